@@ -1,25 +1,39 @@
 """Customer service module for Kurve."""
 
+import asyncio
+import logging
+
 from .agent import (
     root_agent,
     initialize_agents_and_tools,
+    start_initialization,
+    wait_until_ready,
+    health,
     cleanup,
     register_shutdown_handlers,
 )
+from .config import Config
 
-# Initialize the agent asynchronously
-import asyncio
-
-# Try to initialize async resources
+# Agents and MCP tools are initialized lazily on the first request by
+# default; see Config.startup.init_mode
+_init_mode = Config().startup.init_mode
 try:
-    loop = asyncio.get_event_loop()
-    if loop.is_running():
-        asyncio.create_task(initialize_agents_and_tools())
-    else:
-        loop.run_until_complete(initialize_agents_and_tools())
+    if _init_mode == "background":
+        try:
+            asyncio.get_running_loop()
+            start_initialization()
+        except RuntimeError:
+            pass  # No running loop yet; the first request initializes
+    elif _init_mode == "eager":
+        asyncio.get_event_loop().run_until_complete(initialize_agents_and_tools())
 except Exception as e:
-    import logging
-
     logging.getLogger(__name__).error(f"Failed to initialize agents: {e}")
 
-__all__ = ["root_agent", "cleanup", "register_shutdown_handlers"]
+__all__ = [
+    "root_agent",
+    "initialize_agents_and_tools",
+    "wait_until_ready",
+    "health",
+    "cleanup",
+    "register_shutdown_handlers",
+]
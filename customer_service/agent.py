@@ -1,23 +1,48 @@
 # define the MCP tools
 
 import asyncio
+import atexit
 import os
-from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset
+import sys
+from google.adk.tools import BaseTool
 from google.adk.tools.agent_tool import AgentTool
 from mcp import StdioServerParameters
 from google.adk.tools.mcp_tool.mcp_tool import MCPTool
-from typing import Tuple, List
+import time
+from typing import Any, AsyncGenerator, Dict, Optional, Tuple, List
 from contextlib import AsyncExitStack
 import logging
 from google.adk.agents import Agent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from customer_service.config import Config, MCPServerSettings
 from customer_service.prompts import GLOBAL_INSTRUCTION, INSTRUCTION
-from customer_service.shared_libraries.callbacks import before_agent
+from customer_service.shared_libraries.callbacks import (
+    CUSTOMER_ID,
+    before_agent,
+    before_tool,
+    record_delegation,
+    route_intent,
+    stop_agent_timer,
+)
+from customer_service.shared_libraries.customer_repository import (
+    customer_repository,
+)
+from customer_service.shared_libraries.mcp_pool import MCPConnectionPool
+from customer_service.shared_libraries.metrics import meter_tools, metrics
+from customer_service.shared_libraries.prefetch import session_prefetcher
+from customer_service.shared_libraries.profile_serializer import profile_serializer
+from customer_service.shared_libraries.rate_limiter import RateLimitedGemini
+from customer_service.shared_libraries.response_cache import response_cache
+from customer_service.shared_libraries.tool_cassette import ToolCassette
 from customer_service.sub_agents import (
     order_agent,
     product_agent,
     initialize_order_tools,
     initialize_product_tools,
+    shutdown_product_tools,
 )
+from customer_service.sub_agents.product_agent import catalog_cache
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -25,22 +50,105 @@ logger = logging.getLogger(__name__)
 # Global exit stack for resource management
 _exit_stack = None
 _mcp_tools = None
+_mcp_pool = None
+
+# Cassette of recorded MCP tool calls, see load_tools
+_cassette: Optional[ToolCassette] = None
+
+# The stand-in MCP server is started from the repository root
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Initialization state, see initialize_agents_and_tools
+_init_task: Optional[asyncio.Task] = None
+_init_failed_at: Optional[float] = None
+
+
+class LazyInitAgent(Agent):
+    """
+    Agent that waits for agent and MCP tool initialization before running.
+
+    Importing the package no longer connects to the MCP server; the first
+    request starts initialization (unless it is already running) and every
+    request waits for it to finish.
+    """
+
+    async def run_async(
+        self, parent_context: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        await wait_until_ready()
+        async for event in super().run_async(parent_context):
+            yield event
+
+    async def run_live(
+        self, parent_context: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        await wait_until_ready()
+        async for event in super().run_live(parent_context):
+            yield event
+
 
 # Create the agent instance at module level
-root_agent = Agent(
-    model="gemini-2.0-flash",
+root_agent = LazyInitAgent(
+    model=RateLimitedGemini(model="gemini-2.0-flash"),
     name="shopify_agent",
     global_instruction=GLOBAL_INSTRUCTION,
     sub_agents=[],  # Will be populated during initialization
     instruction=INSTRUCTION,
+    before_model_callback=route_intent,
+    after_model_callback=record_delegation,
     before_agent_callback=before_agent,
+    after_agent_callback=stop_agent_timer,
+    before_tool_callback=before_tool,
     tools=[],
 )
 
+def shopify_server_parameters(settings: MCPServerSettings) -> StdioServerParameters:
+    """
+    Build the command that starts a Shopify MCP server process.
+
+    Args:
+        settings: The MCP server settings
+
+    Returns:
+        Parameters for the Node Shopify server, or for the Python stand-in
+        when `settings.backend` is "stub".
+    """
+    if settings.backend == "stub":
+        return StdioServerParameters(
+            command=sys.executable,
+            args=["-m", "loadtest.mcp_server", *settings.stub_args],
+            cwd=_REPO_ROOT,
+        )
+
+    # Get credentials from environment variables
+    shopify_access_token = os.environ.get("SHOPIFY_ACCESS_TOKEN")
+    myshopify_domain = os.environ.get(
+        "MYSHOPIFY_DOMAIN", "thesatinstory-in.myshopify.com"
+    )
+
+    if not shopify_access_token:
+        logger.error("SHOPIFY_ACCESS_TOKEN environment variable not set")
+        raise ValueError("SHOPIFY_ACCESS_TOKEN environment variable must be set")
+
+    return StdioServerParameters(
+        command="node",
+        args=[settings.node_script],
+        env={
+            "SHOPIFY_ACCESS_TOKEN": shopify_access_token,
+            "MYSHOPIFY_DOMAIN": myshopify_domain,
+        },
+    )
+
+
 async def get_shopify_tools() -> Tuple[List[MCPTool], AsyncExitStack]:
     """
     Get MCP tools from the Shopify server.
 
+    Tool calls are dispatched through a pool of MCP server subprocesses sized
+    by `Config.mcp_pool`, so concurrent conversations do not queue behind a
+    single stdio pipe. `Config.mcp_server` selects the Node Shopify server or
+    the Python stand-in in loadtest.mcp_server.
+
     Available tools include:
     - Product Management: findProducts, listProductsInCollection, getProductsByIds, getVariantsByIds
     - Customer Management: listCustomers, addCustomerTags
@@ -52,37 +160,31 @@ async def get_shopify_tools() -> Tuple[List[MCPTool], AsyncExitStack]:
     - Debugging Tools: debugGetVariantMetafield
     - Developer Tools: introspect_admin_schema, search_dev_docs
     """
-    global _exit_stack, _mcp_tools
+    global _exit_stack, _mcp_tools, _mcp_pool
 
     if _mcp_tools is not None:
         return _mcp_tools, _exit_stack
 
-    # Get credentials from environment variables
-    shopify_access_token = os.environ.get("SHOPIFY_ACCESS_TOKEN")
-    myshopify_domain = os.environ.get(
-        "MYSHOPIFY_DOMAIN", "thesatinstory-in.myshopify.com"
+    server_parameters = shopify_server_parameters(Config().mcp_server)
+    pool_settings = Config().mcp_pool
+    logger.info(
+        "Attempting to connect to Shopify MCP server pool of %i...",
+        pool_settings.pool_size,
     )
-
-    if not shopify_access_token:
-        logger.error("SHOPIFY_ACCESS_TOKEN environment variable not set")
-        raise ValueError("SHOPIFY_ACCESS_TOKEN environment variable must be set")
-
-    logger.info("Attempting to connect to Shopify MCP server...")
     try:
-        _exit_stack = AsyncExitStack()
-        tools, exit_stack = await MCPToolset.from_server(
-            connection_params=StdioServerParameters(
-                command="node",
-                args=[
-                    "/Users/tanush/code/shopify-mcp-server/build/index.js"
-                ],
-                env={
-                    "SHOPIFY_ACCESS_TOKEN": shopify_access_token,
-                    "MYSHOPIFY_DOMAIN": myshopify_domain,
-                },
-            )
+        pool = MCPConnectionPool(
+            connection_params=server_parameters,
+            settings=pool_settings,
         )
+        exit_stack = AsyncExitStack()
+        exit_stack.push_async_callback(pool.close)
+        try:
+            tools = await pool.start()
+        except Exception:
+            await exit_stack.aclose()
+            raise
         _exit_stack = exit_stack
+        _mcp_pool = pool
         _mcp_tools = tools
 
         logger.info(f"Connected to Shopify MCP server, found {len(tools)} tools")
@@ -92,31 +194,234 @@ async def get_shopify_tools() -> Tuple[List[MCPTool], AsyncExitStack]:
         raise
 
 
-async def initialize_agents_and_tools():
-    """Initialize all agents and their tools."""
-    global root_agent
+async def load_tools() -> List[BaseTool]:
+    """
+    Get the MCP tools, recorded or replayed as `Config.tool_cassette` says.
+
+    Returns:
+        The MCP tools; in replay mode, stand-ins answering from the cassette
+        without connecting to the MCP server.
+    """
+    global _cassette
+
+    settings = Config().tool_cassette
+    if settings.mode == "replay":
+        _cassette = ToolCassette.load(settings.path)
+        logger.info("Replaying MCP tool calls from %s", settings.path)
+        return _cassette.replay_tools()
 
-    # Get all MCP tools
-    tools, exit_stack = await get_shopify_tools()
+    tools, _ = await get_shopify_tools()
+    if settings.mode == "record":
+        _cassette = ToolCassette(settings.path)
+        atexit.register(_cassette.save)
+        logger.info("Recording MCP tool calls to %s", settings.path)
+        return _cassette.recording_tools(tools)
+    return tools
+
+
+async def load_customer_profiles(tools: List[MCPTool]) -> None:
+    """
+    Bind the customer repository to the MCP tools and preload profiles.
+
+    The configured customer and any IDs in `Config.customers.preload_ids`
+    are loaded up front so the first session finds its profile cached.
+
+    Args:
+        tools: The MCP tools from the Shopify server
+    """
+    tools_by_name = {tool.name: tool for tool in tools}
+    if "listCustomers" not in tools_by_name or "findOrders" not in tools_by_name:
+        logger.warning("listCustomers/findOrders unavailable; using static profiles")
+        return
+
+    customer_repository.bind(
+        list_customers=lambda args: tools_by_name["listCustomers"].run_async(
+            args=args, tool_context=None
+        ),
+        find_orders=lambda args: tools_by_name["findOrders"].run_async(
+            args=args, tool_context=None
+        ),
+    )
+    customer_ids = [CUSTOMER_ID, *customer_repository.settings.preload_ids]
+    loaded = await customer_repository.preload(customer_ids)
+    logger.info(f"Preloaded {loaded} of {len(customer_ids)} customer profiles")
+
+
+def register_cache_metrics() -> None:
+    """Report the hit and miss counts of the in-process caches."""
+    metrics.register_cache(
+        "response",
+        lambda: (
+            response_cache.hits + response_cache.similar_hits,
+            response_cache.misses,
+        ),
+    )
+    for name, cache in (
+        ("catalog", catalog_cache),
+        ("customer", customer_repository),
+        ("profile", profile_serializer),
+        ("prefetch", session_prefetcher),
+    ):
+        metrics.register_cache(name, lambda cache=cache: (cache.hits, cache.misses))
+
+
+async def _initialize(tools: Optional[List[BaseTool]] = None) -> None:
+    """Connect to the MCP server and attach tools and sub-agents."""
+    # Get all MCP tools, unless a stand-in tool set was supplied
+    if tools is None:
+        tools = await load_tools()
+    tools = meter_tools(tools)
+    register_cache_metrics()
+    metrics.start()
 
     # Initialize specialized agents with their tools
     await initialize_order_tools(tools)
     await initialize_product_tools(tools)
+    await load_customer_profiles(tools)
 
     # Add specialized agents to sub_agents list for automatic delegation
     root_agent.sub_agents = [order_agent, product_agent]
+    # ADK links parents only at construction; without this the sub-agents
+    # cannot transfer back to the root agent
+    for sub_agent in root_agent.sub_agents:
+        sub_agent.parent_agent = root_agent
     logger.info(
         f"Configured {len(root_agent.sub_agents)} sub-agents for automatic delegation"
     )
 
 
+def _init_failed(task: asyncio.Task) -> bool:
+    return task.done() and (task.cancelled() or task.exception() is not None)
+
+
+def start_initialization(tools: Optional[List[BaseTool]] = None) -> asyncio.Task:
+    """
+    Start initializing agents and tools in the background.
+
+    Returns the running or finished initialization task; a new attempt is
+    only started if none was made yet or the last one failed. Must be called
+    from the event loop that will serve requests, since the MCP connections
+    belong to it.
+
+    Args:
+        tools: Tools to attach instead of connecting to the Shopify MCP
+            server, e.g. stubs for load tests
+
+    Returns:
+        The initialization task, which doubles as the readiness future.
+    """
+    global _init_task, _init_failed_at
+    if _init_task is None or _init_failed(_init_task):
+        _init_failed_at = None
+        _init_task = asyncio.create_task(
+            _initialize(tools), name="initialize-agents"
+        )
+
+        def record_failure(task: asyncio.Task) -> None:
+            global _init_failed_at
+            if _init_failed(task):
+                _init_failed_at = time.monotonic()
+
+        _init_task.add_done_callback(record_failure)
+    return _init_task
+
+
+async def initialize_agents_and_tools(tools: Optional[List[BaseTool]] = None):
+    """
+    Initialize all agents and their tools.
+
+    Idempotent and safe to call concurrently: every caller awaits the same
+    initialization, and a failed initialization is retried by the next call.
+
+    Args:
+        tools: Tools to attach instead of connecting to the Shopify MCP
+            server, e.g. stubs for load tests
+    """
+    await asyncio.shield(start_initialization(tools))
+
+
+async def wait_until_ready() -> bool:
+    """
+    Wait for initialization, starting it if needed.
+
+    A failed initialization is logged rather than raised so the agent can
+    still answer without tools; it is retried at most once per
+    `Config.startup.retry_interval_secs`.
+
+    Returns:
+        Whether agents and tools are initialized.
+    """
+    if _init_task is not None and _init_failed(_init_task):
+        retry_interval = Config().startup.retry_interval_secs
+        if time.monotonic() - (_init_failed_at or 0.0) < retry_interval:
+            return False
+    try:
+        await initialize_agents_and_tools()
+        return True
+    except Exception as e:  # pylint: disable=broad-except
+        logger.error(f"Failed to initialize agents: {e}")
+        return False
+
+
+def mcp_pool() -> Optional[MCPConnectionPool]:
+    """The MCP connection pool, once connected to the Shopify MCP server."""
+    return _mcp_pool
+
+
+def health() -> Dict[str, Any]:
+    """
+    Report readiness of the agents and MCP tools.
+
+    Returns:
+        A dictionary with the initialization "status" (not_started,
+        initializing, ready or failed), a "ready" flag, the last "error", the
+        MCP tool count and pool state, and the tools attached to each
+        sub-agent.
+    """
+    if _init_task is None:
+        status, error = "not_started", None
+    elif not _init_task.done():
+        status, error = "initializing", None
+    elif _init_failed(_init_task):
+        status = "failed"
+        error = "cancelled" if _init_task.cancelled() else str(_init_task.exception())
+    else:
+        status, error = "ready", None
+
+    return {
+        "status": status,
+        "ready": status == "ready",
+        "error": error,
+        "mcp": {
+            "connected": _mcp_tools is not None,
+            "tools": len(_mcp_tools or []),
+            "pool": _mcp_pool.stats() if _mcp_pool is not None else None,
+        },
+        "sub_agents": {
+            agent.name: {
+                "attached": agent in root_agent.sub_agents,
+                "tools": [getattr(tool, "name", str(tool)) for tool in agent.tools],
+            }
+            for agent in (order_agent, product_agent)
+        },
+    }
+
+
 async def cleanup():
     """Cleanup MCP resources."""
-    global _exit_stack
+    global _exit_stack, _mcp_tools, _mcp_pool, _init_task
+    if _init_task is not None and not _init_task.done():
+        _init_task.cancel()
+    _init_task = None
+    await shutdown_product_tools()
+    if _cassette is not None:
+        _cassette.save()
     if _exit_stack:
         logger.info("Cleaning up Shopify MCP resources")
         await _exit_stack.aclose()
         _exit_stack = None
+        _mcp_tools = None
+        _mcp_pool = None
 
 
 def register_shutdown_handlers():
@@ -143,6 +448,9 @@ def register_shutdown_handlers():
 __all__ = [
     "root_agent",
     "initialize_agents_and_tools",
+    "start_initialization",
+    "wait_until_ready",
+    "health",
     "cleanup",
     "register_shutdown_handlers",
 ]
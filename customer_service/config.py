@@ -21,7 +21,8 @@ using Pydantic for validation and environment variable loading.
 
 import logging
 import os
-from typing import Optional
+import shlex
+from typing import Dict, List, Literal, Optional, Tuple
 
 from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -48,6 +49,720 @@ class AgentModel(BaseModel):
     )
 
 
+def _default_mcp_pool_size() -> int:
+    """Size the MCP pool to the available cores, capped to keep Shopify happy."""
+    return max(1, min(os.cpu_count() or 1, 8))
+
+
+class MCPPoolSettings(BaseModel):
+    """
+    Shopify MCP server connection pool settings.
+
+    Attributes:
+        pool_size: Number of MCP server subprocesses serving tool calls
+        warm_spares: Number of started, idle subprocesses kept ready to
+            replace a dead member
+        call_timeout_secs: Timeout applied to every MCP tool call
+        health_check_interval_secs: Seconds between health-check pings
+        health_check_timeout_secs: Timeout for a single health-check ping
+        start_timeout_secs: Time allowed for a new MCP server subprocess to
+            start and initialize its session
+    """
+
+    pool_size: int = Field(
+        default_factory=_default_mcp_pool_size,
+        ge=1,
+        description="Number of MCP server subprocesses serving tool calls",
+    )
+    warm_spares: int = Field(
+        default=1, ge=0, description="Idle MCP subprocesses kept ready"
+    )
+    call_timeout_secs: float = Field(
+        default=30.0, gt=0, description="Timeout for a single MCP tool call"
+    )
+    health_check_interval_secs: float = Field(
+        default=15.0, gt=0, description="Seconds between health-check pings"
+    )
+    health_check_timeout_secs: float = Field(
+        default=5.0, gt=0, description="Timeout for a single health-check ping"
+    )
+    start_timeout_secs: float = Field(
+        default=30.0, gt=0, description="Timeout for starting an MCP subprocess"
+    )
+
+
+def _default_mcp_server_script() -> str:
+    """Locate the Node server's build, by default in this repository."""
+    return os.environ.get(
+        "SHOPIFY_MCP_SERVER_PATH",
+        os.path.normpath(
+            os.path.join(
+                os.path.dirname(os.path.abspath(__file__)),
+                "../shopify-mcp-server/build/index.js",
+            )
+        ),
+    )
+
+
+class MCPServerSettings(BaseModel):
+    """
+    Shopify MCP server process settings.
+
+    Attributes:
+        backend: "shopify" runs the Node Shopify MCP server against the live
+            store; "stub" runs the Python stand-in in loadtest.mcp_server over
+            generated data, with no store or access token needed
+        node_script: Path of the Node server's build/index.js
+        stub_args: Command line arguments for the stand-in, e.g.
+            ["--products", "100000", "--latency-ms", "80", "--throttle"]
+    """
+
+    backend: Literal["shopify", "stub"] = Field(
+        default_factory=lambda: os.environ.get("SHOPIFY_MCP_BACKEND", "shopify"),
+        description="Which MCP server the agent connects to",
+    )
+    node_script: str = Field(
+        default_factory=_default_mcp_server_script,
+        description="Path of the Node Shopify MCP server build",
+    )
+    stub_args: List[str] = Field(
+        default_factory=lambda: shlex.split(
+            os.environ.get("SHOPIFY_MCP_STUB_ARGS", "")
+        ),
+        description="Command line arguments for the Python stand-in server",
+    )
+
+
+def _default_cassette_path() -> str:
+    return os.environ.get(
+        "TOOL_CASSETTE_PATH",
+        os.path.normpath(
+            os.path.join(
+                os.path.dirname(os.path.abspath(__file__)),
+                "../eval/cassettes/shopify_tools.json",
+            )
+        ),
+    )
+
+
+class ToolCassetteSettings(BaseModel):
+    """
+    Record/replay of MCP tool calls, used to run the evals offline.
+
+    Attributes:
+        mode: "off" calls the MCP server as usual; "record" also saves every
+            call and response to the cassette; "replay" answers calls from
+            the cassette without starting the MCP server
+        path: Cassette file; a .gz suffix compresses it
+    """
+
+    mode: Literal["off", "record", "replay"] = Field(
+        default_factory=lambda: os.environ.get("TOOL_CASSETTE_MODE", "off"),
+        description="Whether MCP tool calls are recorded or replayed",
+    )
+    path: str = Field(
+        default_factory=_default_cassette_path,
+        description="Cassette file of recorded MCP tool calls",
+    )
+
+
+def _default_catalog_ttls() -> Dict[str, float]:
+    """Per-tool TTLs; availability-bearing lookups expire fastest."""
+    return {
+        "findProducts": 120.0,
+        "listProductsInCollection": 300.0,
+        "getProductsByIds": 120.0,
+        "getVariantsByIds": 60.0,
+        "listCollections": 900.0,
+    }
+
+
+class ToolCacheSettings(BaseModel):
+    """
+    Read-through cache settings for catalog MCP tools.
+
+    Attributes:
+        enabled: Whether catalog tool results are cached
+        max_bytes: Upper bound on the serialized size of cached results
+        default_ttl_secs: TTL for tools without an entry in ttl_secs
+        ttl_secs: Per-tool TTLs in seconds
+    """
+
+    enabled: bool = Field(default=True, description="Cache catalog tool results")
+    max_bytes: int = Field(
+        default=32 * 1024 * 1024,
+        gt=0,
+        description="Upper bound on the serialized size of cached results",
+    )
+    default_ttl_secs: float = Field(
+        default=60.0, gt=0, description="TTL for tools without a specific TTL"
+    )
+    ttl_secs: Dict[str, float] = Field(
+        default_factory=_default_catalog_ttls, description="Per-tool TTLs"
+    )
+
+
+class CatalogIndexSettings(BaseModel):
+    """
+    In-process catalog search index settings.
+
+    Attributes:
+        enabled: Whether the catalog index and search_catalog tool are used
+        page_size: Products requested per findProducts page while syncing
+        refresh_interval_secs: Seconds between incremental refreshes
+        full_rebuild_interval_secs: Seconds between full snapshot rebuilds,
+            which also drop deleted products
+    """
+
+    enabled: bool = Field(default=True, description="Use the catalog index")
+    page_size: int = Field(
+        default=250, ge=1, le=250, description="Products per findProducts page"
+    )
+    refresh_interval_secs: float = Field(
+        default=300.0, gt=0, description="Seconds between incremental refreshes"
+    )
+    full_rebuild_interval_secs: float = Field(
+        default=3600.0, gt=0, description="Seconds between full rebuilds"
+    )
+
+
+class OrderIndexSettings(BaseModel):
+    """
+    Order number index settings.
+
+    Attributes:
+        page_size: Orders requested per findOrders page while filling the index
+        max_customers: Number of customers whose orders are kept in memory
+        refresh_after_secs: Age after which a miss re-checks the newest orders
+    """
+
+    page_size: int = Field(
+        default=50, ge=1, le=250, description="Orders per findOrders page"
+    )
+    max_customers: int = Field(
+        default=10000, ge=1, description="Customers kept in the order index"
+    )
+    refresh_after_secs: float = Field(
+        default=60.0, ge=0, description="Age after which misses re-check new orders"
+    )
+
+
+class OrderStatusSettings(BaseModel):
+    """
+    Settings for the get_order_status tool.
+
+    Attributes:
+        max_orders: Orders reported when the customer names none: the
+            newest one plus other open orders among the newest max_orders
+        max_items: Line items listed per order
+    """
+
+    max_orders: int = Field(
+        default=3, ge=1, le=10, description="Orders reported by default"
+    )
+    max_items: int = Field(default=5, ge=1, description="Line items listed")
+
+
+class CartSettings(BaseModel):
+    """
+    Settings for the carts behind access_cart_information and modify_cart.
+
+    Attributes:
+        path: SQLite database carts are stored in, from CART_DB_PATH; None
+            keeps them in memory only
+        max_cached_carts: Carts kept in memory in front of the database
+        max_quantity: Largest quantity of one item in a cart
+        idempotency_ttl_secs: How long a modification's idempotency key is
+            remembered
+        sync_debounce_secs: Quiet time after a cart's last change before it
+            is synced to a Shopify draft order
+        sync_max_delay_secs: Longest a changed cart waits for its sync while
+            it keeps changing
+        sync_retry_secs: Wait before retrying a failed sync, doubled after
+            each further failure
+        sync_max_retry_secs: Longest wait before retrying a failed sync
+    """
+
+    path: Optional[str] = Field(
+        default_factory=lambda: os.environ.get("CART_DB_PATH", "carts.db") or None,
+        description="SQLite database of carts",
+    )
+    max_cached_carts: int = Field(
+        default=10000, ge=1, description="Carts kept in memory"
+    )
+    max_quantity: int = Field(default=99, ge=1, description="Largest item quantity")
+    idempotency_ttl_secs: float = Field(
+        default=86400.0, gt=0, description="How long idempotency keys are kept"
+    )
+    sync_debounce_secs: float = Field(
+        default=3.0, ge=0, description="Quiet time before a draft order sync"
+    )
+    sync_max_delay_secs: float = Field(
+        default=30.0, ge=0, description="Longest delay of a draft order sync"
+    )
+    sync_retry_secs: float = Field(
+        default=5.0, gt=0, description="First retry delay of a failed sync"
+    )
+    sync_max_retry_secs: float = Field(
+        default=300.0, gt=0, description="Longest retry delay of a failed sync"
+    )
+
+
+class RateLimitSettings(BaseModel):
+    """
+    Model request rate limit settings.
+
+    Attributes:
+        default_rpm: Requests allowed per window for models without a quota
+        window_secs: Length of the quota window in seconds
+        model_rpm: Per-model request quotas
+        burst: Requests allowed back to back; defaults to the model's quota
+    """
+
+    default_rpm: int = Field(
+        default=10, ge=1, description="Requests per window for unlisted models"
+    )
+    window_secs: float = Field(
+        default=60.0, gt=0, description="Length of the quota window"
+    )
+    model_rpm: Dict[str, int] = Field(
+        default_factory=dict, description="Per-model request quotas"
+    )
+    burst: Optional[int] = Field(
+        default=None, ge=1, description="Requests allowed back to back"
+    )
+
+
+def _default_coalesced_tools() -> Dict[str, Tuple[str, str]]:
+    """ID-list tools as (ID argument, record list key) pairs."""
+    return {
+        "getProductsByIds": ("productIds", "products"),
+        "getVariantsByIds": ("variantIds", "variants"),
+    }
+
+
+class CoalescingSettings(BaseModel):
+    """
+    Request coalescing settings for ID-list MCP tools.
+
+    Attributes:
+        enabled: Whether concurrent ID lookups are batched
+        window_ms: How long to collect IDs before sending a batch
+        max_batch_size: Maximum number of IDs sent in one call
+        tools: Coalesced tools mapped to their ID argument and the key of
+            the record list in their result
+    """
+
+    enabled: bool = Field(default=True, description="Batch concurrent ID lookups")
+    window_ms: float = Field(
+        default=5.0, ge=0, description="Milliseconds to collect IDs per batch"
+    )
+    max_batch_size: int = Field(
+        default=250, ge=1, description="Maximum IDs sent in one call"
+    )
+    tools: Dict[str, Tuple[str, str]] = Field(
+        default_factory=_default_coalesced_tools,
+        description="Coalesced tools with their ID argument and record key",
+    )
+
+
+class CustomerRepositorySettings(BaseModel):
+    """
+    Customer profile repository settings.
+
+    Attributes:
+        max_customers: Number of customer profiles kept in memory
+        ttl_secs: Seconds a loaded profile is served before it is reloaded
+        negative_ttl_secs: Seconds an unknown customer ID is remembered
+        recent_orders: Number of recent orders loaded into purchase history
+        batch_size: Customers requested per listCustomers call when preloading
+        load_concurrency: Maximum concurrent findOrders calls while loading
+        preload_ids: Customer IDs loaded when the agents start
+        store_name: Store name reported as the customer's preferred store
+    """
+
+    max_customers: int = Field(
+        default=10000, ge=1, description="Customer profiles kept in memory"
+    )
+    ttl_secs: float = Field(
+        default=300.0, gt=0, description="Seconds a loaded profile is served"
+    )
+    negative_ttl_secs: float = Field(
+        default=30.0, ge=0, description="Seconds an unknown customer is remembered"
+    )
+    recent_orders: int = Field(
+        default=10, ge=1, le=250, description="Orders loaded per customer"
+    )
+    batch_size: int = Field(
+        default=50, ge=1, le=250, description="Customers per listCustomers call"
+    )
+    load_concurrency: int = Field(
+        default=8, ge=1, description="Concurrent findOrders calls while loading"
+    )
+    preload_ids: List[str] = Field(
+        default_factory=list, description="Customer IDs loaded at start-up"
+    )
+    store_name: str = Field(
+        default="Kurve Online Store", description="Preferred store name"
+    )
+
+
+def _default_profile_fields() -> List[str]:
+    """Customer fields included in prompts unless configured otherwise."""
+    return [
+        "customer_id",
+        "name",
+        "email",
+        "phone_number",
+        "customer_start_date",
+        "loyalty_points",
+        "billing_address",
+        "communication_preferences",
+        "purchase_history",
+    ]
+
+
+class ProfilePromptSettings(BaseModel):
+    """
+    Settings for the compact customer profile rendered into prompts.
+
+    Attributes:
+        fields: Customer fields included, in order; "name" joins the first
+            and last name and "purchase_history" is summarized
+        recent_purchases: Number of most recent purchases listed in full
+        max_items_per_purchase: Line items listed per recent purchase
+        cache_size: Number of rendered profiles kept in memory
+        chars_per_token: Characters per token used for the token estimate
+    """
+
+    fields: List[str] = Field(
+        default_factory=_default_profile_fields,
+        description="Customer fields included in prompts",
+    )
+    recent_purchases: int = Field(
+        default=3, ge=0, description="Most recent purchases listed in full"
+    )
+    max_items_per_purchase: int = Field(
+        default=5, ge=1, description="Line items listed per recent purchase"
+    )
+    cache_size: int = Field(
+        default=10000, ge=1, description="Rendered profiles kept in memory"
+    )
+    chars_per_token: float = Field(
+        default=4.0, gt=0, description="Characters per token for estimates"
+    )
+
+
+class StartupSettings(BaseModel):
+    """
+    Agent and MCP tool initialization settings.
+
+    Attributes:
+        init_mode: "lazy" initializes on the first request, "background"
+            starts initializing at import when an event loop is running (and
+            otherwise falls back to lazy), "eager" blocks the import until
+            initialization finishes
+        retry_interval_secs: Minimum seconds between retries after a failed
+            initialization
+    """
+
+    init_mode: Literal["lazy", "background", "eager"] = Field(
+        default="lazy", description="When agents and MCP tools are initialized"
+    )
+    retry_interval_secs: float = Field(
+        default=30.0, ge=0, description="Seconds between initialization retries"
+    )
+
+
+class PrefetchSettings(BaseModel):
+    """
+    Speculative prefetch settings for the start of a session.
+
+    Attributes:
+        enabled: Whether the customer's recent orders are prefetched
+        recent_orders: Orders requested by the prefetched findOrders call;
+            matches the call the order agent is instructed to make
+        ttl_secs: Seconds a prefetched result may be served
+        max_sessions: Number of sessions whose prefetches are tracked
+    """
+
+    enabled: bool = Field(default=True, description="Prefetch recent orders")
+    recent_orders: int = Field(
+        default=10, ge=1, le=250, description="Orders in the prefetched query"
+    )
+    ttl_secs: float = Field(
+        default=120.0, gt=0, description="Seconds a prefetched result is served"
+    )
+    max_sessions: int = Field(
+        default=10000, ge=1, description="Sessions whose prefetches are tracked"
+    )
+
+
+class ResponseCacheSettings(BaseModel):
+    """
+    Settings for the cache of answers to repeated policy and FAQ questions.
+
+    Attributes:
+        enabled: Whether model answers are cached
+        ttl_secs: Seconds a cached answer is served
+        max_entries: Number of answers kept in memory
+        similarity_threshold: Cosine similarity between a question and a
+            cached one above which the cached answer is served
+        min_similar_terms: Distinct content words a question needs before
+            a similar, rather than identical, question may answer it
+        max_query_chars: Longer questions are neither looked up nor cached
+    """
+
+    enabled: bool = Field(default=True, description="Cache FAQ answers")
+    ttl_secs: float = Field(
+        default=3600.0, gt=0, description="Seconds a cached answer is served"
+    )
+    max_entries: int = Field(
+        default=5000, ge=1, description="Answers kept in memory"
+    )
+    similarity_threshold: float = Field(
+        default=0.85, gt=0, le=1, description="Similarity for a near match"
+    )
+    min_similar_terms: int = Field(
+        default=2, ge=1, description="Content words needed for a near match"
+    )
+    max_query_chars: int = Field(
+        default=200, ge=1, description="Longest question that is cached"
+    )
+
+
+def _default_case_insensitive_fields() -> Dict[str, Literal["lower", "upper"]]:
+    """Tool argument fields normalized unless configured otherwise."""
+    return {
+        "email": "lower",
+        "discount_type": "lower",
+        "code": "upper",
+        "sortKey": "upper",
+        "topic": "upper",
+    }
+
+
+class ArgumentNormalizationSettings(BaseModel):
+    """
+    Normalization of case-insensitive tool arguments before tool calls.
+
+    Attributes:
+        enabled: Whether tool arguments are normalized
+        case_insensitive_fields: Argument names, at any depth, mapped to the
+            case their string values are normalized to; fields with a
+            declared enum are always matched to it
+    """
+
+    enabled: bool = Field(default=True, description="Normalize tool arguments")
+    case_insensitive_fields: Dict[str, Literal["lower", "upper"]] = Field(
+        default_factory=_default_case_insensitive_fields,
+        description="Case-insensitive argument names and their case",
+    )
+
+
+class IntentRouterSettings(BaseModel):
+    """
+    Routing of customer messages to sub-agents without a root model call.
+
+    Attributes:
+        enabled: Whether confident predictions are dispatched directly
+        min_confidence: Classifier probability from which a message is
+            dispatched; keyword rules always are
+        audit_rate: Share of confident messages still sent to the root model
+            so routing accuracy is measured against its delegation
+        epochs: Gradient descent passes when training the classifier
+        learning_rate: Step size when training the classifier
+    """
+
+    enabled: bool = Field(default=True, description="Route messages directly")
+    min_confidence: float = Field(
+        default=0.8, gt=0, le=1, description="Probability to dispatch from"
+    )
+    audit_rate: float = Field(
+        default=0.05, ge=0, le=1, description="Share of messages audited"
+    )
+    epochs: int = Field(default=150, ge=1, description="Training passes")
+    learning_rate: float = Field(
+        default=1.0, gt=0, description="Training step size"
+    )
+
+
+class OutputProjectionSettings(BaseModel):
+    """
+    Projection of MCP tool results onto the fields the agents use.
+
+    Attributes:
+        enabled: Whether tool results are projected before the model sees
+            them
+        max_list_items: Longer lists are truncated, with the full length
+            recorded in a "<field>Total" key
+        max_text_chars: Longer text values, e.g. descriptions, are shortened
+    """
+
+    enabled: bool = Field(default=True, description="Project tool results")
+    max_list_items: int = Field(
+        default=20, ge=1, description="Items kept per list in tool results"
+    )
+    max_text_chars: int = Field(
+        default=300, ge=1, description="Characters kept per text value"
+    )
+
+
+class HistoryCompactionSettings(BaseModel):
+    """
+    Compaction of the conversation history sent with each model call.
+
+    Attributes:
+        enabled: Whether request histories are compacted
+        keep_turns: Most recent turns, including the current one, whose
+            tool results are kept verbatim
+        max_tokens: Estimated token budget for a request's contents; older
+            tool results are summarized, then the oldest turns dropped,
+            until it fits
+        max_result_chars: Tool results up to this long are never summarized
+    """
+
+    enabled: bool = Field(default=True, description="Compact request histories")
+    keep_turns: int = Field(
+        default=3, ge=1, description="Recent turns whose tool results are kept"
+    )
+    max_tokens: int = Field(
+        default=8000, ge=1, description="Token budget for request contents"
+    )
+    max_result_chars: int = Field(
+        default=400, ge=0, description="Longest tool result kept in old turns"
+    )
+
+
+def _env_port(name: str) -> Optional[int]:
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+class MetricsSettings(BaseModel):
+    """
+    Where latency, error and cache metrics are exposed.
+
+    Attributes:
+        host: Interface the Prometheus endpoint listens on
+        port: Port of the Prometheus endpoint at /metrics; None disables it
+        dump_path: File the metrics are written to periodically, with
+            "{pid}" replaced by the process ID; None disables the dump
+        dump_interval_secs: Seconds between dumps
+        chars_per_token: Characters per token for the token estimates
+    """
+
+    host: str = Field(
+        default="127.0.0.1", description="Interface of the metrics endpoint"
+    )
+    port: Optional[int] = Field(
+        default_factory=lambda: _env_port("METRICS_PORT"),
+        ge=0,
+        description="Port of the metrics endpoint",
+    )
+    dump_path: Optional[str] = Field(
+        default_factory=lambda: os.environ.get("METRICS_DUMP_PATH") or None,
+        description="File the metrics are dumped to",
+    )
+    dump_interval_secs: float = Field(
+        default=15.0, gt=0, description="Seconds between metric dumps"
+    )
+    chars_per_token: float = Field(
+        default=4.0, gt=0, description="Characters per token for estimates"
+    )
+
+
+class ServingSettings(BaseModel):
+    """
+    HTTP front-end and admission control settings, per worker process.
+
+    Attributes:
+        host: Interface the server listens on
+        port: Port the server listens on, from SERVER_PORT
+        max_in_flight: Conversation turns run at once
+        max_queued: Turns waiting for a slot before new ones are turned away
+        queue_timeout_secs: Longest a turn waits for a slot before it is
+            turned away
+        max_model_wait_secs: Estimated model rate limiter wait above which
+            new turns are turned away
+        max_mcp_outstanding: Outstanding calls on every live MCP pool member
+            above which new turns are turned away
+        retry_after_secs: Retry-After sent with busy responses
+        identity_header: Request header carrying the authenticated
+            customer's Shopify ID, set by the authenticating proxy in front
+            of the server; sessions are bound to this customer
+        client_state_keys: Session state keys clients may set when creating
+            a session; customer_id always comes from identity_header
+    """
+
+    host: str = Field(default="127.0.0.1", description="Server interface")
+    port: int = Field(
+        default_factory=lambda: _env_port("SERVER_PORT") or 8080,
+        ge=0,
+        description="Server port",
+    )
+    max_in_flight: int = Field(default=32, ge=1, description="Turns run at once")
+    max_queued: int = Field(default=64, ge=0, description="Turns kept waiting")
+    queue_timeout_secs: float = Field(
+        default=5.0, gt=0, description="Longest wait for a slot"
+    )
+    max_model_wait_secs: float = Field(
+        default=10.0, gt=0, description="Model quota wait that sheds turns"
+    )
+    max_mcp_outstanding: int = Field(
+        default=16, ge=1, description="MCP calls per member that shed turns"
+    )
+    retry_after_secs: int = Field(
+        default=2, ge=0, description="Retry-After of busy responses"
+    )
+    identity_header: str = Field(
+        default="X-Customer-Id",
+        min_length=1,
+        description="Header with the authenticated customer ID",
+    )
+    client_state_keys: List[str] = Field(
+        default_factory=list, description="State keys clients may set"
+    )
+
+
+class SessionStoreSettings(BaseModel):
+    """
+    Where conversation sessions are stored.
+
+    Attributes:
+        path: SQLite database of sessions, from SESSION_DB_PATH; None keeps
+            sessions in memory, so they are lost on restart
+        cache_size: Hot sessions kept in memory in front of the database
+        validate_cache: Check a cached session is still current before
+            using it, so several workers can share the database
+        max_pending_events: Events buffered for a session before they are
+            written even though its turn has not finished
+        busy_timeout_secs: Longest a write waits for another worker's
+            transaction
+        synchronous: SQLite's synchronous pragma; NORMAL can lose the last
+            turns on power loss but not on a crash
+    """
+
+    path: Optional[str] = Field(
+        default_factory=lambda: os.environ.get("SESSION_DB_PATH", "sessions.db")
+        or None,
+        description="SQLite database of sessions",
+    )
+    cache_size: int = Field(default=1024, ge=0, description="Hot sessions cached")
+    validate_cache: bool = Field(
+        default=True, description="Whether cached sessions are revalidated"
+    )
+    max_pending_events: int = Field(
+        default=32, ge=1, description="Events buffered per session"
+    )
+    busy_timeout_secs: float = Field(
+        default=5.0, ge=0, description="Longest wait for a write lock"
+    )
+    synchronous: Literal["NORMAL", "FULL"] = Field(
+        default="NORMAL", description="SQLite synchronous pragma"
+    )
+
+
 class Config(BaseSettings):
     """
     Configuration settings for the customer service agent.
@@ -57,6 +772,29 @@ class Config(BaseSettings):
 
     Attributes:
         agent_settings: Settings for the agent model
+        startup: Settings for agent and MCP tool initialization
+        mcp_server: Settings for the Shopify MCP server process
+        mcp_pool: Settings for the Shopify MCP connection pool
+        tool_cassette: Settings for recording and replaying MCP tool calls
+        catalog_cache: Settings for the catalog tool result cache
+        catalog_index: Settings for the in-process catalog search index
+        order_index: Settings for the order number index
+        order_status: Settings for the get_order_status tool
+        cart: Settings for the cart tools and their draft order sync
+        rate_limit: Settings for the model request rate limiter
+        coalescing: Settings for batching concurrent ID lookups
+        customers: Settings for the customer profile repository
+        profile_prompt: Settings for the customer profile rendered into prompts
+        prefetch: Settings for prefetching a session's likely first tool calls
+        response_cache: Settings for caching answers to repeated questions
+        metrics: Settings for exposing latency, error and cache metrics
+        history_compaction: Settings for compacting the history sent to the
+            model
+        output_projection: Settings for trimming tool results for the model
+        argument_normalization: Settings for normalizing tool arguments
+        intent_router: Settings for routing messages to sub-agents directly
+        serving: Settings for the HTTP front-end and admission control
+        session_store: Settings for storing conversation sessions
         app_name: Name of the application
         CLOUD_PROJECT: GCP project ID
         CLOUD_LOCATION: GCP region
@@ -73,6 +811,94 @@ class Config(BaseSettings):
     agent_settings: AgentModel = Field(
         default_factory=AgentModel, description="Settings for the agent model"
     )
+    startup: StartupSettings = Field(
+        default_factory=StartupSettings,
+        description="Settings for agent and MCP tool initialization",
+    )
+    mcp_server: MCPServerSettings = Field(
+        default_factory=MCPServerSettings,
+        description="Settings for the Shopify MCP server process",
+    )
+    mcp_pool: MCPPoolSettings = Field(
+        default_factory=MCPPoolSettings,
+        description="Settings for the Shopify MCP connection pool",
+    )
+    tool_cassette: ToolCassetteSettings = Field(
+        default_factory=ToolCassetteSettings,
+        description="Settings for recording and replaying MCP tool calls",
+    )
+    catalog_cache: ToolCacheSettings = Field(
+        default_factory=ToolCacheSettings,
+        description="Settings for the catalog tool result cache",
+    )
+    catalog_index: CatalogIndexSettings = Field(
+        default_factory=CatalogIndexSettings,
+        description="Settings for the in-process catalog search index",
+    )
+    order_index: OrderIndexSettings = Field(
+        default_factory=OrderIndexSettings,
+        description="Settings for the order number index",
+    )
+    order_status: OrderStatusSettings = Field(
+        default_factory=OrderStatusSettings,
+        description="Settings for the get_order_status tool",
+    )
+    cart: CartSettings = Field(
+        default_factory=CartSettings,
+        description="Settings for the cart tools and their draft order sync",
+    )
+    rate_limit: RateLimitSettings = Field(
+        default_factory=RateLimitSettings,
+        description="Settings for the model request rate limiter",
+    )
+    coalescing: CoalescingSettings = Field(
+        default_factory=CoalescingSettings,
+        description="Settings for batching concurrent ID lookups",
+    )
+    customers: CustomerRepositorySettings = Field(
+        default_factory=CustomerRepositorySettings,
+        description="Settings for the customer profile repository",
+    )
+    profile_prompt: ProfilePromptSettings = Field(
+        default_factory=ProfilePromptSettings,
+        description="Settings for the customer profile rendered into prompts",
+    )
+    prefetch: PrefetchSettings = Field(
+        default_factory=PrefetchSettings,
+        description="Settings for prefetching a session's likely first tool calls",
+    )
+    response_cache: ResponseCacheSettings = Field(
+        default_factory=ResponseCacheSettings,
+        description="Settings for caching answers to repeated questions",
+    )
+    metrics: MetricsSettings = Field(
+        default_factory=MetricsSettings,
+        description="Settings for exposing latency, error and cache metrics",
+    )
+    history_compaction: HistoryCompactionSettings = Field(
+        default_factory=HistoryCompactionSettings,
+        description="Settings for compacting the history sent to the model",
+    )
+    output_projection: OutputProjectionSettings = Field(
+        default_factory=OutputProjectionSettings,
+        description="Settings for trimming tool results for the model",
+    )
+    argument_normalization: ArgumentNormalizationSettings = Field(
+        default_factory=ArgumentNormalizationSettings,
+        description="Settings for normalizing tool arguments",
+    )
+    intent_router: IntentRouterSettings = Field(
+        default_factory=IntentRouterSettings,
+        description="Settings for routing messages to sub-agents directly",
+    )
+    serving: ServingSettings = Field(
+        default_factory=ServingSettings,
+        description="Settings for the HTTP front-end and admission control",
+    )
+    session_store: SessionStoreSettings = Field(
+        default_factory=SessionStoreSettings,
+        description="Settings for storing conversation sessions",
+    )
     app_name: str = Field(
         default="customer_service_app", description="Name of the application"
     )
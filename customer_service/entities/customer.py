@@ -13,9 +13,22 @@
 # limitations under the License.
 """Customer entity module."""
 
-from typing import List, Dict, Optional
+from datetime import date
+from typing import Any, List, Dict, Optional
 from pydantic import BaseModel, Field, ConfigDict
 
+from customer_service.shared_libraries.mcp_results import numeric_id
+
+
+def _amount(value: Any) -> float:
+    """Read a Shopify money value, e.g. {"shopMoney": {"amount": "1399.0"}}."""
+    if isinstance(value, dict):
+        value = value.get("shopMoney", value).get("amount")
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
 
 class Address(BaseModel):
     """
@@ -88,12 +101,12 @@ class Customer(BaseModel):
     phone_number: str
     customer_start_date: str
     years_as_customer: int
-    billing_address: Address
+    billing_address: Optional[Address] = None
     purchase_history: List[Purchase]
     loyalty_points: int
     preferred_store: str
     communication_preferences: CommunicationPreferences
-    garden_profile: GardenProfile
+    garden_profile: Optional[GardenProfile] = None
     scheduled_appointments: Dict = Field(default_factory=dict)
     model_config = ConfigDict(from_attributes=True)
 
@@ -106,6 +119,103 @@ class Customer(BaseModel):
         """
         return self.model_dump_json(indent=4)
 
+    @classmethod
+    def from_shopify(
+        cls,
+        customer: Dict[str, Any],
+        orders: List[Dict[str, Any]],
+        store_name: str,
+        today: Optional[date] = None,
+    ) -> "Customer":
+        """
+        Builds a Customer from Shopify Admin API records.
+
+        Args:
+            customer: A customer record from listCustomers
+            orders: The customer's recent order records from findOrders,
+                with connection wrappers already removed
+            store_name: The store reported as the preferred store
+            today: The date used to compute years as customer
+
+        Returns:
+            The Customer object.
+        """
+        customer_id = numeric_id(customer.get("id") or "")
+        first_name = customer.get("firstName") or ""
+        last_name = customer.get("lastName") or ""
+        address = customer.get("defaultAddress") or {}
+        start_date = (customer.get("createdAt") or "")[:10]
+
+        purchases = []
+        for order in orders:
+            items = [
+                Product(
+                    product_id=numeric_id(
+                        (item.get("product") or {}).get("id") or item.get("sku") or ""
+                    ),
+                    name=item.get("name") or item.get("title") or "",
+                    quantity=int(item.get("quantity") or 1),
+                )
+                for item in order.get("lineItems") or []
+            ]
+            purchases.append(
+                Purchase(
+                    date=(order.get("processedAt") or order.get("createdAt") or "")[
+                        :10
+                    ],
+                    items=items,
+                    total_amount=_amount(
+                        order.get("totalPriceSet") or order.get("totalPrice")
+                    ),
+                )
+            )
+
+        total_spent = _amount(customer.get("amountSpent")) or sum(
+            purchase.total_amount for purchase in purchases
+        )
+        years = 0
+        if start_date:
+            today = today or date.today()
+            started = date.fromisoformat(start_date)
+            years = today.year - started.year - (
+                (today.month, today.day) < (started.month, started.day)
+            )
+
+        email_consent = (customer.get("emailMarketingConsent") or {}).get(
+            "marketingState"
+        )
+        sms_consent = (customer.get("smsMarketingConsent") or {}).get(
+            "marketingState"
+        )
+        return cls(
+            customer_id=customer_id,
+            account_number=f"{first_name[:1]}{last_name[:1]}{customer_id}".upper(),
+            customer_first_name=first_name,
+            customer_last_name=last_name,
+            email=customer.get("email") or "",
+            phone_number=customer.get("phone") or address.get("phone") or "",
+            customer_start_date=start_date,
+            years_as_customer=max(years, 0),
+            billing_address=(
+                Address(
+                    street=address.get("address1") or "",
+                    city=address.get("city") or "",
+                    state=address.get("provinceCode") or address.get("province") or "",
+                    zip=address.get("zip") or "",
+                )
+                if address
+                else None
+            ),
+            purchase_history=purchases,
+            loyalty_points=int(total_spent // 10),
+            preferred_store=store_name,
+            communication_preferences=CommunicationPreferences(
+                email=email_consent == "SUBSCRIBED",
+                sms=sms_consent == "SUBSCRIBED",
+                push_notifications=False,
+            ),
+        )
+
     @staticmethod
     def get_customer(current_customer_id: str) -> Optional["Customer"]:
         """
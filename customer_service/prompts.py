@@ -14,16 +14,17 @@
 
 """Global instruction and instruction for the customer service agent."""
 
-import os
-from .entities.customer import Customer
+from .config import Config
+from .shared_libraries.instruction_provider import GlobalInstructionProvider
 
-# Get customer ID from environment or use default
-DEFAULT_CUSTOMER_ID = "7730071404758"
-CUSTOMER_ID = os.environ.get("CUSTOMER_ID", DEFAULT_CUSTOMER_ID)
+# Static part of the global instruction, identical for every customer
+GLOBAL_INSTRUCTION_PREFIX = """
+The profile of the current customer is:  """
 
-GLOBAL_INSTRUCTION = f"""
-The profile of the current customer is:  {Customer.get_customer(CUSTOMER_ID).to_json()}
-"""
+# Renders the global instruction per session from the session's customer
+GLOBAL_INSTRUCTION = GlobalInstructionProvider(
+    GLOBAL_INSTRUCTION_PREFIX, cache_size=Config().profile_prompt.cache_size
+)
 
 INSTRUCTION = f"""
 You are Vani, the primary AI assistant for Kurve, a D2C brand for affordable shapewear for women.
@@ -0,0 +1,288 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Asyncio HTTP front-end serving root_agent through the ADK Runner.
+
+Unlike `adk web`, every turn passes through an AdmissionController that
+caps the turns running in this worker, queues a bounded number with a
+queue-time SLA, serializes turns of one session and answers at once with
+503 "busy" when the queue is full or the model quota or MCP pool is
+saturated. Endpoints:
+
+- POST /users/{user_id}/sessions: create a session, optionally with state
+- POST /run_sse: run a turn, streaming ADK events as server-sent events;
+  the body matches `adk web`'s (user_id, session_id, new_message, streaming)
+- GET /healthz: agent readiness and admission counters
+- GET /metrics: metrics in the Prometheus text format
+
+Both session endpoints expect an authenticating proxy in front of the
+server to set the customer's Shopify ID in `Config.serving.identity_header`.
+A session's customer_id is taken from that header, never from the client's
+state, and turns are only run for the customer the session belongs to.
+
+Run one worker with `python -m customer_service.server`, or several with
+`uvicorn customer_service.server:create_app --factory --workers 4`; the
+limits in `Config.serving` apply per worker.
+"""
+
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.runners import Runner
+from google.genai import types
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
+
+from customer_service.agent import (
+    health,
+    mcp_pool,
+    root_agent,
+    start_initialization,
+)
+from customer_service.config import Config, ServingSettings
+from customer_service.shared_libraries.admission import (
+    AdmissionController,
+    Overloaded,
+    SaturationProbe,
+)
+from customer_service.shared_libraries.cart import cart_engine
+from customer_service.shared_libraries.metrics import metrics
+from customer_service.shared_libraries.rate_limiter import rate_limiter
+from customer_service.shared_libraries.session_store import (
+    SQLiteSessionService,
+    create_session_service,
+)
+
+logger = logging.getLogger(__name__)
+
+APP_NAME = "customer_service"
+BUSY_MESSAGE = (
+    "We're helping a lot of shoppers right now. Please try again in a moment."
+)
+
+
+class CreateSessionRequest(BaseModel):
+    """Body of POST /users/{user_id}/sessions."""
+
+    state: Optional[Dict[str, Any]] = None
+
+
+def customer_identity(request: Request, settings: ServingSettings) -> str:
+    """
+    Read the authenticated customer's ID from the identity header.
+
+    Args:
+        request: The HTTP request
+        settings: Names the header the authenticating proxy sets
+
+    Returns:
+        The customer ID.
+
+    Raises:
+        HTTPException: 401 when the header is missing or empty.
+    """
+    customer_id = request.headers.get(settings.identity_header, "").strip()
+    if not customer_id:
+        raise HTTPException(status_code=401, detail="Customer identity required")
+    return customer_id
+
+
+class RunRequest(BaseModel):
+    """Body of POST /run_sse, as sent to `adk web`."""
+
+    user_id: str
+    session_id: str
+    new_message: types.Content
+    streaming: bool = False
+
+
+def saturation_probes(settings: ServingSettings) -> List[SaturationProbe]:
+    """
+    Build probes reporting when the model quota or MCP pool is saturated.
+
+    Args:
+        settings: The limits the probes compare against
+
+    Returns:
+        Probes for the process-wide rate limiter and MCP pool.
+    """
+
+    def model_quota() -> Optional[str]:
+        if rate_limiter.backlog_secs() > settings.max_model_wait_secs:
+            return "model_quota"
+        return None
+
+    def mcp() -> Optional[str]:
+        pool = mcp_pool()
+        if pool is not None and pool.saturated(settings.max_mcp_outstanding):
+            return "mcp_pool"
+        return None
+
+    return [model_quota, mcp]
+
+
+def busy_response(error: Overloaded) -> JSONResponse:
+    """The fast response sent when a turn is turned away."""
+    return JSONResponse(
+        {"error": "busy", "reason": error.reason, "message": BUSY_MESSAGE},
+        status_code=503,
+        headers={"Retry-After": str(error.retry_after_secs)},
+    )
+
+
+def create_app(
+    runner: Optional[Runner] = None,
+    settings: Optional[ServingSettings] = None,
+    admission: Optional[AdmissionController] = None,
+) -> FastAPI:
+    """
+    Create the HTTP front-end.
+
+    Args:
+        runner: The runner turns are run with; by default one hosting
+            root_agent with sessions stored as `Config.session_store` says,
+            whose tools are initialized when the server starts
+        settings: Concurrency, queue and saturation limits; by default
+            `Config().serving`
+        admission: The admission controller; by default one with the
+            rate limiter and MCP pool probes
+
+    Returns:
+        The FastAPI application.
+    """
+    config = Config()
+    settings = settings or config.serving
+    admission = admission or AdmissionController(
+        settings, saturation_probes(settings)
+    )
+    initialize = runner is None
+    if runner is None:
+        runner = Runner(
+            app_name=APP_NAME,
+            agent=root_agent,
+            session_service=create_session_service(config.session_store),
+        )
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        # MCP connections belong to the event loop serving requests
+        if initialize:
+            start_initialization()
+        yield
+        if initialize:
+            await cart_engine.sync_pending()
+        if initialize and isinstance(runner.session_service, SQLiteSessionService):
+            runner.session_service.close()
+
+    app = FastAPI(title="Customer service agent", lifespan=lifespan)
+    app.state.admission = admission
+    app.state.runner = runner
+
+    @app.post("/users/{user_id}/sessions")
+    async def create_session(
+        user_id: str,
+        http_request: Request,
+        request: Optional[CreateSessionRequest] = None,
+    ) -> Dict[str, Any]:
+        customer_id = customer_identity(http_request, settings)
+        state = dict(request.state or {}) if request else {}
+        rejected = sorted(set(state) - set(settings.client_state_keys))
+        if rejected:
+            raise HTTPException(
+                status_code=400,
+                detail=f"State keys not accepted: {', '.join(rejected)}",
+            )
+        state["customer_id"] = customer_id
+        session = runner.session_service.create_session(
+            app_name=runner.app_name, user_id=user_id, state=state
+        )
+        return {"session_id": session.id, "user_id": user_id}
+
+    @app.post("/run_sse")
+    async def run_sse(request: RunRequest, http_request: Request):
+        customer_id = customer_identity(http_request, settings)
+        session = runner.session_service.get_session(
+            app_name=runner.app_name,
+            user_id=request.user_id,
+            session_id=request.session_id,
+        )
+        # Other customers' sessions are reported as missing
+        if session is None or session.state.get("customer_id") != customer_id:
+            raise HTTPException(status_code=404, detail="Session not found")
+        try:
+            slot = await admission.acquire(request.session_id)
+        except Overloaded as e:
+            return busy_response(e)
+
+        mode = StreamingMode.SSE if request.streaming else StreamingMode.NONE
+
+        async def events() -> AsyncIterator[str]:
+            try:
+                async for event in runner.run_async(
+                    user_id=request.user_id,
+                    session_id=request.session_id,
+                    new_message=request.new_message,
+                    run_config=RunConfig(streaming_mode=mode),
+                ):
+                    data = event.model_dump_json(exclude_none=True, by_alias=True)
+                    yield f"data: {data}\n\n"
+            except Exception as e:  # pylint: disable=broad-except
+                logger.exception("Turn failed in session %s", request.session_id)
+                yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+                # Store the events of the failed turn without waiting for
+                # the next final response
+                if isinstance(runner.session_service, SQLiteSessionService):
+                    runner.session_service.flush()
+            finally:
+                slot.release()
+
+        # The background task frees the slot if the stream never starts
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers={"X-Queue-Time": f"{slot.queued_secs:.3f}"},
+            background=BackgroundTask(slot.release),
+        )
+
+    @app.get("/healthz")
+    async def healthz() -> JSONResponse:
+        report = health() if initialize else {"ready": True}
+        return JSONResponse(
+            {**report, "admission": admission.stats()},
+            status_code=200 if report["ready"] else 503,
+        )
+
+    @app.get("/metrics")
+    async def prometheus_metrics() -> PlainTextResponse:
+        return PlainTextResponse(
+            metrics.render(), media_type="text/plain; version=0.0.4"
+        )
+
+    return app
+
+
+def main() -> None:
+    """Serve the agent with one worker on `Config.serving`'s host and port."""
+    settings = Config().serving
+    uvicorn.run(create_app(settings=settings), host=settings.host, port=settings.port)
+
+
+if __name__ == "__main__":
+    main()
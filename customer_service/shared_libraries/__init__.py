@@ -19,11 +19,90 @@ This package contains shared utility functions, callbacks, and client libraries
 that are used throughout the customer service agent implementation.
 """
 
-from .callbacks import before_agent, before_tool, rate_limit_callback
+from .callbacks import (
+    before_agent,
+    before_tool,
+    cache_model_response,
+    compact_history,
+    rate_limit_callback,
+    record_delegation,
+    route_intent,
+    serve_cached_response,
+    start_agent_timer,
+    stop_agent_timer,
+)
+from .admission import AdmissionController, Overloaded, Slot
+from .arg_normalizer import ArgNormalizer, ArgNormalizerRegistry, argument_normalizers
+from .cart import CartEngine, cart_engine
+from .coalescing import CoalescingTool
+from .customer_repository import CustomerRepository, customer_repository
+from .history_compactor import HistoryCompactor, history_compactor
+from .instruction_provider import GlobalInstructionProvider
+from .intent_router import IntentRouter, intent_router
+from .mcp_pool import MCPConnectionPool, PooledMCPTool
+from .metrics import MeteredTool, MetricsRegistry, metrics
+from .output_projection import OutputProjector, ProjectedTool, output_projector
+from .prefetch import PrefetchedTool, SessionPrefetcher, session_prefetcher
+from .profile_serializer import ProfileSerializer, profile_serializer
+from .rate_limiter import RateLimitedGemini, RateLimiter, rate_limiter
+from .response_cache import ResponseCache, response_cache
+from .session_store import SQLiteSessionService, create_session_service
+from .tool_cache import CachedTool, ToolResultCache
+from .tool_cassette import RecordingTool, ReplayTool, ToolCassette
+from .tool_wrappers import ToolWrapper
 
 
 __all__ = [
     "before_agent",
     "before_tool",
+    "cache_model_response",
+    "compact_history",
     "rate_limit_callback",
+    "record_delegation",
+    "route_intent",
+    "serve_cached_response",
+    "start_agent_timer",
+    "stop_agent_timer",
+    "AdmissionController",
+    "Overloaded",
+    "Slot",
+    "ArgNormalizer",
+    "ArgNormalizerRegistry",
+    "argument_normalizers",
+    "CartEngine",
+    "cart_engine",
+    "CoalescingTool",
+    "CustomerRepository",
+    "customer_repository",
+    "HistoryCompactor",
+    "history_compactor",
+    "GlobalInstructionProvider",
+    "IntentRouter",
+    "intent_router",
+    "MCPConnectionPool",
+    "PooledMCPTool",
+    "MeteredTool",
+    "MetricsRegistry",
+    "metrics",
+    "OutputProjector",
+    "ProjectedTool",
+    "output_projector",
+    "PrefetchedTool",
+    "SessionPrefetcher",
+    "session_prefetcher",
+    "ProfileSerializer",
+    "profile_serializer",
+    "RateLimitedGemini",
+    "RateLimiter",
+    "rate_limiter",
+    "ResponseCache",
+    "response_cache",
+    "SQLiteSessionService",
+    "create_session_service",
+    "CachedTool",
+    "ToolResultCache",
+    "RecordingTool",
+    "ReplayTool",
+    "ToolCassette",
+    "ToolWrapper",
 ]
@@ -0,0 +1,306 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Admission control for conversation turns served by one worker.
+
+At most `max_in_flight` turns run at once. Further turns wait in a FIFO
+queue of at most `max_queued` turns for up to `queue_timeout_secs`. A turn
+is turned away at once, rather than left to time out deep inside a model or
+MCP call, when:
+
+- the queue is full ("queue_full");
+- it waited longer than its queue-time SLA ("queue_timeout");
+- a saturation probe reports a shared resource is exhausted, e.g. the model
+  quota ("model_quota") or the MCP pool ("mcp_pool").
+
+Turns of one session are also serialized, since ADK sessions do not
+support concurrent turns; waiting for an earlier turn of the same session
+counts against the queue-time SLA.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Deque, Dict, Optional, Sequence
+
+from customer_service.config import ServingSettings
+from customer_service.shared_libraries.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Returns why new turns should be turned away, or None if they may run
+SaturationProbe = Callable[[], Optional[str]]
+
+ADMISSIONS = metrics.counter(
+    "server_admissions_total",
+    "Conversation turns admitted or turned away, by reason",
+    ["outcome", "reason"],
+)
+QUEUE_SECONDS = metrics.histogram(
+    "server_queue_seconds", "Time turns wait for a slot", []
+)
+
+
+class _SessionTurns:
+    """A session's lock and the turns holding or waiting for it."""
+
+    __slots__ = ("lock", "turns")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.turns = 0
+
+
+class Overloaded(Exception):
+    """
+    Raised when a turn is turned away.
+
+    Attributes:
+        reason: Why, e.g. "queue_full" or "model_quota"
+        retry_after_secs: When the client should retry
+    """
+
+    def __init__(self, reason: str, retry_after_secs: int):
+        super().__init__(f"Server busy: {reason}")
+        self.reason = reason
+        self.retry_after_secs = retry_after_secs
+
+
+class Slot:
+    """
+    A running turn's claim on the worker; released exactly once.
+
+    Attributes:
+        queued_secs: Seconds the turn waited before it was admitted
+    """
+
+    def __init__(
+        self,
+        controller: "AdmissionController",
+        session_lock: Optional[asyncio.Lock],
+        session_id: str,
+        queued_secs: float,
+    ):
+        self._controller = controller
+        self._session_lock = session_lock
+        self._session_id = session_id
+        self.queued_secs = queued_secs
+        self._released = False
+
+    def release(self) -> None:
+        """Free the slot and the session; later calls do nothing."""
+        if self._released:
+            return
+        self._released = True
+        if self._session_lock is not None:
+            self._session_lock.release()
+            self._controller._drop_session_lock(self._session_id)
+        self._controller._release_slot()
+
+
+class AdmissionController:
+    """
+    Caps running turns, queues a bounded number and sheds the rest.
+
+    Attributes:
+        settings: Concurrency, queue and SLA limits
+        probes: Saturation probes consulted before admitting a turn
+        admitted: Turns admitted
+        shed: Turns turned away, by reason
+    """
+
+    def __init__(
+        self,
+        settings: ServingSettings,
+        probes: Sequence[SaturationProbe] = (),
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.settings = settings
+        self.probes = list(probes)
+        self._clock = clock
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._sessions: Dict[str, _SessionTurns] = {}
+        self.admitted = 0
+        self.shed: Dict[str, int] = {}
+
+    @property
+    def in_flight(self) -> int:
+        """Turns currently running."""
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        """Turns currently waiting for a slot."""
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    def _shed(self, reason: str) -> Overloaded:
+        self.shed[reason] = self.shed.get(reason, 0) + 1
+        ADMISSIONS.inc(outcome="shed", reason=reason)
+        logger.info(
+            "Shedding a turn (%s) with %i running and %i queued",
+            reason,
+            self._in_flight,
+            self.queued,
+        )
+        return Overloaded(reason, self.settings.retry_after_secs)
+
+    def saturation(self) -> Optional[str]:
+        """
+        Ask the probes whether a shared resource is exhausted.
+
+        Returns:
+            The first probe's reason, or None if every resource has room.
+        """
+        for probe in self.probes:
+            try:
+                reason = probe()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Saturation probe failed")
+                continue
+            if reason:
+                return reason
+        return None
+
+    async def acquire(self, session_id: str = "") -> Slot:
+        """
+        Wait for a slot to run a turn.
+
+        Args:
+            session_id: The turn's session; turns of one session run one
+                at a time
+
+        Returns:
+            The slot, to be released when the turn ends.
+
+        Raises:
+            Overloaded: If the turn is turned away
+        """
+        reason = self.saturation()
+        if reason is not None:
+            raise self._shed(reason)
+
+        started = self._clock()
+        deadline = started + self.settings.queue_timeout_secs
+        await self._acquire_slot(deadline)
+        session_lock = None
+        if session_id:
+            try:
+                session_lock = await self._acquire_session(session_id, deadline)
+            except BaseException:
+                self._release_slot()
+                raise
+
+        queued_secs = self._clock() - started
+        self.admitted += 1
+        ADMISSIONS.inc(outcome="admitted", reason="")
+        QUEUE_SECONDS.observe(queued_secs)
+        return Slot(self, session_lock, session_id, queued_secs)
+
+    @asynccontextmanager
+    async def admit(self, session_id: str = "") -> AsyncIterator[Slot]:
+        """
+        Run a block as an admitted turn.
+
+        Args:
+            session_id: The turn's session
+
+        Yields:
+            The slot, released when the block exits.
+
+        Raises:
+            Overloaded: If the turn is turned away
+        """
+        slot = await self.acquire(session_id)
+        try:
+            yield slot
+        finally:
+            slot.release()
+
+    async def _acquire_slot(self, deadline: float) -> None:
+        if self._in_flight < self.settings.max_in_flight and not self.queued:
+            self._in_flight += 1
+            return
+        if self.queued >= self.settings.max_queued:
+            raise self._shed("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait({waiter}, timeout=max(deadline - self._clock(), 0))
+        except BaseException:
+            # Cancelled, e.g. the client went away; keep a slot handed over
+            # in the meantime from leaking
+            if waiter.done() and not waiter.cancelled():
+                self._release_slot()
+            waiter.cancel()
+            raise
+        if not waiter.done():
+            waiter.cancel()
+            raise self._shed("queue_timeout")
+        # The releasing turn handed its slot over, so _in_flight is unchanged
+
+    def _release_slot(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    async def _acquire_session(self, session_id: str, deadline: float) -> asyncio.Lock:
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = _SessionTurns()
+        session.turns += 1
+        lock = session.lock
+        try:
+            if lock.locked():
+                await asyncio.wait_for(
+                    lock.acquire(), timeout=max(deadline - self._clock(), 0)
+                )
+            else:
+                await lock.acquire()
+        except asyncio.TimeoutError:
+            self._drop_session_lock(session_id)
+            raise self._shed("queue_timeout") from None
+        except BaseException:
+            self._drop_session_lock(session_id)
+            raise
+        return lock
+
+    def _drop_session_lock(self, session_id: str) -> None:
+        session = self._sessions.get(session_id)
+        if session is None:
+            return
+        session.turns -= 1
+        if session.turns <= 0:
+            del self._sessions[session_id]
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Report admission counters.
+
+        Returns:
+            Turns running and queued, turns admitted and turns turned away
+            by reason.
+        """
+        return {
+            "in_flight": self._in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+        }
@@ -0,0 +1,223 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Per-tool argument normalizers compiled from the tools' declared schemas.
+
+Only string fields that are case-insensitive get normalized, so GIDs,
+cursors and free-text queries keep the case the model gave them. A field is
+case-insensitive if:
+
+- its schema declares an enum: the value is replaced by the declared enum
+  value it matches case-insensitively, e.g. "created_at" -> "CREATED_AT";
+- its name is listed in `case_insensitive_fields`, which gives the case it
+  is normalized to, e.g. email addresses to lower case;
+- its schema description says "case-insensitive": it is lowercased.
+
+Each tool's declaration is compiled once into a list of (path, rewrite)
+steps. Normalizing then visits only those paths and rewrites the arguments
+in place, which is how ADK's before-tool callbacks pass changes on to the
+tool.
+"""
+
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from google.adk.tools import BaseTool
+from google.genai import types
+
+from customer_service.config import ArgumentNormalizationSettings, Config
+
+logger = logging.getLogger(__name__)
+
+# Marks "every item of an array" in a path
+_ITEMS = None
+
+Path = Tuple[Optional[str], ...]
+Rewrite = Callable[[str], str]
+
+
+def _enum_rewrite(values: List[str]) -> Rewrite:
+    canonical = {value.lower(): value for value in values}
+    return lambda value: canonical.get(value.strip().lower(), value)
+
+
+_CASE_REWRITES: Dict[str, Rewrite] = {
+    "lower": lambda value: value.strip().lower(),
+    "upper": lambda value: value.strip().upper(),
+}
+
+
+class ArgNormalizer:
+    """
+    Normalizes the case-insensitive arguments of one tool.
+
+    Attributes:
+        tool_name: The tool the normalizer was compiled for
+        steps: (path, rewrite) pairs; a path is a sequence of property names,
+            with None standing for every item of an array
+    """
+
+    def __init__(self, tool_name: str, steps: List[Tuple[Path, Rewrite]]):
+        self.tool_name = tool_name
+        self.steps = steps
+
+    def normalize(self, args: Dict[str, Any]) -> int:
+        """
+        Rewrite the case-insensitive fields of a call's arguments in place.
+
+        Args:
+            args: The call's arguments
+
+        Returns:
+            The number of values changed.
+        """
+        changed = 0
+        for path, rewrite in self.steps:
+            changed += _apply(args, path, rewrite)
+        return changed
+
+
+def _apply(container: Any, path: Path, rewrite: Rewrite) -> int:
+    """Rewrite the string values at path under container."""
+    key, rest = path[0], path[1:]
+    if key is _ITEMS:
+        if not isinstance(container, list):
+            return 0
+        if rest:
+            return sum(_apply(item, rest, rewrite) for item in container)
+        changed = 0
+        for index, item in enumerate(container):
+            if isinstance(item, str):
+                new = rewrite(item)
+                if new != item:
+                    container[index] = new
+                    changed += 1
+        return changed
+
+    if not isinstance(container, dict) or key not in container:
+        return 0
+    if rest:
+        return _apply(container[key], rest, rewrite)
+    value = container[key]
+    if not isinstance(value, str):
+        return 0
+    new = rewrite(value)
+    if new == value:
+        return 0
+    container[key] = new
+    return 1
+
+
+def _type_name(schema: types.Schema) -> str:
+    kind = schema.type
+    return (getattr(kind, "value", kind) or "").upper()
+
+
+def compile_normalizer(
+    tool_name: str,
+    declaration: Optional[types.FunctionDeclaration],
+    case_insensitive_fields: Dict[str, str],
+) -> ArgNormalizer:
+    """
+    Compile a tool's declaration into a normalizer.
+
+    Args:
+        tool_name: The tool's name
+        declaration: The tool's function declaration, if it has one
+        case_insensitive_fields: Field names mapped to "lower" or "upper"
+
+    Returns:
+        The normalizer; it has no steps if no field is case-insensitive.
+    """
+    steps: List[Tuple[Path, Rewrite]] = []
+
+    def visit(schema: types.Schema, path: Path, name: Optional[str]) -> None:
+        kind = _type_name(schema)
+        if kind == "OBJECT":
+            for prop, prop_schema in (schema.properties or {}).items():
+                visit(prop_schema, path + (prop,), prop)
+        elif kind == "ARRAY" and schema.items is not None:
+            visit(schema.items, path + (_ITEMS,), name)
+        elif kind == "STRING" and path:
+            if schema.enum:
+                steps.append((path, _enum_rewrite(schema.enum)))
+            elif name in case_insensitive_fields:
+                steps.append((path, _CASE_REWRITES[case_insensitive_fields[name]]))
+            elif "case-insensitive" in (schema.description or "").lower():
+                steps.append((path, _CASE_REWRITES["lower"]))
+
+    if declaration is not None and declaration.parameters is not None:
+        visit(declaration.parameters, (), None)
+    return ArgNormalizer(tool_name, steps)
+
+
+class ArgNormalizerRegistry:
+    """
+    Compiles and caches one normalizer per tool.
+
+    Attributes:
+        settings: The case-insensitive field names
+        normalized: Values changed across all calls
+    """
+
+    def __init__(self, settings: ArgumentNormalizationSettings):
+        self.settings = settings
+        self._normalizers: Dict[str, ArgNormalizer] = {}
+        self.normalized = 0
+
+    def normalizer_for(self, tool: BaseTool) -> ArgNormalizer:
+        """
+        Get a tool's normalizer, compiling it on first use.
+
+        Args:
+            tool: The tool being called
+
+        Returns:
+            The tool's normalizer.
+        """
+        normalizer = self._normalizers.get(tool.name)
+        if normalizer is None:
+            normalizer = compile_normalizer(
+                tool.name,
+                tool._get_declaration(),
+                self.settings.case_insensitive_fields,
+            )
+            self._normalizers[tool.name] = normalizer
+            logger.debug(
+                "Compiled %i argument normalization steps for %s",
+                len(normalizer.steps),
+                tool.name,
+            )
+        return normalizer
+
+    def normalize(self, tool: BaseTool, args: Dict[str, Any]) -> int:
+        """
+        Normalize a call's case-insensitive arguments in place.
+
+        Args:
+            tool: The tool being called
+            args: The call's arguments
+
+        Returns:
+            The number of values changed.
+        """
+        if not self.settings.enabled:
+            return 0
+        changed = self.normalizer_for(tool).normalize(args)
+        self.normalized += changed
+        return changed
+
+
+# Process-wide normalizers shared by every agent
+argument_normalizers = ArgNormalizerRegistry(Config().argument_normalization)
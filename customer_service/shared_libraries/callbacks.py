@@ -14,43 +14,119 @@
 
 """Callback functions for Customer Service Agent.
 
-This module provides callback functions for rate limiting, tool pre-processing,
-and agent initialization.
+This module provides callback functions for rate limiting, history
+compaction, response caching, intent routing, tool pre-processing, agent
+initialization, and agent timing metrics.
 """
 
 import logging
 import os
 import time
+from collections import OrderedDict
 from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.agents.invocation_context import InvocationContext
-from google.adk.models import LlmRequest
+from google.adk.events import Event
+from google.adk.models import LlmRequest, LlmResponse
 from google.adk.tools import BaseTool
+from google.genai import types
 
 from customer_service.entities.customer import Customer
+from customer_service.shared_libraries.arg_normalizer import argument_normalizers
+from customer_service.shared_libraries.customer_repository import (
+    customer_repository,
+)
+from customer_service.shared_libraries.history_compactor import (
+    COMPACTIONS,
+    TOKENS_SAVED,
+    history_compactor,
+)
+from customer_service.shared_libraries.intent_router import (
+    GENERAL,
+    Route,
+    intent_router,
+)
+from customer_service.shared_libraries.metrics import (
+    AGENT_RUN_SECONDS,
+    current_agent,
+    timed_callback,
+)
+from customer_service.shared_libraries.prefetch import session_prefetcher
+from customer_service.shared_libraries.profile_serializer import profile_serializer
+from customer_service.shared_libraries.rate_limiter import (
+    current_session_id,
+    rate_limiter,
+)
+from customer_service.shared_libraries.response_cache import (
+    customer_segment,
+    personal_values,
+    response_cache,
+)
 
 # Configure logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
 # Rate limiting constants
-RATE_LIMIT_SECS = 60
-RPM_QUOTA = 10
+RATE_LIMIT_SECS = rate_limiter.settings.window_secs
+RPM_QUOTA = rate_limiter.settings.default_rpm
 
 # Get customer ID from environment or use default
 DEFAULT_CUSTOMER_ID = "7730071404758"  # Fallback default
 CUSTOMER_ID = os.environ.get("CUSTOMER_ID", DEFAULT_CUSTOMER_ID)
 
+# (invocation ID, agent name) -> when the agent started its turn
+_agent_started: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+_MAX_RUNNING_AGENTS = 10000
 
+# Invocation ID -> the router's prediction awaiting the root model's decision
+_pending_routes: "OrderedDict[str, Route]" = OrderedDict()
+_MAX_PENDING_ROUTES = 10000
+
+
+def start_agent_timer(callback_context: CallbackContext) -> None:
+    """
+    Note when an agent starts its part of a turn.
+
+    Args:
+        callback_context: The callback context of the starting agent
+    """
+    key = (callback_context.invocation_id, callback_context.agent_name)
+    _agent_started[key] = time.perf_counter()
+    # Agents that raised never stop their timers
+    while len(_agent_started) > _MAX_RUNNING_AGENTS:
+        _agent_started.popitem(last=False)
+
+
+def stop_agent_timer(callback_context: CallbackContext) -> None:
+    """
+    Observe an agent's part of a turn, including its delegations, in the
+    agent_run_seconds metric.
+
+    Args:
+        callback_context: The callback context of the finishing agent
+    """
+    key = (callback_context.invocation_id, callback_context.agent_name)
+    started = _agent_started.pop(key, None)
+    if started is not None:
+        AGENT_RUN_SECONDS.observe(
+            time.perf_counter() - started, agent=callback_context.agent_name
+        )
+
+
+@timed_callback
 def rate_limit_callback(
     callback_context: CallbackContext, llm_request: LlmRequest
 ) -> None:
     """
-    Implement a query rate limit for LLM requests.
+    Prepare an LLM request for the process-wide rate limiter.
 
-    Ensures that no more than RPM_QUOTA requests are made within RATE_LIMIT_SECS.
-    If quota is exceeded, this function will sleep to enforce the rate limit.
+    The quota itself (RPM_QUOTA requests per RATE_LIMIT_SECS, shared by all
+    sessions) is enforced by RateLimitedGemini, which awaits the limiter
+    without blocking the event loop. ADK does not await model callbacks, so
+    this callback only records the session the request belongs to, letting
+    the limiter queue sessions fairly, and the agent, for metric labels.
 
     Args:
         callback_context: The active callback context containing state
@@ -62,62 +138,259 @@ def rate_limit_callback(
             if part.text == "":
                 part.text = " "
 
-    now = time.time()
+    session_id = callback_context._invocation_context.session.id
+    current_session_id.set(session_id)
+    current_agent.set(callback_context.agent_name)
+    logger.debug(
+        "rate_limit_callback [session: %s, model: %s]",
+        session_id,
+        llm_request.model,
+    )
 
-    # Initialize rate limiting state if first call
-    if "timer_start" not in callback_context.state:
-        callback_context.state["timer_start"] = now
-        callback_context.state["request_count"] = 1
-        logger.debug(
-            "rate_limit_callback [timestamp: %i, req_count: 1, elapsed_secs: 0]",
-            now,
-        )
+
+@timed_callback
+def compact_history(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> None:
+    """
+    Run rate_limit_callback, then compact the request's history.
+
+    Tool results of older turns are summarized, and the oldest turns dropped
+    if the contents exceed `Config.history_compaction.max_tokens`; see
+    history_compactor. The estimated tokens saved are recorded in the
+    agent_history_tokens_saved_total metric.
+
+    Args:
+        callback_context: The active callback context containing state
+        llm_request: The LLM request about to be sent
+    """
+    rate_limit_callback(callback_context, llm_request)
+
+    compaction = history_compactor.compact(llm_request.contents)
+    if compaction.tokens_saved <= 0:
         return
+    llm_request.contents = compaction.contents
+    agent_name = callback_context.agent_name
+    COMPACTIONS.inc(agent=agent_name)
+    TOKENS_SAVED.inc(compaction.tokens_saved, agent=agent_name)
+    logger.debug(
+        "Compacted history for %s from ~%i to ~%i tokens, dropping %i turns",
+        agent_name,
+        compaction.tokens_before,
+        compaction.tokens_after,
+        compaction.turns_dropped,
+    )
+
+
+def _turn_events(invocation_context: InvocationContext) -> List[Event]:
+    """Events of the current turn, starting with the customer's message."""
+    return [
+        event
+        for event in invocation_context.session.events
+        if event.invocation_id == invocation_context.invocation_id
+    ]
+
+
+def _turn_query(invocation_context: InvocationContext) -> Optional[str]:
+    """The customer's message for this turn, if it is plain text."""
+    content = invocation_context.user_content
+    if content is None or not content.parts:
+        return None
+    if any(part.text is None for part in content.parts):
+        return None
+    return "".join(part.text for part in content.parts).strip() or None
 
-    # Update request count and calculate elapsed time
-    request_count = callback_context.state["request_count"] + 1
-    elapsed_secs = now - callback_context.state["timer_start"]
+
+def _is_first_model_call(invocation_context: InvocationContext) -> bool:
+    """Whether the agent is the first to answer the turn's message."""
+    return all(e.author == "user" for e in _turn_events(invocation_context))
+
+
+def _is_first_turn(invocation_context: InvocationContext) -> bool:
+    """Whether the turn opens the session, so its message has no context."""
+    return all(
+        event.invocation_id == invocation_context.invocation_id
+        for event in invocation_context.session.events
+    )
+
+
+@timed_callback
+def serve_cached_response(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """
+    Answer a repeated question from the response cache.
+
+    Runs compact_history, then looks the customer's message up when this is
+    the turn's first model call, i.e. the agent receiving the question, on
+    the session's first turn. Later messages such as "yes, do it" depend on
+    the conversation, so they always go to the model. A cached answer skips
+    the model call and any delegation it would make.
+
+    Args:
+        callback_context: The active callback context containing state
+        llm_request: The LLM request about to be sent
+
+    Returns:
+        The cached answer, or None to call the model.
+    """
+    compact_history(callback_context, llm_request)
+
+    invocation_context = callback_context._invocation_context
+    query = _turn_query(invocation_context)
+    if query is None or not _is_first_model_call(invocation_context):
+        return None
+    if not _is_first_turn(invocation_context):
+        return None
+
+    segment = customer_segment(callback_context.state.get("customer_profile"))
+    content = response_cache.lookup(invocation_context.agent.name, segment, query)
+    if content is None:
+        return None
     logger.debug(
-        "rate_limit_callback [timestamp: %i, request_count: %i, elapsed_secs: %i]",
-        now,
-        request_count,
-        elapsed_secs,
+        "Answered from response cache [session: %s, agent: %s]",
+        invocation_context.session.id,
+        invocation_context.agent.name,
     )
+    return LlmResponse(content=content)
+
 
-    # Apply rate limiting if quota exceeded
-    if request_count > RPM_QUOTA:
-        delay = RATE_LIMIT_SECS - elapsed_secs + 1
-        if delay > 0:
-            logger.debug("Sleeping for %i seconds", delay)
-            time.sleep(delay)
-        # Reset timer and counter after delay
-        callback_context.state["timer_start"] = time.time()
-        callback_context.state["request_count"] = 1
-    else:
-        callback_context.state["request_count"] = request_count
+@timed_callback
+def cache_model_response(
+    callback_context: CallbackContext, llm_response: LlmResponse
+) -> None:
+    """
+    Offer a final answer to the response cache.
 
+    Answers are cached under the agent that received the question, so a
+    question the root agent delegated is answered by the root agent next
+    time. Only the session's first turn is cached, since later answers
+    depend on the conversation. Turns that called any tool other than
+    transfer_to_agent are not cached; ResponseCache.store refuses answers
+    with personal data.
 
-def lowercase_value(value: Any) -> Any:
+    Args:
+        callback_context: The active callback context containing state
+        llm_response: The model's response
     """
-    Recursively convert string values to lowercase in various data structures.
+    content = llm_response.content
+    if llm_response.partial or content is None or not content.parts:
+        return
+    if any(part.function_call for part in content.parts):
+        return
+
+    invocation_context = callback_context._invocation_context
+    query = _turn_query(invocation_context)
+    if query is None or not _is_first_turn(invocation_context):
+        return
+    events = _turn_events(invocation_context)
+    for event in events:
+        calls = event.get_function_calls()
+        if any(call.name != "transfer_to_agent" for call in calls):
+            return
+
+    entry_agent = next(
+        (e.author for e in events if e.author != "user"),
+        invocation_context.agent.name,
+    )
+    profile = callback_context.state.get("customer_profile")
+    response_cache.store(
+        entry_agent,
+        customer_segment(profile),
+        query,
+        content,
+        personal=personal_values(profile),
+    )
+
+
+@timed_callback
+def route_intent(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """
+    Send a message straight to the sub-agent the intent router predicts.
+
+    Runs serve_cached_response first. On the turn's first model call, a
+    confident prediction is answered with a transfer_to_agent call in place
+    of the model's, so ADK hands the message to the sub-agent without the
+    root model call. Other predictions are kept for record_delegation.
 
     Args:
-        value: The value to process (can be a dict, list, set, tuple, string, or other type)
+        callback_context: The active callback context containing state
+        llm_request: The LLM request about to be sent
 
     Returns:
-        The processed value with all strings converted to lowercase
+        A cached answer or the transfer, or None to call the model.
     """
-    if isinstance(value, dict):
-        return {k: lowercase_value(v) for k, v in value.items()}
-    elif isinstance(value, str):
-        return value.lower()
-    elif isinstance(value, (list, set, tuple)):
-        tp = type(value)
-        return tp(lowercase_value(i) for i in value)
-    else:
-        return value
+    response = serve_cached_response(callback_context, llm_request)
+    if response is not None:
+        return response
+
+    invocation_context = callback_context._invocation_context
+    query = _turn_query(invocation_context)
+    if query is None or not _is_first_model_call(invocation_context):
+        return None
+
+    agent = invocation_context.agent
+    targets = (
+        {sub_agent.name for sub_agent in agent.sub_agents}
+        if "transfer_to_agent" in llm_request.tools_dict
+        else set()
+    )
+    route = intent_router.classify(query)
+    if intent_router.dispatch(route, targets):
+        logger.debug(
+            "Routed to %s by %s [session: %s]",
+            route.intent,
+            route.source,
+            invocation_context.session.id,
+        )
+        transfer = types.FunctionCall(
+            name="transfer_to_agent", args={"agent_name": route.intent}
+        )
+        return LlmResponse(
+            content=types.Content(
+                role="model", parts=[types.Part(function_call=transfer)]
+            )
+        )
+
+    _pending_routes[invocation_context.invocation_id] = route
+    while len(_pending_routes) > _MAX_PENDING_ROUTES:
+        _pending_routes.popitem(last=False)
+    return None
+
+
+@timed_callback
+def record_delegation(
+    callback_context: CallbackContext, llm_response: LlmResponse
+) -> None:
+    """
+    Compare the root model's delegation with the intent router's prediction.
+
+    Runs cache_model_response first. The delegation is the agent the model
+    transferred to, or GENERAL if it answered the message itself.
+
+    Args:
+        callback_context: The active callback context containing state
+        llm_response: The model's response
+    """
+    cache_model_response(callback_context, llm_response)
+    if llm_response.partial:
+        return
+    route = _pending_routes.pop(callback_context.invocation_id, None)
+    if route is None:
+        return
+
+    delegated = GENERAL
+    content = llm_response.content
+    for part in content.parts if content and content.parts else []:
+        call = part.function_call
+        if call is not None and call.name == "transfer_to_agent":
+            delegated = (call.args or {}).get("agent_name", GENERAL)
+    intent_router.record(route, delegated)
 
 
+@timed_callback
 def before_tool(
     tool: BaseTool,
     args: Dict[str, Any],
@@ -127,7 +400,8 @@ def before_tool(
     Process tool arguments before tool execution.
 
     This callback runs before each tool execution to:
-    1. Convert all string values to lowercase
+    1. Normalize case-insensitive arguments, in place, with the tool's
+       schema-compiled normalizer
     2. Apply business logic for specific tools
     3. Potentially short-circuit tool execution with predefined responses
 
@@ -140,8 +414,8 @@ def before_tool(
         Optional dictionary with results if short-circuiting the tool call,
         or None to continue with normal tool execution
     """
-    # Normalize input values to lowercase
-    args = lowercase_value(args)
+    # ADK passes the tool these same args, so they are normalized in place
+    argument_normalizers.normalize(tool, args)
 
     # Apply tool-specific business logic
     if tool.name == "sync_ask_for_approval":
@@ -162,6 +436,7 @@ def before_tool(
     return None
 
 
+@timed_callback
 def before_agent(callback_context: InvocationContext) -> None:
     """
     Initialize the agent context with required state.
@@ -172,12 +447,35 @@ def before_agent(callback_context: InvocationContext) -> None:
     Args:
         callback_context: The invocation context for the agent
     """
-    # Load customer profile if not already present
-
-    logger.info(f"Loading customer profile for customer ID: {CUSTOMER_ID}")
-    if "customer_profile" not in callback_context.state:
-        callback_context.state["customer_profile"] = Customer.get_customer(
-            CUSTOMER_ID
-        ).to_json()
+    start_agent_timer(callback_context)
+
+    # Load customer profile from the repository cache; ADK runs this callback
+    # synchronously, so a cache miss starts a background load instead
+    state = callback_context.state
+    if "customer_id" not in state:
+        state["customer_id"] = CUSTOMER_ID
+    customer_id = state["customer_id"]
+
+    # Start the session's likely first tool calls while the model runs
+    session_id = callback_context._invocation_context.session.id
+    session_prefetcher.start(session_id, customer_id)
+
+    customer = customer_repository.get_cached(customer_id)
+    if customer is None and not customer_repository.is_bound:
+        customer_repository.put(Customer.get_customer(customer_id))
+        customer = customer_repository.get_cached(customer_id)
+    elif customer is None:
+        logger.info(f"Loading customer profile for customer ID: {customer_id}")
+        customer_repository.prefetch(customer_id)
+        return
 
-        logger.debug(f"Loaded customer profile for customer ID: {CUSTOMER_ID}")
\ No newline at end of file
+    # Compact profile, rendered once per customer version
+    profile = profile_serializer.serialize(
+        customer, version=customer_repository.version(customer_id)
+    )
+    if state.get("customer_profile") != profile.text:
+        state["customer_profile"] = profile.text
+        logger.debug(
+            f"Loaded customer profile for customer ID: {customer_id} "
+            f"(~{profile.token_estimate} tokens)"
+        )
@@ -0,0 +1,616 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Customer carts behind the access_cart_information and modify_cart tools.
+
+Carts are kept in memory in front of a SQLite store, so they survive
+restarts. A modification:
+
+- validates all of its adds and removes first and applies them as one
+  batch in one transaction, or not at all;
+- bumps the cart's version, and is refused if it names the version it was
+  based on and the cart has moved on since;
+- returns the original result without applying again if its idempotency
+  key was already used, e.g. when the model repeats a call.
+
+Changed carts are synced to a Shopify draft order with createDraftOrder
+once they have been quiet for `sync_debounce_secs`, so a customer editing
+the cart five times in a row causes one call. A failed sync is retried
+after `sync_retry_secs`, doubling up to `sync_max_retry_secs`. The Shopify
+MCP server has no tool to update or delete a draft order, so each sync
+creates a new draft and the cart keeps the latest draft's ID; earlier
+drafts, including the last one of a cart that was emptied, are left in
+Shopify.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Set
+
+from customer_service.config import CartSettings, Config
+from customer_service.shared_libraries.mcp_results import (
+    decode_tool_result,
+    numeric_id,
+)
+from customer_service.shared_libraries.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Calls an MCP tool with the given arguments and returns its result
+ToolCaller = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+CART_CHANGES = metrics.counter(
+    "cart_modifications_total",
+    "Cart modifications by outcome (applied, replayed, conflict, invalid)",
+    ["outcome"],
+)
+CART_SYNCS = metrics.counter(
+    "cart_draft_order_syncs_total",
+    "Carts synced to Shopify draft orders, by outcome",
+    ["outcome"],
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS carts (
+    customer_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    items TEXT NOT NULL,
+    draft_order_id TEXT,
+    synced_version INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS cart_modifications (
+    customer_id TEXT NOT NULL,
+    idempotency_key TEXT NOT NULL,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (customer_id, idempotency_key)
+) WITHOUT ROWID;
+"""
+
+
+class _Cart:
+    """A customer's cart; items maps product IDs to cart lines."""
+
+    __slots__ = (
+        "customer_id",
+        "version",
+        "items",
+        "draft_order_id",
+        "synced_version",
+    )
+
+    def __init__(
+        self,
+        customer_id: str,
+        version: int = 0,
+        items: Optional[Dict[str, Dict[str, Any]]] = None,
+        draft_order_id: Optional[str] = None,
+        synced_version: int = 0,
+    ):
+        self.customer_id = customer_id
+        self.version = version
+        self.items = items or {}
+        self.draft_order_id = draft_order_id
+        self.synced_version = synced_version
+
+
+class _PendingSync:
+    """A debounced draft order sync waiting to run."""
+
+    __slots__ = ("first_change", "handle")
+
+    def __init__(self, first_change: float):
+        self.first_change = first_change
+        self.handle: Optional[asyncio.TimerHandle] = None
+
+
+def _quantity(item: Dict[str, Any], default: Optional[int]) -> Optional[int]:
+    """Read a positive whole quantity; models often send 2.0 for 2."""
+    value = item.get("quantity", default)
+    if value is None:
+        return None
+    try:
+        quantity = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid quantity {value!r}") from None
+    if quantity != int(quantity) or quantity < 1:
+        raise ValueError(f"Invalid quantity {value!r}")
+    return int(quantity)
+
+
+def _product_id(item: Any) -> str:
+    if isinstance(item, str):
+        return item.strip()
+    if isinstance(item, dict):
+        return str(item.get("product_id") or item.get("variant_id") or "").strip()
+    return ""
+
+
+class CartEngine:
+    """
+    Carts with atomic, versioned and idempotent modifications.
+
+    Attributes:
+        settings: Store, cache, validation and sync settings
+        applied: Modifications applied
+        replayed: Modifications answered from their idempotency key
+        conflicts: Modifications refused because the cart had changed
+        syncs: Draft orders created
+        sync_failures: Draft order syncs that failed
+    """
+
+    def __init__(
+        self,
+        settings: CartSettings,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.settings = settings
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._carts: "OrderedDict[str, _Cart]" = OrderedDict()
+        self._create_draft_order: Optional[ToolCaller] = None
+        self._pending: Dict[str, _PendingSync] = {}
+        self._syncing: Set[str] = set()
+        # Consecutive failed syncs per cart, for the retry backoff
+        self._sync_attempts: Dict[str, int] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.applied = 0
+        self.replayed = 0
+        self.conflicts = 0
+        self.syncs = 0
+        self.sync_failures = 0
+
+    def bind(self, create_draft_order: ToolCaller) -> None:
+        """
+        Attach the MCP tool carts are synced with.
+
+        Args:
+            create_draft_order: Calls createDraftOrder
+        """
+        self._create_draft_order = create_draft_order
+
+    @property
+    def is_bound(self) -> bool:
+        """Whether the createDraftOrder tool has been attached."""
+        return self._create_draft_order is not None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened on first use, so importing the tools creates no database
+        if self._db is None:
+            self._db = sqlite3.connect(
+                self.settings.path or ":memory:",
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(_SCHEMA)
+        return self._db
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        db = self._connection()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def _cart(self, customer_id: str, reload: bool = False) -> _Cart:
+        """Get a customer's cart from memory, or from the store on a miss."""
+        cart = None if reload else self._carts.get(customer_id)
+        if cart is None:
+            row = (
+                self._connection()
+                .execute(
+                    "SELECT version, items, draft_order_id, synced_version "
+                    "FROM carts WHERE customer_id = ?",
+                    (customer_id,),
+                )
+                .fetchone()
+            )
+            cart = _Cart(customer_id)
+            if row is not None:
+                cart = _Cart(customer_id, row[0], json.loads(row[1]), row[2], row[3])
+            self._carts[customer_id] = cart
+            while len(self._carts) > self.settings.max_cached_carts:
+                self._carts.popitem(last=False)
+        self._carts.move_to_end(customer_id)
+        return cart
+
+    @staticmethod
+    def _view(cart: _Cart) -> Dict[str, Any]:
+        items = [dict(line) for line in cart.items.values()]
+        return {
+            "customer_id": cart.customer_id,
+            "version": cart.version,
+            "items": items,
+            "item_count": sum(line["quantity"] for line in items),
+            "subtotal": round(
+                sum(
+                    line["price"] * line["quantity"]
+                    for line in items
+                    if line.get("price") is not None
+                ),
+                2,
+            ),
+            "draft_order_id": cart.draft_order_id,
+        }
+
+    def _modified(
+        self,
+        items: Dict[str, Dict[str, Any]],
+        items_to_add: List[Any],
+        items_to_remove: List[Any],
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Apply a batch to a copy of a cart's lines.
+
+        Removals are applied before additions, so a batch can swap one
+        variant for another.
+
+        Raises:
+            ValueError: If any change in the batch is invalid
+        """
+        lines = {product_id: dict(line) for product_id, line in items.items()}
+        for item in items_to_remove:
+            product_id = _product_id(item)
+            if product_id not in lines:
+                raise ValueError(f"{product_id or item!r} is not in the cart")
+            quantity = _quantity(item, None) if isinstance(item, dict) else None
+            line = lines[product_id]
+            if quantity is None or quantity >= line["quantity"]:
+                del lines[product_id]
+            else:
+                line["quantity"] -= quantity
+
+        for item in items_to_add:
+            product_id = _product_id(item)
+            if not isinstance(item, dict) or not product_id:
+                raise ValueError(f"Items to add need a product_id: {item!r}")
+            quantity = _quantity(item, 1)
+            line = lines.setdefault(
+                product_id,
+                {"product_id": product_id, "name": product_id, "quantity": 0},
+            )
+            line["quantity"] += quantity
+            if line["quantity"] > self.settings.max_quantity:
+                raise ValueError(
+                    f"At most {self.settings.max_quantity} of {product_id} can be "
+                    f"in the cart"
+                )
+            if item.get("name"):
+                line["name"] = str(item["name"])
+            if item.get("price") is not None:
+                try:
+                    line["price"] = float(item["price"])
+                except (TypeError, ValueError):
+                    raise ValueError(f"Invalid price {item['price']!r}") from None
+        return lines
+
+    def get(self, customer_id: str) -> Dict[str, Any]:
+        """
+        Read a customer's cart.
+
+        Args:
+            customer_id: The customer ID
+
+        Returns:
+            The cart's version, items, item count, subtotal of the priced
+            items and latest draft order ID.
+        """
+        with self._lock:
+            return self._view(self._cart(customer_id))
+
+    def modify(
+        self,
+        customer_id: str,
+        items_to_add: List[Any],
+        items_to_remove: List[Any],
+        idempotency_key: str = "",
+        expected_version: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Apply adds and removes to a cart as one batch.
+
+        Args:
+            customer_id: The customer ID
+            items_to_add: Dicts with a product_id, and optionally a quantity
+                (default 1), name and price
+            items_to_remove: Product IDs, or dicts with a product_id and
+                optionally a quantity; without one the line is removed
+            idempotency_key: Identifies the modification; repeating a key
+                returns the first result without applying it again
+            expected_version: The cart version the modification is based
+                on; None applies it to whatever the cart holds
+
+        Returns:
+            A dict with a "status" of "success", "conflict" or "invalid", a
+            message and the cart as it is afterwards.
+        """
+        if not items_to_add and not items_to_remove:
+            CART_CHANGES.inc(outcome="invalid")
+            return {"status": "invalid", "message": "Nothing to add or remove."}
+
+        with self._lock:
+            now = self._clock()
+            db = self._connection()
+            if idempotency_key:
+                row = db.execute(
+                    "SELECT result FROM cart_modifications WHERE customer_id = ? "
+                    "AND idempotency_key = ? AND created_at >= ?",
+                    (
+                        customer_id,
+                        idempotency_key,
+                        now - self.settings.idempotency_ttl_secs,
+                    ),
+                ).fetchone()
+                if row is not None:
+                    self.replayed += 1
+                    CART_CHANGES.inc(outcome="replayed")
+                    return {**json.loads(row[0]), "replayed": True}
+
+            # The cached cart may be stale if another worker changed it, so
+            # a version mismatch or lost write is checked against the store
+            for attempt in range(2):
+                cart = self._cart(customer_id, reload=attempt > 0)
+                if expected_version is not None and expected_version != cart.version:
+                    if attempt == 0:
+                        continue
+                    return self._conflict(
+                        cart,
+                        f"The cart changed since version {expected_version}; "
+                        f"read it again before changing it.",
+                    )
+                try:
+                    items = self._modified(cart.items, items_to_add, items_to_remove)
+                except ValueError as e:
+                    CART_CHANGES.inc(outcome="invalid")
+                    return {"status": "invalid", "message": str(e)}
+                updated = _Cart(
+                    customer_id,
+                    cart.version + 1,
+                    items,
+                    cart.draft_order_id,
+                    cart.synced_version,
+                )
+                result = {
+                    "status": "success",
+                    "message": "Cart updated successfully.",
+                    "items_added": bool(items_to_add),
+                    "items_removed": bool(items_to_remove),
+                    "cart": self._view(updated),
+                }
+                if self._write(cart, updated, idempotency_key, result, now):
+                    break
+            else:
+                return self._conflict(
+                    cart, "The cart is being changed elsewhere; try again."
+                )
+            self.applied += 1
+            CART_CHANGES.inc(outcome="applied")
+        self._schedule_sync(customer_id)
+        return result
+
+    def _conflict(self, cart: _Cart, message: str) -> Dict[str, Any]:
+        self.conflicts += 1
+        CART_CHANGES.inc(outcome="conflict")
+        return {"status": "conflict", "message": message, "cart": self._view(cart)}
+
+    def _write(
+        self,
+        cart: _Cart,
+        updated: _Cart,
+        idempotency_key: str,
+        result: Dict[str, Any],
+        now: float,
+    ) -> bool:
+        """Store a modified cart if the stored one is still at its version."""
+        with self._transaction() as db:
+            written = db.execute(
+                "INSERT INTO carts VALUES (?, ?, ?, NULL, 0, ?) "
+                "ON CONFLICT (customer_id) DO UPDATE SET version = excluded.version, "
+                "items = excluded.items, updated_at = excluded.updated_at "
+                "WHERE carts.version = ?",
+                (cart.customer_id, updated.version, json.dumps(updated.items), now)
+                + (cart.version,),
+            ).rowcount
+            if not written:
+                return False
+            if idempotency_key:
+                db.execute(
+                    "DELETE FROM cart_modifications "
+                    "WHERE customer_id = ? AND created_at < ?",
+                    (cart.customer_id, now - self.settings.idempotency_ttl_secs),
+                )
+                db.execute(
+                    "INSERT OR REPLACE INTO cart_modifications VALUES (?, ?, ?, ?)",
+                    (cart.customer_id, idempotency_key, json.dumps(result), now),
+                )
+        cart.version = updated.version
+        cart.items = updated.items
+        return True
+
+    def _schedule_sync(
+        self, customer_id: str, retry_delay: Optional[float] = None
+    ) -> None:
+        """
+        (Re)start a cart's debounce timer for its draft order sync.
+
+        Args:
+            customer_id: The customer ID
+            retry_delay: Seconds until a failed sync is retried; a sync
+                already scheduled by a later change is kept instead
+        """
+        if self._create_draft_order is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Not called from the agent's event loop; sync_pending() catches up
+            return
+        now = loop.time()
+        pending = self._pending.get(customer_id)
+        if pending is not None and retry_delay is not None:
+            return
+        if pending is None:
+            pending = self._pending[customer_id] = _PendingSync(now)
+        elif pending.handle is not None:
+            pending.handle.cancel()
+        delay = min(
+            self.settings.sync_debounce_secs,
+            max(pending.first_change + self.settings.sync_max_delay_secs - now, 0),
+        )
+        if retry_delay is not None:
+            delay = retry_delay
+        pending.handle = loop.call_later(delay, self._start_sync, customer_id)
+
+    def _start_sync(self, customer_id: str) -> None:
+        self._pending.pop(customer_id, None)
+        task = asyncio.get_running_loop().create_task(self.sync(customer_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def sync(self, customer_id: str) -> Optional[str]:
+        """
+        Sync a cart to a new draft order now if it changed since its last sync.
+
+        Args:
+            customer_id: The customer ID
+
+        Returns:
+            The ID of the cart's latest draft order, if it has one.
+        """
+        if self._create_draft_order is None or customer_id in self._syncing:
+            return None
+        with self._lock:
+            cart = self._cart(customer_id)
+            version = cart.version
+            if cart.synced_version >= version:
+                return cart.draft_order_id
+            line_items = [
+                {"variantId": product_id, "quantity": line["quantity"]}
+                for product_id, line in cart.items.items()
+            ]
+
+        draft_order_id = None
+        self._syncing.add(customer_id)
+        try:
+            if line_items:
+                result = await self._create_draft_order(
+                    {
+                        "lineItems": line_items,
+                        "customerId": (
+                            f"gid://shopify/Customer/{numeric_id(customer_id)}"
+                        ),
+                        "note": f"Cart version {version}",
+                    }
+                )
+                payload = decode_tool_result(result)
+                draft = payload.get("draftOrder") if isinstance(payload, dict) else None
+                draft_order_id = draft.get("id") if isinstance(draft, dict) else None
+                if not draft_order_id:
+                    raise RuntimeError(f"createDraftOrder returned {payload!r}")
+        except Exception as e:  # pylint: disable=broad-except
+            self.sync_failures += 1
+            CART_SYNCS.inc(outcome="failed")
+            attempts = self._sync_attempts.get(customer_id, 0) + 1
+            self._sync_attempts[customer_id] = attempts
+            delay = min(
+                self.settings.sync_retry_secs * 2 ** (attempts - 1),
+                self.settings.sync_max_retry_secs,
+            )
+            logger.warning(
+                "Could not sync the cart of %s, retrying in %.0fs: %s",
+                customer_id,
+                delay,
+                e,
+            )
+            self._schedule_sync(customer_id, retry_delay=delay)
+            return None
+        finally:
+            self._syncing.discard(customer_id)
+        self._sync_attempts.pop(customer_id, None)
+
+        with self._lock:
+            with self._transaction() as db:
+                db.execute(
+                    "UPDATE carts SET draft_order_id = ?, synced_version = ? "
+                    "WHERE customer_id = ? AND synced_version < ?",
+                    (draft_order_id, version, customer_id, version),
+                )
+            cart = self._cart(customer_id)
+            if cart.synced_version < version:
+                cart.synced_version = version
+                cart.draft_order_id = draft_order_id
+            changed_since = cart.version > version
+        self.syncs += 1
+        CART_SYNCS.inc(outcome="created" if draft_order_id else "emptied")
+        logger.info(
+            "Synced version %i of the cart of %s to %s",
+            version,
+            customer_id,
+            draft_order_id,
+        )
+        if changed_since:
+            self._schedule_sync(customer_id)
+        return draft_order_id
+
+    async def sync_pending(self) -> None:
+        """Sync every cart waiting for its debounce timer, e.g. at shutdown."""
+        for pending in self._pending.values():
+            if pending.handle is not None:
+                pending.handle.cancel()
+        customer_ids = set(self._pending)
+        self._pending.clear()
+        with self._lock:
+            customer_ids.update(
+                customer_id
+                for customer_id, cart in self._carts.items()
+                if cart.synced_version < cart.version
+            )
+        await asyncio.gather(*(self.sync(customer_id) for customer_id in customer_ids))
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report cart counters.
+
+        Returns:
+            Cached carts, carts waiting for a sync, modifications applied,
+            replayed and refused as conflicts, and syncs and sync failures.
+        """
+        return {
+            "cached": len(self._carts),
+            "pending_syncs": len(self._pending),
+            "applied": self.applied,
+            "replayed": self.replayed,
+            "conflicts": self.conflicts,
+            "syncs": self.syncs,
+            "sync_failures": self.sync_failures,
+        }
+
+
+# Process-wide carts used by the cart tools
+cart_engine = CartEngine(Config().cart)
@@ -0,0 +1,342 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""In-process catalog search index.
+
+The product agent used to split each query into tokens, call findProducts
+once per token and rank the matches itself. This module keeps a BM25 inverted
+index over product titles, tags, product types and descriptions in memory,
+built from a paged findProducts snapshot and refreshed incrementally in the
+background, so a search is a dictionary walk instead of several MCP round
+trips.
+"""
+
+import asyncio
+import heapq
+import logging
+import math
+import re
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+
+from customer_service.config import CatalogIndexSettings
+from customer_service.shared_libraries.mcp_results import (
+    extract_page_info,
+    extract_records,
+)
+
+logger = logging.getLogger(__name__)
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Relative weight of each indexed field
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "tags": 2.0,
+    "product_type": 2.0,
+    "description": 1.0,
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_HTML_RE = re.compile(r"<[^>]+>")
+
+# Calls an MCP tool with the given arguments and returns its result
+ToolCaller = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase index terms.
+
+    Trailing plural "s" is dropped from longer words so that "shorts" and
+    "short" match.
+
+    Args:
+        text: The text to tokenize
+
+    Returns:
+        The list of terms.
+    """
+    terms = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        terms.append(token)
+    return terms
+
+
+def product_fields(product: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Extract the searchable fields from a Shopify product.
+
+    Args:
+        product: A product record from findProducts
+
+    Returns:
+        The product's title, tags, product type and plain-text description.
+    """
+    tags = product.get("tags") or []
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    description = product.get("description") or _HTML_RE.sub(
+        " ", product.get("descriptionHtml") or ""
+    )
+    return {
+        "title": product.get("title") or "",
+        "tags": " ".join(tags),
+        "product_type": product.get("productType") or "",
+        "description": description,
+    }
+
+
+class CatalogIndex:
+    """
+    BM25 inverted index over the product catalog.
+
+    Term frequencies are weighted per field (see FIELD_WEIGHTS) before
+    scoring, so a title match outranks a description match.
+    """
+
+    def __init__(self) -> None:
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._doc_terms: Dict[str, Dict[str, float]] = {}
+        self._doc_length: Dict[str, float] = {}
+        self._titles: Dict[str, str] = {}
+        self._total_length = 0.0
+        # Per-term BM25 contributions, valid until the index next changes
+        self._scored: Dict[str, List[Tuple[str, float]]] = {}
+        self.last_synced_at: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def upsert(self, products: Iterable[Dict[str, Any]]) -> None:
+        """
+        Add or replace products in the index.
+
+        Products that are not active are removed instead.
+
+        Args:
+            products: Product records with at least an "id"
+        """
+        self._scored.clear()
+        for product in products:
+            product_id = product.get("id")
+            if not product_id:
+                continue
+            self.remove([product_id])
+            status = (product.get("status") or "ACTIVE").upper()
+            if status != "ACTIVE":
+                continue
+            terms: Dict[str, float] = {}
+            for field, text in product_fields(product).items():
+                weight = FIELD_WEIGHTS[field]
+                for term in tokenize(text):
+                    terms[term] = terms.get(term, 0.0) + weight
+            length = sum(terms.values())
+            self._doc_terms[product_id] = terms
+            self._doc_length[product_id] = length
+            self._titles[product_id] = product.get("title") or ""
+            self._total_length += length
+            for term, frequency in terms.items():
+                self._postings.setdefault(term, {})[product_id] = frequency
+
+    def remove(self, product_ids: Iterable[str]) -> None:
+        """
+        Remove products from the index.
+
+        Args:
+            product_ids: IDs of the products to remove
+        """
+        self._scored.clear()
+        for product_id in product_ids:
+            terms = self._doc_terms.pop(product_id, None)
+            if terms is None:
+                continue
+            self._total_length -= self._doc_length.pop(product_id)
+            self._titles.pop(product_id, None)
+            for term in terms:
+                posting = self._postings[term]
+                del posting[product_id]
+                if not posting:
+                    del self._postings[term]
+
+    def replace_all(self, products: Iterable[Dict[str, Any]]) -> None:
+        """
+        Rebuild the index from a full snapshot and swap it in.
+
+        Args:
+            products: Every product in the catalog
+        """
+        fresh = CatalogIndex()
+        fresh.upsert(products)
+        self._postings = fresh._postings
+        self._doc_terms = fresh._doc_terms
+        self._doc_length = fresh._doc_length
+        self._titles = fresh._titles
+        self._total_length = fresh._total_length
+        self._scored = {}
+
+    def _term_scores(self, term: str) -> List[Tuple[str, float]]:
+        """Return the BM25 contribution of term to every product containing it."""
+        scored = self._scored.get(term)
+        if scored is not None:
+            return scored
+        posting = self._postings.get(term)
+        if not posting:
+            return []
+        doc_count = len(self._doc_terms)
+        avg_length = self._total_length / doc_count
+        idf = math.log(1 + (doc_count - len(posting) + 0.5) / (len(posting) + 0.5))
+        scored = []
+        for product_id, frequency in posting.items():
+            norm = K1 * (1 - B + B * self._doc_length[product_id] / avg_length)
+            tf = frequency * (K1 + 1) / (frequency + norm)
+            scored.append((product_id, idf * tf))
+        self._scored[term] = scored
+        return scored
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Rank products against a free-text query.
+
+        Args:
+            query: The shopper's query
+            limit: Maximum number of results
+
+        Returns:
+            Up to limit results with "id", "title" and "score", best first.
+        """
+        if not self._doc_terms:
+            return []
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            for product_id, contribution in self._term_scores(term):
+                scores[product_id] = scores.get(product_id, 0.0) + contribution
+        top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [
+            {
+                "id": product_id,
+                "title": self._titles[product_id],
+                "score": round(score, 4),
+            }
+            for product_id, score in top
+        ]
+
+
+class CatalogIndexer:
+    """
+    Keeps a CatalogIndex in sync with Shopify.
+
+    A full snapshot is paged through findProducts at start-up and on every
+    full_rebuild_interval_secs; in between, only products updated since the
+    last sync are fetched and upserted.
+    """
+
+    def __init__(
+        self,
+        index: CatalogIndex,
+        find_products: ToolCaller,
+        settings: CatalogIndexSettings,
+    ):
+        self.index = index
+        self._find_products = find_products
+        self.settings = settings
+        self._task: Optional[asyncio.Task] = None
+        self.ready = asyncio.Event()
+
+    async def _fetch(self, query: str = "") -> List[Dict[str, Any]]:
+        """Page through findProducts and return every matching product."""
+        products: List[Dict[str, Any]] = []
+        cursor = None
+        while True:
+            args: Dict[str, Any] = {"first": self.settings.page_size}
+            if query:
+                args["query"] = query
+            if cursor:
+                args["after"] = cursor
+            result = await self._find_products(args)
+            products.extend(extract_records(result, "products"))
+            has_next, cursor = extract_page_info(result)
+            if not has_next or not cursor:
+                return products
+
+    async def rebuild(self) -> None:
+        """Replace the index with a fresh full snapshot."""
+        started_at = datetime.now(timezone.utc)
+        products = await self._fetch()
+        self.index.replace_all(products)
+        self.index.last_synced_at = started_at
+        self.ready.set()
+        logger.info("Indexed %i catalog products", len(self.index))
+
+    async def refresh(self) -> None:
+        """Upsert products updated since the last sync."""
+        if self.index.last_synced_at is None:
+            await self.rebuild()
+            return
+        started_at = datetime.now(timezone.utc)
+        since = self.index.last_synced_at.strftime("%Y-%m-%dT%H:%M:%SZ")
+        products = await self._fetch(f"updated_at:>'{since}'")
+        self.index.upsert(products)
+        self.index.last_synced_at = started_at
+        logger.debug("Refreshed %i catalog products", len(products))
+
+    async def _run(self) -> None:
+        """Build the index, then keep it fresh until cancelled."""
+        loop = asyncio.get_running_loop()
+        last_rebuild = float("-inf")
+        while True:
+            try:
+                if (
+                    loop.time() - last_rebuild
+                    >= self.settings.full_rebuild_interval_secs
+                ):
+                    await self.rebuild()
+                    last_rebuild = loop.time()
+                else:
+                    await self.refresh()
+            except Exception as e:  # pylint: disable=broad-except
+                logger.error("Catalog index sync failed: %s", e)
+            await asyncio.sleep(self.settings.refresh_interval_secs)
+
+    def start(self) -> None:
+        """Start syncing in the background."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="catalog-indexer")
+
+    async def stop(self) -> None:
+        """Stop background syncing."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Process-wide index queried by the search_catalog tool
+catalog_index = CatalogIndex()
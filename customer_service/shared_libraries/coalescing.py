@@ -0,0 +1,195 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Request coalescing for ID-list MCP tools.
+
+When many shoppers browse the same collection, their sessions ask for
+overlapping sets of product and variant IDs at nearly the same time. A
+CoalescingTool collects the IDs requested within a short window across all
+sessions, sends one deduplicated batched call, and hands each caller back
+only the records it asked for.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from google.adk.tools import BaseTool
+from google.adk.tools.tool_context import ToolContext
+from mcp.types import CallToolResult, TextContent
+
+from customer_service.config import CoalescingSettings
+from customer_service.shared_libraries.mcp_results import extract_records, numeric_id
+from customer_service.shared_libraries.tool_cache import cache_key
+from customer_service.shared_libraries.tool_wrappers import ToolWrapper
+
+logger = logging.getLogger(__name__)
+
+
+class _Batch:
+    """IDs and waiting callers collected during one window."""
+
+    def __init__(self, args: Dict[str, Any]):
+        self.args = args
+        self.ids: Dict[str, None] = {}  # Ordered set
+        self.waiters: List[asyncio.Future] = []
+
+
+class CoalescingTool(ToolWrapper):
+    """
+    Batches concurrent ID lookups into a single call of the wrapped tool.
+
+    Calls are only merged when all their arguments other than the ID list
+    are identical.
+
+    Attributes:
+        id_arg: Name of the argument holding the ID list
+        record_key: Name of the record list in the tool result
+        window_secs: How long to collect IDs before sending a batch
+        max_batch_size: Maximum number of IDs sent in one call
+    """
+
+    def __init__(
+        self,
+        tool: BaseTool,
+        id_arg: str,
+        record_key: str,
+        window_secs: float,
+        max_batch_size: int,
+    ):
+        super().__init__(tool)
+        self.id_arg = id_arg
+        self.record_key = record_key
+        self.window_secs = window_secs
+        self.max_batch_size = max_batch_size
+        self._pending: Dict[str, _Batch] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.requests = 0
+        self.batches = 0
+        self.ids_requested = 0
+        self.ids_sent = 0
+
+    async def run_async(
+        self, *, args: Dict[str, Any], tool_context: ToolContext
+    ) -> Any:
+        ids = [str(i) for i in args.get(self.id_arg) or []]
+        if not ids or len(ids) > self.max_batch_size:
+            return await self.wrapped_tool.run_async(
+                args=args, tool_context=tool_context
+            )
+
+        other_args = {k: v for k, v in args.items() if k != self.id_arg}
+        key = cache_key(self.name, other_args)
+        batch = self._pending.get(key)
+        if batch is not None and len(batch.ids.keys() | ids) > self.max_batch_size:
+            self._flush(key, batch)
+            batch = None
+        if batch is None:
+            batch = self._pending[key] = _Batch(other_args)
+            asyncio.get_running_loop().call_later(
+                self.window_secs, self._flush, key, batch
+            )
+
+        batch.ids.update(dict.fromkeys(ids))
+        future = asyncio.get_running_loop().create_future()
+        batch.waiters.append(future)
+        self.requests += 1
+        self.ids_requested += len(ids)
+
+        result, records_by_id = await future
+        if records_by_id is None:
+            return result
+        # Callers may pass bare numeric IDs or full GIDs
+        records = [
+            records_by_id[numeric_id(i)] for i in ids if numeric_id(i) in records_by_id
+        ]
+        payload = {self.record_key: records}
+        return CallToolResult(
+            content=[TextContent(type="text", text=json.dumps(payload))]
+        )
+
+    def _flush(self, key: str, batch: _Batch) -> None:
+        """Send a batch unless it has already been sent."""
+        if self._pending.get(key) is not batch:
+            return
+        del self._pending[key]
+        # Keep a reference so the task is not garbage-collected mid-flight
+        task = asyncio.create_task(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: _Batch) -> None:
+        """Run one batched call and resolve every waiting caller."""
+        self.batches += 1
+        self.ids_sent += len(batch.ids)
+        args = {**batch.args, self.id_arg: list(batch.ids)}
+        try:
+            result = await self.wrapped_tool.run_async(args=args, tool_context=None)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning("Batched %s call failed: %s", self.name, e)
+            for future in batch.waiters:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        records_by_id: Optional[Dict[str, Any]] = None
+        if not getattr(result, "isError", False):
+            records_by_id = {
+                numeric_id(record.get("id")): record
+                for record in extract_records(result, self.record_key)
+            }
+        for future in batch.waiters:
+            if not future.done():
+                future.set_result((result, records_by_id))
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report coalescing counters.
+
+        Returns:
+            Requests received, batched calls sent, IDs requested by callers
+            and IDs actually sent after deduplication.
+        """
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "ids_requested": self.ids_requested,
+            "ids_sent": self.ids_sent,
+        }
+
+
+def wrap_with_coalescing(tool: BaseTool, settings: CoalescingSettings) -> BaseTool:
+    """
+    Wrap a tool with request coalescing if it is configured for it.
+
+    Args:
+        tool: The tool to wrap
+        settings: Coalescing settings naming the ID argument per tool
+
+    Returns:
+        The coalescing tool, or the tool itself if it is not an ID-list tool
+        or coalescing is disabled.
+    """
+    spec: Optional[Tuple[str, str]] = settings.tools.get(tool.name)
+    if not settings.enabled or spec is None:
+        return tool
+    id_arg, record_key = spec
+    return CoalescingTool(
+        tool,
+        id_arg=id_arg,
+        record_key=record_key,
+        window_secs=settings.window_ms / 1000,
+        max_batch_size=settings.max_batch_size,
+    )
@@ -0,0 +1,381 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Shopify-backed customer profile repository.
+
+Customer profiles are loaded through the listCustomers and findOrders MCP
+tools, validated once into Customer models and kept, together with their
+serialized JSON, in a bounded LRU cache with a TTL. Concurrent requests for
+the same customer share a single load, and preloading a list of customers
+fetches their records with one listCustomers call per batch.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from customer_service.config import Config, CustomerRepositorySettings
+from customer_service.entities.customer import Customer
+from customer_service.shared_libraries.mcp_results import extract_records, numeric_id
+
+logger = logging.getLogger(__name__)
+
+# Calls an MCP tool with the given arguments and returns its result
+ToolCaller = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class _Entry:
+    """A cached profile; customer is None for IDs Shopify does not know."""
+
+    __slots__ = ("customer", "version", "expires_at", "_json")
+
+    def __init__(self, customer: Optional[Customer], expires_at: float):
+        self.customer = customer
+        self.version = (
+            hashlib.sha1(customer.model_dump_json().encode()).hexdigest()[:12]
+            if customer is not None
+            else ""
+        )
+        self.expires_at = expires_at
+        self._json: Optional[str] = None
+
+    @property
+    def json(self) -> Optional[str]:
+        """The profile's Customer.to_json form, serialized on first use."""
+        if self._json is None and self.customer is not None:
+            self._json = self.customer.to_json()
+        return self._json
+
+
+def _consume_exception(future: asyncio.Future) -> None:
+    """Mark a load failure as retrieved when nobody awaited the load."""
+    if not future.cancelled():
+        future.exception()
+
+
+class CustomerRepository:
+    """
+    LRU + TTL cache of customer profiles loaded from Shopify.
+
+    At most max_customers profiles are kept; the least recently used
+    profile is dropped first.
+    """
+
+    def __init__(
+        self,
+        settings: CustomerRepositorySettings,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.settings = settings
+        self._clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._list_customers: Optional[ToolCaller] = None
+        self._find_orders: Optional[ToolCaller] = None
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.load_errors = 0
+        self.evictions = 0
+
+    def bind(self, list_customers: ToolCaller, find_orders: ToolCaller) -> None:
+        """
+        Attach the MCP tools used to load profiles.
+
+        Profiles cached before the tools were available (static fallbacks)
+        are dropped so they are reloaded from Shopify.
+
+        Args:
+            list_customers: Calls listCustomers
+            find_orders: Calls findOrders
+        """
+        self._list_customers = list_customers
+        self._find_orders = find_orders
+        self._entries.clear()
+
+    @property
+    def is_bound(self) -> bool:
+        """Whether the MCP tools have been attached."""
+        return self._list_customers is not None and self._find_orders is not None
+
+    def _entry(self, customer_id: str) -> Optional[_Entry]:
+        """Return the fresh cache entry for a customer, counting hits."""
+        entry = self._entries.get(customer_id)
+        if entry is not None and entry.expires_at > self._clock():
+            self._entries.move_to_end(customer_id)
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def _store(self, customer_id: str, customer: Optional[Customer]) -> _Entry:
+        ttl = (
+            self.settings.ttl_secs
+            if customer is not None
+            else self.settings.negative_ttl_secs
+        )
+        entry = self._entries[customer_id] = _Entry(customer, self._clock() + ttl)
+        self._entries.move_to_end(customer_id)
+        while len(self._entries) > self.settings.max_customers:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def put(self, customer: Customer) -> None:
+        """
+        Cache a profile that was obtained elsewhere.
+
+        Args:
+            customer: The customer profile
+        """
+        self._store(numeric_id(customer.customer_id), customer)
+
+    def get_cached(self, customer_id: str) -> Optional[Customer]:
+        """
+        Return a cached profile without loading it.
+
+        Args:
+            customer_id: The customer ID or GID
+
+        Returns:
+            The Customer, or None if it is not cached or has expired.
+        """
+        entry = self._entry(numeric_id(customer_id))
+        return entry.customer if entry is not None else None
+
+    def get_cached_json(self, customer_id: str) -> Optional[str]:
+        """
+        Return a cached profile's serialized JSON without loading it.
+
+        Args:
+            customer_id: The customer ID or GID
+
+        Returns:
+            The profile JSON, or None if it is not cached or has expired.
+        """
+        entry = self._entry(numeric_id(customer_id))
+        return entry.json if entry is not None else None
+
+    def version(self, customer_id: str) -> Optional[str]:
+        """
+        Return a short content hash of a cached profile.
+
+        The version only changes when a reload returns different data, so it
+        can key caches of anything derived from the profile.
+
+        Args:
+            customer_id: The customer ID or GID
+
+        Returns:
+            The version, or None if the profile is not cached.
+        """
+        entry = self._entries.get(numeric_id(customer_id))
+        return entry.version if entry is not None and entry.version else None
+
+    def invalidate(self, customer_id: Optional[str] = None) -> None:
+        """
+        Drop one cached profile, or all of them.
+
+        Args:
+            customer_id: The customer to drop; every customer if None
+        """
+        if customer_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(numeric_id(customer_id), None)
+
+    async def get(self, customer_id: str) -> Optional[Customer]:
+        """
+        Return a customer's profile, loading it from Shopify on a miss.
+
+        Args:
+            customer_id: The customer ID or GID
+
+        Returns:
+            The Customer, or None if Shopify has no such customer.
+        """
+        customer_id = numeric_id(customer_id)
+        entry = self._entry(customer_id)
+        if entry is not None:
+            return entry.customer
+        future = self._inflight.get(customer_id) or self._start_load([customer_id])[0]
+        return await asyncio.shield(future)
+
+    async def get_json(self, customer_id: str) -> Optional[str]:
+        """
+        Return a customer's serialized profile, loading it on a miss.
+
+        Args:
+            customer_id: The customer ID or GID
+
+        Returns:
+            The profile JSON, or None if Shopify has no such customer.
+        """
+        customer = await self.get(customer_id)
+        if customer is None:
+            return None
+        entry = self._entries.get(numeric_id(customer_id))
+        return entry.json if entry is not None else customer.to_json()
+
+    def prefetch(self, customer_id: str) -> None:
+        """
+        Start loading a profile in the background if it is not cached.
+
+        Args:
+            customer_id: The customer ID or GID
+        """
+        customer_id = numeric_id(customer_id)
+        entry = self._entries.get(customer_id)
+        if entry is not None and entry.expires_at > self._clock():
+            return
+        if customer_id not in self._inflight:
+            self._start_load([customer_id])
+
+    async def preload(self, customer_ids: Iterable[str]) -> int:
+        """
+        Load many profiles, batching their listCustomers lookups.
+
+        Args:
+            customer_ids: The customer IDs or GIDs to load
+
+        Returns:
+            The number of customers now cached with a profile.
+        """
+        ids = list(dict.fromkeys(numeric_id(i) for i in customer_ids))
+        now = self._clock()
+        missing = [
+            i
+            for i in ids
+            if i not in self._inflight
+            and not (i in self._entries and self._entries[i].expires_at > now)
+        ]
+        self._start_load(missing)
+        futures = [self._inflight[i] for i in ids if i in self._inflight]
+        await asyncio.gather(
+            *(asyncio.shield(f) for f in futures), return_exceptions=True
+        )
+        return sum(
+            1
+            for i in ids
+            if i in self._entries and self._entries[i].customer is not None
+        )
+
+    def _start_load(self, customer_ids: List[str]) -> List[asyncio.Future]:
+        """Register in-flight futures for customers and start loading them."""
+        if not self.is_bound:
+            raise RuntimeError("CustomerRepository is not bound to the MCP tools")
+        loop = asyncio.get_running_loop()
+        futures = []
+        for customer_id in customer_ids:
+            future = self._inflight[customer_id] = loop.create_future()
+            future.add_done_callback(_consume_exception)
+            futures.append(future)
+        if customer_ids:
+            task = asyncio.create_task(self._load(customer_ids))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return futures
+
+    def _settle(self, customer_id: str, outcome: Any) -> None:
+        future = self._inflight.pop(customer_id, None)
+        if future is None or future.done():
+            return
+        if isinstance(outcome, BaseException):
+            future.set_exception(outcome)
+        else:
+            future.set_result(outcome)
+
+    async def _fetch_orders(self, customer_id: str) -> List[Dict[str, Any]]:
+        result = await self._find_orders(
+            {
+                "first": self.settings.recent_orders,
+                "query": f"customer_id:{customer_id}",
+                "sortKey": "PROCESSED_AT",
+                "reverse": True,
+            }
+        )
+        return extract_records(result, "orders")
+
+    async def _load(self, customer_ids: List[str]) -> None:
+        """Load profiles and settle their in-flight futures."""
+        try:
+            records: Dict[str, Dict[str, Any]] = {}
+            size = self.settings.batch_size
+            for start in range(0, len(customer_ids), size):
+                batch = customer_ids[start : start + size]
+                result = await self._list_customers(
+                    {
+                        "first": len(batch),
+                        "query": " OR ".join(f"id:{i}" for i in batch),
+                    }
+                )
+                for record in extract_records(result, "customers"):
+                    records[numeric_id(record.get("id"))] = record
+
+            semaphore = asyncio.Semaphore(self.settings.load_concurrency)
+
+            async def build(customer_id: str) -> Optional[Customer]:
+                record = records.get(customer_id)
+                if record is None:
+                    return None
+                async with semaphore:
+                    orders = await self._fetch_orders(customer_id)
+                return Customer.from_shopify(
+                    record, orders, store_name=self.settings.store_name
+                )
+
+            customers = await asyncio.gather(
+                *(build(i) for i in customer_ids), return_exceptions=True
+            )
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning("Loading customers %s failed: %s", customer_ids, e)
+            self.load_errors += len(customer_ids)
+            for customer_id in customer_ids:
+                self._settle(customer_id, e)
+            return
+
+        for customer_id, customer in zip(customer_ids, customers):
+            if isinstance(customer, Exception):
+                logger.warning("Loading customer %s failed: %s", customer_id, customer)
+                self.load_errors += 1
+            else:
+                self.loads += 1
+                self._store(customer_id, customer)
+            self._settle(customer_id, customer)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report repository counters.
+
+        Returns:
+            Cached profiles, cache hits and misses, profiles loaded, failed
+            loads, loads in flight and LRU evictions.
+        """
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            "load_errors": self.load_errors,
+            "inflight": len(self._inflight),
+            "evictions": self.evictions,
+        }
+
+
+# Process-wide repository shared by every session
+customer_repository = CustomerRepository(Config().customers)
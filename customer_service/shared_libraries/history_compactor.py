@@ -0,0 +1,238 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compaction of the conversation history sent with each model call.
+
+ADK rebuilds `llm_request.contents` from the whole session on every model
+call, so full product and order JSON returned by tools many turns ago is
+resent again and again. Before each call the HistoryCompactor:
+
+1. keeps the last `keep_turns` turns verbatim and replaces older tool
+   results, including other agents' results that ADK quotes as text, with
+   a one-line reference naming the tool and the records it returned;
+2. if the contents still exceed `max_tokens`, also compacts tool results of
+   every turn but the current one;
+3. if they still exceed it, drops the oldest turns, always keeping the
+   current one.
+
+A turn starts with a customer message. Function calls and their responses
+always stay paired, since results are summarized in place and turns are
+dropped whole. The compacted contents are a copy ADK makes per call, so the
+session history itself is untouched.
+"""
+
+import json
+import logging
+import re
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from google.genai import types
+
+from customer_service.config import Config, HistoryCompactionSettings
+from customer_service.shared_libraries.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# ADK's rendering of another agent's tool result, see _convert_foreign_event
+_FOREIGN_RESULT = re.compile(
+    r"^(\[[^\]]+\] `(?P<tool>[^`]+)` tool returned result: )(?P<result>.*)$",
+    re.DOTALL,
+)
+# Identifying fields, in JSON, escaped JSON or Python repr
+_IDENTIFIER = re.compile(
+    r"""\\*["'](?:title|name|id)\\*["']\s*:\s*\\*["']([^"'\\]{1,80})"""
+)
+_MAX_IDENTIFIERS = 8
+
+TOKENS_SAVED = metrics.counter(
+    "agent_history_tokens_saved_total",
+    "Estimated prompt tokens removed by history compaction",
+    ["agent"],
+)
+COMPACTIONS = metrics.counter(
+    "agent_history_compactions_total",
+    "Model requests whose history was compacted",
+    ["agent"],
+)
+
+
+class Compaction(NamedTuple):
+    """The result of compacting a request's contents."""
+
+    contents: List[types.Content]
+    tokens_before: int
+    tokens_after: int
+    turns_dropped: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+def _json_default(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    return str(value)
+
+
+def summarize_result(tool_name: str, result: Any, max_chars: int) -> Optional[str]:
+    """
+    Summarize a tool result as a reference to the records it returned.
+
+    Args:
+        tool_name: The tool that returned the result
+        result: The result, or its text rendering
+        max_chars: Results up to this long are kept as they are
+
+    Returns:
+        A one-line summary, or None if the result is short enough to keep.
+    """
+    text = (
+        result
+        if isinstance(result, str)
+        else json.dumps(result, default=_json_default)
+    )
+    if len(text) <= max_chars:
+        return None
+    identifiers: List[str] = []
+    for match in _IDENTIFIER.finditer(text):
+        value = match.group(1).strip()
+        if value and value not in identifiers:
+            identifiers.append(value)
+            if len(identifiers) == _MAX_IDENTIFIERS:
+                break
+    mentions = f"; it mentioned {', '.join(identifiers)}" if identifiers else ""
+    return (
+        f"[Earlier {tool_name} result of {len(text)} characters omitted"
+        f"{mentions}. Call {tool_name} again if its details are needed.]"
+    )
+
+
+def _is_turn_start(content: types.Content) -> bool:
+    """Whether a content is a customer message rather than a tool result."""
+    if content.role != "user" or not content.parts:
+        return False
+    if any(part.function_response for part in content.parts):
+        return False
+    text = content.parts[0].text
+    return text is not None and not text.startswith("For context:")
+
+
+class HistoryCompactor:
+    """
+    Compacts model request contents to recent turns and a token budget.
+
+    Attributes:
+        settings: Turns kept verbatim, token budget and summary settings
+        requests: Requests seen
+        compacted: Requests whose contents were changed
+        tokens_saved: Estimated tokens removed across all requests
+    """
+
+    def __init__(self, settings: HistoryCompactionSettings):
+        self.settings = settings
+        self.requests = 0
+        self.compacted = 0
+        self.tokens_saved = 0
+
+    def compact(self, contents: List[types.Content]) -> Compaction:
+        """
+        Compact a request's contents.
+
+        Args:
+            contents: The request contents, oldest first
+
+        Returns:
+            The compacted contents with token estimates before and after.
+        """
+        tokens_before = metrics.estimate_tokens(contents)
+        self.requests += 1
+        if not self.settings.enabled or not contents:
+            return Compaction(contents, tokens_before, tokens_before, 0)
+
+        turns = self._split_turns(contents)
+        for turn in turns[: -self.settings.keep_turns]:
+            self._summarize_turn(turn)
+
+        budget = self.settings.max_tokens
+        tokens = metrics.estimate_tokens([c for turn in turns for c in turn])
+        if tokens > budget:
+            for turn in turns[:-1]:
+                self._summarize_turn(turn)
+            tokens = metrics.estimate_tokens([c for turn in turns for c in turn])
+
+        dropped = 0
+        while tokens > budget and len(turns) > 1:
+            tokens -= metrics.estimate_tokens(turns.pop(0))
+            dropped += 1
+
+        compacted = [content for turn in turns for content in turn]
+        result = Compaction(compacted, tokens_before, tokens, dropped)
+        if result.tokens_saved > 0:
+            self.compacted += 1
+            self.tokens_saved += result.tokens_saved
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report compaction counters.
+
+        Returns:
+            Requests seen and compacted, and estimated tokens saved.
+        """
+        return {
+            "requests": self.requests,
+            "compacted": self.compacted,
+            "tokens_saved": self.tokens_saved,
+        }
+
+    @staticmethod
+    def _split_turns(contents: List[types.Content]) -> List[List[types.Content]]:
+        """Group contents into turns, each starting with a customer message."""
+        turns: List[List[types.Content]] = []
+        for content in contents:
+            if not turns or _is_turn_start(content):
+                turns.append([])
+            turns[-1].append(content)
+        return turns
+
+    def _summarize_turn(self, turn: List[types.Content]) -> None:
+        """Replace the turn's long tool results with summaries, in place."""
+        for index, content in enumerate(turn):
+            parts = [self._summarize_part(part) for part in content.parts or []]
+            if any(new is not old for new, old in zip(parts, content.parts or [])):
+                turn[index] = types.Content(role=content.role, parts=parts)
+
+    def _summarize_part(self, part: types.Part) -> types.Part:
+        max_chars = self.settings.max_result_chars
+        response = part.function_response
+        if response is not None:
+            summary = summarize_result(response.name, response.response, max_chars)
+            if summary is None:
+                return part
+            return types.Part(
+                function_response=types.FunctionResponse(
+                    id=response.id, name=response.name, response={"result": summary}
+                )
+            )
+        match = _FOREIGN_RESULT.match(part.text or "")
+        if match is not None:
+            summary = summarize_result(match["tool"], match["result"], max_chars)
+            if summary is not None:
+                return types.Part(text=match.group(1) + summary)
+        return part
+
+
+# Process-wide compactor shared by every agent
+history_compactor = HistoryCompactor(Config().history_compaction)
@@ -0,0 +1,103 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Per-session global instruction.
+
+The global instruction used to be rendered once at import time for the
+customer named in the environment, so a process could only serve that one
+customer. GlobalInstructionProvider is passed to the agents as their
+global_instruction and renders it for each request from the session's
+customer ID: a static prefix, byte-identical for every customer, followed by
+the customer's compact profile.
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from google.adk.agents.readonly_context import ReadonlyContext
+
+from customer_service.shared_libraries.callbacks import CUSTOMER_ID
+from customer_service.shared_libraries.customer_repository import (
+    customer_repository,
+)
+from customer_service.shared_libraries.profile_serializer import profile_serializer
+
+logger = logging.getLogger(__name__)
+
+# Shown in place of the profile while it is still being loaded
+PROFILE_UNAVAILABLE = '{"status":"loading"}'
+
+
+class GlobalInstructionProvider:
+    """
+    Renders the global instruction for the session's customer.
+
+    Rendered instructions are cached per customer and profile version.
+
+    Attributes:
+        prefix: Static text preceding the customer profile
+        cache_size: Number of rendered instructions kept in memory
+    """
+
+    def __init__(self, prefix: str, cache_size: int = 10000):
+        self.prefix = prefix
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, customer_id: str, fallback: str = PROFILE_UNAVAILABLE) -> str:
+        """
+        Render the global instruction for a customer.
+
+        Args:
+            customer_id: The customer the session belongs to
+            fallback: Profile text used while the profile is not cached
+
+        Returns:
+            The static prefix followed by the customer's compact profile.
+        """
+        customer = customer_repository.get_cached(customer_id)
+        if customer is None:
+            return f"{self.prefix}{fallback}\n"
+
+        key = (customer.customer_id, customer_repository.version(customer_id) or "")
+        instruction = self._cache.get(key)
+        if instruction is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return instruction
+        self.misses += 1
+        profile = profile_serializer.serialize(customer, version=key[1] or None)
+        instruction = self._cache[key] = f"{self.prefix}{profile.text}\n"
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return instruction
+
+    def __call__(self, context: ReadonlyContext) -> str:
+        state = context.state
+        return self.render(
+            state.get("customer_id", CUSTOMER_ID),
+            fallback=state.get("customer_profile", PROFILE_UNAVAILABLE),
+        )
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report instruction cache counters.
+
+        Returns:
+            Cached instructions, cache hits and cache misses.
+        """
+        return {"size": len(self._cache), "hits": self.hits, "misses": self.misses}
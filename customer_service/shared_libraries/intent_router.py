@@ -0,0 +1,445 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Deterministic routing of customer messages to the sub-agents.
+
+For most order and product questions the root agent's model call only
+decides to call transfer_to_agent. The IntentRouter predicts that decision
+locally so the call can be skipped:
+
+1. keyword and regex rules, e.g. "#1042" or "track my order", route a
+   message outright when all matching rules agree;
+2. otherwise a multinomial logistic regression over TF-IDF weighted
+   unigrams and bigrams, trained on SEED_EXAMPLES when first used, gives
+   each intent a probability.
+
+Messages predicted with at least `min_confidence` are dispatched; the rest,
+and an `audit_rate` sample of the confident ones, still go to the root
+model, whose delegation is then compared with the prediction to measure
+routing accuracy.
+"""
+
+import logging
+import math
+import random
+import re
+from collections import Counter, defaultdict
+from typing import (
+    Callable,
+    Collection,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from customer_service.config import Config, IntentRouterSettings
+from customer_service.shared_libraries.metrics import metrics
+from customer_service.shared_libraries.response_cache import normalize_query, stem
+
+logger = logging.getLogger(__name__)
+
+ORDER = "order_agent"
+PRODUCT = "product_agent"
+# Messages the root agent answers itself
+GENERAL = "general"
+
+# (pattern, intent); a message matching rules of one intent only is routed
+DEFAULT_RULES: List[Tuple[str, str]] = [
+    (r"#\s?\d{3,}", ORDER),
+    (r"\btrack(ing)?\b", ORDER),
+    (r"\bwhere('?s| is) my (order|package|parcel|shipment|delivery)\b", ORDER),
+    (r"\b(order|delivery|shipping) status\b", ORDER),
+    (r"\bmy (last|latest|recent|previous|past) orders?\b", ORDER),
+    (r"\border (number|no|history|id)\b", ORDER),
+    (r"\b(awb|courier)\b", ORDER),
+    (r"\b(not|never) (been )?(delivered|shipped|received|arrived)\b", ORDER),
+    (r"\b(recommend|suggest)", PRODUCT),
+    (r"\bdo you (have|sell|stock|carry)\b", PRODUCT),
+    (r"\b(in|out of) stock\b", PRODUCT),
+    (r"\b(which|what) size\b", PRODUCT),
+    (r"\bsize (chart|guide)\b", PRODUCT),
+    (r"\b(compare|difference between)\b", PRODUCT),
+]
+
+# (message, intent) pairs the classifier is trained on
+SEED_EXAMPLES: List[Tuple[str, str]] = [
+    ("Where is my order?", ORDER),
+    ("When will my order arrive", ORDER),
+    ("Has my package shipped yet?", ORDER),
+    ("Can you check the status of my order", ORDER),
+    ("I ordered last week and haven't received anything", ORDER),
+    ("my parcel is late", ORDER),
+    ("What did I order last time?", ORDER),
+    ("show me my past orders", ORDER),
+    ("Is my order out for delivery?", ORDER),
+    ("I need the tracking number for my shipment", ORDER),
+    ("When was my last order delivered", ORDER),
+    ("My delivery hasn't come yet", ORDER),
+    ("order 1579", ORDER),
+    ("what's happening with order 1042", ORDER),
+    ("did my order get dispatched", ORDER),
+    ("how many orders have I placed", ORDER),
+    ("The courier says delivered but I didn't get it", ORDER),
+    ("expected delivery date for my order", ORDER),
+    ("was my payment for the order successful", ORDER),
+    ("which items were in my previous order", ORDER),
+    ("my order was cancelled why", ORDER),
+    ("can you find my recent purchase", ORDER),
+    ("Do you have a tummy control bodysuit?", PRODUCT),
+    ("Recommend shapewear for a wedding dress", PRODUCT),
+    ("I'm looking for high waist shaping shorts", PRODUCT),
+    ("what size should I get in the sculpt bodysuit", PRODUCT),
+    ("Is the seamless brief available in black?", PRODUCT),
+    ("show me your new arrivals", PRODUCT),
+    ("which shaper is best for a pear shaped body", PRODUCT),
+    ("compare the thigh shaper and the high waist brief", PRODUCT),
+    ("what fabric is the bralette made of", PRODUCT),
+    ("I need something to wear under a bodycon dress", PRODUCT),
+    ("any shapewear under 1000 rupees", PRODUCT),
+    ("do the leggings come in plus sizes", PRODUCT),
+    ("is the slip dress breathable", PRODUCT),
+    ("suggest a cami for everyday wear", PRODUCT),
+    ("what colours does the bodysuit come in", PRODUCT),
+    ("best product for lower belly", PRODUCT),
+    ("tell me about the postpartum belt", PRODUCT),
+    ("is the 3XL shaper back in stock", PRODUCT),
+    ("show me strapless options", PRODUCT),
+    ("how do I wash the sculpt bodysuit", PRODUCT),
+    ("which products help with back fat", PRODUCT),
+    ("I want a comfortable bra for daily use", PRODUCT),
+    ("Hi", GENERAL),
+    ("Hello there", GENERAL),
+    ("Thank you so much!", GENERAL),
+    ("ok thanks bye", GENERAL),
+    ("What is your return policy?", GENERAL),
+    ("How do I return something", GENERAL),
+    ("Can I exchange for a different size", GENERAL),
+    ("Do you ship internationally?", GENERAL),
+    ("How long does shipping usually take", GENERAL),
+    ("What payment methods do you accept", GENERAL),
+    ("Is cash on delivery available", GENERAL),
+    ("Do you have a store near me", GENERAL),
+    ("Can I get a discount code", GENERAL),
+    ("I want to talk to a human", GENERAL),
+    ("how can I contact customer care", GENERAL),
+    ("What are your customer service hours", GENERAL),
+    ("who are you", GENERAL),
+    ("can you help me", GENERAL),
+    ("update my email address", GENERAL),
+    ("how do refunds work", GENERAL),
+    ("is there a loyalty program", GENERAL),
+    ("what's in my cart", GENERAL),
+]
+
+ROUTED = metrics.counter(
+    "agent_router_messages_total",
+    "Customer messages seen by the intent router, by predicted intent",
+    ["intent", "decision"],
+)
+COMPARED = metrics.counter(
+    "agent_router_comparisons_total",
+    "Router predictions compared with the root model's delegation",
+    ["predicted", "delegated"],
+)
+
+# Weight decay keeping the few training examples from being memorized
+_L2 = 1e-3
+
+
+class Route(NamedTuple):
+    """A predicted intent and how sure the router is of it."""
+
+    intent: str
+    confidence: float
+    source: str  # "rule" or "classifier"
+
+
+def ngrams(text: str) -> List[str]:
+    """
+    Split a message into stemmed unigrams and bigrams.
+
+    Args:
+        text: The customer's message
+
+    Returns:
+        Stemmed words followed by pairs of adjacent stemmed words. Unlike
+        response_cache.query_terms, stopwords such as "my" are kept since
+        they tell orders from policies.
+    """
+    words = [stem(word) for word in normalize_query(text).split()]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def _softmax(scores: List[float]) -> List[float]:
+    top = max(scores)
+    exps = [math.exp(score - top) for score in scores]
+    total = sum(exps)
+    return [e / total for e in exps]
+
+
+class LinearClassifier:
+    """
+    Multinomial logistic regression over TF-IDF weighted n-grams.
+
+    Attributes:
+        labels: The intents, in weight order
+        idf: Inverse document frequency of each n-gram seen in training
+    """
+
+    def __init__(
+        self,
+        labels: List[str],
+        idf: Dict[str, float],
+        weights: List[Dict[str, float]],
+        bias: List[float],
+    ):
+        self.labels = labels
+        self.idf = idf
+        self._weights = weights
+        self._bias = bias
+
+    @classmethod
+    def fit(
+        cls,
+        examples: Sequence[Tuple[str, str]],
+        epochs: int,
+        learning_rate: float,
+    ) -> "LinearClassifier":
+        """
+        Train a classifier with full-batch gradient descent.
+
+        Args:
+            examples: (message, intent) pairs
+            epochs: Gradient descent passes over the examples
+            learning_rate: Step size
+
+        Returns:
+            The trained classifier. Training is deterministic.
+        """
+        documents = [(ngrams(text), label) for text, label in examples]
+        labels = sorted({label for _, label in documents})
+        frequency: Counter = Counter()
+        for grams, _ in documents:
+            frequency.update(set(grams))
+        count = len(documents)
+        idf = {
+            gram: math.log((1 + count) / (1 + df)) + 1
+            for gram, df in frequency.items()
+        }
+        weights = [defaultdict(float) for _ in labels]
+        model = cls(labels, idf, weights, [0.0] * len(labels))
+        samples = [
+            (model.vectorize(grams), labels.index(label))
+            for grams, label in documents
+        ]
+
+        for _ in range(epochs):
+            weight_grads = [defaultdict(float) for _ in labels]
+            bias_grads = [0.0] * len(labels)
+            for vector, target in samples:
+                for index, prob in enumerate(model._probabilities(vector)):
+                    error = prob - (index == target)
+                    bias_grads[index] += error
+                    grads = weight_grads[index]
+                    for gram, value in vector.items():
+                        grads[gram] += error * value
+            for index, weights in enumerate(model._weights):
+                model._bias[index] -= learning_rate * bias_grads[index] / count
+                for gram, grad in weight_grads[index].items():
+                    weights[gram] -= learning_rate * (
+                        grad / count + _L2 * weights[gram]
+                    )
+        return model
+
+    def vectorize(self, grams: List[str]) -> Dict[str, float]:
+        """Weigh known n-grams by TF-IDF, normalized to unit length."""
+        vector = {
+            gram: tf * self.idf[gram]
+            for gram, tf in Counter(grams).items()
+            if gram in self.idf
+        }
+        norm = math.sqrt(sum(value * value for value in vector.values()))
+        return {gram: value / norm for gram, value in vector.items()} if norm else {}
+
+    def _probabilities(self, vector: Dict[str, float]) -> List[float]:
+        scores = [
+            bias + sum(weights.get(gram, 0.0) * v for gram, v in vector.items())
+            for weights, bias in zip(self._weights, self._bias)
+        ]
+        return _softmax(scores)
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """
+        Predict a message's intent.
+
+        Args:
+            text: The customer's message
+
+        Returns:
+            The most probable intent and its probability; GENERAL with
+            probability 0 if the message has no known n-gram.
+        """
+        vector = self.vectorize(ngrams(text))
+        if not vector:
+            return GENERAL, 0.0
+        probabilities = self._probabilities(vector)
+        best = max(range(len(self.labels)), key=probabilities.__getitem__)
+        return self.labels[best], probabilities[best]
+
+
+class IntentRouter:
+    """
+    Predicts which agent should answer a message and tracks its accuracy.
+
+    Attributes:
+        settings: Confidence threshold, audit rate and training settings
+        dispatched: Messages routed without a root model call
+        deferred: Messages left to the root model, audits included
+        audited: Confident messages left to the root model for comparison
+        compared: Predictions compared with the root model's delegation
+        agreed: Compared predictions that matched the delegation
+    """
+
+    def __init__(
+        self,
+        settings: IntentRouterSettings,
+        examples: Sequence[Tuple[str, str]] = SEED_EXAMPLES,
+        rules: Sequence[Tuple[str, str]] = DEFAULT_RULES,
+        sample: Callable[[], float] = random.random,
+    ):
+        self.settings = settings
+        self._examples = list(examples)
+        self._rules = [(re.compile(pattern), intent) for pattern, intent in rules]
+        self._sample = sample
+        self._classifier: Optional[LinearClassifier] = None
+        self.dispatched = 0
+        self.deferred = 0
+        self.audited = 0
+        self.compared = 0
+        self.agreed = 0
+
+    @property
+    def classifier(self) -> LinearClassifier:
+        """The classifier, trained on first use."""
+        if self._classifier is None:
+            self._classifier = LinearClassifier.fit(
+                self._examples, self.settings.epochs, self.settings.learning_rate
+            )
+        return self._classifier
+
+    def classify(self, text: str) -> Route:
+        """
+        Predict a message's intent.
+
+        Args:
+            text: The customer's message
+
+        Returns:
+            The rules' intent with confidence 1 if the matching rules agree,
+            otherwise the classifier's prediction.
+        """
+        lowered = text.lower()
+        matched = {
+            intent for pattern, intent in self._rules if pattern.search(lowered)
+        }
+        if len(matched) == 1:
+            return Route(matched.pop(), 1.0, "rule")
+        intent, confidence = self.classifier.predict(text)
+        return Route(intent, confidence, "classifier")
+
+    def dispatch(self, route: Route, agents: Collection[str]) -> bool:
+        """
+        Decide whether a message skips the root model call.
+
+        Args:
+            route: The message's predicted intent
+            agents: Names of the sub-agents the message can be sent to
+
+        Returns:
+            Whether to transfer the message to `route.intent` directly.
+        """
+        confident = (
+            self.settings.enabled
+            and route.intent in agents
+            and route.confidence >= self.settings.min_confidence
+        )
+        if confident and self._sample() < self.settings.audit_rate:
+            self.audited += 1
+            decision = "audited"
+        elif confident:
+            self.dispatched += 1
+            decision = "dispatched"
+        else:
+            decision = "deferred"
+        if decision != "dispatched":
+            self.deferred += 1
+        ROUTED.inc(intent=route.intent, decision=decision)
+        return decision == "dispatched"
+
+    def record(self, route: Route, delegated: str) -> bool:
+        """
+        Compare a prediction with the root model's delegation.
+
+        Args:
+            route: The router's prediction for a deferred message
+            delegated: The agent the model transferred to, or GENERAL if it
+                answered itself
+
+        Returns:
+            Whether the prediction matched.
+        """
+        agreed = route.intent == delegated
+        self.compared += 1
+        self.agreed += agreed
+        COMPARED.inc(predicted=route.intent, delegated=delegated)
+        logger.log(
+            logging.DEBUG if agreed else logging.INFO,
+            "Intent router predicted %s (%.2f by %s), model chose %s; "
+            "accuracy %.1f%% over %i messages",
+            route.intent,
+            route.confidence,
+            route.source,
+            delegated,
+            100.0 * self.accuracy(),
+            self.compared,
+        )
+        return agreed
+
+    def accuracy(self) -> float:
+        """Share of compared predictions that matched, 0 before any."""
+        return self.agreed / self.compared if self.compared else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Report routing counters.
+
+        Returns:
+            Messages dispatched, deferred and audited, and the predictions
+            compared with the model's delegation and their accuracy.
+        """
+        return {
+            "dispatched": self.dispatched,
+            "deferred": self.deferred,
+            "audited": self.audited,
+            "compared": self.compared,
+            "agreed": self.agreed,
+            "accuracy": self.accuracy(),
+        }
+
+
+# Process-wide router in front of the root agent
+intent_router = IntentRouter(Config().intent_router)
@@ -0,0 +1,435 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Supervised pool of Shopify MCP server connections.
+
+A single stdio MCP server serializes every tool call made by every
+conversation in the process. This module runs several MCP server
+subprocesses side by side, dispatches each call to the member with the
+fewest outstanding requests, pings members periodically and swaps dead
+members for warm spares.
+"""
+
+import asyncio
+import itertools
+import logging
+import sys
+from contextlib import AsyncExitStack
+from typing import Any, Dict, List, Optional, Set, TextIO
+
+import anyio
+from google.adk.tools.mcp_tool.mcp_session_manager import MCPSessionManager
+from google.adk.tools.mcp_tool.mcp_tool import MCPTool
+from google.adk.tools.tool_context import ToolContext
+from mcp import ClientSession, StdioServerParameters
+from mcp.types import Tool as McpBaseTool
+
+from customer_service.config import MCPPoolSettings
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean the underlying MCP server connection is gone.
+_CONNECTION_ERRORS = (
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+    ConnectionError,
+)
+
+
+class PoolExhaustedError(RuntimeError):
+    """Raised when no MCP server connection can be made available."""
+
+
+class _PoolMember:
+    """
+    A single MCP server subprocess and its client session.
+
+    The connection is opened and closed inside one long-lived task so that
+    the anyio cancel scopes used by the stdio transport are entered and
+    exited from the same task.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self) -> None:
+        self.member_id = next(self._ids)
+        self.session: Optional[ClientSession] = None
+        self.outstanding = 0
+        self.alive = False
+        self._ready: Optional[asyncio.Future] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(
+        self, connection_params: StdioServerParameters, errlog: TextIO
+    ) -> ClientSession:
+        """
+        Spawn the MCP server and wait for its session to be initialized.
+
+        Args:
+            connection_params: Parameters used to spawn the MCP server
+            errlog: Stream receiving the server's stderr
+
+        Returns:
+            The initialized client session.
+        """
+        loop = asyncio.get_running_loop()
+        self._ready = loop.create_future()
+        self._stop = asyncio.Event()
+        self._task = asyncio.create_task(
+            self._serve(connection_params, errlog),
+            name=f"mcp-pool-member-{self.member_id}",
+        )
+        return await self._ready
+
+    async def _serve(
+        self, connection_params: StdioServerParameters, errlog: TextIO
+    ) -> None:
+        """Own the connection until asked to stop or the server dies."""
+        try:
+            async with AsyncExitStack() as exit_stack:
+                self.session = await MCPSessionManager.initialize_session(
+                    connection_params=connection_params,
+                    exit_stack=exit_stack,
+                    errlog=errlog,
+                )
+                self.alive = True
+                self._ready.set_result(self.session)
+                await self._stop.wait()
+        except Exception as e:  # pylint: disable=broad-except
+            if not self._ready.done():
+                self._ready.set_exception(e)
+            else:
+                logger.warning("MCP pool member %i exited: %s", self.member_id, e)
+        finally:
+            self.alive = False
+
+    async def ping(self, timeout_secs: float) -> bool:
+        """
+        Check that the MCP server still answers.
+
+        Args:
+            timeout_secs: Maximum time to wait for the ping response
+
+        Returns:
+            True if the server answered in time, False otherwise.
+        """
+        if not self.alive or self.session is None:
+            return False
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout=timeout_secs)
+            return True
+        except (asyncio.TimeoutError, *_CONNECTION_ERRORS) as e:
+            logger.warning(
+                "Health check failed for MCP pool member %i: %r", self.member_id, e
+            )
+            return False
+
+    async def close(self) -> None:
+        """Stop the member and wait for its subprocess to exit."""
+        self.alive = False
+        if self._stop is not None:
+            self._stop.set()
+        if self._task is not None:
+            if not self._ready.done() or self._ready.cancelled():
+                # Still initializing, so it will never wait on _stop
+                self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                if not self._task.cancelled():
+                    raise
+            except Exception as e:  # pylint: disable=broad-except
+                logger.debug("Error closing MCP pool member %i: %s", self.member_id, e)
+
+
+class PooledMCPTool(MCPTool):
+    """
+    An MCP tool whose calls are dispatched through an MCPConnectionPool.
+
+    The tool keeps the declaration of the underlying MCP tool, so agents
+    and callbacks see exactly the same tool surface as with a single
+    server connection.
+    """
+
+    def __init__(self, mcp_tool: McpBaseTool, pool: "MCPConnectionPool"):
+        super().__init__(
+            mcp_tool=mcp_tool,
+            mcp_session=pool.primary_session,
+            mcp_session_manager=None,
+        )
+        self._pool = pool
+
+    async def run_async(self, *, args: Dict[str, Any], tool_context: ToolContext):
+        """
+        Run the tool on the least busy pool member.
+
+        Args:
+            args: The arguments to pass to the MCP tool
+            tool_context: The tool context from the calling agent
+
+        Returns:
+            The MCP CallToolResult.
+        """
+        return await self._pool.call_tool(self.name, args)
+
+
+class MCPConnectionPool:
+    """
+    Pool of MCP server subprocesses with least-outstanding-requests dispatch.
+
+    Attributes:
+        connection_params: Parameters used to spawn each MCP server
+        settings: Pool size, spare count, timeouts and health-check cadence
+    """
+
+    def __init__(
+        self,
+        connection_params: StdioServerParameters,
+        settings: MCPPoolSettings,
+        errlog: TextIO = sys.stderr,
+    ):
+        self.connection_params = connection_params
+        self.settings = settings
+        self._errlog = errlog
+        self._active: List[_PoolMember] = []
+        self._spares: List[_PoolMember] = []
+        self._replenish_lock = asyncio.Lock()
+        self._health_task: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._closed = False
+        self.replacements = 0
+
+    @property
+    def primary_session(self) -> Optional[ClientSession]:
+        """Session of the first active member, used for tool metadata."""
+        return self._active[0].session if self._active else None
+
+    async def start(self) -> List[MCPTool]:
+        """
+        Start all pool members and list the tools exposed by the server.
+
+        Returns:
+            One PooledMCPTool per tool exposed by the MCP server.
+        """
+        await self._replenish()
+        if not self._active:
+            raise PoolExhaustedError("No MCP server could be started")
+        tools_response = await self._active[0].session.list_tools()
+        self._health_task = asyncio.create_task(
+            self._health_check_loop(), name="mcp-pool-health-check"
+        )
+        logger.info(
+            "Started MCP pool with %i members and %i warm spares",
+            len(self._active),
+            len(self._spares),
+        )
+        return [PooledMCPTool(tool, self) for tool in tools_response.tools]
+
+    async def call_tool(self, name: str, args: Dict[str, Any]) -> Any:
+        """
+        Call an MCP tool on the member with the fewest outstanding requests.
+
+        A call that fails because its member died is retried once on
+        another member after the dead one has been replaced.
+
+        Args:
+            name: Name of the MCP tool
+            args: Arguments for the tool
+
+        Returns:
+            The MCP CallToolResult.
+
+        Raises:
+            asyncio.TimeoutError: If the call exceeds call_timeout_secs
+            PoolExhaustedError: If no member can be made available
+        """
+        for attempt in range(2):
+            member = await self._acquire()
+            member.outstanding += 1
+            try:
+                return await asyncio.wait_for(
+                    member.session.call_tool(name, arguments=args),
+                    timeout=self.settings.call_timeout_secs,
+                )
+            except asyncio.TimeoutError:
+                logger.warning(
+                    "MCP tool %s timed out after %.1fs on member %i",
+                    name,
+                    self.settings.call_timeout_secs,
+                    member.member_id,
+                )
+                raise
+            except _CONNECTION_ERRORS as e:
+                logger.warning(
+                    "MCP pool member %i lost during %s: %r",
+                    member.member_id,
+                    name,
+                    e,
+                )
+                await self._evict(member)
+                if attempt:
+                    raise
+            finally:
+                member.outstanding -= 1
+        raise PoolExhaustedError(f"Could not run MCP tool {name}")
+
+    async def _acquire(self) -> _PoolMember:
+        """Pick the live member with the fewest outstanding requests."""
+        live = [member for member in self._active if member.alive]
+        if not live:
+            await self._replenish()
+            live = [member for member in self._active if member.alive]
+            if not live:
+                raise PoolExhaustedError("No live MCP server connections")
+        return min(live, key=lambda member: member.outstanding)
+
+    async def _start_member(self) -> Optional[_PoolMember]:
+        """Spawn a new member, returning None if it failed to start."""
+        member = _PoolMember()
+        try:
+            await asyncio.wait_for(
+                member.start(self.connection_params, self._errlog),
+                timeout=self.settings.start_timeout_secs,
+            )
+            return member
+        except Exception as e:  # pylint: disable=broad-except
+            logger.error("Failed to start MCP server: %r", e)
+            # A server that never answered is still running; stop it
+            await member.close()
+            return None
+
+    async def _replenish(self) -> None:
+        """Fill active slots from spares, then top up the spares."""
+        async with self._replenish_lock:
+            if self._closed:
+                return
+            self._active = [member for member in self._active if member.alive]
+            self._spares = [member for member in self._spares if member.alive]
+            while len(self._active) < self.settings.pool_size and self._spares:
+                self._active.append(self._spares.pop(0))
+
+            missing = self.settings.pool_size - len(self._active)
+            missing_spares = self.settings.warm_spares - len(self._spares)
+            wanted = max(missing, 0) + max(missing_spares, 0)
+            if not wanted:
+                return
+            started = await asyncio.gather(
+                *(self._start_member() for _ in range(wanted))
+            )
+            for member in filter(None, started):
+                if len(self._active) < self.settings.pool_size:
+                    self._active.append(member)
+                else:
+                    self._spares.append(member)
+
+    async def _evict(self, member: _PoolMember) -> None:
+        """Remove a dead member and promote a warm spare in its place."""
+        if member in self._active:
+            self._active.remove(member)
+        elif member in self._spares:
+            self._spares.remove(member)
+        else:
+            return
+        self.replacements += 1
+        await member.close()
+        if self._spares and len(self._active) < self.settings.pool_size:
+            self._active.append(self._spares.pop(0))
+        # Keep a reference so the task is not garbage-collected mid-flight
+        task = asyncio.create_task(self._replenish())
+        self._tasks.add(task)
+        task.add_done_callback(self._replenish_done)
+
+    def _replenish_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Could not replenish the MCP pool: %r", task.exception())
+
+    async def _check_health(self) -> None:
+        """Ping every member once and replace the ones that fail."""
+        members = self._active + self._spares
+        results = await asyncio.gather(
+            *(
+                member.ping(self.settings.health_check_timeout_secs)
+                for member in members
+            ),
+            return_exceptions=True,
+        )
+        for member, healthy in zip(members, results):
+            if isinstance(healthy, BaseException):
+                logger.warning(
+                    "Health check failed for MCP pool member %i: %r",
+                    member.member_id,
+                    healthy,
+                )
+                healthy = False
+            if not healthy:
+                await self._evict(member)
+
+    async def _health_check_loop(self) -> None:
+        """Ping every member periodically and replace the ones that fail."""
+        while not self._closed:
+            await asyncio.sleep(self.settings.health_check_interval_secs)
+            try:
+                await self._check_health()
+            except Exception:  # pylint: disable=broad-except
+                # A failed round must not end health checks for good
+                logger.exception("MCP pool health check failed")
+
+    def saturated(self, max_outstanding: int) -> bool:
+        """
+        Whether a new tool call would have to queue behind others.
+
+        Args:
+            max_outstanding: Outstanding calls per member considered full
+
+        Returns:
+            True if no member is alive or every live member has at least
+            max_outstanding calls in flight.
+        """
+        live = [member for member in self._active if member.alive]
+        return not live or min(m.outstanding for m in live) >= max_outstanding
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report the current pool state.
+
+        Returns:
+            A dictionary with per-member outstanding requests, spare count
+            and the number of replaced members.
+        """
+        return {
+            "active": {
+                member.member_id: member.outstanding for member in self._active
+            },
+            "spares": len(self._spares),
+            "replacements": self.replacements,
+        }
+
+    async def close(self) -> None:
+        """Stop health checks and shut down every MCP server subprocess."""
+        self._closed = True
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        members = self._active + self._spares
+        self._active, self._spares = [], []
+        await asyncio.gather(*(member.close() for member in members))
@@ -0,0 +1,135 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Helpers for reading Shopify MCP tool results.
+
+The Shopify MCP server returns GraphQL payloads as JSON text content. These
+helpers turn a CallToolResult back into Python data and flatten the
+connection (edges/node) wrappers used by the Admin API.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def decode_tool_result(result: Any) -> Any:
+    """
+    Decode an MCP tool result into Python data.
+
+    Args:
+        result: A CallToolResult, or an already decoded value
+
+    Returns:
+        The JSON payload of the result's text content, the raw text if it is
+        not JSON, or the value itself if it is not a CallToolResult.
+    """
+    content = getattr(result, "content", None)
+    if content is None:
+        return result
+    text = "".join(getattr(part, "text", "") or "" for part in content)
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def unwrap_edges(value: Any) -> Any:
+    """
+    Recursively replace GraphQL connections with plain lists of nodes.
+
+    Args:
+        value: Decoded GraphQL data
+
+    Returns:
+        The same data with every {"edges": [{"node": x}]} replaced by [x] and
+        every {"nodes": [x]} replaced by [x].
+    """
+    if isinstance(value, dict):
+        if "edges" in value and isinstance(value["edges"], list):
+            return [unwrap_edges(edge.get("node", edge)) for edge in value["edges"]]
+        if set(value) <= {"nodes", "pageInfo"} and isinstance(
+            value.get("nodes"), list
+        ):
+            return [unwrap_edges(node) for node in value["nodes"]]
+        return {k: unwrap_edges(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [unwrap_edges(v) for v in value]
+    return value
+
+
+def _find(payload: Any, key: str) -> Any:
+    """Find the first value stored under key, searching breadth first."""
+    queue = [payload]
+    while queue:
+        current = queue.pop(0)
+        if isinstance(current, dict):
+            if key in current:
+                return current[key]
+            queue.extend(current.values())
+        elif isinstance(current, list):
+            queue.extend(current)
+    return None
+
+
+def extract_records(result: Any, key: str) -> List[Dict[str, Any]]:
+    """
+    Extract a list of records such as products or orders from a tool result.
+
+    Args:
+        result: A CallToolResult or decoded payload
+        key: Name of the list in the payload, e.g. "products" or "orders"
+
+    Returns:
+        The records with connection wrappers removed, or an empty list.
+    """
+    payload = decode_tool_result(result)
+    if isinstance(payload, list):
+        records = payload
+    else:
+        records = _find(payload, key)
+    records = unwrap_edges(records)
+    if isinstance(records, dict):
+        records = [records]
+    if not isinstance(records, list):
+        return []
+    return [record for record in records if isinstance(record, dict)]
+
+
+def extract_page_info(result: Any) -> Tuple[bool, Optional[str]]:
+    """
+    Read pagination info from a tool result.
+
+    Args:
+        result: A CallToolResult or decoded payload
+
+    Returns:
+        A (has_next_page, end_cursor) tuple; (False, None) when absent.
+    """
+    page_info = _find(decode_tool_result(result), "pageInfo")
+    if not isinstance(page_info, dict):
+        return False, None
+    return bool(page_info.get("hasNextPage")), page_info.get("endCursor")
+
+
+def numeric_id(gid: Any) -> str:
+    """
+    Return the numeric tail of a Shopify GID.
+
+    Args:
+        gid: A GID such as "gid://shopify/Order/5865972728022" or a plain ID
+
+    Returns:
+        "5865972728022" for the example above; plain IDs are returned as is.
+    """
+    return str(gid).rsplit("/", 1)[-1]
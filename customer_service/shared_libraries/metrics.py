@@ -0,0 +1,541 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Latency, error and cache metrics in the Prometheus text format.
+
+Instruments are module-level counters and histograms labelled by agent and
+tool (or model, callback or cache) name:
+
+- agent_run_seconds: time an agent spends on a turn, including delegations
+- agent_callback_seconds: time spent in agent callbacks such as before_agent
+- agent_model_call_seconds / agent_model_errors_total: Gemini calls
+- agent_model_tokens: estimated prompt and response tokens per model call
+- agent_rate_limit_wait_seconds: time model calls wait for the rate limiter
+- agent_mcp_tool_seconds / agent_mcp_tool_errors_total: MCP tool calls
+- agent_cache_hits_total / agent_cache_misses_total: in-process caches
+
+MetricsRegistry.start exposes them on a local HTTP endpoint and dumps them
+to a file periodically, as `Config.metrics` says. Recording is always on;
+it costs a dict update under a lock.
+"""
+
+import atexit
+import bisect
+import contextvars
+import functools
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from google.adk.tools import BaseTool
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+from mcp.types import CallToolResult
+
+from customer_service.config import Config, MetricsSettings
+from customer_service.shared_libraries.tool_wrappers import ToolWrapper
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+# Agent whose model call is in progress, set by rate_limit_callback
+current_agent = contextvars.ContextVar("current_agent", default="none")
+
+# Whether a timed callback is running, so callbacks it calls are not timed
+_in_timed_callback = contextvars.ContextVar("in_timed_callback", default=False)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    """Base class for labelled metrics."""
+
+    kind = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        lock: threading.Lock,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = lock
+
+    def _label_values(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self._render_samples())
+        return lines
+
+    def _render_samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """A monotonically increasing count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, *args: Any):
+        super().__init__(*args)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """
+        Add to the count.
+
+        Args:
+            amount: Amount added
+            **labels: A value for each of the counter's label names
+        """
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        """The current count for a label set."""
+        return self._values.get(self._label_values(labels), 0.0)
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}"
+            for key, v in values
+        ]
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, *args: Any, buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(*args)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [bucket counts..., +Inf count, sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        Record an observation.
+
+        Args:
+            value: The observed value, e.g. seconds or tokens
+            **labels: A value for each of the histogram's label names
+        """
+        key = self._label_values(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """
+        Observe the seconds spent in a with block.
+
+        Args:
+            **labels: A value for each of the histogram's label names
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        """The number of observations for a label set."""
+        counts = self._values.get(self._label_values(labels))
+        return int(sum(counts[:-1])) if counts else 0
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((k, list(v)) for k, v in self._values.items())
+        names = self.labelnames + ("le",)
+        lines = []
+        for key, counts in values:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(names, key + (_format_value(bound),))
+                value = _format_value(cumulative)
+                lines.append(f"{self.name}_bucket{labels} {value}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(cumulative)}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    The process's metrics, their HTTP endpoint and file dump.
+
+    Attributes:
+        settings: Endpoint, dump and token estimate settings
+        server: The HTTP server, once started
+    """
+
+    def __init__(self, settings: MetricsSettings):
+        self.settings = settings
+        self.server: Optional[ThreadingHTTPServer] = None
+        self._lock = threading.Lock()
+        self._metrics: List[_Metric] = []
+        self._caches: Dict[str, Callable[[], Tuple[int, int]]] = {}
+        self._dump_stop: Optional[threading.Event] = None
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str]
+    ) -> Counter:
+        """Create and register a counter."""
+        metric = Counter(name, documentation, labelnames, self._lock)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        """Create and register a histogram."""
+        metric = Histogram(
+            name, documentation, labelnames, self._lock, buckets=buckets
+        )
+        self._metrics.append(metric)
+        return metric
+
+    def register_cache(self, name: str, stats: Callable[[], Tuple[int, int]]) -> None:
+        """
+        Report a cache's hit and miss counts.
+
+        Args:
+            name: The cache label, e.g. "response"
+            stats: Returns the cache's (hits, misses) so far
+        """
+        self._caches[name] = stats
+
+    def estimate_tokens(
+        self, contents: Sequence[Optional[types.Content]], text: str = ""
+    ) -> int:
+        """
+        Estimate the tokens in model contents from their length.
+
+        Args:
+            contents: Request or response contents
+            text: Further text, e.g. the system instruction
+
+        Returns:
+            Characters of text and function calls and responses, divided by
+            `settings.chars_per_token`.
+        """
+        chars = len(text)
+        for content in contents:
+            for part in (content.parts or []) if content else []:
+                if part.text:
+                    chars += len(part.text)
+                elif part.function_call:
+                    args = part.function_call.args or {}
+                    chars += len(json.dumps(args, default=str))
+                elif part.function_response:
+                    chars += len(
+                        json.dumps(part.function_response.response or {}, default=str)
+                    )
+        return int(chars / self.settings.chars_per_token)
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text format.
+
+        Returns:
+            The exposition text.
+        """
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        if self._caches:
+            stats = {name: stats() for name, stats in sorted(self._caches.items())}
+            for suffix, index in (("hits", 0), ("misses", 1)):
+                name = f"agent_cache_{suffix}_total"
+                lines.append(f"# HELP {name} Cache lookups that were {suffix}")
+                lines.append(f"# TYPE {name} counter")
+                for cache, counts in stats.items():
+                    labels = _format_labels(("cache",), (cache,))
+                    lines.append(f"{name}{labels} {counts[index]}")
+            lines.append("# HELP agent_cache_hit_ratio Share of lookups that hit")
+            lines.append("# TYPE agent_cache_hit_ratio gauge")
+            for cache, (hits, misses) in stats.items():
+                ratio = hits / (hits + misses) if hits + misses else 0.0
+                labels = _format_labels(("cache",), (cache,))
+                lines.append(f"agent_cache_hit_ratio{labels} {ratio:.4f}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """
+        Write the rendered metrics to a file atomically.
+
+        Args:
+            path: The file; "{pid}" is replaced with the process ID
+        """
+        path = path.format(pid=os.getpid())
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def start(self) -> None:
+        """
+        Start the HTTP endpoint and file dump that `settings` enable.
+
+        Idempotent. A port that is already taken, e.g. by another eval
+        worker, is logged and skipped.
+        """
+        settings = self.settings
+        if settings.port is not None and self.server is None:
+            try:
+                self.server = ThreadingHTTPServer(
+                    (settings.host, settings.port), _handler(self)
+                )
+            except OSError as e:
+                logger.warning("Metrics endpoint not started: %s", e)
+            else:
+                threading.Thread(
+                    target=self.server.serve_forever, name="metrics-http", daemon=True
+                ).start()
+                logger.info(
+                    "Serving metrics on http://%s:%i/metrics",
+                    settings.host,
+                    self.server.server_address[1],
+                )
+
+        if settings.dump_path and self._dump_stop is None:
+            self._dump_stop = threading.Event()
+            threading.Thread(
+                target=self._dump_loop, name="metrics-dump", daemon=True
+            ).start()
+            atexit.register(self._dump)
+
+    def stop(self) -> None:
+        """Stop the HTTP endpoint and file dump."""
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        if self._dump_stop is not None:
+            self._dump_stop.set()
+            self._dump_stop = None
+            self._dump()
+
+    def _dump(self) -> None:
+        try:
+            self.write(self.settings.dump_path)
+        except OSError as e:
+            logger.warning(
+                "Could not write metrics to %s: %s", self.settings.dump_path, e
+            )
+
+    def _dump_loop(self) -> None:
+        stop = self._dump_stop
+        while not stop.wait(self.settings.dump_interval_secs):
+            self._dump()
+
+
+def _handler(registry: MetricsRegistry) -> type:
+    """Build a request handler serving a registry at /metrics."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # pylint: disable=invalid-name
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    return MetricsHandler
+
+
+def _context_agent(args: Sequence[Any], kwargs: Dict[str, Any]) -> str:
+    """Find the agent name in a callback's context argument."""
+    for value in (*args, *kwargs.values()):
+        agent_name = getattr(value, "agent_name", None)
+        if isinstance(agent_name, str):
+            return agent_name
+    return "none"
+
+
+def timed_callback(callback: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Observe an agent callback's duration in agent_callback_seconds.
+
+    Callbacks chain into each other, e.g. route_intent runs
+    serve_cached_response. Only the outermost timed callback, the one ADK
+    registered, is observed, so each chain is counted once.
+
+    Args:
+        callback: A synchronous ADK callback
+
+    Returns:
+        The callback, timed and labelled by agent and callback name.
+    """
+
+    @functools.wraps(callback)
+    def timed(*args: Any, **kwargs: Any) -> Any:
+        if _in_timed_callback.get():
+            return callback(*args, **kwargs)
+        token = _in_timed_callback.set(True)
+        try:
+            with CALLBACK_SECONDS.time(
+                agent=_context_agent(args, kwargs), callback=callback.__name__
+            ):
+                return callback(*args, **kwargs)
+        finally:
+            _in_timed_callback.reset(token)
+
+    return timed
+
+
+class MeteredTool(ToolWrapper):
+    """Observes a tool's latency and errors, labelled by agent and tool."""
+
+    async def run_async(
+        self, *, args: Dict[str, Any], tool_context: Optional[ToolContext]
+    ) -> Any:
+        agent = tool_context.agent_name if tool_context is not None else "none"
+        started = time.perf_counter()
+        try:
+            result = await self.wrapped_tool.run_async(
+                args=args, tool_context=tool_context
+            )
+        except Exception:
+            TOOL_ERRORS.inc(agent=agent, tool=self.name)
+            raise
+        finally:
+            TOOL_SECONDS.observe(
+                time.perf_counter() - started, agent=agent, tool=self.name
+            )
+        if isinstance(result, CallToolResult) and result.isError:
+            TOOL_ERRORS.inc(agent=agent, tool=self.name)
+        return result
+
+
+def meter_tools(tools: List[BaseTool]) -> List[BaseTool]:
+    """
+    Wrap MCP tools so their calls are metered.
+
+    Args:
+        tools: The MCP tools
+
+    Returns:
+        The wrapped tools, in order; tools already metered are kept as is,
+        so a retried initialization does not count calls twice.
+    """
+    return [
+        tool if isinstance(tool, MeteredTool) else MeteredTool(tool) for tool in tools
+    ]
+
+
+# Process-wide metrics registry
+metrics = MetricsRegistry(Config().metrics)
+
+AGENT_RUN_SECONDS = metrics.histogram(
+    "agent_run_seconds", "Time an agent spends on a turn", ["agent"]
+)
+CALLBACK_SECONDS = metrics.histogram(
+    "agent_callback_seconds", "Time spent in agent callbacks", ["agent", "callback"]
+)
+MODEL_CALL_SECONDS = metrics.histogram(
+    "agent_model_call_seconds", "Model call latency", ["agent", "model"]
+)
+MODEL_ERRORS = metrics.counter(
+    "agent_model_errors_total", "Failed model calls", ["agent", "model"]
+)
+MODEL_TOKENS = metrics.histogram(
+    "agent_model_tokens",
+    "Estimated tokens per model call",
+    ["agent", "direction"],
+    buckets=TOKEN_BUCKETS,
+)
+RATE_LIMIT_WAIT_SECONDS = metrics.histogram(
+    "agent_rate_limit_wait_seconds",
+    "Time model calls wait for the rate limiter",
+    ["agent", "model"],
+)
+TOOL_SECONDS = metrics.histogram(
+    "agent_mcp_tool_seconds", "MCP tool call latency", ["agent", "tool"]
+)
+TOOL_ERRORS = metrics.counter(
+    "agent_mcp_tool_errors_total", "Failed MCP tool calls", ["agent", "tool"]
+)
@@ -0,0 +1,251 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Per-customer index from customer-facing order numbers to order IDs.
+
+Customers quote order names such as "#1579", while getOrderById needs the
+internal order ID. The index is filled lazily: a lookup pages through the
+customer's orders (newest first) only until the requested order is found,
+and later lookups for orders already seen are answered from memory. The
+newest orders, e.g. for "where is my order", come from the first page.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from customer_service.config import Config, OrderIndexSettings
+from customer_service.shared_libraries.mcp_results import (
+    extract_page_info,
+    extract_records,
+)
+
+logger = logging.getLogger(__name__)
+
+# Calls an MCP tool with the given arguments and returns its result
+ToolCaller = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+_NON_ALNUM_RE = re.compile(r"[^0-9a-z]")
+
+
+def normalize_order_number(value: Any) -> str:
+    """
+    Normalize a customer-facing order number.
+
+    Args:
+        value: An order name or number such as "#1579", "order 1579" or 1579
+
+    Returns:
+        The bare order number, e.g. "1579".
+    """
+    text = _NON_ALNUM_RE.sub("", str(value).lower())
+    return text[len("order"):] if text.startswith("order") else text
+
+
+class _CustomerOrders:
+    """Orders seen so far for one customer, plus where paging stopped."""
+
+    def __init__(self) -> None:
+        self.by_number: Dict[str, Dict[str, Any]] = {}
+        self.cursor: Optional[str] = None
+        self.complete = False
+        self.synced_at = 0.0
+        self.lock = asyncio.Lock()
+
+
+class OrderIndex:
+    """
+    Lazily filled, per-customer order number to order ID index.
+
+    At most max_customers customers are kept; the least recently used
+    customer is dropped first.
+    """
+
+    def __init__(
+        self,
+        settings: OrderIndexSettings,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.settings = settings
+        self._clock = clock
+        self._customers: "OrderedDict[str, _CustomerOrders]" = OrderedDict()
+        self._find_orders: Optional[ToolCaller] = None
+        self._get_order: Optional[ToolCaller] = None
+
+    def bind(self, find_orders: ToolCaller, get_order: ToolCaller) -> None:
+        """
+        Attach the MCP tools used to fill the index and fetch order details.
+
+        Args:
+            find_orders: Calls findOrders
+            get_order: Calls getOrderById
+        """
+        self._find_orders = find_orders
+        self._get_order = get_order
+
+    @property
+    def is_bound(self) -> bool:
+        """Whether the MCP tools have been attached."""
+        return self._find_orders is not None and self._get_order is not None
+
+    def _customer(self, customer_id: str) -> _CustomerOrders:
+        orders = self._customers.get(customer_id)
+        if orders is None:
+            orders = self._customers[customer_id] = _CustomerOrders()
+            while len(self._customers) > self.settings.max_customers:
+                self._customers.popitem(last=False)
+        self._customers.move_to_end(customer_id)
+        return orders
+
+    @staticmethod
+    def _add(orders: _CustomerOrders, records: List[Dict[str, Any]]) -> None:
+        """Index order records by their normalized name."""
+        for record in records:
+            if not record.get("name"):
+                continue
+            orders.by_number[normalize_order_number(record["name"])] = {
+                "id": record.get("id"),
+                "name": record["name"],
+                "processedAt": record.get("processedAt") or record.get("createdAt"),
+                "displayFulfillmentStatus": record.get("displayFulfillmentStatus"),
+                "cancelledAt": record.get("cancelledAt"),
+            }
+
+    async def _fetch_page(
+        self, customer_id: str, after: Optional[str]
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        args: Dict[str, Any] = {
+            "first": self.settings.page_size,
+            "query": f"customer_id:{customer_id}",
+            "sortKey": "PROCESSED_AT",
+            "reverse": True,
+        }
+        if after:
+            args["after"] = after
+        result = await self._find_orders(args)
+        has_next, cursor = extract_page_info(result)
+        return extract_records(result, "orders"), cursor if has_next else None
+
+    async def resolve(
+        self, customer_id: str, order_number: Any
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Resolve a customer-facing order number to the order's summary.
+
+        Args:
+            customer_id: The customer the order must belong to
+            order_number: The order name or number quoted by the customer
+
+        Returns:
+            A dict with the order "id", "name", "processedAt",
+            "displayFulfillmentStatus" and "cancelledAt", or None if the
+            customer has no such order.
+        """
+        if self._find_orders is None:
+            raise RuntimeError("OrderIndex is not bound to the findOrders tool")
+        key = normalize_order_number(order_number)
+        orders = self._customer(customer_id)
+        async with orders.lock:
+            if key in orders.by_number:
+                return orders.by_number[key]
+
+            # Orders placed since the last sync appear on the first page
+            age = self._clock() - orders.synced_at
+            if orders.synced_at and age > self.settings.refresh_after_secs:
+                records, _ = await self._fetch_page(customer_id, None)
+                self._add(orders, records)
+                orders.synced_at = self._clock()
+                if key in orders.by_number:
+                    return orders.by_number[key]
+
+            # Keep paging older orders until the order turns up
+            while not orders.complete:
+                records, cursor = await self._fetch_page(customer_id, orders.cursor)
+                self._add(orders, records)
+                orders.cursor = cursor
+                orders.complete = cursor is None
+                orders.synced_at = self._clock()
+                if key in orders.by_number:
+                    return orders.by_number[key]
+        return None
+
+    async def recent(self, customer_id: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        List a customer's newest orders.
+
+        The first page of orders is fetched on first use and again once it
+        is older than `refresh_after_secs`.
+
+        Args:
+            customer_id: The customer ID
+            limit: Number of orders to return
+
+        Returns:
+            Order summaries as returned by resolve, newest first.
+        """
+        if self._find_orders is None:
+            raise RuntimeError("OrderIndex is not bound to the findOrders tool")
+        orders = self._customer(customer_id)
+        async with orders.lock:
+            age = self._clock() - orders.synced_at
+            if not orders.synced_at or age > self.settings.refresh_after_secs:
+                records, cursor = await self._fetch_page(customer_id, None)
+                self._add(orders, records)
+                if not orders.synced_at:
+                    orders.cursor = cursor
+                    orders.complete = cursor is None
+                orders.synced_at = self._clock()
+            summaries = sorted(
+                orders.by_number.values(),
+                key=lambda summary: summary["processedAt"] or "",
+                reverse=True,
+            )
+        return summaries[:limit]
+
+    async def get_order(self, order_id: str) -> Any:
+        """
+        Fetch full order details with getOrderById.
+
+        Args:
+            order_id: The internal order ID
+
+        Returns:
+            The getOrderById result.
+        """
+        if self._get_order is None:
+            raise RuntimeError("OrderIndex is not bound to the getOrderById tool")
+        return await self._get_order({"orderId": order_id})
+
+    def known_orders(self, customer_id: str) -> List[str]:
+        """
+        List the order names indexed so far for a customer.
+
+        Args:
+            customer_id: The customer ID
+
+        Returns:
+            Order names, e.g. ["#1579", "#1576"].
+        """
+        orders = self._customers.get(customer_id)
+        if orders is None:
+            return []
+        names = {summary["name"] for summary in orders.by_number.values()}
+        return sorted(filter(None, names), reverse=True)
+
+
+# Process-wide index used by the lookup_order tool
+order_index = OrderIndex(Config().order_index)
@@ -0,0 +1,170 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Rendering of Shopify orders as short, customer-facing status blocks.
+
+The get_order_status tool hands the order agent a status block it can
+repeat as is, instead of raw GraphQL the model has to read and format over
+several reasoning steps. A block looks like:
+
+    **Order #1579** placed 12 Mar 2025 (INR 1,998.00, paid)
+    Status: In transit
+    Items: Sculpt Bodysuit (M / Black) x1; Thigh Shaper (L) x2
+    Tracking: Delhivery DL0000001579 https://track.example.com/DL0000001579
+    Expected delivery: 15 Mar 2025
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from customer_service.shared_libraries.mcp_results import unwrap_edges
+
+# displayFulfillmentStatus values, see the Admin API's OrderDisplayFulfillmentStatus
+FULFILLMENT_LABELS: Dict[str, str] = {
+    "UNFULFILLED": "Being prepared",
+    "IN_PROGRESS": "Being prepared",
+    "PENDING_FULFILLMENT": "Being prepared",
+    "OPEN": "Being prepared",
+    "SCHEDULED": "Scheduled",
+    "ON_HOLD": "On hold",
+    "PARTIALLY_FULFILLED": "Partly shipped",
+    "FULFILLED": "Shipped",
+    "RESTOCKED": "Returned",
+}
+# Fulfillment displayStatus values, more precise than the order's status
+SHIPMENT_LABELS: Dict[str, str] = {
+    "LABEL_PRINTED": "Packed",
+    "CONFIRMED": "Shipped",
+    "IN_TRANSIT": "In transit",
+    "OUT_FOR_DELIVERY": "Out for delivery",
+    "ATTEMPTED_DELIVERY": "Delivery attempted",
+    "READY_FOR_PICKUP": "Ready for pickup",
+    "DELIVERED": "Delivered",
+    "FAILURE": "Delivery failed",
+}
+_CLOSED_STATUSES = frozenset({"FULFILLED", "RESTOCKED"})
+
+
+def is_open(summary: Dict[str, Any]) -> bool:
+    """
+    Whether an order is still on its way.
+
+    Args:
+        summary: An order summary from OrderIndex, or an order record
+
+    Returns:
+        True unless the order was cancelled, fully shipped or returned.
+    """
+    if summary.get("cancelledAt"):
+        return False
+    return summary.get("displayFulfillmentStatus") not in _CLOSED_STATUSES
+
+
+def _date(value: Any) -> Optional[str]:
+    """Format an ISO 8601 timestamp as e.g. "12 Mar 2025"."""
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return str(value)
+    return f"{moment.day} {moment:%b %Y}"
+
+
+def _money(price_set: Any) -> Optional[str]:
+    money = (price_set or {}).get("shopMoney") or {}
+    try:
+        amount = float(money["amount"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    currency = money.get("currencyCode")
+    return f"{currency} {amount:,.2f}" if currency else f"{amount:,.2f}"
+
+
+def status_label(order: Dict[str, Any]) -> str:
+    """
+    Describe where an order is, in the customer's terms.
+
+    Args:
+        order: An order record, connections unwrapped
+
+    Returns:
+        The latest shipment's status if the store reports one, otherwise
+        the order's fulfillment status, e.g. "In transit" or "Shipped".
+    """
+    if order.get("cancelledAt"):
+        return f"Cancelled on {_date(order['cancelledAt'])}"
+    for fulfillment in reversed(order.get("fulfillments") or []):
+        label = SHIPMENT_LABELS.get(fulfillment.get("displayStatus") or "")
+        if label:
+            return label
+    status = order.get("displayFulfillmentStatus") or ""
+    return FULFILLMENT_LABELS.get(status, status.replace("_", " ").capitalize())
+
+
+def format_order_status(order: Dict[str, Any], max_items: int) -> str:
+    """
+    Render an order as a status block.
+
+    Args:
+        order: An order record, e.g. getOrderById's "order"
+        max_items: Line items listed before the rest are counted
+
+    Returns:
+        A few lines of markdown: the order's name, date and total, its
+        status, items, tracking numbers and expected delivery date.
+    """
+    order = unwrap_edges(order)
+    details = [
+        part
+        for part in (
+            _money(order.get("totalPriceSet")),
+            (order.get("displayFinancialStatus") or "").replace("_", " ").lower(),
+        )
+        if part
+    ]
+    header = f"**Order {order.get('name') or order.get('id')}**"
+    placed = _date(order.get("processedAt") or order.get("createdAt"))
+    if placed:
+        header += f" placed {placed}"
+    if details:
+        header += f" ({', '.join(details)})"
+    lines = [header, f"Status: {status_label(order)}"]
+
+    items: List[Dict[str, Any]] = order.get("lineItems") or []
+    if items:
+        listed = [
+            f"{item.get('name')} x{item.get('quantity', 1)}"
+            for item in items[:max_items]
+        ]
+        if len(items) > max_items:
+            listed.append(f"+{len(items) - max_items} more")
+        lines.append("Items: " + "; ".join(listed))
+
+    fulfillments = order.get("fulfillments") or []
+    tracking = [
+        " ".join(filter(None, (info.get(key) for key in ("company", "number", "url"))))
+        for fulfillment in fulfillments
+        for info in fulfillment.get("trackingInfo") or []
+    ]
+    if tracking:
+        lines.append("Tracking: " + "; ".join(tracking))
+    estimates = [
+        _date(fulfillment.get("estimatedDeliveryAt"))
+        for fulfillment in fulfillments
+        if fulfillment.get("estimatedDeliveryAt")
+    ]
+    if estimates and not order.get("cancelledAt"):
+        lines.append(f"Expected delivery: {estimates[-1]}")
+    return "\n".join(lines)
@@ -0,0 +1,286 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Projection of MCP tool results onto the fields the agents use.
+
+Shopify GraphQL payloads carry edges/node wrappers, cursors, images and
+metafields that the model never reads but that are resent with every later
+model request of the session. Before a result reaches the model, the
+OutputProjector unwraps connections, keeps only the fields listed in the
+tool's rule, truncates lists to `max_list_items` (recording the full length
+in a sibling "<field>Total" key) and shortens long prose such as
+descriptions.
+
+Rules are nested dicts compiled once into projection functions: a field
+mapped to None is kept as is, a field mapped to a dict is projected with
+it, and fields missing from a payload are skipped. Only the copies handed
+to the model are projected; caches, indexes and prefetches keep full
+results.
+"""
+
+import json
+import logging
+from typing import Any, Callable, Dict, Optional
+
+from google.adk.tools import BaseTool
+from google.adk.tools.tool_context import ToolContext
+from mcp.types import CallToolResult, TextContent
+
+from customer_service.config import Config, OutputProjectionSettings
+from customer_service.shared_libraries.mcp_results import (
+    decode_tool_result,
+    unwrap_edges,
+)
+from customer_service.shared_libraries.metrics import metrics
+from customer_service.shared_libraries.tool_wrappers import ToolWrapper
+
+logger = logging.getLogger(__name__)
+
+# A field rule: None keeps the value, a dict projects it
+Rule = Optional[Dict[str, Any]]
+
+VARIANT_FIELDS: Dict[str, Rule] = {
+    "id": None,
+    "title": None,
+    "sku": None,
+    "price": None,
+    "compareAtPrice": None,
+    "availableForSale": None,
+    "inventoryQuantity": None,
+    "selectedOptions": None,
+}
+PRODUCT_FIELDS: Dict[str, Rule] = {
+    "id": None,
+    "title": None,
+    "productType": None,
+    "description": None,
+    "tags": None,
+    "status": None,
+    "totalInventory": None,
+    "priceRange": None,
+    "priceRangeV2": None,
+    "options": {"name": None, "values": None},
+    "variants": VARIANT_FIELDS,
+}
+ORDER_FIELDS: Dict[str, Rule] = {
+    "id": None,
+    "name": None,
+    "createdAt": None,
+    "cancelledAt": None,
+    "displayFinancialStatus": None,
+    "displayFulfillmentStatus": None,
+    "totalPriceSet": {"shopMoney": None},
+    "lineItems": {"name": None, "quantity": None, "variant": {"id": None}},
+    "fulfillments": {
+        "status": None,
+        "estimatedDeliveryAt": None,
+        "trackingInfo": {"company": None, "number": None, "url": None},
+    },
+}
+# The model needs endCursor to ask for the next page
+PAGE_INFO_FIELDS: Dict[str, Rule] = {"hasNextPage": None, "endCursor": None}
+
+# Per-tool rules for the results the product and order agents read
+DEFAULT_RULES: Dict[str, Dict[str, Rule]] = {
+    "findProducts": {"products": PRODUCT_FIELDS, "pageInfo": PAGE_INFO_FIELDS},
+    "getProductsByIds": {"products": PRODUCT_FIELDS},
+    "listProductsInCollection": {
+        "products": PRODUCT_FIELDS,
+        "pageInfo": PAGE_INFO_FIELDS,
+    },
+    "getVariantsByIds": {
+        "variants": {**VARIANT_FIELDS, "product": {"id": None, "title": None}}
+    },
+    "findOrders": {"orders": ORDER_FIELDS, "pageInfo": PAGE_INFO_FIELDS},
+    "getOrderById": {"order": ORDER_FIELDS},
+}
+
+CHARS_SAVED = metrics.counter(
+    "agent_tool_output_chars_saved_total",
+    "Characters removed from tool results by projection",
+    ["tool"],
+)
+
+
+def _is_long_text(value: Any, max_chars: int) -> bool:
+    """Whether a value is prose to shorten; IDs and URLs are never cut."""
+    return isinstance(value, str) and len(value) > max_chars and " " in value
+
+
+def _compile(
+    rule: Dict[str, Rule], settings: OutputProjectionSettings
+) -> Callable[[Any], Any]:
+    """Compile a rule into a function projecting dicts and lists of dicts."""
+    fields = [
+        (name, _compile(child, settings) if child else None)
+        for name, child in rule.items()
+    ]
+    max_items = settings.max_list_items
+    max_chars = settings.max_text_chars
+
+    def project_dict(value: Dict[str, Any]) -> Dict[str, Any]:
+        projected: Dict[str, Any] = {}
+        for name, project_field in fields:
+            if name not in value:
+                continue
+            field = value[name]
+            if isinstance(field, list) and len(field) > max_items:
+                projected[f"{name}Total"] = len(field)
+                field = field[:max_items]
+            if project_field is not None:
+                field = project_field(field)
+            elif _is_long_text(field, max_chars):
+                field = field[:max_chars].rstrip() + "…"
+            projected[name] = field
+        return projected
+
+    def project(value: Any) -> Any:
+        if isinstance(value, dict):
+            return project_dict(value)
+        if isinstance(value, list):
+            return [project(item) for item in value]
+        return value
+
+    return project
+
+
+class OutputProjector:
+    """
+    Projects tool results with compiled per-tool rules.
+
+    Attributes:
+        settings: List and text limits, and whether projection is enabled
+        chars_before: Characters of results before projection
+        chars_after: Characters of results after projection
+    """
+
+    def __init__(
+        self,
+        settings: OutputProjectionSettings,
+        rules: Optional[Dict[str, Dict[str, Rule]]] = None,
+    ):
+        self.settings = settings
+        rules = rules or DEFAULT_RULES
+        self._projections = {
+            tool_name: _compile(rule, settings) for tool_name, rule in rules.items()
+        }
+        self._fields = {tool_name: set(rule) for tool_name, rule in rules.items()}
+        self.chars_before = 0
+        self.chars_after = 0
+
+    def handles(self, tool_name: str) -> bool:
+        """Whether results of a tool are projected."""
+        return self.settings.enabled and tool_name in self._projections
+
+    def project(self, tool_name: str, payload: Any) -> Any:
+        """
+        Project a decoded tool payload.
+
+        Args:
+            tool_name: The tool that returned the payload
+            payload: The decoded payload, e.g. from decode_tool_result
+
+        Returns:
+            The projected payload, or the payload itself for tools without
+            a rule and payloads that are not JSON objects.
+        """
+        if not self.handles(tool_name) or not isinstance(payload, dict):
+            return payload
+        fields = self._fields[tool_name]
+        payload = unwrap_edges(payload)
+        # Results may nest the records, e.g. under a GraphQL "data" key
+        queue = [payload]
+        while queue:
+            current = queue.pop(0)
+            if isinstance(current, dict):
+                if fields & current.keys():
+                    return self._projections[tool_name](current)
+                queue.extend(current.values())
+        return payload
+
+    def project_result(self, tool_name: str, result: Any) -> Any:
+        """
+        Project a tool result for the model.
+
+        Args:
+            tool_name: The tool that returned the result
+            result: A CallToolResult or an already decoded value
+
+        Returns:
+            A CallToolResult with the projected JSON for MCP results, the
+            projected value for decoded ones, and error results unchanged.
+        """
+        if not self.handles(tool_name):
+            return result
+        if not isinstance(result, CallToolResult):
+            return self.project(tool_name, result)
+        if result.isError:
+            return result
+        payload = decode_tool_result(result)
+        if not isinstance(payload, dict):
+            return result
+
+        projected = self.project(tool_name, payload)
+        text = json.dumps(projected, separators=(",", ":"), ensure_ascii=False)
+        before = sum(len(getattr(part, "text", "") or "") for part in result.content)
+        self.chars_before += before
+        self.chars_after += len(text)
+        CHARS_SAVED.inc(max(before - len(text), 0), tool=tool_name)
+        return CallToolResult(content=[TextContent(type="text", text=text)])
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report projection counters.
+
+        Returns:
+            Characters of MCP results before and after projection.
+        """
+        return {"chars_before": self.chars_before, "chars_after": self.chars_after}
+
+
+class ProjectedTool(ToolWrapper):
+    """Projects the wrapped tool's results before they reach the model."""
+
+    def __init__(self, tool: BaseTool, projector: OutputProjector):
+        super().__init__(tool)
+        self.projector = projector
+
+    async def run_async(
+        self, *, args: Dict[str, Any], tool_context: ToolContext
+    ) -> Any:
+        result = await self.wrapped_tool.run_async(
+            args=args, tool_context=tool_context
+        )
+        return self.projector.project_result(self.name, result)
+
+
+def wrap_with_projection(tool: BaseTool, projector: OutputProjector) -> BaseTool:
+    """
+    Wrap a tool so its results are projected.
+
+    Args:
+        tool: The tool to wrap
+        projector: The projector holding the per-tool rules
+
+    Returns:
+        The projected tool, or the tool itself if it has no rule or
+        projection is disabled.
+    """
+    if not projector.handles(tool.name):
+        return tool
+    return ProjectedTool(tool, projector)
+
+
+# Process-wide projector shared by every agent
+output_projector = OutputProjector(Config().output_projection)
@@ -0,0 +1,261 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Speculative prefetch of a session's likely first tool calls.
+
+The order agent's first move is almost always get_order_status or findOrders
+for the session's customer, made only after a delegation hop through the
+root model. When a session starts, before_agent asks the SessionPrefetcher
+to warm the order index with the customer's newest orders, so that
+get_order_status finds them without a findOrders round trip, and to start
+the instructed findOrders call in the background, parked in a
+session-scoped future cache. The first matching call through a
+PrefetchedTool then awaits the parked future instead of making a cold MCP
+round trip.
+
+Prefetched results are served once: later calls in the session go to the
+server so they see fresh data.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from google.adk.tools import BaseTool
+from google.adk.tools.tool_context import ToolContext
+
+from customer_service.config import Config, PrefetchSettings
+from customer_service.shared_libraries.tool_cache import cache_key
+from customer_service.shared_libraries.tool_wrappers import ToolWrapper
+
+logger = logging.getLogger(__name__)
+
+# Calls an MCP tool with the given arguments and returns its result
+ToolCaller = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+# Warms a cache for the given customer ID
+Warmer = Callable[[str], Awaitable[Any]]
+
+
+class _Prefetch:
+    """A prefetched call and when it stops being served."""
+
+    __slots__ = ("task", "expires_at")
+
+    def __init__(self, task: asyncio.Task, expires_at: float):
+        self.task = task
+        self.expires_at = expires_at
+
+
+def _consume_exception(task: asyncio.Task) -> None:
+    """Mark a prefetch failure as retrieved when nobody used the result."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.debug("Prefetch %s failed: %s", task.get_name(), task.exception())
+
+
+class SessionPrefetcher:
+    """
+    Session-scoped cache of speculatively started tool calls.
+
+    At most max_sessions sessions are tracked; the least recently started
+    session is dropped first, cancelling its unused prefetches.
+    """
+
+    def __init__(
+        self,
+        settings: PrefetchSettings,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.settings = settings
+        self._clock = clock
+        self._tools: Dict[str, ToolCaller] = {}
+        self._warmer: Optional[Warmer] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._sessions: "OrderedDict[str, Dict[str, _Prefetch]]" = OrderedDict()
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+
+    def bind(
+        self, tools: Dict[str, ToolCaller], warmer: Optional[Warmer] = None
+    ) -> None:
+        """
+        Attach the MCP tools used for prefetching.
+
+        Args:
+            tools: Tool callers keyed by tool name
+            warmer: Optionally fills a tool-side cache for a customer, e.g.
+                the order index behind get_order_status
+        """
+        self._tools = dict(tools)
+        self._warmer = warmer
+
+    @property
+    def is_bound(self) -> bool:
+        """Whether any prefetchable tool or warmer has been attached."""
+        return bool(self._tools) or self._warmer is not None
+
+    def planned_calls(self, customer_id: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        List the calls prefetched for a customer.
+
+        Args:
+            customer_id: The session's customer
+
+        Returns:
+            (tool name, arguments) pairs, in the form the agents make them.
+        """
+        return [
+            (
+                "findOrders",
+                {
+                    "first": self.settings.recent_orders,
+                    "query": f"customer_id:{customer_id}",
+                },
+            )
+        ]
+
+    def start(self, session_id: str, customer_id: str) -> int:
+        """
+        Start prefetching for a session, once per session.
+
+        Must be called from a running event loop.
+
+        Args:
+            session_id: The session the results are parked for
+            customer_id: The session's customer
+
+        Returns:
+            The number of calls started, including the warmer.
+        """
+        if not self.settings.enabled or not self.is_bound:
+            return 0
+        if session_id in self._sessions:
+            return 0
+
+        warming = 0
+        if self._warmer is not None:
+            task = asyncio.create_task(
+                self._warmer(customer_id), name="prefetch-warm"
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            task.add_done_callback(_consume_exception)
+            warming = 1
+
+        now = self._clock()
+        parked: Dict[str, _Prefetch] = {}
+        for tool_name, args in self.planned_calls(customer_id):
+            call = self._tools.get(tool_name)
+            if call is None:
+                continue
+            task = asyncio.create_task(call(args), name=f"prefetch-{tool_name}")
+            task.add_done_callback(_consume_exception)
+            parked[cache_key(tool_name, args)] = _Prefetch(
+                task, now + self.settings.ttl_secs
+            )
+        self._sessions[session_id] = parked
+        self.started += len(parked) + warming
+        while len(self._sessions) > self.settings.max_sessions:
+            _, evicted = self._sessions.popitem(last=False)
+            for prefetch in evicted.values():
+                prefetch.task.cancel()
+        return len(parked) + warming
+
+    async def take(
+        self, session_id: str, tool_name: str, args: Dict[str, Any]
+    ) -> Optional[Any]:
+        """
+        Claim a prefetched result for a call, if one is parked.
+
+        Args:
+            session_id: The session making the call
+            tool_name: The tool being called
+            args: The call's arguments
+
+        Returns:
+            The prefetched result, or None if there is none, it expired or
+            the prefetch failed; the caller should then make the call itself.
+        """
+        parked = self._sessions.get(session_id)
+        prefetch = parked.pop(cache_key(tool_name, args), None) if parked else None
+        if prefetch is None or prefetch.expires_at <= self._clock():
+            self.misses += 1
+            if prefetch is not None:
+                prefetch.task.cancel()
+            return None
+        try:
+            result = await asyncio.shield(prefetch.task)
+        except Exception:  # pylint: disable=broad-except
+            self.failures += 1
+            return None
+        if getattr(result, "isError", False):
+            self.failures += 1
+            return None
+        self.hits += 1
+        return result
+
+    def discard(self, session_id: str) -> None:
+        """
+        Drop a session's parked prefetches.
+
+        Args:
+            session_id: The session to drop
+        """
+        for prefetch in self._sessions.pop(session_id, {}).values():
+            prefetch.task.cancel()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report prefetch counters.
+
+        Returns:
+            Tracked sessions, calls started, calls served from a prefetch,
+            calls that found nothing parked and prefetches that failed.
+        """
+        return {
+            "sessions": len(self._sessions),
+            "started": self.started,
+            "hits": self.hits,
+            "misses": self.misses,
+            "failures": self.failures,
+        }
+
+
+class PrefetchedTool(ToolWrapper):
+    """Serves the first matching call of a session from its prefetch."""
+
+    def __init__(self, tool: BaseTool, prefetcher: SessionPrefetcher):
+        super().__init__(tool)
+        self.prefetcher = prefetcher
+
+    async def run_async(
+        self, *, args: Dict[str, Any], tool_context: ToolContext
+    ) -> Any:
+        if tool_context is not None:
+            session_id = tool_context._invocation_context.session.id
+            result = await self.prefetcher.take(session_id, self.name, args)
+            if result is not None:
+                logger.debug(
+                    "Served %s for session %s from prefetch", self.name, session_id
+                )
+                return result
+        return await self.wrapped_tool.run_async(args=args, tool_context=tool_context)
+
+
+# Process-wide prefetcher shared by every session
+session_prefetcher = SessionPrefetcher(Config().prefetch)
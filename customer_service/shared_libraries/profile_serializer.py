@@ -0,0 +1,191 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compact customer profile rendering for prompts.
+
+Customer.to_json pretty-prints every field, including the full purchase
+history, and the result is sent with every model request. The serializer
+renders only the configured fields as minified JSON, summarizes the purchase
+history as aggregates plus the most recent purchases, and caches the output
+per customer version so repeated turns do not re-render it.
+"""
+
+import json
+import math
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional, Sequence, Tuple
+
+from customer_service.config import Config, ProfilePromptSettings
+from customer_service.entities.customer import Customer
+
+
+class PromptProfile(NamedTuple):
+    """
+    A customer profile rendered for a prompt.
+
+    Attributes:
+        text: Minified JSON profile
+        token_estimate: Estimated number of tokens in text
+    """
+
+    text: str
+    token_estimate: int
+
+
+def estimate_tokens(text: str, chars_per_token: float = 4.0) -> int:
+    """
+    Estimate the number of tokens in text.
+
+    Args:
+        text: The text to measure
+        chars_per_token: Average characters per token
+
+    Returns:
+        The estimated token count.
+    """
+    return math.ceil(len(text) / chars_per_token)
+
+
+def _compact(value: Any) -> Any:
+    """Drop empty values from nested dicts and lists."""
+    if isinstance(value, dict):
+        compacted = {k: _compact(v) for k, v in value.items()}
+        return {k: v for k, v in compacted.items() if v not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [_compact(v) for v in value]
+    return value
+
+
+class ProfileSerializer:
+    """
+    Renders Customer models as compact, cached prompt profiles.
+
+    Attributes:
+        settings: Field projection, summary and cache settings
+    """
+
+    def __init__(self, settings: ProfilePromptSettings):
+        self.settings = settings
+        self._cache: "OrderedDict[Tuple[str, str, Tuple[str, ...]], PromptProfile]" = (
+            OrderedDict()
+        )
+        self._renderers: Dict[str, Callable[[Customer], Any]] = {
+            "name": self._name,
+            "communication_preferences": self._channels,
+            "purchase_history": self._purchases,
+        }
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _name(customer: Customer) -> str:
+        return f"{customer.customer_first_name} {customer.customer_last_name}".strip()
+
+    @staticmethod
+    def _channels(customer: Customer) -> list:
+        """Render communication preferences as the list of enabled channels."""
+        preferences = customer.communication_preferences.model_dump()
+        return [channel for channel, enabled in preferences.items() if enabled]
+
+    def _purchases(self, customer: Customer) -> Dict[str, Any]:
+        """Summarize purchase history as aggregates plus the latest purchases."""
+        history = sorted(customer.purchase_history, key=lambda p: p.date, reverse=True)
+        if not history:
+            return {}
+        recent = []
+        for purchase in history[: self.settings.recent_purchases]:
+            items = [
+                f"{item.name} x{item.quantity}" if item.quantity != 1 else item.name
+                for item in purchase.items[: self.settings.max_items_per_purchase]
+            ]
+            extra = len(purchase.items) - len(items)
+            if extra > 0:
+                items.append(f"+{extra} more")
+            recent.append(
+                {"date": purchase.date, "total": purchase.total_amount, "items": items}
+            )
+        return {
+            "orders": len(history),
+            "spent": round(sum(p.total_amount for p in history), 2),
+            "first": history[-1].date,
+            "last": history[0].date,
+            "recent": recent,
+        }
+
+    def _render(self, customer: Customer, fields: Sequence[str]) -> PromptProfile:
+        projected: Dict[str, Any] = {}
+        for field in fields:
+            renderer = self._renderers.get(field)
+            if renderer is not None:
+                projected[field] = renderer(customer)
+            elif field in Customer.model_fields:
+                value = getattr(customer, field)
+                projected[field] = (
+                    value.model_dump() if hasattr(value, "model_dump") else value
+                )
+        text = json.dumps(
+            _compact(projected), separators=(",", ":"), ensure_ascii=False
+        )
+        return PromptProfile(
+            text=text,
+            token_estimate=estimate_tokens(text, self.settings.chars_per_token),
+        )
+
+    def serialize(
+        self,
+        customer: Customer,
+        version: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> PromptProfile:
+        """
+        Render a customer profile for a prompt.
+
+        Args:
+            customer: The customer to render
+            version: The profile version from the customer repository; the
+                result is cached per customer, version and field projection
+                when given
+            fields: Fields to include; defaults to settings.fields
+
+        Returns:
+            The minified profile and its token estimate.
+        """
+        fields = tuple(fields or self.settings.fields)
+        if version is None:
+            return self._render(customer, fields)
+
+        key = (customer.customer_id, version, fields)
+        profile = self._cache.get(key)
+        if profile is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return profile
+        self.misses += 1
+        profile = self._cache[key] = self._render(customer, fields)
+        while len(self._cache) > self.settings.cache_size:
+            self._cache.popitem(last=False)
+        return profile
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report serializer cache counters.
+
+        Returns:
+            Cached profiles, cache hits and cache misses.
+        """
+        return {"size": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+
+# Process-wide serializer shared by every session
+profile_serializer = ProfileSerializer(Config().profile_prompt)
@@ -0,0 +1,263 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Process-wide async rate limiting for model calls.
+
+Each model gets a token bucket refilled at its requests-per-minute quota.
+Callers that find the bucket empty wait on an asyncio future instead of
+sleeping the thread, and waiting callers are served round-robin by session
+so one busy conversation cannot starve the others.
+
+ADK runs model callbacks synchronously, so the wait happens in
+RateLimitedGemini.generate_content_async; rate_limit_callback only records
+which session and agent the upcoming request belongs to. RateLimitedGemini
+also records the wait, the call's latency and its estimated tokens in the
+metrics registry.
+"""
+
+import asyncio
+import bisect
+import contextvars
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import AsyncGenerator, Callable, Deque, Dict, List, Optional
+
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.models.google_llm import Gemini
+
+from customer_service.config import Config, RateLimitSettings
+from customer_service.shared_libraries.metrics import (
+    MODEL_CALL_SECONDS,
+    MODEL_ERRORS,
+    MODEL_TOKENS,
+    RATE_LIMIT_WAIT_SECONDS,
+    current_agent,
+    metrics,
+)
+
+logger = logging.getLogger(__name__)
+
+# Session of the model request about to be made in the current task
+current_session_id: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "current_session_id", default=""
+)
+
+# Upper bounds (seconds) of the queue wait histogram buckets
+WAIT_BUCKETS = (0.0, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float("inf"))
+
+
+class _ModelQueue:
+    """Token bucket and per-session wait queues for one model."""
+
+    def __init__(self, rate_per_sec: float, capacity: float, now: float):
+        self.rate_per_sec = rate_per_sec
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = now
+        self.waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self.dispatcher: Optional[asyncio.Task] = None
+        self.acquired = 0
+        self.delayed = 0
+        self.total_wait_secs = 0.0
+        self.max_wait_secs = 0.0
+        self.wait_histogram: List[int] = [0] * len(WAIT_BUCKETS)
+
+    def refill(self, now: float) -> None:
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate_per_sec)
+        self.updated_at = now
+
+    def record(self, wait_secs: float) -> None:
+        self.acquired += 1
+        if wait_secs > 0:
+            self.delayed += 1
+        self.total_wait_secs += wait_secs
+        self.max_wait_secs = max(self.max_wait_secs, wait_secs)
+        self.wait_histogram[bisect.bisect_left(WAIT_BUCKETS, wait_secs)] += 1
+
+    @property
+    def queued(self) -> int:
+        return sum(
+            1 for futures in self.waiters.values() for f in futures if not f.done()
+        )
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter with per-model quotas and fair queuing.
+
+    Attributes:
+        settings: Default and per-model quotas
+    """
+
+    def __init__(
+        self,
+        settings: RateLimitSettings,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.settings = settings
+        self._clock = clock
+        self._queues: Dict[str, _ModelQueue] = {}
+
+    def _queue(self, model: str) -> _ModelQueue:
+        queue = self._queues.get(model)
+        if queue is None:
+            rpm = self.settings.model_rpm.get(model, self.settings.default_rpm)
+            capacity = self.settings.burst or rpm
+            queue = self._queues[model] = _ModelQueue(
+                rate_per_sec=rpm / self.settings.window_secs,
+                capacity=capacity,
+                now=self._clock(),
+            )
+        return queue
+
+    async def acquire(self, model: str, session_id: str = "") -> float:
+        """
+        Wait until a request to model may be made.
+
+        Args:
+            model: The model the request is for
+            session_id: The session making the request, used for fair queuing
+
+        Returns:
+            The number of seconds spent waiting.
+        """
+        queue = self._queue(model)
+        queue.refill(self._clock())
+        if not queue.waiters and queue.tokens >= 1:
+            queue.tokens -= 1
+            queue.record(0.0)
+            return 0.0
+
+        started_at = self._clock()
+        future = asyncio.get_running_loop().create_future()
+        queue.waiters.setdefault(session_id, deque()).append(future)
+        if queue.dispatcher is None or queue.dispatcher.done():
+            queue.dispatcher = asyncio.create_task(self._dispatch(queue))
+        await future
+        wait_secs = self._clock() - started_at
+        queue.record(wait_secs)
+        logger.debug(
+            "Rate limiter delayed %s request for session %s by %.2fs",
+            model,
+            session_id,
+            wait_secs,
+        )
+        return wait_secs
+
+    async def _dispatch(self, queue: _ModelQueue) -> None:
+        """Hand out tokens to waiting sessions in round-robin order."""
+        while queue.waiters:
+            queue.refill(self._clock())
+            if queue.tokens < 1:
+                await asyncio.sleep((1 - queue.tokens) / queue.rate_per_sec)
+                continue
+            session_id, futures = next(iter(queue.waiters.items()))
+            future = futures.popleft()
+            if futures:
+                queue.waiters.move_to_end(session_id)
+            else:
+                del queue.waiters[session_id]
+            if future.done():  # Cancelled while waiting
+                continue
+            queue.tokens -= 1
+            future.set_result(None)
+
+    def backlog_secs(self) -> float:
+        """
+        Estimate how long a request made now would wait.
+
+        Returns:
+            Seconds until the busiest model's queued requests and one more
+            have been served, 0 if every model has a token to spare.
+        """
+        now = self._clock()
+        backlog = 0.0
+        for queue in self._queues.values():
+            queue.refill(now)
+            deficit = queue.queued + 1 - queue.tokens
+            backlog = max(backlog, deficit / queue.rate_per_sec)
+        return backlog
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        """
+        Report per-model limiter metrics.
+
+        Returns:
+            For every model: requests admitted, requests that had to wait,
+            requests currently queued, total/mean/max queue wait in seconds
+            and a histogram of waits keyed by bucket upper bound.
+        """
+        return {
+            model: {
+                "acquired": queue.acquired,
+                "delayed": queue.delayed,
+                "queued": queue.queued,
+                "total_wait_secs": queue.total_wait_secs,
+                "mean_wait_secs": (
+                    queue.total_wait_secs / queue.acquired if queue.acquired else 0.0
+                ),
+                "max_wait_secs": queue.max_wait_secs,
+                "wait_histogram": dict(zip(WAIT_BUCKETS, queue.wait_histogram)),
+            }
+            for model, queue in self._queues.items()
+        }
+
+
+# Process-wide limiter shared by every agent and session
+rate_limiter = RateLimiter(Config().rate_limit)
+
+
+class RateLimitedGemini(Gemini):
+    """Gemini model whose requests wait for the process-wide rate limiter."""
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        model = llm_request.model or self.model
+        agent = current_agent.get()
+        started = time.perf_counter()
+        await rate_limiter.acquire(model, current_session_id.get())
+        called = time.perf_counter()
+        RATE_LIMIT_WAIT_SECONDS.observe(called - started, agent=agent, model=model)
+
+        config = llm_request.config
+        system_instruction = config.system_instruction if config else None
+        MODEL_TOKENS.observe(
+            metrics.estimate_tokens(
+                llm_request.contents,
+                system_instruction if isinstance(system_instruction, str) else "",
+            ),
+            agent=agent,
+            direction="prompt",
+        )
+        try:
+            async for response in super().generate_content_async(llm_request, stream):
+                if response.error_code:
+                    MODEL_ERRORS.inc(agent=agent, model=model)
+                elif not response.partial:
+                    MODEL_TOKENS.observe(
+                        metrics.estimate_tokens([response.content]),
+                        agent=agent,
+                        direction="response",
+                    )
+                yield response
+        except Exception:
+            MODEL_ERRORS.inc(agent=agent, model=model)
+            raise
+        finally:
+            MODEL_CALL_SECONDS.observe(
+                time.perf_counter() - called, agent=agent, model=model
+            )
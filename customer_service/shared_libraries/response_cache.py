@@ -0,0 +1,415 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Cache of model answers to repeated policy and FAQ questions.
+
+Questions like "what's your return policy" get the same answer for every
+customer, yet each one costs a root model call and often a delegation to the
+product agent. The ResponseCache stores final text answers keyed on the agent
+that received the question, a coarse customer segment and the normalized
+question. A lookup first tries the exact key, then the most similar cached
+question for the same agent and segment, accepted above a cosine similarity
+threshold over stemmed content words. Questions with too few content words
+are only matched exactly, since "ok" or "do it" is similar to too much.
+Callers only look up and store a session's opening question; follow-ups
+depend on the conversation before them.
+
+Only answers produced without tool calls (other than agent transfers) are
+stored, and answers mentioning any value from the customer's profile, an
+email address, a phone number or an order number are refused, so one
+customer's data is never served to another.
+"""
+
+import json
+import logging
+import math
+import re
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from google.genai import types
+
+from customer_service.config import Config, ResponseCacheSettings
+
+logger = logging.getLogger(__name__)
+
+# (agent name, customer segment, normalized question)
+CacheKey = Tuple[str, str, str]
+
+_STOPWORDS = frozenset(
+    """a an and any are as at be can could do does for from have how i if in
+    is it its me my of on or our please should so tell the there this to us
+    was what whats when where which will with would you your yours""".split()
+)
+_SUFFIXES = ("ing", "es", "ed", "s")
+_WORD = re.compile(r"[a-z0-9]+")
+_PERSONAL_DATA = [
+    re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+"),  # email address
+    re.compile(r"\+?\d[\d\s().-]{7,}\d"),  # phone number
+    re.compile(r"#\d{3,}"),  # order name
+    re.compile(r"\b\d{6,}\b"),  # order, customer or account number
+    re.compile(r"gid://", re.IGNORECASE),  # Shopify global ID
+]
+
+
+def normalize_query(text: str) -> str:
+    """
+    Normalize a question for exact lookups.
+
+    Args:
+        text: The customer's question
+
+    Returns:
+        The question lowercased, without apostrophes or punctuation, and
+        with whitespace collapsed.
+    """
+    return " ".join(_WORD.findall(text.lower().replace("'", "")))
+
+
+def stem(word: str) -> str:
+    """
+    Strip a common inflection from a word.
+
+    Args:
+        word: A lowercased word
+
+    Returns:
+        The word without a trailing "ing", "es", "ed" or "s", if at least
+        three characters remain.
+    """
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[: -len(suffix)]
+    return word
+
+
+def query_terms(normalized: str) -> Counter:
+    """
+    Split a normalized question into stemmed content words.
+
+    Args:
+        normalized: A question from normalize_query
+
+    Returns:
+        Stemmed words other than stopwords, with their counts.
+    """
+    return Counter(stem(w) for w in normalized.split() if w not in _STOPWORDS)
+
+
+def _cosine(a: Counter, b: Counter) -> float:
+    dot = sum(count * b[term] for term, count in a.items())
+    if not dot:
+        return 0.0
+    norm_a = math.sqrt(sum(c * c for c in a.values()))
+    norm_b = math.sqrt(sum(c * c for c in b.values()))
+    return dot / (norm_a * norm_b)
+
+
+def customer_segment(profile_text: Optional[str]) -> str:
+    """
+    Fingerprint the customer's segment from their prompt profile.
+
+    Answers may depend on whether the customer has ordered before (e.g.
+    first-order offers), but never on who the customer is.
+
+    Args:
+        profile_text: The compact profile JSON from before_agent, if loaded
+
+    Returns:
+        "returning", "new" or "unknown".
+    """
+    if not profile_text:
+        return "unknown"
+    try:
+        profile = json.loads(profile_text)
+    except ValueError:
+        return "unknown"
+    return "returning" if profile.get("purchase_history") else "new"
+
+
+def personal_values(profile_text: Optional[str]) -> Set[str]:
+    """
+    Collect the customer's profile values that must not appear in a cached
+    answer.
+
+    Args:
+        profile_text: The compact profile JSON from before_agent, if loaded
+
+    Returns:
+        Lowercased string values of at least three characters, including
+        the first and last name separately.
+    """
+    if not profile_text:
+        return set()
+    try:
+        profile = json.loads(profile_text)
+    except ValueError:
+        return set()
+
+    values: Set[str] = set()
+
+    def collect(value: Any) -> None:
+        if isinstance(value, dict):
+            for item in value.values():
+                collect(item)
+        elif isinstance(value, list):
+            for item in value:
+                collect(item)
+        elif value is not None and not isinstance(value, bool):
+            text = str(value).strip().lower()
+            if len(text) >= 3:
+                values.add(text)
+
+    collect(profile)
+    for part in str(profile.get("name", "")).split():
+        if len(part) >= 3:
+            values.add(part.lower())
+    return values
+
+
+def _content_text(content: Optional[types.Content]) -> str:
+    if content is None or not content.parts:
+        return ""
+    return "".join(part.text or "" for part in content.parts)
+
+
+class _Entry:
+    """A cached answer and when it expires."""
+
+    __slots__ = ("content", "terms", "expires_at")
+
+    def __init__(self, content: types.Content, terms: Counter, expires_at: float):
+        self.content = content
+        self.terms = terms
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """
+    TTL and LRU bounded cache of final model answers.
+
+    Attributes:
+        settings: TTL, size and similarity settings
+        hits: Lookups answered by the exact question
+        similar_hits: Lookups answered by a similar question
+        misses: Lookups with no usable entry
+        refused: Answers not stored because of tool calls or personal data
+    """
+
+    def __init__(
+        self,
+        settings: ResponseCacheSettings,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.settings = settings
+        self._clock = clock
+        self._entries: "OrderedDict[CacheKey, _Entry]" = OrderedDict()
+        # (agent, segment) -> term -> keys, for similarity candidates
+        self._index: Dict[Tuple[str, str], Dict[str, Set[CacheKey]]] = {}
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.refused = 0
+
+    def lookup(
+        self, agent_name: str, segment: str, query: str
+    ) -> Optional[types.Content]:
+        """
+        Find a cached answer to a question.
+
+        Args:
+            agent_name: The agent the question was asked to
+            segment: The customer segment from customer_segment
+            query: The customer's question
+
+        Returns:
+            A copy of the cached answer, or None.
+        """
+        if not self.settings.enabled:
+            return None
+        normalized = normalize_query(query)
+        if not normalized or len(normalized) > self.settings.max_query_chars:
+            return None
+        key = (agent_name, segment, normalized)
+        entry = self._live_entry(key)
+        if entry is not None:
+            self.hits += 1
+        else:
+            key = self._most_similar(agent_name, segment, query_terms(normalized))
+            entry = self._live_entry(key) if key else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.similar_hits += 1
+        self._entries.move_to_end(key)
+        return entry.content.model_copy(deep=True)
+
+    def store(
+        self,
+        agent_name: str,
+        segment: str,
+        query: str,
+        content: types.Content,
+        personal: Iterable[str] = (),
+    ) -> bool:
+        """
+        Cache an answer unless it calls tools or contains personal data.
+
+        Args:
+            agent_name: The agent the question was asked to
+            segment: The customer segment from customer_segment
+            query: The customer's question
+            content: The model's final answer
+            personal: The customer's profile values, from personal_values
+
+        Returns:
+            Whether the answer was cached.
+        """
+        if not self.settings.enabled:
+            return False
+        normalized = normalize_query(query)
+        if not normalized or len(normalized) > self.settings.max_query_chars:
+            return False
+        text = _content_text(content)
+        if not text.strip() or not self.is_cacheable(content, personal):
+            self.refused += 1
+            return False
+
+        key = (agent_name, segment, normalized)
+        self._remove(key)
+        terms = query_terms(normalized)
+        self._entries[key] = _Entry(
+            content.model_copy(deep=True),
+            terms,
+            self._clock() + self.settings.ttl_secs,
+        )
+        postings = self._index.setdefault((agent_name, segment), {})
+        for term in terms:
+            postings.setdefault(term, set()).add(key)
+        while len(self._entries) > self.settings.max_entries:
+            self._remove(next(iter(self._entries)))
+        return True
+
+    @staticmethod
+    def is_cacheable(content: types.Content, personal: Iterable[str] = ()) -> bool:
+        """
+        Check that an answer has no tool calls and no personal data.
+
+        Args:
+            content: The model's answer
+            personal: The customer's profile values, from personal_values
+
+        Returns:
+            Whether the answer may be served to other customers.
+        """
+        for part in content.parts or []:
+            if part.function_call or part.function_response:
+                return False
+            if part.inline_data or part.file_data or part.executable_code:
+                return False
+        text = _content_text(content)
+        if any(pattern.search(text) for pattern in _PERSONAL_DATA):
+            return False
+        lowered = text.lower()
+        return not any(value in lowered for value in personal)
+
+    def invalidate(
+        self, agent_name: Optional[str] = None, query: Optional[str] = None
+    ) -> int:
+        """
+        Drop cached answers, e.g. after a policy changes.
+
+        Args:
+            agent_name: Only drop this agent's answers
+            query: Only drop answers to this question and similar ones
+
+        Returns:
+            The number of answers dropped.
+        """
+        if query is None:
+            keys = [k for k in self._entries if agent_name in (None, k[0])]
+        else:
+            normalized = normalize_query(query)
+            terms = query_terms(normalized)
+            threshold = self.settings.similarity_threshold
+            keys = [
+                key
+                for key, entry in self._entries.items()
+                if agent_name in (None, key[0])
+                and (key[2] == normalized or _cosine(terms, entry.terms) >= threshold)
+            ]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        """Drop every cached answer."""
+        self._entries.clear()
+        self._index.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report cache counters.
+
+        Returns:
+            Entries held, exact and similar hits, misses and refused answers.
+        """
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "refused": self.refused,
+        }
+
+    def _live_entry(self, key: CacheKey) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= self._clock():
+            self._remove(key)
+            return None
+        return entry
+
+    def _most_similar(
+        self, agent_name: str, segment: str, terms: Counter
+    ) -> Optional[CacheKey]:
+        """Find the most similar cached question above the threshold."""
+        postings = self._index.get((agent_name, segment))
+        if not postings or len(terms) < self.settings.min_similar_terms:
+            return None
+        candidates: Set[CacheKey] = set()
+        for term in terms:
+            candidates.update(postings.get(term, ()))
+        best_key, best_score = None, self.settings.similarity_threshold
+        for key in candidates:
+            score = _cosine(terms, self._entries[key].terms)
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def _remove(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        postings = self._index.get(key[:2], {})
+        for term in entry.terms:
+            keys = postings.get(term)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del postings[term]
+
+
+# Process-wide response cache shared by every session
+response_cache = ResponseCache(Config().response_cache)
@@ -0,0 +1,819 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""ADK session service persisting sessions in a local SQLite database.
+
+Sessions survive restarts and can be shared by several workers on one host:
+
+- The database runs in WAL mode, so readers never wait for the writer.
+- Events and state deltas of a turn are buffered in memory and written in
+  one transaction when the turn's final response is appended, instead of
+  one transaction per event.
+- The transaction runs on a single writer thread with its own connection,
+  so serializing events, committing and WAL checkpoints never block the
+  event loop; the turn's changes are snapshotted and handed over in order.
+  A session with queued writes is served from memory, even if it was
+  evicted meanwhile, and is reloaded only once they are in the database;
+  reads never wait for the writer. A write that fails is put back in the
+  session's buffers and retried with its next write.
+- Recently used sessions are kept in an LRU read-through cache. A cached
+  session is revalidated with a primary key lookup of its version before
+  use, so a turn another worker wrote is picked up instead of overwritten.
+
+State is split the way ADK scopes it: "app:" and "user:" keys are stored
+once per app and per user and merged into every session read, "temp:" keys
+are never stored and the rest belongs to the session.
+"""
+
+import copy
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, InMemorySessionService, Session
+from google.adk.sessions.base_session_service import (
+    GetSessionConfig,
+    ListEventsResponse,
+    ListSessionsResponse,
+)
+from google.adk.sessions.state import State
+
+from customer_service.config import SessionStoreSettings
+from customer_service.shared_libraries.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SESSION_LOOKUPS = metrics.counter(
+    "session_store_lookups_total",
+    "Session reads by cache result (hit, stale or miss)",
+    ["result"],
+)
+SESSION_WRITE_SECONDS = metrics.histogram(
+    "session_store_write_seconds", "Time spent writing a turn's events", []
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    last_update_time REAL NOT NULL,
+    version INTEGER NOT NULL,
+    PRIMARY KEY (app_name, user_id, id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS events (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    event TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_by_session
+    ON events (app_name, user_id, session_id);
+CREATE TABLE IF NOT EXISTS app_states (
+    app_name TEXT PRIMARY KEY,
+    state TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS user_states (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id)
+) WITHOUT ROWID;
+"""
+
+_SESSION_KEY = "app_name = ? AND user_id = ? AND id = ?"
+_EVENTS_KEY = "app_name = ? AND user_id = ? AND session_id = ?"
+
+SessionKey = Tuple[str, str, str]
+
+
+def _split_state(
+    delta: Dict[str, Any],
+) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    """Split a state delta into session, app and user deltas."""
+    own: Dict[str, Any] = {}
+    app: Dict[str, Any] = {}
+    user: Dict[str, Any] = {}
+    for key, value in delta.items():
+        if key.startswith(State.APP_PREFIX):
+            app[key.removeprefix(State.APP_PREFIX)] = value
+        elif key.startswith(State.USER_PREFIX):
+            user[key.removeprefix(State.USER_PREFIX)] = value
+        elif not key.startswith(State.TEMP_PREFIX):
+            own[key] = value
+    return own, app, user
+
+
+class _Entry:
+    """A cached session and the writes not yet in the database."""
+
+    __slots__ = ("session", "version", "events", "state", "app", "user", "stale")
+
+    def __init__(self, session: Session, version: int):
+        self.session = session
+        self.version = version
+        self.events: List[Event] = []
+        self.state: Dict[str, Any] = {}
+        self.app: Dict[str, Any] = {}
+        self.user: Dict[str, Any] = {}
+        # Set by the writer when another worker wrote the session first
+        self.stale = False
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self.events or self.state or self.app or self.user)
+
+
+class _Write:
+    """A snapshot of an entry's buffered changes, handed to the writer."""
+
+    __slots__ = (
+        "key",
+        "entry",
+        "version",
+        "session_state",
+        "last_update_time",
+        "events",
+        "state",
+        "app",
+        "user",
+    )
+
+    def __init__(self, key: SessionKey, entry: _Entry):
+        self.key = key
+        self.entry = entry
+        self.version = entry.version
+        self.session_state = json.dumps(entry.session.state)
+        self.last_update_time = entry.session.last_update_time
+        self.events = entry.events
+        self.state = entry.state
+        self.app = entry.app
+        self.user = entry.user
+
+
+class _Pending:
+    """A session's latest queued write, its entry and the scoped state it
+    carries."""
+
+    __slots__ = ("future", "entry", "app", "user")
+
+    def __init__(
+        self,
+        future: Future,
+        entry: _Entry,
+        app: Dict[str, Any],
+        user: Dict[str, Any],
+    ):
+        self.future = future
+        self.entry = entry
+        self.app = app
+        self.user = user
+
+
+class SQLiteSessionService(BaseSessionService):
+    """
+    Session service backed by SQLite in WAL mode with a read-through cache.
+
+    Turn writes run on a writer thread when the database is a file; an
+    in-memory database cannot be shared between connections, so it is
+    written inline.
+
+    Attributes:
+        settings: Database path, cache size and write batching limits
+        hits: Reads answered from the cache
+        misses: Reads that loaded the session from the database
+        stale: Cached sessions reloaded because another worker wrote them
+        writes: Transactions that wrote buffered events
+        failed_writes: Transactions that failed; their events are put back
+            in the session's buffers
+    """
+
+    def __init__(self, settings: SessionStoreSettings):
+        self.settings = settings
+        self._lock = threading.RLock()
+        self._cache: "OrderedDict[SessionKey, _Entry]" = OrderedDict()
+        # Latest queued write per session, guarded by _pending_lock since
+        # the writer thread removes them
+        self._pending: Dict[SessionKey, _Pending] = {}
+        # Failed writes per session, plus the writes queued behind them,
+        # in order; also guarded by _pending_lock
+        self._failed: Dict[SessionKey, List[_Write]] = {}
+        self._write_error: Optional[BaseException] = None
+        self._pending_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.writes = 0
+        self.failed_writes = 0
+        self._db = self._connect()
+        self._db.executescript(_SCHEMA)
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._writer_db: Optional[sqlite3.Connection] = None
+        if settings.path:
+            self._writer = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="session-writer"
+            )
+            self._writer_db = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(
+            self.settings.path or ":memory:",
+            timeout=self.settings.busy_timeout_secs,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(f"PRAGMA synchronous={self.settings.synchronous}")
+        return db
+
+    @contextmanager
+    def _transaction(
+        self, db: Optional[sqlite3.Connection] = None
+    ) -> Iterator[sqlite3.Connection]:
+        # IMMEDIATE takes the write lock up front, so the read-modify-write
+        # of app and user state cannot interleave with another worker's
+        db = db or self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def _merge_scoped_state(
+        self,
+        db: sqlite3.Connection,
+        app_name: str,
+        user_id: str,
+        app: Dict[str, Any],
+        user: Dict[str, Any],
+    ) -> None:
+        """Write app and user state deltas."""
+        if app:
+            row = db.execute(
+                "SELECT state FROM app_states WHERE app_name = ?", (app_name,)
+            ).fetchone()
+            state = {**(json.loads(row[0]) if row else {}), **app}
+            db.execute(
+                "INSERT OR REPLACE INTO app_states VALUES (?, ?)",
+                (app_name, json.dumps(state)),
+            )
+        if user:
+            row = db.execute(
+                "SELECT state FROM user_states WHERE app_name = ? AND user_id = ?",
+                (app_name, user_id),
+            ).fetchone()
+            state = {**(json.loads(row[0]) if row else {}), **user}
+            db.execute(
+                "INSERT OR REPLACE INTO user_states VALUES (?, ?, ?)",
+                (app_name, user_id, json.dumps(state)),
+            )
+
+    def _scoped_state(self, key: SessionKey, entry: _Entry) -> Dict[str, Any]:
+        """The app and user state merged into a session, with prefixes."""
+        app_name, user_id, _ = key
+        with self._pending_lock:
+            pending = self._pending.get(key)
+        queued_app = pending.app if pending else {}
+        queued_user = pending.user if pending else {}
+        row = self._db.execute(
+            "SELECT state FROM app_states WHERE app_name = ?", (app_name,)
+        ).fetchone()
+        app = {**(json.loads(row[0]) if row else {}), **queued_app, **entry.app}
+        row = self._db.execute(
+            "SELECT state FROM user_states WHERE app_name = ? AND user_id = ?",
+            (app_name, user_id),
+        ).fetchone()
+        user = {**(json.loads(row[0]) if row else {}), **queued_user, **entry.user}
+        state = {State.APP_PREFIX + name: value for name, value in app.items()}
+        state.update({State.USER_PREFIX + name: value for name, value in user.items()})
+        return state
+
+    def _load(self, key: SessionKey) -> Optional[_Entry]:
+        row = self._db.execute(
+            f"SELECT state, last_update_time, version FROM sessions "
+            f"WHERE {_SESSION_KEY}",
+            key,
+        ).fetchone()
+        if row is None:
+            return None
+        events = [
+            Event.model_validate_json(data)
+            for (data,) in self._db.execute(
+                f"SELECT event FROM events WHERE {_EVENTS_KEY} ORDER BY rowid", key
+            )
+        ]
+        session = Session(
+            app_name=key[0],
+            user_id=key[1],
+            id=key[2],
+            state=json.loads(row[0]),
+            events=events,
+            last_update_time=row[1],
+        )
+        return _Entry(session, row[2])
+
+    def _remember(self, key: SessionKey, entry: _Entry) -> None:
+        self._cache[key] = entry
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.settings.cache_size:
+            evicted_key, evicted = self._cache.popitem(last=False)
+            self._write(evicted_key, evicted)
+
+    def _entry(self, key: SessionKey, validate: bool) -> Optional[_Entry]:
+        """
+        Get a session's cache entry, loading it on a miss.
+
+        Args:
+            key: The session's app name, user ID and session ID
+            validate: Reload the session if another worker wrote it since
+                it was cached
+
+        Returns:
+            The entry, or None if the session does not exist.
+        """
+        self._restore_failed()
+        entry = self._cache.get(key)
+        pending = self._pending_entry(key)
+        if entry is None and pending is not None:
+            # Evicted while its writes are queued: the entry is still the
+            # newest copy, and the database is not
+            entry = pending
+            self._remember(key, entry)
+        if entry is not None and entry.stale and entry.dirty:
+            # Hand this worker's changes over before the session is reloaded
+            self._write(key, entry)
+            pending = self._pending_entry(key)
+        if entry is not None:
+            # The database is behind the entry until queued writes land, so
+            # a stale entry is reloaded only once they are in
+            fresh = not entry.stale and (
+                not validate or not self.settings.validate_cache
+            )
+            if fresh or entry.dirty or pending is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                SESSION_LOOKUPS.inc(result="hit")
+                return entry
+            if not entry.stale:
+                row = self._db.execute(
+                    f"SELECT version FROM sessions WHERE {_SESSION_KEY}", key
+                ).fetchone()
+                if row is not None and row[0] == entry.version:
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    SESSION_LOOKUPS.inc(result="hit")
+                    return entry
+            self._cache.pop(key, None)
+            self.stale += 1
+            SESSION_LOOKUPS.inc(result="stale")
+        else:
+            self.misses += 1
+            SESSION_LOOKUPS.inc(result="miss")
+        entry = self._load(key)
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    def _pending_entry(self, key: SessionKey) -> Optional[_Entry]:
+        """The entry whose writes are queued for a session, if any."""
+        with self._pending_lock:
+            pending = self._pending.get(key)
+        return pending.entry if pending is not None else None
+
+    def _restore_failed(self) -> None:
+        """
+        Put failed writes back in their entries' buffers, so they are
+        retried with the entry's next write.
+
+        A session is restored only once none of its writes are queued, so
+        its events stay in order.
+        """
+        with self._pending_lock:
+            if not self._failed:
+                return
+            ready = {
+                key: writes
+                for key, writes in self._failed.items()
+                if key not in self._pending
+            }
+            for key in ready:
+                del self._failed[key]
+        for key, writes in ready.items():
+            entry = writes[-1].entry
+            events: List[Event] = []
+            state: Dict[str, Any] = {}
+            app: Dict[str, Any] = {}
+            user: Dict[str, Any] = {}
+            for write in writes:
+                events.extend(write.events)
+                state.update(write.state)
+                app.update(write.app)
+                user.update(write.user)
+            entry.events = events + entry.events
+            entry.state = {**state, **entry.state}
+            entry.app = {**app, **entry.app}
+            entry.user = {**user, **entry.user}
+            # The database still has the version the first failed write read
+            entry.version = writes[0].version
+            if self._cache.get(key) is not entry:
+                self._remember(key, entry)
+
+    def _write(self, key: SessionKey, entry: _Entry) -> None:
+        """
+        Hand an entry's buffered events and state to the writer.
+
+        The buffers are cleared and the entry takes the version the write
+        will leave in the database, so the next turn can buffer at once.
+        """
+        if not entry.dirty:
+            return
+        write = _Write(key, entry)
+        entry.version += 1
+        entry.events, entry.state, entry.app, entry.user = [], {}, {}, {}
+        if self._writer is None:
+            self._apply(write, self._db)
+            return
+        with self._pending_lock:
+            # Later reads see the scoped state of every queued write
+            queued = self._pending.get(key)
+            future = self._writer.submit(self._apply, write, self._writer_db)
+            self._pending[key] = _Pending(
+                future,
+                entry,
+                {**queued.app, **write.app} if queued else write.app,
+                {**queued.user, **write.user} if queued else write.user,
+            )
+        future.add_done_callback(lambda done: self._written(key, done))
+
+    def _written(self, key: SessionKey, future: Future) -> None:
+        with self._pending_lock:
+            pending = self._pending.get(key)
+            if pending is not None and pending.future is future:
+                del self._pending[key]
+
+    def _apply(self, write: _Write, db: sqlite3.Connection) -> None:
+        """
+        Write a snapshot of a turn in one transaction.
+
+        A failed write, and every later write of the session until it is
+        restored, is kept for _restore_failed.
+        """
+        started = time.perf_counter()
+        key = write.key
+        with self._pending_lock:
+            if key in self._failed:
+                # Writing this turn before the failed one would reorder events
+                self._failed[key].append(write)
+                return
+        conflict = False
+        try:
+            with self._transaction(db):
+                updated = db.execute(
+                    f"UPDATE sessions SET state = ?, last_update_time = ?, "
+                    f"version = version + 1 WHERE {_SESSION_KEY} AND version = ?",
+                    (write.session_state, write.last_update_time, *key)
+                    + (write.version,),
+                ).rowcount
+                if not updated:
+                    # Another worker wrote the session since it was read:
+                    # apply this turn's changes on top of what it wrote
+                    row = db.execute(
+                        f"SELECT state FROM sessions WHERE {_SESSION_KEY}", key
+                    ).fetchone()
+                    if row is None:
+                        logger.warning(
+                            "Dropping writes to deleted session %s", key[2]
+                        )
+                        write.entry.stale = True
+                        return
+                    conflict = True
+                    db.execute(
+                        f"UPDATE sessions SET state = ?, last_update_time = ?, "
+                        f"version = version + 1 WHERE {_SESSION_KEY}",
+                        (
+                            json.dumps({**json.loads(row[0]), **write.state}),
+                            write.last_update_time,
+                            *key,
+                        ),
+                    )
+                db.executemany(
+                    "INSERT INTO events VALUES (?, ?, ?, ?)",
+                    [
+                        (*key, event.model_dump_json(exclude_none=True))
+                        for event in write.events
+                    ],
+                )
+                self._merge_scoped_state(db, key[0], key[1], write.app, write.user)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.exception("Failed to write session %s; will retry", key[2])
+            with self._pending_lock:
+                self._failed.setdefault(key, []).append(write)
+                self._write_error = e
+            self.failed_writes += 1
+            return
+
+        if conflict:
+            logger.info("Session %s was written concurrently; reloading", key[2])
+            write.entry.stale = True
+        self.writes += 1
+        SESSION_WRITE_SECONDS.observe(time.perf_counter() - started)
+
+    def _copy(self, key: SessionKey, entry: _Entry) -> Session:
+        # Callers mutate the state they are handed, so it is deep copied;
+        # events are never changed once appended and the list is shared
+        session = entry.session
+        return Session(
+            app_name=session.app_name,
+            user_id=session.user_id,
+            id=session.id,
+            state={**copy.deepcopy(session.state), **self._scoped_state(key, entry)},
+            events=list(session.events),
+            last_update_time=session.last_update_time,
+        )
+
+    def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        """
+        Create and store a session.
+
+        Args:
+            app_name: The app the session belongs to
+            user_id: The user the session belongs to
+            state: The session's initial state
+            session_id: The session's ID; by default a new UUID
+
+        Returns:
+            The session, with app and user state merged in.
+
+        Raises:
+            ValueError: If a session with the ID already exists
+        """
+        session_id = (session_id or "").strip() or str(uuid.uuid4())
+        key = (app_name, user_id, session_id)
+        own, app, user = _split_state(state or {})
+        session = Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id,
+            state=own,
+            last_update_time=time.time(),
+        )
+        entry = _Entry(session, 0)
+        with self._lock:
+            try:
+                with self._transaction() as db:
+                    db.execute(
+                        "INSERT INTO sessions VALUES (?, ?, ?, ?, ?, 0)",
+                        (*key, json.dumps(own), session.last_update_time),
+                    )
+                    self._merge_scoped_state(db, app_name, user_id, app, user)
+            except sqlite3.IntegrityError:
+                raise ValueError(f"Session {session_id} already exists") from None
+            self._remember(key, entry)
+            return self._copy(key, entry)
+
+    def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        """
+        Read a session, from the cache if it is current.
+
+        Args:
+            app_name: The app the session belongs to
+            user_id: The user the session belongs to
+            session_id: The session's ID
+            config: Which events to return; by default all of them
+
+        Returns:
+            The session, or None if it does not exist.
+        """
+        key = (app_name, user_id, session_id)
+        with self._lock:
+            entry = self._entry(key, validate=True)
+            if entry is None:
+                return None
+            session = self._copy(key, entry)
+        if config and config.num_recent_events:
+            session.events = session.events[-config.num_recent_events :]
+        elif config and config.after_timestamp:
+            session.events = [
+                event
+                for event in session.events
+                if event.timestamp >= config.after_timestamp
+            ]
+        return session
+
+    def list_sessions(self, *, app_name: str, user_id: str) -> ListSessionsResponse:
+        """
+        List a user's sessions, without their events and state.
+
+        Args:
+            app_name: The app the sessions belong to
+            user_id: The user the sessions belong to
+
+        Returns:
+            The sessions.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, last_update_time FROM sessions "
+                "WHERE app_name = ? AND user_id = ?",
+                (app_name, user_id),
+            ).fetchall()
+        return ListSessionsResponse(
+            sessions=[
+                Session(
+                    app_name=app_name,
+                    user_id=user_id,
+                    id=session_id,
+                    last_update_time=last_update_time,
+                )
+                for session_id, last_update_time in rows
+            ]
+        )
+
+    def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        """
+        Delete a session and its events.
+
+        Args:
+            app_name: The app the session belongs to
+            user_id: The user the session belongs to
+            session_id: The session's ID
+        """
+        key = (app_name, user_id, session_id)
+        with self._lock:
+            self._cache.pop(key, None)
+            with self._transaction() as db:
+                db.execute(f"DELETE FROM events WHERE {_EVENTS_KEY}", key)
+                db.execute(f"DELETE FROM sessions WHERE {_SESSION_KEY}", key)
+
+    def list_events(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> ListEventsResponse:
+        """
+        List a session's events.
+
+        Args:
+            app_name: The app the session belongs to
+            user_id: The user the session belongs to
+            session_id: The session's ID
+
+        Returns:
+            The events, oldest first.
+        """
+        session = self.get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+        return ListEventsResponse(events=session.events if session else [])
+
+    def append_event(self, session: Session, event: Event) -> Event:
+        """
+        Append an event to a session, writing the turn once it is answered.
+
+        Events are buffered until one is the turn's final response, or
+        until max_pending_events are buffered.
+
+        Args:
+            session: The session the runner is working with
+            event: The event
+
+        Returns:
+            The event.
+        """
+        if event.partial:
+            return event
+        super().append_event(session=session, event=event)
+        session.last_update_time = event.timestamp
+
+        key = (session.app_name, session.user_id, session.id)
+        with self._lock:
+            entry = self._entry(key, validate=False)
+            if entry is None:
+                return event
+            entry.session.events.append(event)
+            entry.session.last_update_time = event.timestamp
+            entry.events.append(event)
+            if event.actions and event.actions.state_delta:
+                own, app, user = _split_state(event.actions.state_delta)
+                entry.session.state.update(own)
+                entry.state.update(own)
+                entry.app.update(app)
+                entry.user.update(user)
+            if (
+                event.author != "user" and event.is_final_response()
+            ) or len(entry.events) >= self.settings.max_pending_events:
+                self._write(key, entry)
+        return event
+
+    def flush(self) -> None:
+        """
+        Hand every buffered event to the writer, e.g. after a turn failed
+        midway, without waiting for the writes. Failed writes are retried.
+        """
+        with self._lock:
+            self._restore_failed()
+            for key, entry in list(self._cache.items()):
+                self._write(key, entry)
+
+    def wait_for_writes(self) -> None:
+        """
+        Wait until every queued write is in the database or has failed;
+        failed writes are retried by the session's next write or flush.
+        """
+        with self._pending_lock:
+            pending = list(self._pending.values())
+        for queued in pending:
+            queued.future.result()
+
+    def close(self) -> None:
+        """
+        Write every buffered event and close the database.
+
+        Raises:
+            RuntimeError: If some sessions' events could not be written;
+                the error that failed the last write is its cause
+        """
+        with self._lock:
+            self.flush()
+            self.wait_for_writes()
+            self._restore_failed()
+            unwritten = [key[2] for key, entry in self._cache.items() if entry.dirty]
+            if self._writer is not None:
+                self._writer.shutdown(wait=True)
+                self._writer_db.close()
+            self._db.close()
+        if unwritten:
+            raise RuntimeError(
+                f"Could not write sessions: {', '.join(unwritten)}"
+            ) from self._write_error
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report cache and write counters.
+
+        Returns:
+            Cached sessions, sessions with queued writes, cache hits, misses
+            and stale entries, and written and failed write transactions.
+        """
+        with self._pending_lock:
+            pending = len(self._pending)
+        return {
+            "cached": len(self._cache),
+            "pending": pending,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "writes": self.writes,
+            "failed_writes": self.failed_writes,
+        }
+
+
+def create_session_service(settings: SessionStoreSettings) -> BaseSessionService:
+    """
+    Create the session service the settings ask for.
+
+    Args:
+        settings: The session store settings
+
+    Returns:
+        A SQLiteSessionService, or an InMemorySessionService if no database
+        path is set.
+    """
+    if not settings.path:
+        return InMemorySessionService()
+    logger.info("Storing sessions in %s", settings.path)
+    return SQLiteSessionService(settings)
@@ -0,0 +1,252 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Read-through TTL/LRU cache for MCP tool results.
+
+Catalog data changes far more slowly than customers ask about it, so the
+product agent's lookups are served from a process-wide cache keyed on the
+tool name and its normalized arguments. The cache is bounded by the
+serialized size of its entries and evicts least recently used entries first.
+"""
+
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from google.adk.tools import BaseTool
+from google.adk.tools.tool_context import ToolContext
+
+from customer_service.config import ToolCacheSettings
+from customer_service.shared_libraries.tool_wrappers import ToolWrapper
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(value: Any) -> Any:
+    """Drop empty arguments, collapse whitespace and unify whole numbers."""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)  # Gemini sends NUMBER arguments as floats
+    if isinstance(value, dict):
+        return {
+            k: _normalize(v) for k, v in value.items() if v is not None and v != ""
+        }
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def cache_key(tool_name: str, args: Dict[str, Any]) -> str:
+    """
+    Build the cache key for a tool call.
+
+    Args:
+        tool_name: Name of the tool
+        args: Arguments of the call
+
+    Returns:
+        A key that is identical for calls differing only in argument order,
+        surrounding whitespace, omitted empty arguments or 10 versus 10.0.
+    """
+    normalized = json.dumps(
+        _normalize(args or {}), sort_keys=True, separators=(",", ":"), default=str
+    )
+    return f"{tool_name}:{normalized}"
+
+
+def result_size(result: Any) -> int:
+    """
+    Estimate the size of a tool result in bytes.
+
+    Args:
+        result: A tool result, usually an MCP CallToolResult
+
+    Returns:
+        The length of the result's JSON serialization.
+    """
+    if hasattr(result, "model_dump_json"):
+        return len(result.model_dump_json().encode("utf-8"))
+    return len(json.dumps(result, default=str).encode("utf-8"))
+
+
+class _Entry(NamedTuple):
+    value: Any
+    expires_at: float
+    size: int
+
+
+class ToolResultCache:
+    """
+    Byte-bounded LRU cache with per-entry expiry.
+
+    Attributes:
+        max_bytes: Maximum total size of cached values
+        hits: Number of lookups served from the cache
+        misses: Number of lookups not found or expired
+        evictions: Number of entries dropped to stay under max_bytes
+    """
+
+    def __init__(
+        self, max_bytes: int, clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.tool_hits: Dict[str, int] = {}
+        self.tool_misses: Dict[str, int] = {}
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a live entry and mark it as recently used.
+
+        Args:
+            key: The cache key
+
+        Returns:
+            The cached value, or None on a miss.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= self._clock():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry.value
+
+    def set(self, key: str, value: Any, ttl_secs: float, size: int) -> None:
+        """
+        Store a value, evicting least recently used entries if needed.
+
+        Values larger than the whole cache are not stored.
+
+        Args:
+            key: The cache key
+            value: The value to store
+            ttl_secs: Seconds until the entry expires
+            size: Size of the value in bytes
+        """
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _Entry(value, self._clock() + ttl_secs, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate(self, prefix: str = "") -> int:
+        """
+        Drop every entry whose key starts with prefix.
+
+        Args:
+            prefix: Key prefix, for example a tool name; empty drops everything
+
+        Returns:
+            The number of dropped entries.
+        """
+        keys = [key for key in self._entries if key.startswith(prefix)]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def record(self, tool_name: str, hit: bool) -> None:
+        """Count a lookup for tool_name."""
+        if hit:
+            self.hits += 1
+            self.tool_hits[tool_name] = self.tool_hits.get(tool_name, 0) + 1
+        else:
+            self.misses += 1
+            self.tool_misses[tool_name] = self.tool_misses.get(tool_name, 0) + 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report cache counters.
+
+        Returns:
+            A dictionary with hit/miss/eviction counters, per-tool counters,
+            entry count and bytes in use.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "tool_hits": dict(self.tool_hits),
+            "tool_misses": dict(self.tool_misses),
+        }
+
+
+class CachedTool(ToolWrapper):
+    """
+    Read-through cache in front of a tool.
+
+    Error results are passed through without being cached.
+    """
+
+    def __init__(self, tool: BaseTool, cache: ToolResultCache, ttl_secs: float):
+        super().__init__(tool)
+        self.cache = cache
+        self.ttl_secs = ttl_secs
+
+    async def run_async(
+        self, *, args: Dict[str, Any], tool_context: ToolContext
+    ) -> Any:
+        key = cache_key(self.name, args)
+        cached = self.cache.get(key)
+        self.cache.record(self.name, cached is not None)
+        if cached is not None:
+            logger.debug("Cache hit for %s", key)
+            return cached
+
+        result = await self.wrapped_tool.run_async(
+            args=args, tool_context=tool_context
+        )
+        if not getattr(result, "isError", False):
+            self.cache.set(key, result, self.ttl_secs, result_size(result))
+        return result
+
+
+def wrap_with_cache(
+    tool: BaseTool, cache: ToolResultCache, settings: ToolCacheSettings
+) -> BaseTool:
+    """
+    Wrap a tool with the cache using its configured TTL.
+
+    Args:
+        tool: The tool to wrap
+        cache: The shared result cache
+        settings: Cache settings holding the per-tool TTLs
+
+    Returns:
+        The cached tool, or the tool itself if caching is disabled.
+    """
+    if not settings.enabled:
+        return tool
+    ttl_secs = settings.ttl_secs.get(tool.name, settings.default_ttl_secs)
+    return CachedTool(tool, cache, ttl_secs)
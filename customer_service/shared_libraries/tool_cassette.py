@@ -0,0 +1,271 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Record and replay of MCP tool calls.
+
+In record mode every call through a RecordingTool goes to the MCP server as
+usual, and the request and response are added to a cassette. Calls are keyed
+by tool name and normalized arguments (see tool_cache.cache_key). In replay
+mode the agent gets ReplayTools built from the cassette's recorded function
+declarations. They answer from the cassette without starting a server, so
+evals run fast, offline and against fixed store data.
+
+Identical responses are stored once. A call recorded several times replays
+its responses in recorded order, then keeps repeating the last one.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.adk.tools import BaseTool
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+from mcp.types import CallToolResult, TextContent
+
+from customer_service.shared_libraries.tool_cache import cache_key
+from customer_service.shared_libraries.tool_wrappers import ToolWrapper
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+
+
+def _encode(result: Any) -> Dict[str, Any]:
+    """Convert a tool result to JSON, remembering whether it came from MCP."""
+    if isinstance(result, CallToolResult):
+        return {"mcp": result.model_dump(mode="json", exclude_none=True)}
+    return {"json": json.loads(json.dumps(result, default=str))}
+
+
+def _decode(payload: Dict[str, Any]) -> Any:
+    if "mcp" in payload:
+        return CallToolResult.model_validate(payload["mcp"])
+    return payload["json"]
+
+
+class ToolCassette:
+    """
+    Recorded MCP tool calls, their responses and the tools' declarations.
+
+    Attributes:
+        path: File the cassette is loaded from and saved to; a .gz suffix
+            compresses it
+        recorded: Calls recorded since loading
+        replayed: Calls answered from the cassette
+        misses: Replayed calls with no recorded response
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._declarations: Dict[str, Dict[str, Any]] = {}
+        self._calls: Dict[str, List[str]] = {}
+        self._responses: Dict[str, Dict[str, Any]] = {}
+        self._cursors: Dict[str, int] = {}
+        self._dirty = False
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path: str) -> "ToolCassette":
+        """
+        Load a cassette from disk.
+
+        Args:
+            path: The cassette file
+
+        Returns:
+            The cassette.
+
+        Raises:
+            FileNotFoundError: If there is no cassette at path
+        """
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        cassette = cls(path)
+        cassette._declarations = data.get("tools", {})
+        cassette._calls = data.get("calls", {})
+        cassette._responses = data.get("responses", {})
+        return cassette
+
+    def save(self) -> None:
+        """Write the cassette to disk atomically, if anything was recorded."""
+        if not self._dirty:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        data = {
+            "version": CASSETTE_VERSION,
+            "tools": self._declarations,
+            "calls": self._calls,
+            "responses": self._responses,
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        os.close(fd)
+        opener = gzip.open if self.path.endswith(".gz") else open
+        with opener(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(data, f, sort_keys=True, indent=1)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+        logger.info(
+            "Saved %i calls and %i distinct responses to %s",
+            len(self._calls),
+            len(self._responses),
+            self.path,
+        )
+
+    def record(self, tool_name: str, args: Dict[str, Any], result: Any) -> None:
+        """
+        Add a call and its response.
+
+        Args:
+            tool_name: The tool called
+            args: The call's arguments
+            result: The tool's result
+        """
+        payload = _encode(result)
+        response_id = hashlib.sha1(
+            json.dumps(payload, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:16]
+        self._responses.setdefault(response_id, payload)
+        self._calls.setdefault(cache_key(tool_name, args), []).append(response_id)
+        self.recorded += 1
+        self._dirty = True
+
+    def replay(self, tool_name: str, args: Dict[str, Any]) -> Tuple[bool, Any]:
+        """
+        Look up the next recorded response for a call.
+
+        Args:
+            tool_name: The tool called
+            args: The call's arguments
+
+        Returns:
+            (True, result) for a recorded call, else (False, None).
+        """
+        key = cache_key(tool_name, args)
+        responses = self._calls.get(key)
+        if not responses:
+            self.misses += 1
+            return False, None
+        position = self._cursors.get(key, 0)
+        self._cursors[key] = position + 1
+        self.replayed += 1
+        response_id = responses[min(position, len(responses) - 1)]
+        return True, _decode(self._responses[response_id])
+
+    def recording_tools(self, tools: List[BaseTool]) -> List["RecordingTool"]:
+        """
+        Wrap MCP tools so their calls are recorded.
+
+        Args:
+            tools: The tools to record
+
+        Returns:
+            The wrapped tools, in order.
+        """
+        for tool in tools:
+            declaration = tool._get_declaration()
+            if declaration is not None:
+                self._declarations[tool.name] = declaration.model_dump(
+                    mode="json", exclude_none=True
+                )
+        self._dirty = True
+        return [RecordingTool(tool, self) for tool in tools]
+
+    def replay_tools(self) -> List["ReplayTool"]:
+        """
+        Create stand-ins for the recorded tools.
+
+        Returns:
+            One tool per recorded declaration.
+        """
+        return [
+            ReplayTool(types.FunctionDeclaration.model_validate(declaration), self)
+            for declaration in self._declarations.values()
+        ]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report cassette counters.
+
+        Returns:
+            Recorded tools, distinct calls and responses, and the calls
+            recorded, replayed and missed since loading.
+        """
+        return {
+            "tools": len(self._declarations),
+            "calls": len(self._calls),
+            "responses": len(self._responses),
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "misses": self.misses,
+        }
+
+
+class RecordingTool(ToolWrapper):
+    """Calls the wrapped tool and records the call in a cassette."""
+
+    def __init__(self, tool: BaseTool, cassette: ToolCassette):
+        super().__init__(tool)
+        self.cassette = cassette
+
+    async def run_async(
+        self, *, args: Dict[str, Any], tool_context: ToolContext
+    ) -> Any:
+        result = await self.wrapped_tool.run_async(
+            args=args, tool_context=tool_context
+        )
+        self.cassette.record(self.name, args, result)
+        return result
+
+
+class ReplayTool(BaseTool):
+    """Answers calls to a recorded tool from a cassette."""
+
+    def __init__(
+        self, declaration: types.FunctionDeclaration, cassette: ToolCassette
+    ):
+        super().__init__(
+            name=declaration.name, description=declaration.description or ""
+        )
+        self.declaration = declaration
+        self.cassette = cassette
+
+    def _get_declaration(self) -> Optional[types.FunctionDeclaration]:
+        return self.declaration
+
+    async def run_async(
+        self, *, args: Dict[str, Any], tool_context: Optional[ToolContext]
+    ) -> Any:
+        found, result = self.cassette.replay(self.name, args)
+        if found:
+            return result
+        logger.warning("No recorded response for %s", cache_key(self.name, args))
+        return CallToolResult(
+            content=[
+                TextContent(
+                    type="text",
+                    text=f"No recorded response for {self.name} with these "
+                    "arguments; re-record the cassette",
+                )
+            ],
+            isError=True,
+        )
@@ -0,0 +1,60 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Base class for tools that wrap another tool.
+
+Wrappers keep the wrapped tool's name, description and function declaration,
+so they can be stacked around MCP tools without changing what the model sees.
+"""
+
+from typing import Any, Dict, Optional
+
+from google.adk.tools import BaseTool
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+
+
+class ToolWrapper(BaseTool):
+    """
+    A tool that delegates to a wrapped tool.
+
+    Attribute lookups that the wrapper does not define (for example
+    `mcp_tool` on MCP tools) fall through to the wrapped tool.
+
+    Attributes:
+        wrapped_tool: The tool calls are delegated to
+    """
+
+    def __init__(self, tool: BaseTool):
+        super().__init__(
+            name=tool.name,
+            description=tool.description,
+            is_long_running=tool.is_long_running,
+        )
+        self.wrapped_tool = tool
+
+    def _get_declaration(self) -> Optional[types.FunctionDeclaration]:
+        return self.wrapped_tool._get_declaration()
+
+    async def run_async(
+        self, *, args: Dict[str, Any], tool_context: ToolContext
+    ) -> Any:
+        return await self.wrapped_tool.run_async(
+            args=args, tool_context=tool_context
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "wrapped_tool":
+            raise AttributeError(name)
+        return getattr(self.wrapped_tool, name)
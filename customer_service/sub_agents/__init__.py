@@ -6,11 +6,18 @@ of customer service using ADK's automatic delegation pattern.
 
 # Export sub-agents for easier imports
 from .order_agent import order_agent, initialize_order_tools
-from .product_agent import product_agent, initialize_product_tools
+from .product_agent import (
+    catalog_cache,
+    product_agent,
+    initialize_product_tools,
+    shutdown_product_tools,
+)
 
 __all__ = [
     "order_agent",
     "initialize_order_tools",
     "product_agent",
     "initialize_product_tools",
+    "catalog_cache",
+    "shutdown_product_tools",
 ]
\ No newline at end of file
@@ -1,29 +1,67 @@
 import logging
+from functools import partial
 from google.adk.agents import Agent
 from google.adk.tools.mcp_tool.mcp_tool import MCPTool
 from typing import List
+from customer_service.config import Config
 from customer_service.prompts import GLOBAL_INSTRUCTION
+from customer_service.shared_libraries.callbacks import (
+    before_tool,
+    compact_history,
+    start_agent_timer,
+    stop_agent_timer,
+)
+from customer_service.shared_libraries.rate_limiter import RateLimitedGemini
+from customer_service.shared_libraries.cart import cart_engine
+from customer_service.shared_libraries.order_index import order_index
+from customer_service.shared_libraries.output_projection import (
+    output_projector,
+    wrap_with_projection,
+)
+from customer_service.shared_libraries.prefetch import (
+    PrefetchedTool,
+    session_prefetcher,
+)
+from customer_service.tools import (
+    access_cart_information,
+    get_order_status,
+    lookup_order,
+    modify_cart,
+)
 
 logger = logging.getLogger(__name__)
 
 ORDER_INSTRUCTION = """
 You are the Order Processing specialist for Kurve. Handle all order-related inquiries with these specific steps:
 
-**When a customer asks about an order:**
+**When a customer asks where their order is or what its status is:**
+
+- Call get_order_status(order_number) once, with the number exactly as the customer gave it, or "" if they did not name one
+- Reply with its "status_block" as is, adding at most one friendly sentence; no further calls are needed
+- If it returns "not_found", tell the customer and offer the order numbers listed in "known_orders"
+
+**For other questions about an order (items, totals, order history):**
 
 1. **If they provide what they think is an order ID (like "1579"):**
-   - FIRST call findOrders(first=10, query="customer_id:CUSTOMER_ID") to retrieve recent orders
-   - Look for a matching order name/number in the results (not the internal order ID)
-   - If found, extract the ACTUAL order ID from the matching order
-   - THEN call getOrderById(order_id) with the correct internal ID
-   - This handles the case where customers use the customer-facing order number
+   - Call lookup_order(order_number) with the number exactly as the customer gave it
+   - It maps the customer-facing order number to the internal ID and returns the full order details in one step
+   - If it returns "not_found", tell the customer and offer the order numbers listed in "known_orders"
 
 2. **If they don't provide an ID:**
    - Call findOrders(first=10, query="customer_id:CUSTOMER_ID")
    - If exactly one order is found, confirm with the customer
    - If multiple orders, help them identify which one they're looking for
 
+**When a customer wants to see or change their cart:**
+
+- Call access_cart_information() to read the cart and its "version"
+- Make every requested change in one modify_cart call, passing expected_version from the cart you read; include each new item's 'name' and 'price'
+- If it returns "conflict", read the cart again and confirm the change with the customer before retrying
+- Do not call createDraftOrder for the cart; cart changes are synced to a draft order automatically
+
 Function calling :
+* get_order_status: {'order_number': {'description': 'Customer-facing order number, e.g. "1579", or "" for the latest order', 'type': <Type.STRING: 'STRING'>}} -> dict
+* lookup_order: {'order_number': {'description': 'Customer-facing order number, e.g. "1579" or "#1579"', 'type': <Type.STRING: 'STRING'>}} -> dict
 * findOrders: {'first': {'description': 'Limit of orders to return', 'type': <Type.NUMBER: 'NUMBER'>}, 'after': {'description': 'Next page cursor', 'type': <Type.STRING: 'STRING'>}, 'query': {'description': 'Filter orders using query syntax', 'type': <Type.STRING: 'STRING'>}, 'sortKey': {'description': 'Field to sort by', 'enum': ['PROCESSED_AT', 'TOTAL_PRICE', 'ID', 'CREATED_AT', 'UPDATED_AT', 'ORDER_NUMBER'], 'type': <Type.STRING: 'STRING'>}, 'reverse': {'description': 'Reverse sort order', 'type': <Type.BOOLEAN: 'BOOLEAN'>}} -> None*   `findOrders(first: int, query: str) -> dict`: Retrieves a list of orders for the current customer with query customer_id=CUSTOMER_ID
 * getOrderById: {'orderId': {'description': "ID of the order to retrieve", 'type': <Type.STRING: 'STRING'>}} -> None
 
@@ -33,10 +71,14 @@ Format responses clearly, including tracking information when available.
 
 # Create order agent with a description for automatic delegation
 order_agent = Agent(
-    model="gemini-2.0-flash",
+    model=RateLimitedGemini(model="gemini-2.0-flash"),
     name="order_agent",
     global_instruction=GLOBAL_INSTRUCTION,
     instruction=ORDER_INSTRUCTION,
+    before_model_callback=compact_history,
+    before_agent_callback=start_agent_timer,
+    after_agent_callback=stop_agent_timer,
+    before_tool_callback=before_tool,
     tools=[],
 )
 
@@ -48,8 +90,59 @@ async def initialize_order_tools(mcp_tools: List[MCPTool]):
         tool for tool in mcp_tools if tool.name in ["findOrders", "getOrderById", "createDraftOrder", "completeDraftOrder"]
     ]
 
-    # Add tools to the order agent
-    order_agent.tools.extend(order_tools)
+    # Resolve customer-facing order numbers through the order index
+    tools_by_name = {tool.name: tool for tool in order_tools}
+    warm_order_index = None
+    if "findOrders" in tools_by_name and "getOrderById" in tools_by_name:
+        order_index.bind(
+            find_orders=lambda args: tools_by_name["findOrders"].run_async(
+                args=args, tool_context=None
+            ),
+            get_order=lambda args: tools_by_name["getOrderById"].run_async(
+                args=args, tool_context=None
+            ),
+        )
+        order_tools.extend([lookup_order, get_order_status])
+        warm_order_index = partial(
+            order_index.recent, limit=Config().order_status.max_orders
+        )
+
+    # Sync cart changes to draft orders, debounced, through createDraftOrder
+    if "createDraftOrder" in tools_by_name:
+        create_draft_order = tools_by_name["createDraftOrder"]
+        cart_engine.bind(
+            lambda args: create_draft_order.run_async(args=args, tool_context=None)
+        )
+        order_tools.extend([access_cart_information, modify_cart])
+
+    # Serve the first findOrders call of a session from the prefetch that
+    # before_agent starts when the session begins, and warm the order index
+    # with the exact call get_order_status makes for the latest orders
+    if "findOrders" in tools_by_name:
+        find_orders = tools_by_name["findOrders"]
+        session_prefetcher.bind(
+            {
+                "findOrders": lambda args: find_orders.run_async(
+                    args=args, tool_context=None
+                )
+            },
+            warmer=warm_order_index,
+        )
+        order_tools = [
+            PrefetchedTool(tool, session_prefetcher)
+            if tool is find_orders
+            else tool
+            for tool in order_tools
+        ]
+
+    # Hand the model only the order fields it uses
+    order_tools = [
+        wrap_with_projection(tool, output_projector) for tool in order_tools
+    ]
+
+    # Replace rather than extend, so a retried initialization attaches each
+    # tool once
+    order_agent.tools = order_tools
     logger.info(f"Added {len(order_tools)} order-related tools to order agent")
 
     return order_agent
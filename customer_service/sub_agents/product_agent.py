@@ -7,17 +7,49 @@ identification, and selection inquiries, delegated from the main agent.
 import logging
 from google.adk.agents import Agent
 from google.adk.tools.mcp_tool.mcp_tool import MCPTool
-from typing import List
+from typing import List, Optional
+from customer_service.config import Config
 from customer_service.prompts import GLOBAL_INSTRUCTION
+from customer_service.shared_libraries.callbacks import (
+    before_tool,
+    cache_model_response,
+    serve_cached_response,
+    start_agent_timer,
+    stop_agent_timer,
+)
+from customer_service.shared_libraries.rate_limiter import RateLimitedGemini
+from customer_service.shared_libraries.catalog_index import (
+    CatalogIndexer,
+    catalog_index,
+)
+from customer_service.shared_libraries.coalescing import wrap_with_coalescing
+from customer_service.shared_libraries.output_projection import (
+    output_projector,
+    wrap_with_projection,
+)
+from customer_service.shared_libraries.tool_cache import (
+    ToolResultCache,
+    wrap_with_cache,
+)
+from customer_service.tools import search_catalog
 
 logger = logging.getLogger(__name__)
 
+_config = Config()
+_cache_settings = _config.catalog_cache
+
+# Process-wide cache shared by every session's catalog lookups
+catalog_cache = ToolResultCache(max_bytes=_cache_settings.max_bytes)
+
+# Background sync for the search_catalog index, started with the MCP tools
+catalog_indexer: Optional[CatalogIndexer] = None
+
 PRODUCT_INSTRUCTION = """
 You are Kurve’s Product Specialist—a friendly, body-positive expert who helps shoppers find the perfect affordable shapewear. Write in a concise, reassuring tone; avoid jargon; celebrate all body types.
 
 Rules :
 1. Fetch first, talk second
-   * Call findProducts / getProductsByIds before answering any product-related question.
+   * Call search_catalog / getProductsByIds before answering any product-related question.
    * Always verify real-time availability (variant.availableForSale).
 
 2. Respect customer context
@@ -32,9 +64,9 @@ Rules :
 Core Responsibilities:
 
 1. Product Identification:
-   * Split query into tokens, search each
-   * Rank matches by relevance score
-        findProducts(query_tokens, limit=10) → getProductsByIds(top_ids)
+   * Pass the shopper's query as-is; search_catalog returns IDs already ranked by relevance
+   * If search_catalog reports the index is unavailable, fall back to findProducts
+        search_catalog(query, limit=10) → getProductsByIds(product_ids)
 
 2. Personalized Recommendations:
    * Map body-shape keywords to silhouette benefits (e.g., “pear” → high-waist brief)
@@ -60,10 +92,15 @@ Format product information clearly and highlight key benefits relevant to the cu
 
 # Create product agent with description for automatic delegation
 product_agent = Agent(
-    model="gemini-2.0-flash",
+    model=RateLimitedGemini(model="gemini-2.0-flash"),
     name="product_agent",
     global_instruction=GLOBAL_INSTRUCTION,
     instruction=PRODUCT_INSTRUCTION,
+    before_model_callback=serve_cached_response,
+    after_model_callback=cache_model_response,
+    before_agent_callback=start_agent_timer,
+    after_agent_callback=stop_agent_timer,
+    before_tool_callback=before_tool,
     tools=[],
 )
 
@@ -90,8 +127,51 @@ async def initialize_product_tools(mcp_tools: List[MCPTool]):
         ]
     ]
 
-    # Add tools to the product agent
-    product_agent.tools.extend(product_tools)
+    # Keep the local catalog index in sync; reads bypass the result cache
+    global catalog_indexer
+    if catalog_indexer is not None:
+        # Left over from an earlier, failed initialization
+        await catalog_indexer.stop()
+        catalog_indexer = None
+    agent_tools = []
+    find_products = next(
+        (tool for tool in product_tools if tool.name == "findProducts"), None
+    )
+    if _config.catalog_index.enabled and find_products is not None:
+        catalog_indexer = CatalogIndexer(
+            catalog_index,
+            lambda args: find_products.run_async(args=args, tool_context=None),
+            _config.catalog_index,
+        )
+        catalog_indexer.start()
+        agent_tools.append(search_catalog)
+
+    # Serve repeated catalog lookups from the shared cache, and batch the
+    # ID lookups that miss it across concurrent sessions; the model is
+    # handed only the product fields it uses
+    product_tools = [
+        wrap_with_projection(
+            wrap_with_cache(
+                wrap_with_coalescing(tool, _config.coalescing),
+                catalog_cache,
+                _cache_settings,
+            ),
+            output_projector,
+        )
+        for tool in product_tools
+    ]
+
+    # Replace rather than extend, so a retried initialization attaches each
+    # tool once
+    product_agent.tools = agent_tools + product_tools
     logger.info(f"Added {len(product_tools)} tools to product agent")
 
     return product_agent
+
+
+async def shutdown_product_tools():
+    """Stop background work started by initialize_product_tools."""
+    global catalog_indexer
+    if catalog_indexer is not None:
+        await catalog_indexer.stop()
+        catalog_indexer = None
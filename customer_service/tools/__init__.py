@@ -26,9 +26,12 @@ from .tools import (
     check_product_availability,
     generate_qr_code,
     get_available_planting_times,
+    get_order_status,
     get_product_recommendations,
+    lookup_order,
     modify_cart,
     schedule_planting_service,
+    search_catalog,
     send_call_companion_link,
     send_care_instructions,
     sync_ask_for_approval,
@@ -47,6 +50,10 @@ __all__ = [
     # Product tools
     "get_product_recommendations",
     "check_product_availability",
+    "search_catalog",
+    # Order tools
+    "lookup_order",
+    "get_order_status",
     # Service tools
     "schedule_planting_service",
     "get_available_planting_times",
@@ -14,10 +14,27 @@
 # add docstring to this module
 """Tools module for the customer service agent."""
 
+import asyncio
+import hashlib
+import json
 import logging
 import uuid
 from datetime import datetime, timedelta
 
+from google.adk.tools import ToolContext
+
+from customer_service.config import Config
+from customer_service.shared_libraries.callbacks import CUSTOMER_ID
+from customer_service.shared_libraries.cart import cart_engine
+from customer_service.shared_libraries.catalog_index import catalog_index
+from customer_service.shared_libraries.mcp_results import decode_tool_result
+from customer_service.shared_libraries.order_index import order_index
+from customer_service.shared_libraries.order_status import (
+    format_order_status,
+    is_open,
+)
+from customer_service.shared_libraries.output_projection import output_projector
+
 logger = logging.getLogger(__name__)
 
 
@@ -118,66 +135,62 @@ def update_salesforce_crm(customer_id: str, details: dict) -> dict:
     return {"status": "success", "message": "Salesforce record updated."}
 
 
-def access_cart_information(customer_id: str) -> dict:
-    """
-    Args:
-        customer_id (str): The ID of the customer.
+def access_cart_information(tool_context: ToolContext) -> dict:
+    """Reads the current customer's shopping cart.
 
     Returns:
-        dict: A dictionary representing the cart contents.
+        dict: A dictionary representing the cart contents, with the cart's
+        version to pass to modify_cart.
 
     Example:
-        >>> access_cart_information(customer_id='123')
-        {'items': [{'product_id': 'soil-123', 'name': 'Standard Potting Soil', 'quantity': 1}, {'product_id': 'fert-456', 'name': 'General Purpose Fertilizer', 'quantity': 1}], 'subtotal': 25.98}
+        >>> access_cart_information()
+        {'customer_id': '123', 'version': 2, 'items': [{'product_id': 'gid://shopify/ProductVariant/101', 'name': 'Sculpt Bodysuit (M / Black)', 'quantity': 1, 'price': 1499.0}], 'item_count': 1, 'subtotal': 1499.0, 'draft_order_id': 'gid://shopify/DraftOrder/7'}
     """
+    customer_id = tool_context.state.get("customer_id", CUSTOMER_ID)
     logger.info("Accessing cart information for customer ID: %s", customer_id)
-
-    # MOCK API RESPONSE - Replace with actual API call
-    mock_cart = {
-        "items": [
-            {
-                "product_id": "soil-123",
-                "name": "Standard Potting Soil",
-                "quantity": 1,
-            },
-            {
-                "product_id": "fert-456",
-                "name": "General Purpose Fertilizer",
-                "quantity": 1,
-            },
-        ],
-        "subtotal": 25.98,
-    }
-    return mock_cart
+    return cart_engine.get(customer_id)
 
 
 def modify_cart(
-    customer_id: str, items_to_add: list[dict], items_to_remove: list[dict]
+    items_to_add: list[dict],
+    items_to_remove: list[dict],
+    tool_context: ToolContext,
+    expected_version: int = -1,
+    idempotency_key: str = "",
 ) -> dict:
-    """Modifies the user's shopping cart by adding and/or removing items.
+    """Modifies the current customer's shopping cart by adding and/or removing items in one step.
 
     Args:
-        customer_id (str): The ID of the customer.
-        items_to_add (list): A list of dictionaries, each with 'product_id' and 'quantity'.
-        items_to_remove (list): A list of product_ids to remove.
+        items_to_add (list): A list of dictionaries, each with 'product_id' (the variant ID), 'quantity', and optionally the 'name' and 'price' shown to the customer.
+        items_to_remove (list): A list of dictionaries, each with 'product_id' and optionally 'quantity'; without a quantity the item is removed entirely.
+        expected_version (int): The cart 'version' from access_cart_information; the change is refused with status 'conflict' if the cart changed since. -1 skips the check.
+        idempotency_key (str): Optional key identifying this change; repeating a call with the same key does not apply it twice.
 
     Returns:
-        dict: A dictionary indicating the status of the cart modification.
+        dict: A dictionary with the status ('success', 'conflict' or 'invalid') and the updated cart. Nothing is changed unless every item can be added or removed.
     Example:
-        >>> modify_cart(customer_id='123', items_to_add=[{'product_id': 'soil-456', 'quantity': 1}, {'product_id': 'fert-789', 'quantity': 1}], items_to_remove=[{'product_id': 'fert-112', 'quantity': 1}])
-        {'status': 'success', 'message': 'Cart updated successfully.', 'items_added': True, 'items_removed': True}
+        >>> modify_cart(items_to_add=[{'product_id': 'gid://shopify/ProductVariant/101', 'quantity': 1}], items_to_remove=[{'product_id': 'gid://shopify/ProductVariant/102'}])
+        {'status': 'success', 'message': 'Cart updated successfully.', 'items_added': True, 'items_removed': True, 'cart': {...}}
     """
 
+    customer_id = tool_context.state.get("customer_id", CUSTOMER_ID)
     logger.info("Modifying cart for customer ID: %s", customer_id)
     logger.info("Adding items: %s", items_to_add)
     logger.info("Removing items: %s", items_to_remove)
-    # MOCK API RESPONSE - Replace with actual API call
-    return {
-        "status": "success",
-        "message": "Cart updated successfully.",
-        "items_added": True,
-        "items_removed": True,
-    }
+    if not idempotency_key:
+        # A repeated identical call within one turn is applied only once
+        call = json.dumps([items_to_add, items_to_remove], sort_keys=True)
+        idempotency_key = (
+            f"{tool_context.invocation_id}:"
+            f"{hashlib.sha1(call.encode()).hexdigest()[:16]}"
+        )
+    return cart_engine.modify(
+        customer_id,
+        items_to_add or [],
+        items_to_remove or [],
+        idempotency_key=idempotency_key,
+        expected_version=None if expected_version < 0 else expected_version,
+    )
 
 
 def get_product_recommendations(plant_type: str, customer_id: str) -> dict:
@@ -234,6 +247,180 @@ def get_product_recommendations(plant_type: str, customer_id: str) -> dict:
     return recommendations
 
 
+def search_catalog(query: str, limit: int = 10) -> dict:
+    """Searches the product catalog and returns the best matching products.
+
+    Args:
+        query: The shopper's free-text product query (e.g., 'black strapless bodysuit').
+        limit: Maximum number of products to return.
+
+    Returns:
+        A dictionary with the ranked product IDs and their titles. Example:
+        {'status': 'success', 'product_ids': ['gid://shopify/Product/1'],
+         'results': [{'id': 'gid://shopify/Product/1', 'title': 'ShapeShifter Bodysuit', 'score': 4.21}]}
+
+    Example:
+        >>> search_catalog(query='strapless bodysuit', limit=3)
+        {'status': 'success', 'product_ids': [...], 'results': [...]}
+    """
+    logger.info("Searching catalog for: %s", query)
+    if not len(catalog_index):
+        return {
+            "status": "unavailable",
+            "message": "Catalog index is not ready; use findProducts instead.",
+            "product_ids": [],
+            "results": [],
+        }
+    results = catalog_index.search(query, limit=limit)
+    return {
+        "status": "success",
+        "product_ids": [result["id"] for result in results],
+        "results": results,
+    }
+
+
+async def lookup_order(order_number: str, tool_context: ToolContext) -> dict:
+    """Looks up one of the current customer's orders by its customer-facing number.
+
+    Args:
+        order_number: The order number the customer quoted (e.g., '1579' or '#1579').
+
+    Returns:
+        A dictionary with the order's internal ID, status, totals, line items
+        and tracking, or a 'not_found' status listing the customer's known
+        order numbers. Example:
+        {'status': 'success', 'order_id': 'gid://shopify/Order/5865972728022',
+         'order_name': '#1579', 'order': {...}}
+
+    Example:
+        >>> await lookup_order(order_number='#1579')
+        {'status': 'success', 'order_id': 'gid://shopify/Order/...', 'order_name': '#1579', 'order': {...}}
+    """
+    customer_id = tool_context.state.get("customer_id", CUSTOMER_ID)
+    logger.info("Looking up order %s for customer ID: %s", order_number, customer_id)
+    if not order_index.is_bound:
+        return {
+            "status": "unavailable",
+            "message": "Order lookup is not ready; use findOrders instead.",
+        }
+
+    try:
+        summary = await order_index.resolve(customer_id, order_number)
+        if summary is None:
+            return {
+                "status": "not_found",
+                "message": f"No order {order_number} found for this customer.",
+                "known_orders": order_index.known_orders(customer_id),
+            }
+        details = await order_index.get_order(summary["id"])
+    except Exception as e:  # pylint: disable=broad-except
+        # An MCP timeout or lost connection should not abort the whole turn
+        logger.warning("Could not look up order %s: %r", order_number, e)
+        return {
+            "status": "unavailable",
+            "message": "Order lookup failed; try again or use findOrders.",
+        }
+    return {
+        "status": "success",
+        "order_id": summary["id"],
+        "order_name": summary["name"],
+        "order": output_projector.project(
+            "getOrderById", decode_tool_result(details)
+        ),
+    }
+
+
+async def get_order_status(order_number: str, tool_context: ToolContext) -> dict:
+    """Reports where the current customer's order is, ready to show the customer.
+
+    Args:
+        order_number: The order number the customer quoted (e.g., '1579'), or an
+            empty string for their latest order.
+
+    Returns:
+        A dictionary with the orders covered and a markdown 'status_block'
+        to show the customer as is. Without an order number it covers the
+        latest order plus any other recent orders still on their way. Example:
+        {'status': 'success', 'orders': [{'order_name': '#1579', 'order_id':
+         'gid://shopify/Order/5865972728022', 'fulfillment_status': 'FULFILLED'}],
+         'status_block': '**Order #1579** placed 12 Mar 2025 ...'}
+
+    Example:
+        >>> await get_order_status(order_number='')
+        {'status': 'success', 'orders': [...], 'status_block': '...'}
+    """
+    customer_id = tool_context.state.get("customer_id", CUSTOMER_ID)
+    logger.info(
+        "Getting status of order %r for customer ID: %s", order_number, customer_id
+    )
+    if not order_index.is_bound:
+        return {
+            "status": "unavailable",
+            "message": "Order status is not ready; use findOrders instead.",
+        }
+
+    settings = Config().order_status
+    named = bool(order_number.strip())
+    try:
+        if named:
+            summary = await order_index.resolve(customer_id, order_number)
+            summaries = [summary] if summary is not None else []
+        else:
+            recent = await order_index.recent(customer_id, settings.max_orders)
+            summaries = recent[:1] + [s for s in recent[1:] if is_open(s)]
+    except Exception as e:  # pylint: disable=broad-except
+        # An MCP timeout or lost connection should not abort the whole turn
+        logger.warning("Could not get status of order %r: %r", order_number, e)
+        return {
+            "status": "unavailable",
+            "message": "Order status failed; try again or use findOrders.",
+        }
+    if not summaries and named:
+        return {
+            "status": "not_found",
+            "message": f"No order {order_number} found for this customer.",
+            "known_orders": order_index.known_orders(customer_id),
+        }
+    if not summaries:
+        return {
+            "status": "not_found",
+            "message": "This customer has no orders yet.",
+            "known_orders": [],
+        }
+
+    # Fetch every order's fulfillments and tracking at once
+    results = await asyncio.gather(
+        *(order_index.get_order(summary["id"]) for summary in summaries),
+        return_exceptions=True,
+    )
+    blocks = []
+    for summary, result in zip(summaries, results):
+        order = None
+        if not isinstance(result, BaseException):
+            payload = decode_tool_result(result)
+            if isinstance(payload, dict):
+                order = payload.get("order")
+        if isinstance(order, dict):
+            blocks.append(format_order_status(order, settings.max_items))
+        else:
+            logger.warning("Could not fetch order %s: %s", summary["id"], result)
+            blocks.append(
+                f"**Order {summary['name']}**\nStatus: details unavailable right now"
+            )
+    return {
+        "status": "success",
+        "orders": [
+            {
+                "order_name": summary["name"],
+                "order_id": summary["id"],
+                "fulfillment_status": summary.get("displayFulfillmentStatus"),
+            }
+            for summary in summaries
+        ],
+        "status_block": "\n\n".join(blocks),
+    }
+
+
 def check_product_availability(product_id: str, store_id: str) -> dict:
     """Checks the availability of a product at a specified store (or for pickup).
 
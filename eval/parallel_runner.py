@@ -0,0 +1,486 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Parallel eval runner with per-case score statistics.
+
+AgentEvaluator.evaluate runs every .test.json case num_runs times, one after
+another, and reports a single mean. This runner turns each (case, run) pair
+into a sample and runs the samples on a process pool. Every worker runs one
+conversation at a time, so the worker count bounds how many model requests
+are in flight. An optional total request rate is split evenly between the
+workers' rate limiters.
+
+Samples are scored the way AgentEvaluator scores them:
+
+* tool_trajectory_avg_score: the share of turns whose tool calls exactly
+  match the expected ones;
+* response_match_score: ROUGE-1 F1 between the response and the reference.
+  This is computed locally, so scoring needs no Vertex AI calls.
+
+Scores are merged into a per-case mean, variance and standard error. The
+JSON report records the commit and a hash of every case, so reports from
+different commits can be compared. --shard splits the samples between CI
+machines, and --merge combines their reports.
+
+    python -m eval.parallel_runner eval/eval_data --num-runs 20 --workers 8 \\
+        --report eval_report.json
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from typing import Any, Dict, List, NamedTuple, Optional
+
+TOOL_TRAJECTORY_SCORE_KEY = "tool_trajectory_avg_score"
+RESPONSE_MATCH_SCORE_KEY = "response_match_score"
+
+# Criteria used by AgentEvaluator when a folder has no test_config.json
+DEFAULT_CRITERIA = {TOOL_TRAJECTORY_SCORE_KEY: 1.0, RESPONSE_MATCH_SCORE_KEY: 0.8}
+
+REPORT_VERSION = 1
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class EvalSample(NamedTuple):
+    """One run of one eval case."""
+
+    case: str
+    run: int
+
+
+def discover_cases(paths: List[str]) -> List[str]:
+    """
+    Find eval cases.
+
+    Args:
+        paths: .test.json files or directories searched recursively
+
+    Returns:
+        The case files, sorted.
+    """
+    cases = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                cases.extend(
+                    os.path.join(root, name)
+                    for name in files
+                    if name.endswith(".test.json")
+                )
+        else:
+            cases.append(path)
+    return sorted(cases)
+
+
+def load_criteria(case: str) -> Dict[str, float]:
+    """Read the thresholds in the case's test_config.json, as AgentEvaluator does."""
+    config_path = os.path.join(os.path.dirname(case), "test_config.json")
+    if not os.path.exists(config_path):
+        return dict(DEFAULT_CRITERIA)
+    with open(config_path, encoding="utf-8") as f:
+        return json.load(f)["criteria"]
+
+
+def plan_samples(
+    cases: List[str], num_runs: int, shard: int = 0, num_shards: int = 1
+) -> List[EvalSample]:
+    """
+    Expand cases into samples and keep this shard's share.
+
+    Runs are interleaved, so the first result for every case arrives early.
+
+    Args:
+        cases: The case files
+        num_runs: Runs per case
+        shard: Index of this shard
+        num_shards: Number of shards the samples are split into
+
+    Returns:
+        This shard's samples.
+    """
+    samples = [EvalSample(case, run) for run in range(num_runs) for case in cases]
+    return samples[shard::num_shards]
+
+
+def rouge_1(response: Optional[str], reference: str) -> float:
+    """
+    ROUGE-1 F1 of a response against a reference.
+
+    Args:
+        response: The agent's response
+        reference: The expected response
+
+    Returns:
+        The score, between 0 and 1.
+    """
+    candidate = _TOKEN_RE.findall((response or "").lower())
+    target = _TOKEN_RE.findall(reference.lower())
+    overlap = sum((Counter(candidate) & Counter(target)).values())
+    if not overlap:
+        return 0.0
+    precision = overlap / len(candidate)
+    recall = overlap / len(target)
+    return 2 * precision * recall / (precision + recall)
+
+
+def _tool_calls(tool_uses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {"tool_name": use["tool_name"], "tool_input": use["tool_input"]}
+        for use in tool_uses
+    ]
+
+
+def score_turns(
+    turns: List[Dict[str, Any]], criteria: Dict[str, float]
+) -> Dict[str, float]:
+    """
+    Score one conversation.
+
+    Args:
+        turns: The case's turns with the agent's actual_tool_use and response
+        criteria: The metrics to compute
+
+    Returns:
+        Metric name to score.
+    """
+    scores = {}
+    if TOOL_TRAJECTORY_SCORE_KEY in criteria:
+        scores[TOOL_TRAJECTORY_SCORE_KEY] = statistics.fmean(
+            float(
+                _tool_calls(turn.get("actual_tool_use", []))
+                == _tool_calls(turn.get("expected_tool_use", []))
+            )
+            for turn in turns
+        )
+    if RESPONSE_MATCH_SCORE_KEY in criteria and all("reference" in t for t in turns):
+        scores[RESPONSE_MATCH_SCORE_KEY] = statistics.fmean(
+            rouge_1(turn.get("response"), turn["reference"]) for turn in turns
+        )
+    return scores
+
+
+def _case_hash(case: str) -> str:
+    with open(case, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Worker process state, set by _init_worker
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(
+    agent_module: str,
+    initial_session: Dict[str, Any],
+    model_rpm: Optional[int],
+) -> None:
+    """Prepare a worker: quiet logging and its share of the request rate."""
+    logging.disable(logging.INFO)
+    _worker.update(agent_module=agent_module, initial_session=initial_session)
+    if model_rpm:
+        from customer_service.shared_libraries.rate_limiter import rate_limiter
+
+        rate_limiter.settings = rate_limiter.settings.model_copy(
+            update={"default_rpm": model_rpm, "model_rpm": {}}
+        )
+
+
+def run_sample(sample: EvalSample) -> Dict[str, Any]:
+    """
+    Run one sample in a worker and score it.
+
+    Args:
+        sample: The case and run to execute
+
+    Returns:
+        The sample's scores, or its error.
+    """
+    from google.adk.evaluation.evaluation_generator import EvaluationGenerator
+
+    with open(sample.case, encoding="utf-8") as f:
+        turns = json.load(f)
+    started = time.perf_counter()
+    result: Dict[str, Any] = {"case": sample.case, "run": sample.run}
+    try:
+        responses = EvaluationGenerator._process_query(
+            copy.deepcopy(turns),
+            _worker["agent_module"],
+            None,
+            _worker["initial_session"],
+        )
+        result["scores"] = score_turns(responses, load_criteria(sample.case))
+        # The ADK runner logs model and tool failures and ends the turn
+        result["unanswered"] = sum(1 for turn in responses if not turn["response"])
+    except Exception as e:  # pylint: disable=broad-except
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["elapsed_secs"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def _metric_stats(values: List[float], threshold: Optional[float]) -> Dict[str, Any]:
+    mean = statistics.fmean(values)
+    variance = statistics.variance(values) if len(values) > 1 else 0.0
+    stats = {
+        "n": len(values),
+        "mean": round(mean, 6),
+        "variance": round(variance, 6),
+        "stderr": round(math.sqrt(variance / len(values)), 6),
+        "min": round(min(values), 6),
+        "max": round(max(values), 6),
+    }
+    if threshold is not None:
+        stats["threshold"] = threshold
+        stats["passed"] = mean >= threshold
+    return stats
+
+
+def aggregate(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge sample results into per-case and overall statistics.
+
+    Args:
+        samples: Results from run_sample, from any number of shards
+
+    Returns:
+        The "cases" and "summary" sections of a report.
+    """
+    cases: Dict[str, Dict[str, Any]] = {}
+    totals: Dict[str, List[float]] = {}
+    for case in sorted({sample["case"] for sample in samples}):
+        criteria = load_criteria(case)
+        case_samples = [s for s in samples if s["case"] == case]
+        metrics: Dict[str, List[float]] = {}
+        for sample in case_samples:
+            for metric, score in sample.get("scores", {}).items():
+                metrics.setdefault(metric, []).append(score)
+                totals.setdefault(metric, []).append(score)
+        cases[case] = {
+            "hash": _case_hash(case),
+            "samples": len(case_samples),
+            "errors": sum(1 for s in case_samples if "error" in s),
+            "unanswered_turns": sum(s.get("unanswered", 0) for s in case_samples),
+            "metrics": {
+                metric: _metric_stats(values, criteria.get(metric))
+                for metric, values in sorted(metrics.items())
+            },
+        }
+    summary = {
+        "samples": len(samples),
+        "errors": sum(case["errors"] for case in cases.values()),
+        "metrics": {
+            metric: _metric_stats(values, None)
+            for metric, values in sorted(totals.items())
+        },
+        "passed": all(
+            stats.get("passed", True)
+            for case in cases.values()
+            for stats in case["metrics"].values()
+        ),
+    }
+    return {"cases": cases, "summary": summary}
+
+
+def run(
+    cases: List[str],
+    num_runs: int,
+    workers: int,
+    agent_module: str = "customer_service",
+    initial_session: Optional[Dict[str, Any]] = None,
+    model_rpm: Optional[int] = None,
+    shard: int = 0,
+    num_shards: int = 1,
+) -> Dict[str, Any]:
+    """
+    Run eval samples on a process pool and build the report.
+
+    Args:
+        cases: The case files
+        num_runs: Runs per case
+        workers: Worker processes, and so concurrent conversations
+        agent_module: Module whose agent.root_agent is evaluated
+        initial_session: Initial session for every sample
+        model_rpm: Total model requests per minute across all workers
+        shard: Index of this shard
+        num_shards: Number of shards the samples are split into
+
+    Returns:
+        The report.
+    """
+    samples = plan_samples(cases, num_runs, shard, num_shards)
+    share = max(1, model_rpm // workers) if model_rpm else None
+    started = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(agent_module, {"state": initial_session or {}}, share),
+    ) as pool:
+        futures = [pool.submit(run_sample, sample) for sample in samples]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            status = result.get("error") or result.get("scores")
+            print(
+                f"[{len(results)}/{len(samples)}] "
+                f"{result['case']} #{result['run']}: {status}"
+            )
+    elapsed = time.perf_counter() - started
+
+    report = {
+        "version": REPORT_VERSION,
+        "commit": _commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {
+            "agent_module": agent_module,
+            "num_runs": num_runs,
+            "workers": workers,
+            "model_rpm": model_rpm,
+            "shard": f"{shard}/{num_shards}",
+        },
+        "elapsed_secs": round(elapsed, 1),
+        "samples": sorted(results, key=lambda r: (r["case"], r["run"])),
+    }
+    report.update(aggregate(results))
+    return report
+
+
+def merge(reports: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combine the reports of several shards.
+
+    Args:
+        reports: Shard reports of the same commit and configuration
+
+    Returns:
+        The combined report.
+    """
+    samples = [sample for report in reports for sample in report["samples"]]
+    merged = {
+        "version": REPORT_VERSION,
+        "commit": reports[0]["commit"],
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {**reports[0]["config"], "shard": f"merged from {len(reports)}"},
+        "elapsed_secs": max(report["elapsed_secs"] for report in reports),
+        "samples": sorted(samples, key=lambda r: (r["case"], r["run"])),
+    }
+    merged.update(aggregate(samples))
+    return merged
+
+
+def format_summary(report: Dict[str, Any]) -> str:
+    """Render per-case means and standard errors as text."""
+    lines = []
+    for case, stats in report["cases"].items():
+        metrics = ", ".join(
+            f"{metric} {m['mean']:.3f} ± {m['stderr']:.3f}"
+            + ("" if m.get("passed", True) else " FAILED")
+            for metric, m in stats["metrics"].items()
+        )
+        lines.append(
+            f"{os.path.relpath(case)} ({stats['samples']} samples, "
+            f"{stats['errors']} errors, {stats['unanswered_turns']} unanswered "
+            f"turns): {metrics}"
+        )
+    summary = report["summary"]
+    lines.append(
+        f"{summary['samples']} samples, {summary['errors']} errors in "
+        f"{report['elapsed_secs']}s: {'PASSED' if summary['passed'] else 'FAILED'}"
+    )
+    return "\n".join(lines)
+
+
+parser = argparse.ArgumentParser(description="Run agent evals in parallel")
+parser.add_argument("paths", nargs="*", help=".test.json files or directories")
+parser.add_argument("--num-runs", type=int, default=1, help="Runs per case")
+parser.add_argument(
+    "--workers", type=int, default=os.cpu_count() or 1, help="Worker processes"
+)
+parser.add_argument(
+    "--model-rpm", type=int, help="Total model requests per minute across workers"
+)
+parser.add_argument(
+    "--agent-module", default="customer_service", help="Module with the agent"
+)
+parser.add_argument(
+    "--initial-session", help="Session file whose state starts every sample"
+)
+parser.add_argument(
+    "--shard", default="0/1", help="This machine's shard, as INDEX/COUNT"
+)
+parser.add_argument(
+    "--merge", nargs="+", metavar="REPORT", help="Combine shard reports instead"
+)
+parser.add_argument("--report", help="Write the JSON report to a file")
+
+
+def main() -> None:
+    args = parser.parse_args()
+    if args.merge:
+        reports = []
+        for path in args.merge:
+            with open(path, encoding="utf-8") as f:
+                reports.append(json.load(f))
+        report = merge(reports)
+    else:
+        shard, num_shards = (int(part) for part in args.shard.split("/"))
+        initial_session = None
+        if args.initial_session:
+            with open(args.initial_session, encoding="utf-8") as f:
+                initial_session = json.load(f)["state"]
+        default_cases = os.path.join(os.path.dirname(__file__), "eval_data")
+        report = run(
+            discover_cases(args.paths or [default_cases]),
+            num_runs=args.num_runs,
+            workers=args.workers,
+            agent_module=args.agent_module,
+            initial_session=initial_session,
+            model_rpm=args.model_rpm,
+            shard=shard,
+            num_shards=num_shards,
+        )
+    print(format_summary(report))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(0 if report["summary"]["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
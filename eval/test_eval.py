@@ -19,10 +19,18 @@ import pytest
 from dotenv import find_dotenv, load_dotenv
 from customer_service.config import Config
 
+CASSETTE = os.path.join(os.path.dirname(__file__), "cassettes", "shopify_tools.json")
+
 
 @pytest.fixture(scope="session", autouse=True)
 def load_env():
     load_dotenv(find_dotenv(".env"))
+    # Replay recorded Shopify responses once a cassette exists; run with
+    # TOOL_CASSETTE_MODE=record to refresh it against the live store
+    os.environ.setdefault("TOOL_CASSETTE_PATH", CASSETTE)
+    os.environ.setdefault(
+        "TOOL_CASSETTE_MODE", "replay" if os.path.exists(CASSETTE) else "record"
+    )
     c = Config()
 
 
@@ -0,0 +1,512 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Generated Shopify store data and handlers for the MCP tool surface.
+
+FakeStore answers the Shopify MCP tools with Admin API shaped payloads
+(connections with edges/node and pageInfo) over a deterministic, generated
+catalog. Products, customers and orders are generated from their numeric
+IDs on demand, so a store with 100k products and millions of orders costs
+a few hundred kilobytes up front.
+"""
+
+import math
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Numeric IDs of generated customers start here
+CUSTOMER_ID_BASE = 1_000_000
+
+_STYLES = ["Bodysuit", "Shorts", "Brief", "Camisole", "Slip", "Leggings", "Bra"]
+_LINES = ["ShapeShifter", "SculptFit", "Second Skin", "Everyday", "Contour"]
+_FEATURES = ["Seamless", "High-Waist", "Strapless", "Tummy Control", "Thigh Slimming"]
+_COLOURS = ["Black", "Nude", "Mocha", "White", "Navy"]
+_SIZES = ["XS", "S", "M", "L", "XL"]
+_FIRST_NAMES = ["Gauri", "Asha", "Meera", "Priya", "Riya", "Neha", "Kavya", "Isha"]
+_LAST_NAMES = ["Khanna", "Sharma", "Iyer", "Patel", "Rao", "Singh", "Das", "Kapoor"]
+_CITIES = [("Noida", "UP"), ("Pune", "MH"), ("Chennai", "TN"), ("Jaipur", "RJ")]
+
+_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _iso(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _gid(kind: str, number: int) -> str:
+    return f"gid://shopify/{kind}/{number}"
+
+
+def _number(gid: Any) -> int:
+    return int(str(gid).rsplit("/", 1)[-1])
+
+
+def _connection(
+    nodes: List[Dict[str, Any]], offset: int, total: int
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Wrap a page of nodes as a connection plus its pageInfo."""
+    end = offset + len(nodes)
+    page_info = {
+        "hasNextPage": end < total,
+        "endCursor": str(end) if nodes else None,
+    }
+    return {"edges": [{"node": node} for node in nodes]}, page_info
+
+
+def _parse_query(query: str) -> Dict[str, List[str]]:
+    """Split a Shopify search query into field filters and free text."""
+    filters: Dict[str, List[str]] = {}
+    for term in (query or "").replace(" OR ", " ").split():
+        field, sep, value = term.partition(":")
+        if not sep:
+            field, value = "text", term
+        filters.setdefault(field.lower(), []).append(value.strip("'\""))
+    return filters
+
+
+class FakeStore:
+    """
+    Deterministic generated Shopify store.
+
+    Attributes:
+        product_count: Number of catalog products
+        customer_count: Number of customers
+        orders_per_customer: Orders placed by every customer
+        seed: Seed for the generated data
+    """
+
+    def __init__(
+        self,
+        product_count: int = 500,
+        customer_count: int = 1000,
+        orders_per_customer: int = 5,
+        seed: int = 7,
+    ):
+        self.product_count = product_count
+        self.customer_count = customer_count
+        self.orders_per_customer = orders_per_customer
+        self.seed = seed
+        # Only each product's (line, feature, style) combination is kept in
+        # memory; full records are generated on demand
+        self._combinations = bytearray(
+            self._combination(i) for i in range(product_count)
+        )
+        self._draft_orders: Dict[str, Dict[str, Any]] = {}
+        self.handlers: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+            "findProducts": self.find_products,
+            "listProductsInCollection": self.list_products_in_collection,
+            "getProductsByIds": self.get_products_by_ids,
+            "getVariantsByIds": self.get_variants_by_ids,
+            "listCollections": self.list_collections,
+            "listCustomers": self.list_customers,
+            "addCustomerTags": self.add_customer_tags,
+            "findOrders": self.find_orders,
+            "getOrderById": self.get_order_by_id,
+            "createDraftOrder": self.create_draft_order,
+            "completeDraftOrder": self.complete_draft_order,
+            "getShopDetails": self.get_shop_details,
+            "getExtendedShopDetails": self.get_extended_shop_details,
+            "createDiscountCode": self.create_discount_code,
+            "manageWebhooks": self.manage_webhooks,
+            "debugGetVariantMetafield": self.debug_get_variant_metafield,
+            "introspect_admin_schema": self.introspect_admin_schema,
+            "search_dev_docs": self.search_dev_docs,
+        }
+        self._webhooks: Dict[str, Dict[str, Any]] = {}
+        self._discounts = 0
+
+    # Generated records
+
+    def _product_rng(self, index: int) -> Tuple[random.Random, int]:
+        """Seed a product's generator and draw its combination."""
+        rng = random.Random(self.seed * 1_000_003 + index)
+        line = rng.randrange(len(_LINES))
+        feature = rng.randrange(len(_FEATURES))
+        style = rng.randrange(len(_STYLES))
+        return rng, (line * len(_FEATURES) + feature) * len(_STYLES) + style
+
+    def _combination(self, index: int) -> int:
+        return self._product_rng(index)[1]
+
+    @staticmethod
+    def _names(combination: int) -> Tuple[str, str, str]:
+        """Return the (line, feature, style) of a combination."""
+        rest, style = divmod(combination, len(_STYLES))
+        line, feature = divmod(rest, len(_FEATURES))
+        return _LINES[line], _FEATURES[feature], _STYLES[style]
+
+    def product(self, index: int) -> Dict[str, Any]:
+        """Generate the product with the given index."""
+        rng, combination = self._product_rng(index)
+        line, feature, style = self._names(combination)
+        price = rng.choice([799, 999, 1199, 1399, 1599, 1899])
+        product_number = 8_000_000 + index
+        variants = []
+        for v, (colour, size) in enumerate(
+            rng.sample([(c, s) for c in _COLOURS for s in _SIZES], 4)
+        ):
+            variants.append(
+                {
+                    "id": _gid("ProductVariant", product_number * 10 + v),
+                    "title": f"{colour} / {size}",
+                    "sku": f"KRV-{product_number}-{v}",
+                    "price": f"{price}.00",
+                    "inventoryQuantity": rng.randint(0, 40),
+                    "selectedOptions": [
+                        {"name": "Color", "value": colour},
+                        {"name": "Size", "value": size},
+                    ],
+                }
+            )
+        return {
+            "id": _gid("Product", product_number),
+            "title": f"{line} {feature} {style}",
+            "handle": f"{line}-{feature}-{style}-{index}".lower().replace(" ", "-"),
+            "productType": style,
+            "tags": [feature.lower(), line.lower(), "shapewear"],
+            "status": "ACTIVE",
+            "description": (
+                f"{feature} {style.lower()} from the {line} range, made for "
+                f"all-day comfort and a smooth silhouette."
+            ),
+            "updatedAt": _iso(_EPOCH + timedelta(hours=index)),
+            "collection": style.lower(),
+            "variants": variants,
+        }
+
+    def customer_ids(self) -> List[str]:
+        """Return the numeric IDs of every generated customer."""
+        return [str(CUSTOMER_ID_BASE + i) for i in range(self.customer_count)]
+
+    def _customer_index(self, customer_id: Any) -> Optional[int]:
+        try:
+            index = _number(customer_id) - CUSTOMER_ID_BASE
+        except ValueError:
+            return None
+        return index if 0 <= index < self.customer_count else None
+
+    def customer(self, index: int) -> Dict[str, Any]:
+        """Generate the customer record with the given index."""
+        rng = random.Random(self.seed * 7_919 + index)
+        first, last = rng.choice(_FIRST_NAMES), rng.choice(_LAST_NAMES)
+        city, province = rng.choice(_CITIES)
+        number = CUSTOMER_ID_BASE + index
+        return {
+            "id": _gid("Customer", number),
+            "firstName": first,
+            "lastName": last,
+            "email": f"{first}.{last}.{number}@example.com".lower(),
+            "phone": f"+9198{number:08d}"[:13],
+            "createdAt": _iso(_EPOCH - timedelta(days=rng.randint(0, 900))),
+            "numberOfOrders": self.orders_per_customer,
+            "tags": [],
+            "defaultAddress": {
+                "address1": f"{rng.randint(1, 300)} Market Road",
+                "city": city,
+                "provinceCode": province,
+                "zip": f"{rng.randint(110000, 600000)}",
+            },
+            "emailMarketingConsent": {
+                "marketingState": rng.choice(["SUBSCRIBED", "NOT_SUBSCRIBED"])
+            },
+        }
+
+    def order(self, number: int) -> Optional[Dict[str, Any]]:
+        """Generate the order with the given global order number."""
+        customer_index, position = divmod(number, self.orders_per_customer)
+        if not 0 <= customer_index < self.customer_count:
+            return None
+        rng = random.Random(self.seed * 104_729 + number)
+        items = []
+        total = 0.0
+        count = min(rng.randint(1, 3), self.product_count)
+        for index in rng.sample(range(self.product_count), count):
+            product = self.product(index)
+            variant = rng.choice(product["variants"])
+            quantity = rng.randint(1, 2)
+            total += float(variant["price"]) * quantity
+            items.append(
+                {
+                    "name": f"{product['title']} ({variant['title']})",
+                    "quantity": quantity,
+                    "product": {"id": product["id"]},
+                    "variant": {"id": variant["id"]},
+                }
+            )
+        processed_at = _EPOCH + timedelta(days=position * 30 + rng.randint(0, 20))
+        fulfilled = position < self.orders_per_customer - 1 or rng.random() < 0.5
+        return {
+            "id": _gid("Order", 5_000_000 + number),
+            "name": f"#{1000 + number}",
+            "createdAt": _iso(processed_at),
+            "processedAt": _iso(processed_at),
+            "displayFinancialStatus": "PAID",
+            "displayFulfillmentStatus": "FULFILLED" if fulfilled else "UNFULFILLED",
+            "totalPriceSet": {
+                "shopMoney": {"amount": f"{total:.2f}", "currencyCode": "INR"}
+            },
+            "customer": {"id": _gid("Customer", CUSTOMER_ID_BASE + customer_index)},
+            "lineItems": {"edges": [{"node": item} for item in items]},
+            "fulfillments": (
+                [
+                    {
+                        "status": "SUCCESS",
+                        "trackingInfo": [
+                            {
+                                "company": "Delhivery",
+                                "number": f"DL{number:010d}",
+                                "url": f"https://track.example.com/DL{number:010d}",
+                            }
+                        ],
+                    }
+                ]
+                if fulfilled
+                else []
+            ),
+        }
+
+    def customer_orders(self, customer_index: int) -> List[Dict[str, Any]]:
+        """Generate every order of a customer, oldest first."""
+        start = customer_index * self.orders_per_customer
+        return [
+            self.order(number)
+            for number in range(start, start + self.orders_per_customer)
+        ]
+
+    # Tool handlers
+
+    def _product_index(self, gid: Any) -> Optional[int]:
+        try:
+            index = _number(gid) - 8_000_000
+        except ValueError:
+            return None
+        return index if 0 <= index < self.product_count else None
+
+    def _match_products(self, query: str) -> List[int]:
+        """Return the indexes of the products matching a search query."""
+        filters = _parse_query(query)
+        start = 0
+        for since in filters.pop("updated_at", []):
+            since = since.lstrip(">=").strip("'\"").replace("Z", "+00:00")
+            moment = datetime.fromisoformat(since)
+            hours = (moment - _EPOCH).total_seconds() / 3600
+            start = max(start, math.floor(hours) + 1)
+        # Filter the few distinct combinations rather than every product
+        combinations = set(range(len(_LINES) * len(_FEATURES) * len(_STYLES)))
+        for field in ("title", "text", "product_type", "tag"):
+            for value in filters.get(field, []):
+                value = value.lower().rstrip("*")
+                combinations = {c for c in combinations if self._matches(c, value)}
+        return [
+            index
+            for index in range(max(start, 0), self.product_count)
+            if self._combinations[index] in combinations
+        ]
+
+    def _matches(self, combination: int, value: str) -> bool:
+        line, feature, style = self._names(combination)
+        title = f"{line} {feature} {style}".lower()
+        tags = (feature.lower(), line.lower(), "shapewear")
+        return value in title or value in style.lower() or value in tags
+
+    @staticmethod
+    def _page(
+        records: Sequence[Any],
+        args: Dict[str, Any],
+        key: str,
+        build: Callable[[Any], Dict[str, Any]] = lambda record: record,
+    ) -> Dict[str, Any]:
+        first = int(args.get("first") or 10)
+        offset = int(args.get("after") or 0)
+        page = [build(record) for record in records[offset : offset + first]]
+        connection, page_info = _connection(page, offset, len(records))
+        return {key: connection, "pageInfo": page_info}
+
+    def find_products(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        indexes = self._match_products(args.get("query", ""))
+        if args.get("reverse"):
+            indexes.reverse()
+        return self._page(indexes, args, "products", self.product)
+
+    def list_products_in_collection(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        collection = str(args.get("collectionId", "")).rsplit("/", 1)[-1].lower()
+        indexes = [
+            index
+            for index in range(self.product_count)
+            if self._names(self._combinations[index])[2].lower() == collection
+        ]
+        return self._page(indexes, args, "products", self.product)
+
+    def get_products_by_ids(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        indexes = map(self._product_index, args.get("productIds") or [])
+        return {"products": [self.product(i) for i in indexes if i is not None]}
+
+    def get_variants_by_ids(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        variants = []
+        for variant_id in args.get("variantIds") or []:
+            try:
+                product_number, position = divmod(_number(variant_id), 10)
+            except ValueError:
+                continue
+            index = self._product_index(product_number)
+            if index is None or position >= 4:
+                continue
+            variants.append(self.product(index)["variants"][position])
+        return {"variants": variants}
+
+    def list_collections(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        collections = [
+            {"id": _gid("Collection", style.lower()), "title": style}
+            for style in _STYLES
+        ]
+        return self._page(collections, args, "collections")
+
+    def list_customers(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        ids = _parse_query(args.get("query", "")).get("id")
+        if ids is not None:
+            indexes = [self._customer_index(i) for i in ids]
+            customers = [self.customer(i) for i in indexes if i is not None]
+            return self._page(customers, {**args, "after": None}, "customers")
+        first = int(args.get("first") or 10)
+        offset = int(args.get("after") or 0)
+        customers = [
+            self.customer(i)
+            for i in range(offset, min(offset + first, self.customer_count))
+        ]
+        connection, page_info = _connection(customers, offset, self.customer_count)
+        return {"customers": connection, "pageInfo": page_info}
+
+    def add_customer_tags(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        return {"customerId": args.get("customerId"), "tags": args.get("tags", [])}
+
+    def find_orders(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        customer_ids = _parse_query(args.get("query", "")).get("customer_id", [])
+        orders: List[Dict[str, Any]] = []
+        for customer_id in customer_ids:
+            index = self._customer_index(customer_id)
+            if index is not None:
+                orders.extend(self.customer_orders(index))
+        if args.get("sortKey") in ("PROCESSED_AT", "CREATED_AT", "ORDER_NUMBER"):
+            orders.sort(key=lambda order: order["processedAt"])
+        if args.get("reverse"):
+            orders.reverse()
+        return self._page(orders, args, "orders")
+
+    def get_order_by_id(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            order = self.order(_number(args.get("orderId")) - 5_000_000)
+        except ValueError:
+            order = None
+        return {"order": order}
+
+    def create_draft_order(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        number = len(self._draft_orders) + 1
+        draft = {
+            "id": _gid("DraftOrder", number),
+            "name": f"#D{number}",
+            "status": "OPEN",
+            "lineItems": args.get("lineItems", []),
+        }
+        self._draft_orders[draft["id"]] = draft
+        return {"draftOrder": draft}
+
+    def complete_draft_order(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        draft = self._draft_orders.get(args.get("draftOrderId") or args.get("id"))
+        if draft is None:
+            return {"draftOrder": None, "userErrors": [{"message": "Not found"}]}
+        draft["status"] = "COMPLETED"
+        return {"draftOrder": draft}
+
+    def get_shop_details(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "shop": {
+                "name": "Kurve",
+                "currencyCode": "INR",
+                "myshopifyDomain": "kurve-loadtest.myshopify.com",
+            }
+        }
+
+    def get_extended_shop_details(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        shop = self.get_shop_details(args)["shop"]
+        return {
+            "shop": {
+                **shop,
+                "email": "support@kurve.example.com",
+                "ianaTimezone": "Asia/Kolkata",
+                "shipsToCountries": ["IN"],
+                "productCount": self.product_count,
+                "customerCount": self.customer_count,
+            }
+        }
+
+    def create_discount_code(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        self._discounts += 1
+        return {
+            "codeDiscountNode": {
+                "id": _gid("DiscountCodeNode", self._discounts),
+                "code": args.get("code"),
+                "title": args.get("title"),
+            },
+            "userErrors": [],
+        }
+
+    def manage_webhooks(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        action = args.get("action", "list")
+        if action == "subscribe":
+            webhook_id = _gid("WebhookSubscription", len(self._webhooks) + 1)
+            self._webhooks[webhook_id] = {
+                "id": webhook_id,
+                "topic": args.get("topic"),
+                "callbackUrl": args.get("callbackUrl"),
+            }
+            return {"webhook": self._webhooks[webhook_id]}
+        if action == "unsubscribe":
+            removed = self._webhooks.pop(args.get("webhookId"), None)
+            return {"deleted": removed is not None}
+        return {"webhooks": list(self._webhooks.values())}
+
+    def debug_get_variant_metafield(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        variants = self.get_variants_by_ids({"variantIds": [args.get("variantId")]})
+        if not variants["variants"]:
+            return {"metafield": None}
+        return {
+            "metafield": {
+                "namespace": args.get("namespace", "custom"),
+                "key": args.get("key", "size_chart"),
+                "value": "XS 28-30 / S 31-34 / M 35-38 / L 39-42 / XL 43-46",
+            }
+        }
+
+    def introspect_admin_schema(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        return {"types": [], "query": args.get("query")}
+
+    def search_dev_docs(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        return {"results": [], "prompt": args.get("prompt")}
+
+    def call(self, tool_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Answer a tool call.
+
+        Args:
+            tool_name: The MCP tool name
+            args: The tool arguments
+
+        Returns:
+            The tool's payload.
+        """
+        handler = self.handlers.get(tool_name)
+        if handler is None:
+            raise KeyError(f"Unknown tool: {tool_name}")
+        return handler(args or {})
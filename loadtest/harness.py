@@ -0,0 +1,318 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Concurrent-conversation load generator for root_agent.
+
+The harness attaches stub MCP tools backed by a FakeStore to the real
+agents, swaps every agent's model for a ScriptedLlm, and then drives N
+concurrent sessions through the ADK Runner for each concurrency level.
+Each level reports throughput, turn latency percentiles, event-loop lag and
+memory per session.
+"""
+
+import asyncio
+import importlib
+import math
+import os
+import resource
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+from pydantic import BaseModel, Field
+
+from customer_service.agent import initialize_agents_and_tools, root_agent
+from customer_service.shared_libraries.customer_repository import (
+    customer_repository,
+)
+from customer_service.sub_agents import order_agent, product_agent
+from loadtest.fixtures import FakeStore
+from loadtest.scripted_llm import ScriptedLlm
+from loadtest.stub_mcp import LatencyModel, stub_tools
+
+APP_NAME = "loadtest"
+
+# The sub_agents package re-exports the agent under the module's own name
+_product_agent_module = importlib.import_module(
+    "customer_service.sub_agents.product_agent"
+)
+
+# One conversation: an order question, a product question, a sign-off
+DEFAULT_TURNS = [
+    "Where is my latest order?",
+    "I am looking for a black bodysuit in size S",
+    "Thanks, that's all",
+]
+
+
+class LoadProfile(BaseModel):
+    """
+    Load test parameters.
+
+    Attributes:
+        levels: Concurrent sessions at each step of the sweep
+        turns: User messages sent, in order, by every session
+        llm_latency_ms: Median simulated model latency
+        llm_latency_sigma: Log-normal shape of the model latency
+        mcp_latency_ms: Median simulated MCP server latency
+        mcp_latency_sigma: Log-normal shape of the MCP latency
+        products: Products in the generated catalog
+        customers: Customers in the generated store
+        orders_per_customer: Orders placed by every customer
+        warm_profiles: Preload customer profiles before each level
+        trace_memory: Measure Python heap growth per session with tracemalloc
+            (slows the run down)
+        lag_interval_ms: Sampling interval of the event-loop lag probe
+        seed: Seed for the generated data and latencies
+    """
+
+    levels: List[int] = Field(default_factory=lambda: [1, 10, 50, 100])
+    turns: List[str] = Field(default_factory=lambda: list(DEFAULT_TURNS))
+    llm_latency_ms: float = 400.0
+    llm_latency_sigma: float = 0.3
+    mcp_latency_ms: float = 40.0
+    mcp_latency_sigma: float = 0.5
+    products: int = 500
+    customers: int = 1000
+    orders_per_customer: int = 5
+    warm_profiles: bool = True
+    trace_memory: bool = False
+    lag_interval_ms: float = 10.0
+    seed: int = 7
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Nearest-rank percentile.
+
+    Args:
+        values: The samples
+        q: The percentile, between 0 and 100
+
+    Returns:
+        The percentile, or 0.0 without samples.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def rss_bytes() -> int:
+    """Return the resident set size of this process."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class LagMonitor:
+    """Measures how late the event loop wakes up a periodic sleeper."""
+
+    def __init__(self, interval_secs: float):
+        self.interval_secs = interval_secs
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval_secs)
+            self.samples.append(max(0.0, loop.time() - started - self.interval_secs))
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="loop-lag-monitor")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+async def setup(profile: LoadProfile) -> FakeStore:
+    """
+    Attach stub tools and scripted models to the agents.
+
+    Args:
+        profile: The load test parameters
+
+    Returns:
+        The store backing the stub tools.
+    """
+    store = FakeStore(
+        product_count=profile.products,
+        customer_count=profile.customers,
+        orders_per_customer=profile.orders_per_customer,
+        seed=profile.seed,
+    )
+    mcp_latency = LatencyModel(
+        profile.mcp_latency_ms, profile.mcp_latency_sigma, seed=profile.seed
+    )
+    await initialize_agents_and_tools(stub_tools(store, mcp_latency))
+
+    for offset, agent in enumerate((root_agent, order_agent, product_agent)):
+        agent.model = ScriptedLlm(
+            agent_name=agent.name,
+            root_agent_name=root_agent.name,
+            latency=LatencyModel(
+                profile.llm_latency_ms,
+                profile.llm_latency_sigma,
+                seed=profile.seed + offset,
+            ),
+        )
+
+    indexer = _product_agent_module.catalog_indexer
+    if indexer is not None:
+        await asyncio.wait_for(indexer.ready.wait(), timeout=60)
+    return store
+
+
+async def run_level(
+    concurrency: int, profile: LoadProfile, store: FakeStore
+) -> Dict[str, Any]:
+    """
+    Run one concurrency level.
+
+    Args:
+        concurrency: Number of simultaneous sessions
+        profile: The load test parameters
+        store: The store backing the stub tools
+
+    Returns:
+        The level's report.
+    """
+    session_service = InMemorySessionService()
+    runner = Runner(
+        app_name=APP_NAME, agent=root_agent, session_service=session_service
+    )
+    all_customers = store.customer_ids()
+    customers = [all_customers[i % len(all_customers)] for i in range(concurrency)]
+    if profile.warm_profiles:
+        await customer_repository.preload(customers)
+
+    latencies: List[float] = []
+    errors: List[str] = []
+    lag = LagMonitor(profile.lag_interval_ms / 1000)
+
+    async def conversation(index: int) -> None:
+        user_id = f"load-user-{index}"
+        session = session_service.create_session(
+            app_name=APP_NAME,
+            user_id=user_id,
+            state={"customer_id": customers[index]},
+        )
+        for text in profile.turns:
+            message = types.Content(role="user", parts=[types.Part(text=text)])
+            started = time.perf_counter()
+            try:
+                async for _ in runner.run_async(
+                    user_id=user_id, session_id=session.id, new_message=message
+                ):
+                    pass
+            except Exception as e:  # pylint: disable=broad-except
+                errors.append(f"{type(e).__name__}: {e}")
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    if profile.trace_memory:
+        tracemalloc.start()
+    heap_before = tracemalloc.get_traced_memory()[0] if profile.trace_memory else 0
+    rss_before = rss_bytes()
+    lag.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(conversation(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    await lag.stop()
+    rss_after = rss_bytes()
+    heap_after = tracemalloc.get_traced_memory()[0] if profile.trace_memory else 0
+    if profile.trace_memory:
+        tracemalloc.stop()
+
+    return {
+        "concurrency": concurrency,
+        "turns": len(latencies),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "elapsed_secs": round(elapsed, 3),
+        "throughput_tps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "latency_p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "latency_p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "loop_lag_p99_ms": round(percentile(lag.samples, 99) * 1000, 2),
+        "loop_lag_max_ms": round(max(lag.samples, default=0.0) * 1000, 2),
+        "rss_per_session_kb": round((rss_after - rss_before) / concurrency / 1024, 1),
+        "heap_per_session_kb": (
+            round((heap_after - heap_before) / concurrency / 1024, 1)
+            if profile.trace_memory
+            else None
+        ),
+    }
+
+
+async def sweep(profile: LoadProfile) -> List[Dict[str, Any]]:
+    """
+    Run every concurrency level of a profile.
+
+    Args:
+        profile: The load test parameters
+
+    Returns:
+        One report per level, in order.
+    """
+    store = await setup(profile)
+    return [await run_level(level, profile, store) for level in profile.levels]
+
+
+def format_report(reports: List[Dict[str, Any]]) -> str:
+    """
+    Render level reports as a plain-text table.
+
+    Args:
+        reports: Reports from sweep
+
+    Returns:
+        The table.
+    """
+    columns = [
+        ("concurrency", "sessions"),
+        ("turns", "turns"),
+        ("errors", "errors"),
+        ("throughput_tps", "turns/s"),
+        ("latency_p50_ms", "p50 ms"),
+        ("latency_p95_ms", "p95 ms"),
+        ("latency_p99_ms", "p99 ms"),
+        ("loop_lag_p99_ms", "lag p99 ms"),
+        ("loop_lag_max_ms", "lag max ms"),
+        ("rss_per_session_kb", "RSS KiB/session"),
+        ("heap_per_session_kb", "heap KiB/session"),
+    ]
+    rows = [[title for _, title in columns]]
+    for report in reports:
+        rows.append(
+            ["-" if report[key] is None else str(report[key]) for key, _ in columns]
+        )
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    return "\n".join(
+        "  ".join(cell.rjust(width) for cell, width in zip(row, widths))
+        for row in rows
+    )
@@ -0,0 +1,411 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Python stdio stand-in for the Shopify MCP server.
+
+Serves the Shopify MCP tool surface from a generated FakeStore, so the agent
+can run and be benchmarked without Node, a store or an access token. Faults
+can be injected on every call:
+
+* latency drawn from a log-normal LatencyModel;
+* random failures at a configurable error rate;
+* Shopify-style throttling from a leaky bucket of query cost points, which
+  fails calls with a THROTTLED error the way the Admin API does. Every
+  server process keeps its own bucket, so divide --bucket-size and
+  --restore-rate by the MCP pool size to model one store-wide limit.
+
+Point the agent at it with `Config.mcp_server.backend = "stub"` (or
+SHOPIFY_MCP_BACKEND=stub), or run it directly:
+
+    python -m loadtest.mcp_server --products 100000 --customers 200000
+"""
+
+import argparse
+import json
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import anyio
+from mcp import types
+from mcp.server.lowlevel import Server
+from mcp.server.stdio import stdio_server
+
+from loadtest.fixtures import FakeStore
+from loadtest.stub_mcp import LatencyModel
+
+_STRING = {"type": "string"}
+_INTEGER = {"type": "integer"}
+_BOOLEAN = {"type": "boolean"}
+_STRINGS = {"type": "array", "items": _STRING}
+_PAGE = {"first": _INTEGER, "after": _STRING}
+_SEARCH = {**_PAGE, "query": _STRING, "sortKey": _STRING, "reverse": _BOOLEAN}
+
+# Tool name -> (description, properties, required)
+TOOLS: Dict[str, tuple] = {
+    "findProducts": ("Search products", _SEARCH, []),
+    "listProductsInCollection": (
+        "List the products of a collection",
+        {**_PAGE, "collectionId": _STRING},
+        ["collectionId"],
+    ),
+    "getProductsByIds": (
+        "Get products by ID",
+        {"productIds": _STRINGS},
+        ["productIds"],
+    ),
+    "getVariantsByIds": (
+        "Get product variants by ID",
+        {"variantIds": _STRINGS},
+        ["variantIds"],
+    ),
+    "listCollections": ("List collections", {**_PAGE, "query": _STRING}, []),
+    "listCustomers": ("List customers", {**_PAGE, "query": _STRING}, []),
+    "addCustomerTags": (
+        "Add tags to a customer",
+        {"customerId": _STRING, "tags": _STRINGS},
+        ["customerId", "tags"],
+    ),
+    "findOrders": ("Search orders", _SEARCH, []),
+    "getOrderById": ("Get an order by ID", {"orderId": _STRING}, ["orderId"]),
+    "createDraftOrder": (
+        "Create a draft order",
+        {
+            "lineItems": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {"variantId": _STRING, "quantity": _INTEGER},
+                },
+            },
+            "email": _STRING,
+            "customerId": _STRING,
+            "note": _STRING,
+        },
+        ["lineItems"],
+    ),
+    "completeDraftOrder": (
+        "Complete a draft order",
+        {"draftOrderId": _STRING},
+        ["draftOrderId"],
+    ),
+    "createDiscountCode": (
+        "Create a discount code",
+        {
+            "title": _STRING,
+            "code": _STRING,
+            "valueType": _STRING,
+            "value": {"type": "number"},
+            "startsAt": _STRING,
+            "endsAt": _STRING,
+        },
+        ["title", "code"],
+    ),
+    "getShopDetails": ("Get shop details", {}, []),
+    "getExtendedShopDetails": ("Get extended shop details", {}, []),
+    "manageWebhooks": (
+        "List, subscribe or unsubscribe webhooks",
+        {
+            "action": _STRING,
+            "topic": _STRING,
+            "callbackUrl": _STRING,
+            "webhookId": _STRING,
+        },
+        ["action"],
+    ),
+    "debugGetVariantMetafield": (
+        "Read a variant metafield",
+        {"variantId": _STRING, "namespace": _STRING, "key": _STRING},
+        ["variantId"],
+    ),
+    "introspect_admin_schema": (
+        "Search the Admin API GraphQL schema",
+        {"query": _STRING, "filter": _STRINGS},
+        ["query"],
+    ),
+    "search_dev_docs": (
+        "Search the Shopify developer docs",
+        {"prompt": _STRING},
+        ["prompt"],
+    ),
+}
+
+_MUTATIONS = {
+    "addCustomerTags",
+    "createDraftOrder",
+    "completeDraftOrder",
+    "createDiscountCode",
+    "manageWebhooks",
+}
+
+
+def query_cost(tool_name: str, args: Dict[str, Any]) -> int:
+    """
+    Approximate the Admin API cost of a call, in Shopify's cost points.
+
+    Mutations cost 10; connections cost one point per requested node plus
+    one; lookups by ID cost one point per ID plus one.
+
+    Args:
+        tool_name: The MCP tool name
+        args: The tool arguments
+
+    Returns:
+        The requested query cost.
+    """
+    if tool_name in _MUTATIONS:
+        return 10
+    if "first" in args or tool_name in ("findProducts", "findOrders"):
+        return 1 + int(args.get("first") or 10)
+    ids = args.get("productIds") or args.get("variantIds") or []
+    return 1 + len(ids)
+
+
+class ThrottledError(Exception):
+    """A call was rejected because the cost bucket was empty."""
+
+
+class ThrottleBucket:
+    """
+    Shopify's leaky bucket of query cost points.
+
+    Attributes:
+        capacity: Points available when the bucket is full
+        restore_rate: Points restored per second
+    """
+
+    def __init__(
+        self,
+        capacity: float = 1000.0,
+        restore_rate: float = 50.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.capacity = capacity
+        self.restore_rate = restore_rate
+        self._clock = clock
+        self._available = capacity
+        self._updated = clock()
+        self.throttled = 0
+
+    def available(self) -> float:
+        """Return the points available now."""
+        now = self._clock()
+        self._available = min(
+            self.capacity,
+            self._available + (now - self._updated) * self.restore_rate,
+        )
+        self._updated = now
+        return self._available
+
+    def acquire(self, cost: int) -> None:
+        """
+        Spend the points for a call.
+
+        Args:
+            cost: The call's requested query cost
+
+        Raises:
+            ThrottledError: With Shopify's THROTTLED error payload, if fewer
+                than cost points are available.
+        """
+        available = self.available()
+        if cost > available:
+            self.throttled += 1
+            raise ThrottledError(
+                json.dumps(
+                    {
+                        "errors": [
+                            {
+                                "message": "Throttled",
+                                "extensions": {"code": "THROTTLED"},
+                            }
+                        ],
+                        "extensions": {
+                            "cost": {
+                                "requestedQueryCost": cost,
+                                "actualQueryCost": None,
+                                "throttleStatus": {
+                                    "maximumAvailable": self.capacity,
+                                    "currentlyAvailable": int(available),
+                                    "restoreRate": self.restore_rate,
+                                },
+                            }
+                        },
+                    }
+                )
+            )
+        self._available = available - cost
+
+
+class FaultInjector:
+    """
+    Latency, failure and throttling applied to every call.
+
+    Attributes:
+        latency: Simulated server latency
+        error_rate: Fraction of calls failing with an internal error
+        bucket: Query cost bucket, or None to disable throttling
+    """
+
+    def __init__(
+        self,
+        latency: Optional[LatencyModel] = None,
+        error_rate: float = 0.0,
+        bucket: Optional[ThrottleBucket] = None,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.bucket = bucket
+        self._rng = random.Random(seed)
+
+    async def apply(self, tool_name: str, args: Dict[str, Any]) -> None:
+        """
+        Delay a call and decide whether it fails.
+
+        Args:
+            tool_name: The MCP tool name
+            args: The tool arguments
+
+        Raises:
+            ThrottledError: If the call was throttled
+            RuntimeError: If the call was picked to fail
+        """
+        if self.latency is not None:
+            await anyio.sleep(self.latency.sample())
+        if self.bucket is not None:
+            self.bucket.acquire(query_cost(tool_name, args))
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise RuntimeError(
+                json.dumps(
+                    {
+                        "errors": [
+                            {
+                                "message": "Internal error. Looks like something "
+                                "went wrong on our end.",
+                                "extensions": {"code": "INTERNAL_SERVER_ERROR"},
+                            }
+                        ]
+                    }
+                )
+            )
+
+
+def list_tools() -> List[types.Tool]:
+    """Describe every tool the stand-in serves."""
+    return [
+        types.Tool(
+            name=name,
+            description=description,
+            inputSchema={
+                "type": "object",
+                "properties": properties,
+                "required": required,
+            },
+        )
+        for name, (description, properties, required) in TOOLS.items()
+    ]
+
+
+def build_server(store: FakeStore, faults: Optional[FaultInjector] = None) -> Server:
+    """
+    Create the MCP server.
+
+    Args:
+        store: The store answering the calls
+        faults: Faults injected on every call
+
+    Returns:
+        The server, ready to run over any transport.
+    """
+    server = Server("shopify-mcp-stand-in")
+    faults = faults or FaultInjector()
+
+    @server.list_tools()
+    async def _list_tools() -> List[types.Tool]:
+        return list_tools()
+
+    @server.call_tool()
+    async def _call_tool(
+        name: str, arguments: Dict[str, Any]
+    ) -> List[types.TextContent]:
+        if name not in TOOLS:
+            raise ValueError(f"Unknown tool: {name}")
+        await faults.apply(name, arguments)
+        payload = store.call(name, arguments)
+        return [types.TextContent(type="text", text=json.dumps(payload))]
+
+    return server
+
+
+parser = argparse.ArgumentParser(description="Shopify MCP server stand-in")
+parser.add_argument("--products", type=int, default=1000, help="Catalog size")
+parser.add_argument("--customers", type=int, default=1000, help="Customer count")
+parser.add_argument(
+    "--orders-per-customer", type=int, default=5, help="Orders per customer"
+)
+parser.add_argument(
+    "--latency-ms", type=float, default=0.0, help="Median call latency"
+)
+parser.add_argument(
+    "--latency-sigma", type=float, default=0.5, help="Log-normal latency shape"
+)
+parser.add_argument(
+    "--error-rate", type=float, default=0.0, help="Fraction of calls that fail"
+)
+parser.add_argument(
+    "--throttle",
+    action="store_true",
+    help="Throttle calls with Shopify's leaky bucket of query cost points",
+)
+parser.add_argument(
+    "--bucket-size", type=float, default=1000.0, help="Cost points when full"
+)
+parser.add_argument(
+    "--restore-rate", type=float, default=50.0, help="Cost points restored per second"
+)
+parser.add_argument("--seed", type=int, default=7, help="Data and fault seed")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parser.parse_args(argv)
+    store = FakeStore(
+        product_count=args.products,
+        customer_count=args.customers,
+        orders_per_customer=args.orders_per_customer,
+        seed=args.seed,
+    )
+    faults = FaultInjector(
+        latency=LatencyModel(args.latency_ms, args.latency_sigma, seed=args.seed),
+        error_rate=args.error_rate,
+        bucket=(
+            ThrottleBucket(args.bucket_size, args.restore_rate)
+            if args.throttle
+            else None
+        ),
+        seed=args.seed,
+    )
+    server = build_server(store, faults)
+
+    async def run() -> None:
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(
+                read_stream, write_stream, server.create_initialization_options()
+            )
+
+    anyio.run(run)
+
+
+if __name__ == "__main__":
+    main()
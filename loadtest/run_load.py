@@ -0,0 +1,92 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Sweep concurrency levels against root_agent and print the results.
+
+Usage:
+    python -m loadtest.run_load --levels 1,10,50,100 --json results.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+
+from loadtest.harness import LoadProfile, format_report, sweep
+
+parser = argparse.ArgumentParser(description="Load test the customer service agent")
+parser.add_argument(
+    "--levels",
+    default="1,10,50,100",
+    help="Comma-separated numbers of concurrent sessions",
+)
+parser.add_argument(
+    "--llm-latency-ms", type=float, default=400.0, help="Median model latency"
+)
+parser.add_argument(
+    "--llm-sigma", type=float, default=0.3, help="Log-normal shape of model latency"
+)
+parser.add_argument(
+    "--mcp-latency-ms", type=float, default=40.0, help="Median MCP latency"
+)
+parser.add_argument(
+    "--mcp-sigma", type=float, default=0.5, help="Log-normal shape of MCP latency"
+)
+parser.add_argument("--products", type=int, default=500, help="Catalog size")
+parser.add_argument("--customers", type=int, default=1000, help="Customer count")
+parser.add_argument(
+    "--cold-profiles",
+    action="store_true",
+    help="Do not preload customer profiles before each level",
+)
+parser.add_argument(
+    "--trace-memory",
+    action="store_true",
+    help="Also measure Python heap growth per session (slower)",
+)
+parser.add_argument("--seed", type=int, default=7, help="Data and latency seed")
+parser.add_argument("--json", dest="json_path", help="Write the reports to a file")
+
+
+def main() -> None:
+    args = parser.parse_args()
+    # Agent logging at INFO/DEBUG would dominate the measurements
+    logging.disable(logging.INFO)
+
+    profile = LoadProfile(
+        levels=[int(level) for level in args.levels.split(",")],
+        llm_latency_ms=args.llm_latency_ms,
+        llm_latency_sigma=args.llm_sigma,
+        mcp_latency_ms=args.mcp_latency_ms,
+        mcp_latency_sigma=args.mcp_sigma,
+        products=args.products,
+        customers=args.customers,
+        warm_profiles=not args.cold_profiles,
+        trace_memory=args.trace_memory,
+        seed=args.seed,
+    )
+    reports = asyncio.run(sweep(profile))
+    print(format_report(reports))
+    for report in reports:
+        if report["first_error"]:
+            print(f"{report['concurrency']} sessions: {report['first_error']}")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"profile": profile.model_dump(), "levels": reports}, f, indent=2
+            )
+
+
+if __name__ == "__main__":
+    main()
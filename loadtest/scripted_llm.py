@@ -0,0 +1,201 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Deterministic stand-in for Gemini that follows the agents' playbooks.
+
+ScriptedLlm reads the request the way the real model would - the latest user
+message, the tool results so far and the customer profile in the system
+instruction - and answers with the delegation and tool-call sequence the
+instructions prescribe:
+
+* the root agent transfers order questions to order_agent and product
+  questions to product_agent;
+* order_agent calls findOrders, then getOrderById for the newest order;
+* product_agent searches the catalog, then fetches the top products by ID;
+* a sub-agent handed a question outside its domain transfers back.
+
+Each answer is delayed by a LatencyModel to stand in for model latency.
+"""
+
+import re
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.genai import types
+from pydantic import ConfigDict, Field
+
+from customer_service.shared_libraries.mcp_results import (
+    decode_tool_result,
+    extract_records,
+)
+from loadtest.stub_mcp import LatencyModel
+
+_CUSTOMER_ID_RE = re.compile(r'"customer_id":"(\d+)"')
+_ORDER_WORDS = ("order", "delivery", "deliver", "track", "shipped", "refund")
+_PRODUCT_WORDS = ("bodysuit", "shorts", "size", "recommend", "looking for", "product")
+
+
+def classify(text: str) -> str:
+    """
+    Classify a user message by the agent that should handle it.
+
+    Args:
+        text: The user message
+
+    Returns:
+        "order", "product" or "other".
+    """
+    lowered = text.lower()
+    if any(word in lowered for word in _ORDER_WORDS):
+        return "order"
+    if any(word in lowered for word in _PRODUCT_WORDS):
+        return "product"
+    return "other"
+
+
+def _text(content: types.Content) -> str:
+    return "".join(part.text or "" for part in content.parts or [])
+
+
+def _latest_turn(
+    contents: List[types.Content],
+) -> Tuple[str, List[types.FunctionResponse]]:
+    """Return the latest user message and the tool results that followed it."""
+    responses: List[types.FunctionResponse] = []
+    for content in reversed(contents):
+        parts = content.parts or []
+        function_responses = [p.function_response for p in parts if p.function_response]
+        if function_responses:
+            responses[:0] = function_responses
+            continue
+        text = _text(content)
+        if content.role == "user" and text and not text.startswith("For context:"):
+            return text, responses
+    return "", responses
+
+
+def _call(name: str, args: Dict[str, Any]) -> types.Content:
+    return types.Content(
+        role="model",
+        parts=[types.Part(function_call=types.FunctionCall(name=name, args=args))],
+    )
+
+
+def _say(text: str) -> types.Content:
+    return types.Content(role="model", parts=[types.Part(text=text)])
+
+
+def _result(response: types.FunctionResponse) -> Any:
+    payload = response.response or {}
+    return decode_tool_result(payload.get("result", payload))
+
+
+class ScriptedLlm(BaseLlm):
+    """
+    Scripted model for one agent.
+
+    Attributes:
+        agent_name: The agent this model answers for
+        root_agent_name: The agent that delegates to the sub-agents
+        latency: Simulated model latency
+        requests: Number of requests answered
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    model: str = "scripted"
+    agent_name: str
+    root_agent_name: str = "shopify_agent"
+    latency: Optional[LatencyModel] = None
+    requests: int = Field(default=0)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self.requests += 1
+        if self.latency is not None:
+            await self.latency.wait()
+        yield LlmResponse(content=self.respond(llm_request))
+
+    def respond(self, llm_request: LlmRequest) -> types.Content:
+        """
+        Choose the next step for a request.
+
+        Args:
+            llm_request: The request the agent would send to Gemini
+
+        Returns:
+            A function call or a final text answer.
+        """
+        message, responses = _latest_turn(llm_request.contents)
+        topic = classify(message)
+        if self.agent_name == self.root_agent_name:
+            if topic == "order":
+                return _call("transfer_to_agent", {"agent_name": "order_agent"})
+            if topic == "product":
+                return _call("transfer_to_agent", {"agent_name": "product_agent"})
+            return _say("Happy to help! Is there anything else you need?")
+
+        domain = "order" if self.agent_name == "order_agent" else "product"
+        if topic != domain and not responses:
+            return _call("transfer_to_agent", {"agent_name": self.root_agent_name})
+        if domain == "order":
+            return self._order_step(llm_request, responses)
+        return self._product_step(llm_request, message, responses)
+
+    @staticmethod
+    def _order_step(
+        llm_request: LlmRequest, responses: List[types.FunctionResponse]
+    ) -> types.Content:
+        if not responses:
+            match = _CUSTOMER_ID_RE.search(str(llm_request.config.system_instruction))
+            customer_id = match.group(1) if match else "unknown"
+            return _call(
+                "findOrders", {"first": 10, "query": f"customer_id:{customer_id}"}
+            )
+        last = responses[-1]
+        if last.name == "findOrders":
+            orders = extract_records(_result(last), "orders")
+            if not orders:
+                return _say("I could not find any orders on your account.")
+            return _call("getOrderById", {"orderId": orders[-1]["id"]})
+        order = extract_records(_result(last), "order")
+        if not order:
+            return _say("I could not load that order right now.")
+        return _say(
+            f"Your order {order[0].get('name')} is "
+            f"{str(order[0].get('displayFulfillmentStatus')).lower()}."
+        )
+
+    @staticmethod
+    def _product_step(
+        llm_request: LlmRequest, message: str, responses: List[types.FunctionResponse]
+    ) -> types.Content:
+        if not responses:
+            if "search_catalog" in llm_request.tools_dict:
+                return _call("search_catalog", {"query": message, "limit": 5})
+            return _call("findProducts", {"first": 5, "query": message})
+        last = responses[-1]
+        if last.name in ("search_catalog", "findProducts"):
+            result = _result(last)
+            if isinstance(result, dict) and "product_ids" in result:
+                ids = result["product_ids"][:3]
+            else:
+                ids = [p["id"] for p in extract_records(result, "products")[:3]]
+            if not ids:
+                return _say("I could not find matching products.")
+            return _call("getProductsByIds", {"productIds": ids})
+        products = extract_records(_result(last), "products")
+        titles = ", ".join(p.get("title", "") for p in products)
+        return _say(f"You might like: {titles}.")
@@ -0,0 +1,183 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark session lookups and turn writes against a large session store.
+
+Fills a SQLite session store with --sessions sessions, each holding one
+earlier turn, then times per-turn operations on randomly chosen sessions:
+
+- cold lookup: get_session on a session that is not cached
+- hot lookup: get_session on a cached session, revalidated by version
+- turn write: appending a turn's four events, i.e. the time the event
+  loop spends; the transaction is queued to the writer thread
+- turn commit: from the first append until the turn's transaction is in
+  the database
+
+Usage:
+    python -m loadtest.session_store_bench --sessions 100000 --json bench.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from customer_service.config import SessionStoreSettings
+from customer_service.shared_libraries.session_store import SQLiteSessionService
+
+APP_NAME = "customer_service"
+
+parser = argparse.ArgumentParser(description="Benchmark the SQLite session store")
+parser.add_argument("--sessions", type=int, default=100_000, help="Stored sessions")
+parser.add_argument("--samples", type=int, default=2000, help="Timed operations")
+parser.add_argument("--cache-size", type=int, default=1024, help="Hot sessions")
+parser.add_argument("--path", help="Database file; by default a temporary one")
+parser.add_argument("--seed", type=int, default=7, help="Session sampling seed")
+parser.add_argument("--json", dest="json_path", help="Write the results to a file")
+
+
+def turn_events(turn: int) -> List[Event]:
+    """A user message, a tool call and response, and the final answer."""
+
+    def event(author: str, part: types.Part, delta=None) -> Event:
+        return Event(
+            author=author,
+            invocation_id=f"turn-{turn}",
+            content=types.Content(role="model", parts=[part]),
+            actions=EventActions(state_delta=delta or {}),
+        )
+
+    order = {"order_number": f"#{1000 + turn}"}
+    return [
+        event("user", types.Part(text="Where is my order?")),
+        event(
+            "order_agent",
+            types.Part(
+                function_call=types.FunctionCall(name="get_order_status", args=order)
+            ),
+            {"customer_profile": "Returning customer, 4 orders", "turns": turn},
+        ),
+        event(
+            "order_agent",
+            types.Part(
+                function_response=types.FunctionResponse(
+                    name="get_order_status",
+                    response={"status": "success", "status_block": "In transit"},
+                )
+            ),
+        ),
+        event("order_agent", types.Part(text="Your order is in transit.")),
+    ]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Median, p99 and mean of timings in seconds, in microseconds."""
+    ordered = sorted(samples)
+    return {
+        "p50_us": round(statistics.median(ordered) * 1e6, 1),
+        "p99_us": round(ordered[int(len(ordered) * 0.99) - 1] * 1e6, 1),
+        "mean_us": round(statistics.fmean(ordered) * 1e6, 1),
+    }
+
+
+def populate(settings: SessionStoreSettings, count: int) -> float:
+    """Store count sessions with one turn each; returns the seconds taken."""
+    service = SQLiteSessionService(settings.model_copy(update={"cache_size": 0}))
+    started = time.perf_counter()
+    for index in range(count):
+        session = service.create_session(
+            app_name=APP_NAME, user_id=f"user-{index}", session_id=f"s{index}"
+        )
+        for event in turn_events(0):
+            service.append_event(session, event)
+    service.close()
+    return time.perf_counter() - started
+
+
+def bench(args: argparse.Namespace, path: str) -> Dict[str, object]:
+    settings = SessionStoreSettings(path=path, cache_size=args.cache_size)
+    populate_secs = populate(settings, args.sessions)
+
+    rng = random.Random(args.seed)
+    service = SQLiteSessionService(settings)
+    cold, hot, writes, commits = [], [], [], []
+    for turn in range(1, args.samples + 1):
+        index = rng.randrange(args.sessions)
+        key = {
+            "app_name": APP_NAME,
+            "user_id": f"user-{index}",
+            "session_id": f"s{index}",
+        }
+        started = time.perf_counter()
+        session = service.get_session(**key)
+        cold.append(time.perf_counter() - started)
+
+        events = turn_events(turn)
+        started = time.perf_counter()
+        for event in events:
+            service.append_event(session, event)
+        writes.append(time.perf_counter() - started)
+        service.wait_for_writes()
+        commits.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        service.get_session(**key)
+        hot.append(time.perf_counter() - started)
+    service.close()
+
+    return {
+        "sessions": args.sessions,
+        "samples": args.samples,
+        "populate_secs": round(populate_secs, 1),
+        "db_mb": round(os.path.getsize(path) / 2**20, 1),
+        "cold_lookup": summarize(cold),
+        "hot_lookup": summarize(hot),
+        "turn_write": summarize(writes),
+        "turn_commit": summarize(commits),
+        "store": service.stats(),
+    }
+
+
+def main() -> None:
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as directory:
+        results = bench(args, args.path or os.path.join(directory, "sessions.db"))
+
+    print(
+        f"{results['sessions']} sessions, {results['db_mb']} MB, "
+        f"populated in {results['populate_secs']}s"
+    )
+    print(f"{'operation':<12} {'p50 us':>9} {'p99 us':>9} {'mean us':>9}")
+    for name in ("cold_lookup", "hot_lookup", "turn_write", "turn_commit"):
+        timing = results[name]
+        print(
+            f"{name:<12} {timing['p50_us']:>9} {timing['p99_us']:>9} "
+            f"{timing['mean_us']:>9}"
+        )
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
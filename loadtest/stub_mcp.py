@@ -0,0 +1,105 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""In-process stand-ins for the Shopify MCP tools.
+
+StubMCPTool answers from a FakeStore after a simulated server round trip
+drawn from a LatencyModel, and returns the same CallToolResult shape as a
+real MCPTool, so the agents' tool wrappers behave as they do in production.
+"""
+
+import asyncio
+import json
+import math
+import random
+from typing import Any, Dict, List, Optional
+
+from google.adk.tools import BaseTool
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+from mcp.types import CallToolResult, TextContent
+
+from loadtest.fixtures import FakeStore
+
+
+class LatencyModel:
+    """
+    Log-normal latency distribution.
+
+    Attributes:
+        median_ms: Median latency in milliseconds; 0 disables the delay
+        sigma: Shape of the distribution; 0 gives a constant latency
+    """
+
+    def __init__(self, median_ms: float, sigma: float = 0.5, seed: int = 0):
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self._rng = random.Random(seed)
+
+    def sample(self) -> float:
+        """
+        Draw one latency.
+
+        Returns:
+            The latency in seconds.
+        """
+        if self.median_ms <= 0:
+            return 0.0
+        return self._rng.lognormvariate(math.log(self.median_ms), self.sigma) / 1000
+
+    async def wait(self) -> None:
+        """Sleep for one sampled latency."""
+        delay = self.sample()
+        await asyncio.sleep(delay)
+
+
+class StubMCPTool(BaseTool):
+    """A Shopify MCP tool answered by a FakeStore."""
+
+    def __init__(self, name: str, store: FakeStore, latency: LatencyModel):
+        super().__init__(name=name, description=f"Stub of the {name} MCP tool")
+        self.store = store
+        self.latency = latency
+        self.calls = 0
+
+    def _get_declaration(self) -> Optional[types.FunctionDeclaration]:
+        return types.FunctionDeclaration(
+            name=self.name,
+            description=self.description,
+            parameters=types.Schema(type=types.Type.OBJECT),
+        )
+
+    async def run_async(
+        self, *, args: Dict[str, Any], tool_context: Optional[ToolContext]
+    ) -> Any:
+        self.calls += 1
+        await self.latency.wait()
+        payload = self.store.call(self.name, args)
+        return CallToolResult(
+            content=[TextContent(type="text", text=json.dumps(payload))]
+        )
+
+
+def stub_tools(store: FakeStore, latency: LatencyModel) -> List[StubMCPTool]:
+    """
+    Create a stub for every tool the store implements.
+
+    Args:
+        store: The store answering the calls
+        latency: Simulated server latency shared by all tools
+
+    Returns:
+        The stub tools.
+    """
+    return [StubMCPTool(name, store, latency) for name in store.handlers]
@@ -0,0 +1,86 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+
+import pytest
+
+from customer_service.config import ServingSettings
+from customer_service.shared_libraries.admission import (
+    AdmissionController,
+    Overloaded,
+)
+
+
+@pytest.mark.asyncio
+async def test_queued_turns_take_freed_slots_in_order():
+    controller = AdmissionController(
+        ServingSettings(max_in_flight=1, max_queued=1, queue_timeout_secs=5)
+    )
+    first = await controller.acquire("a")
+    waiting = asyncio.create_task(controller.acquire("b"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(Overloaded) as shed:
+        await controller.acquire("c")
+    assert shed.value.reason == "queue_full"
+    assert controller.stats()["queued"] == 1
+
+    first.release()
+    first.release()
+    second = await waiting
+    assert controller.stats()["in_flight"] == 1
+    second.release()
+    assert controller.stats() == {
+        "in_flight": 0,
+        "queued": 0,
+        "admitted": 2,
+        "shed": {"queue_full": 1},
+    }
+
+
+@pytest.mark.asyncio
+async def test_queue_timeout_and_saturation_shed_turns():
+    saturated = []
+    controller = AdmissionController(
+        ServingSettings(max_in_flight=1, queue_timeout_secs=0.01),
+        probes=[lambda: saturated[0] if saturated else None],
+    )
+    async with controller.admit("a"):
+        with pytest.raises(Overloaded) as shed:
+            await controller.acquire("b")
+        assert shed.value.reason == "queue_timeout"
+
+    saturated.append("model_quota")
+    with pytest.raises(Overloaded) as shed:
+        await controller.acquire("b")
+    assert shed.value.reason == "model_quota"
+    assert controller.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_turns_of_one_session_run_one_at_a_time():
+    controller = AdmissionController(ServingSettings(queue_timeout_secs=5))
+    order = []
+
+    async def turn(name):
+        async with controller.admit("session-1"):
+            order.append(f"{name} start")
+            await asyncio.sleep(0.01)
+            order.append(f"{name} end")
+
+    await asyncio.gather(turn("first"), turn("second"))
+
+    assert order == ["first start", "first end", "second start", "second end"]
+    assert controller._sessions == {}
@@ -0,0 +1,100 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from google.adk.tools import BaseTool
+
+from customer_service import agent
+from customer_service.shared_libraries.metrics import MeteredTool
+from customer_service.sub_agents import order_agent, product_agent
+
+
+@pytest.fixture
+def init(monkeypatch):
+    state = SimpleNamespace(calls=0, fail_first=False)
+
+    async def initialize(tools=None):
+        state.calls += 1
+        await asyncio.sleep(0.01)
+        if state.calls == 1 and state.fail_first:
+            raise ValueError("SHOPIFY_ACCESS_TOKEN environment variable must be set")
+
+    monkeypatch.setattr(agent, "_initialize", initialize)
+    monkeypatch.setattr(agent, "_init_task", None)
+    monkeypatch.setattr(agent, "_init_failed_at", None)
+    return state
+
+
+def test_import_does_not_initialize():
+    assert agent.health()["status"] in ("not_started", "ready", "failed")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_initialization_runs_once(init):
+    assert agent.health()["status"] == "not_started"
+    await asyncio.gather(*(agent.initialize_agents_and_tools() for _ in range(5)))
+    await agent.initialize_agents_and_tools()
+
+    assert init.calls == 1
+    assert agent.health()["ready"] is True
+
+
+@pytest.mark.asyncio
+async def test_failed_initialization_is_reported_and_retried(init, monkeypatch):
+    init.fail_first = True
+
+    assert await agent.wait_until_ready() is False
+    status = agent.health()
+    assert status["status"] == "failed"
+    assert "SHOPIFY_ACCESS_TOKEN" in status["error"]
+
+    # Retries are throttled, then succeed
+    assert await agent.wait_until_ready() is False
+    assert init.calls == 1
+    monkeypatch.setattr(agent, "_init_failed_at", -1e9)
+    assert await agent.wait_until_ready() is True
+    assert init.calls == 2
+
+
+class StubTool(BaseTool):
+    def __init__(self, name):
+        super().__init__(name=name, description=name)
+
+
+@pytest.mark.asyncio
+async def test_retried_initialization_attaches_tools_once(monkeypatch):
+    monkeypatch.setattr(order_agent, "tools", [])
+    monkeypatch.setattr(product_agent, "tools", [])
+    attempts = []
+
+    async def load_customer_profiles(tools):
+        attempts.append(tools)
+        if len(attempts) == 1:
+            raise RuntimeError("MCP server went away")
+
+    monkeypatch.setattr(agent, "load_customer_profiles", load_customer_profiles)
+    tools = [StubTool("getOrderById"), StubTool("getProductsByIds")]
+
+    with pytest.raises(RuntimeError):
+        await agent._initialize(tools)
+    await agent._initialize(agent.meter_tools(tools))
+
+    assert [tool.name for tool in order_agent.tools] == ["getOrderById"]
+    assert [tool.name for tool in product_agent.tools] == ["getProductsByIds"]
+    metered = attempts[-1]
+    assert all(isinstance(tool, MeteredTool) for tool in metered)
+    assert not any(isinstance(tool.wrapped_tool, MeteredTool) for tool in metered)
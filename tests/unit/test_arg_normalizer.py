@@ -0,0 +1,110 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from google.adk.tools import BaseTool
+from google.genai import types
+
+from customer_service.config import ArgumentNormalizationSettings
+from customer_service.shared_libraries.arg_normalizer import ArgNormalizerRegistry
+from customer_service.shared_libraries.callbacks import before_tool
+
+
+class DeclaredTool(BaseTool):
+    def __init__(self, name, parameters):
+        super().__init__(name=name, description=name)
+        self.parameters = parameters
+
+    def _get_declaration(self):
+        return types.FunctionDeclaration(
+            name=self.name, description=self.name, parameters=self.parameters
+        )
+
+
+FIND_ORDERS = types.Schema(
+    type="OBJECT",
+    properties={
+        "query": types.Schema(type="STRING"),
+        "sortKey": types.Schema(type="STRING", enum=["CREATED_AT", "TOTAL_PRICE"]),
+        "customer": types.Schema(
+            type="OBJECT",
+            properties={
+                "id": types.Schema(type="STRING"),
+                "email": types.Schema(type="STRING"),
+            },
+        ),
+        "lineItems": types.Schema(
+            type="ARRAY",
+            items=types.Schema(
+                type="OBJECT",
+                properties={
+                    "variantId": types.Schema(type="STRING"),
+                    "size": types.Schema(
+                        type="STRING", description="Size, case-insensitive"
+                    ),
+                },
+            ),
+        ),
+    },
+)
+
+
+def test_only_case_insensitive_fields_are_normalized_in_place():
+    registry = ArgNormalizerRegistry(ArgumentNormalizationSettings())
+    tool = DeclaredTool("findOrders", FIND_ORDERS)
+    args = {
+        "query": "Sculpt Bodysuit",
+        "sortKey": "created_at",
+        "customer": {"id": "gid://shopify/Customer/AbC", "email": " Ana@X.com"},
+        "lineItems": [
+            {"variantId": "gid://shopify/ProductVariant/Xy", "size": "XL"},
+            {"variantId": "gid://shopify/ProductVariant/Zz", "size": "m"},
+        ],
+    }
+
+    assert registry.normalize(tool, args) == 3
+
+    assert args == {
+        "query": "Sculpt Bodysuit",
+        "sortKey": "CREATED_AT",
+        "customer": {"id": "gid://shopify/Customer/AbC", "email": "ana@x.com"},
+        "lineItems": [
+            {"variantId": "gid://shopify/ProductVariant/Xy", "size": "xl"},
+            {"variantId": "gid://shopify/ProductVariant/Zz", "size": "m"},
+        ],
+    }
+    assert registry.normalizer_for(tool) is registry.normalizer_for(tool)
+    assert registry.normalize(tool, {"sortKey": "RELEVANCE", "lineItems": 1}) == 0
+
+
+def test_before_tool_normalizes_and_short_circuits_small_discounts():
+    tool = DeclaredTool(
+        "sync_ask_for_approval",
+        types.Schema(
+            type="OBJECT",
+            properties={
+                "discount_type": types.Schema(type="STRING"),
+                "value": types.Schema(type="NUMBER"),
+                "reason": types.Schema(type="STRING"),
+            },
+        ),
+    )
+    args = {"discount_type": "Percentage", "value": 5, "reason": "Loyal Customer"}
+
+    result = before_tool(tool, args, None)
+
+    assert result == {"result": "You can approve this discount; no manager needed."}
+    assert args["discount_type"] == "percentage"
+    assert args["reason"] == "Loyal Customer"
+    args["value"] = 15
+    assert before_tool(tool, args, None) is None
@@ -0,0 +1,134 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+
+import pytest
+
+from customer_service.config import CartSettings
+from customer_service.shared_libraries.cart import CartEngine
+
+BODYSUIT = "gid://shopify/ProductVariant/101"
+SHAPER = "gid://shopify/ProductVariant/102"
+
+
+def test_batches_apply_atomically_and_survive_restart(tmp_path):
+    settings = CartSettings(path=str(tmp_path / "carts.db"), max_quantity=5)
+    carts = CartEngine(settings)
+    added = carts.modify(
+        "123",
+        [{"product_id": BODYSUIT, "quantity": 2.0, "name": "Bodysuit", "price": 1499}],
+        [],
+    )
+    assert added["status"] == "success"
+
+    invalid = carts.modify(
+        "123", [{"product_id": SHAPER, "quantity": 1}], [{"product_id": "nope"}]
+    )
+    assert invalid["status"] == "invalid"
+    too_many = carts.modify("123", [{"product_id": BODYSUIT, "quantity": 4}], [])
+    assert too_many["status"] == "invalid"
+
+    cart = CartEngine(settings).get("123")
+    assert cart["version"] == 1
+    assert cart["items"] == [
+        {"product_id": BODYSUIT, "name": "Bodysuit", "quantity": 2, "price": 1499.0}
+    ]
+    assert cart["subtotal"] == 2998.0
+
+
+def test_versions_and_idempotency_keys(tmp_path):
+    settings = CartSettings(path=str(tmp_path / "carts.db"))
+    carts = CartEngine(settings)
+    other_worker = CartEngine(settings)
+    carts.get("123")
+
+    first = carts.modify("123", [{"product_id": SHAPER}], [], idempotency_key="k1")
+    again = carts.modify("123", [{"product_id": SHAPER}], [], idempotency_key="k1")
+    assert again == {**first, "replayed": True}
+    assert carts.get("123")["items"][0]["quantity"] == 1
+
+    # A change made from a cart read before another worker's change is
+    # refused when it names its version, and applied on top otherwise
+    other_worker.modify("123", [{"product_id": BODYSUIT}], [], expected_version=1)
+    stale = carts.modify("123", [], [SHAPER], expected_version=1)
+    assert stale["status"] == "conflict"
+    assert stale["cart"]["version"] == 2
+    removed = carts.modify("123", [], [SHAPER])
+    assert removed["cart"]["version"] == 3
+    assert [line["product_id"] for line in removed["cart"]["items"]] == [BODYSUIT]
+    assert carts.stats()["conflicts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_edits_in_a_row_sync_one_draft_order():
+    calls = []
+
+    async def create_draft_order(args):
+        calls.append(args)
+        return {"draftOrder": {"id": f"gid://shopify/DraftOrder/{len(calls)}"}}
+
+    carts = CartEngine(CartSettings(path=None, sync_debounce_secs=0.02))
+    carts.bind(create_draft_order)
+    for _ in range(5):
+        carts.modify("123", [{"product_id": BODYSUIT}], [])
+        await asyncio.sleep(0.005)
+    assert calls == []
+
+    await asyncio.sleep(0.05)
+    assert calls == [
+        {
+            "lineItems": [{"variantId": BODYSUIT, "quantity": 5}],
+            "customerId": "gid://shopify/Customer/123",
+            "note": "Cart version 5",
+        }
+    ]
+    assert carts.get("123")["draft_order_id"] == "gid://shopify/DraftOrder/1"
+
+    carts.modify("123", [], [BODYSUIT])
+    await carts.sync_pending()
+    assert len(calls) == 1
+    assert carts.get("123")["draft_order_id"] is None
+    assert carts.stats()["syncs"] == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_syncs_are_retried_with_backoff():
+    calls = []
+
+    async def create_draft_order(args):
+        calls.append(args)
+        if len(calls) < 3:
+            raise asyncio.TimeoutError()
+        return {"draftOrder": {"id": "gid://shopify/DraftOrder/1"}}
+
+    carts = CartEngine(
+        CartSettings(
+            path=None,
+            sync_debounce_secs=0,
+            sync_retry_secs=0.05,
+            sync_max_retry_secs=0.08,
+        )
+    )
+    carts.bind(create_draft_order)
+    carts.modify("123", [{"product_id": BODYSUIT}], [])
+
+    await asyncio.sleep(0.01)
+    assert len(calls) == 1
+    assert carts.stats()["pending_syncs"] == 1
+    await asyncio.sleep(0.3)
+    assert len(calls) == 3
+    assert carts.get("123")["draft_order_id"] == "gid://shopify/DraftOrder/1"
+    assert carts.stats()["sync_failures"] == 2
+    assert carts.stats()["pending_syncs"] == 0
@@ -0,0 +1,96 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import pytest
+from mcp.types import CallToolResult, TextContent
+
+from customer_service.config import CatalogIndexSettings
+from customer_service.shared_libraries.catalog_index import (
+    CatalogIndex,
+    CatalogIndexer,
+)
+
+PRODUCTS = [
+    {
+        "id": "gid://shopify/Product/1",
+        "title": "ShapeShifter Bodysuit",
+        "tags": ["strapless", "bestseller"],
+        "productType": "Bodysuit",
+        "description": "Seamless sculpting bodysuit with convertible straps.",
+    },
+    {
+        "id": "gid://shopify/Product/2",
+        "title": "High-Waist Shaper Shorts",
+        "tags": "tummy control, everyday",
+        "productType": "Shorts",
+        "descriptionHtml": "<p>Smooths the waist under a bodysuit or dress.</p>",
+    },
+    {
+        "id": "gid://shopify/Product/3",
+        "title": "Archived Slip",
+        "productType": "Slip",
+        "status": "ARCHIVED",
+    },
+]
+
+
+def mcp_page(products, cursor=None):
+    payload = {
+        "products": {"edges": [{"node": product} for product in products]},
+        "pageInfo": {"hasNextPage": cursor is not None, "endCursor": cursor},
+    }
+    return CallToolResult(content=[TextContent(type="text", text=json.dumps(payload))])
+
+
+def test_title_match_outranks_description_match():
+    index = CatalogIndex()
+    index.upsert(PRODUCTS)
+
+    results = index.search("bodysuits")
+
+    assert [r["id"] for r in results] == [
+        "gid://shopify/Product/1",
+        "gid://shopify/Product/2",
+    ]
+
+
+def test_inactive_and_removed_products_are_not_returned():
+    index = CatalogIndex()
+    index.upsert(PRODUCTS)
+    assert index.search("slip") == []
+
+    index.remove(["gid://shopify/Product/2"])
+    assert index.search("tummy control") == []
+    assert len(index) == 1
+
+
+@pytest.mark.asyncio
+async def test_indexer_pages_through_find_products():
+    calls = []
+
+    async def find_products(args):
+        calls.append(args)
+        if "after" not in args:
+            return mcp_page(PRODUCTS[:1], cursor="c1")
+        return mcp_page(PRODUCTS[1:])
+
+    index = CatalogIndex()
+    indexer = CatalogIndexer(index, find_products, CatalogIndexSettings(page_size=1))
+    await indexer.rebuild()
+
+    assert calls == [{"first": 1}, {"first": 1, "after": "c1"}]
+    assert len(index) == 2
+    assert indexer.ready.is_set()
@@ -0,0 +1,125 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+
+import pytest
+from google.adk.tools import BaseTool
+
+from customer_service.shared_libraries.coalescing import CoalescingTool
+from customer_service.shared_libraries.mcp_results import extract_records
+
+
+class ProductsByIds(BaseTool):
+    def __init__(self):
+        super().__init__(name="getProductsByIds", description="Get products")
+        self.calls = []
+
+    async def run_async(self, *, args, tool_context):
+        self.calls.append(args)
+        return {"products": [{"id": i, "title": f"Product {i}"} for i in args["productIds"]]}
+
+
+@pytest.fixture
+def tool():
+    return ProductsByIds()
+
+
+@pytest.fixture
+def coalescing(tool):
+    return CoalescingTool(
+        tool,
+        id_arg="productIds",
+        record_key="products",
+        window_secs=0.005,
+        max_batch_size=250,
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_deduplicated_call(tool, coalescing):
+    first, second = await asyncio.gather(
+        coalescing.run_async(args={"productIds": ["1", "2"]}, tool_context=None),
+        coalescing.run_async(args={"productIds": ["2", "3"]}, tool_context=None),
+    )
+
+    assert tool.calls == [{"productIds": ["1", "2", "3"]}]
+    assert [p["id"] for p in extract_records(first, "products")] == ["1", "2"]
+    assert [p["id"] for p in extract_records(second, "products")] == ["2", "3"]
+    assert coalescing.stats() == {
+        "requests": 2,
+        "batches": 1,
+        "ids_requested": 4,
+        "ids_sent": 3,
+    }
+
+
+@pytest.mark.asyncio
+async def test_calls_with_different_arguments_are_not_merged(tool, coalescing):
+    await asyncio.gather(
+        coalescing.run_async(args={"productIds": ["1"]}, tool_context=None),
+        coalescing.run_async(
+            args={"productIds": ["1"], "locale": "hi"}, tool_context=None
+        ),
+    )
+    assert len(tool.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_failure_reaches_every_caller(coalescing):
+    async def fail(*, args, tool_context):
+        raise RuntimeError("throttled")
+
+    coalescing.wrapped_tool.run_async = fail
+    results = await asyncio.gather(
+        coalescing.run_async(args={"productIds": ["1"]}, tool_context=None),
+        coalescing.run_async(args={"productIds": ["2"]}, tool_context=None),
+        return_exceptions=True,
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_bare_ids_match_records_returned_with_gids():
+    class GidProducts(ProductsByIds):
+        async def run_async(self, *, args, tool_context):
+            self.calls.append(args)
+            return {
+                "products": [
+                    {"id": f"gid://shopify/Product/{i.rsplit('/', 1)[-1]}"}
+                    for i in args["productIds"]
+                ]
+            }
+
+    coalescing = CoalescingTool(
+        GidProducts(),
+        id_arg="productIds",
+        record_key="products",
+        window_secs=0.005,
+        max_batch_size=250,
+    )
+    bare, gid = await asyncio.gather(
+        coalescing.run_async(args={"productIds": ["7"]}, tool_context=None),
+        coalescing.run_async(
+            args={"productIds": ["gid://shopify/Product/8"]}, tool_context=None
+        ),
+    )
+
+    assert [p["id"] for p in extract_records(bare, "products")] == [
+        "gid://shopify/Product/7"
+    ]
+    assert [p["id"] for p in extract_records(gid, "products")] == [
+        "gid://shopify/Product/8"
+    ]
+    assert not coalescing._tasks
@@ -0,0 +1,152 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import json
+
+import pytest
+
+from customer_service.config import CustomerRepositorySettings
+from customer_service.shared_libraries.customer_repository import (
+    CustomerRepository,
+)
+
+CUSTOMERS = {
+    "7730071404758": {
+        "id": "gid://shopify/Customer/7730071404758",
+        "firstName": "Gauri",
+        "lastName": "Khanna",
+        "email": "gauri@example.com",
+        "createdAt": "2025-02-12T10:00:00Z",
+        "amountSpent": {"amount": "2709.0", "currencyCode": "INR"},
+        "defaultAddress": {"city": "Noida", "provinceCode": "UP", "zip": "201301"},
+        "emailMarketingConsent": {"marketingState": "SUBSCRIBED"},
+    },
+    "42": {"id": "gid://shopify/Customer/42", "firstName": "Asha"},
+}
+
+ORDERS = [
+    {
+        "name": "#1579",
+        "processedAt": "2025-03-27T09:00:00Z",
+        "totalPriceSet": {"shopMoney": {"amount": "1310.0"}},
+        "lineItems": {
+            "edges": [
+                {
+                    "node": {
+                        "name": "ShapeShifter Bodysuit",
+                        "quantity": 1,
+                        "product": {"id": "gid://shopify/Product/9"},
+                    }
+                }
+            ]
+        },
+    }
+]
+
+
+class FakeShopify:
+    def __init__(self):
+        self.list_calls = []
+        self.order_calls = []
+
+    async def list_customers(self, args):
+        self.list_calls.append(args)
+        await asyncio.sleep(0)
+        ids = [term.split(":")[1] for term in args["query"].split(" OR ")]
+        return {
+            "customers": {"edges": [{"node": CUSTOMERS[i]} for i in ids if i in CUSTOMERS]}
+        }
+
+    async def find_orders(self, args):
+        self.order_calls.append(args)
+        return {"orders": {"edges": [{"node": order} for order in ORDERS]}}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def shopify():
+    return FakeShopify()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def repository(shopify, clock):
+    repository = CustomerRepository(
+        CustomerRepositorySettings(max_customers=3, ttl_secs=60), clock=clock
+    )
+    repository.bind(shopify.list_customers, shopify.find_orders)
+    return repository
+
+
+@pytest.mark.asyncio
+async def test_get_builds_profile_from_shopify(repository):
+    customer = await repository.get("gid://shopify/Customer/7730071404758")
+
+    assert customer.customer_id == "7730071404758"
+    assert customer.account_number == "GK7730071404758"
+    assert customer.billing_address.city == "Noida"
+    assert customer.loyalty_points == 270
+    assert customer.communication_preferences.email is True
+    assert customer.purchase_history[0].date == "2025-03-27"
+    assert customer.purchase_history[0].items[0].product_id == "9"
+    assert json.loads(repository.get_cached_json("7730071404758"))["email"] == (
+        "gauri@example.com"
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_gets_share_one_load(repository, shopify):
+    first, second = await asyncio.gather(repository.get("42"), repository.get("42"))
+
+    assert first is second
+    assert len(shopify.list_calls) == 1
+    assert len(shopify.order_calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_ttl_expiry_and_lru_eviction(repository, shopify, clock):
+    await repository.get("42")
+    clock.now = 61
+    assert repository.get_cached("42") is None
+    await repository.get("42")
+    assert len(shopify.list_calls) == 2
+
+    await repository.get("7730071404758")
+    await repository.get("404")
+    await repository.get("405")
+    assert repository.get_cached("42") is None
+    assert repository.stats()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_preload_batches_customer_lookups(repository, shopify):
+    loaded = await repository.preload(["42", "7730071404758", "404"])
+
+    assert loaded == 2
+    assert len(shopify.list_calls) == 1
+    assert shopify.list_calls[0]["query"] == "id:42 OR id:7730071404758 OR id:404"
+    assert await repository.get("404") is None
+    assert len(shopify.list_calls) == 1
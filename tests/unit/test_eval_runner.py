@@ -0,0 +1,80 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import pytest
+
+from eval.parallel_runner import aggregate, merge, plan_samples, rouge_1, score_turns
+
+
+def test_samples_are_interleaved_and_sharded():
+    samples = plan_samples(["a", "b"], num_runs=3)
+    assert [(s.case, s.run) for s in samples[:3]] == [("a", 0), ("b", 0), ("a", 1)]
+
+    shards = [plan_samples(["a", "b"], 3, shard, 2) for shard in range(2)]
+    assert sorted(shards[0] + shards[1]) == sorted(samples)
+
+
+def test_scores_match_agent_evaluator_metrics():
+    turns = [
+        {
+            "expected_tool_use": [
+                {"tool_name": "findOrders", "tool_input": {}, "mock_tool_output": 1}
+            ],
+            "actual_tool_use": [{"tool_name": "findOrders", "tool_input": {}}],
+            "response": "Your order shipped",
+            "reference": "Your order has shipped",
+        },
+        {
+            "expected_tool_use": [],
+            "actual_tool_use": [{"tool_name": "findOrders", "tool_input": {}}],
+            "response": None,
+            "reference": "Hi",
+        },
+    ]
+    criteria = {"tool_trajectory_avg_score": 0.5, "response_match_score": 0.2}
+
+    scores = score_turns(turns, criteria)
+
+    assert scores["tool_trajectory_avg_score"] == 0.5
+    assert scores["response_match_score"] == pytest.approx(
+        rouge_1("Your order shipped", "Your order has shipped") / 2
+    )
+
+
+def test_shard_reports_merge_into_case_statistics(tmp_path):
+    case = tmp_path / "case.test.json"
+    case.write_text("[]")
+    (tmp_path / "test_config.json").write_text(
+        json.dumps({"criteria": {"tool_trajectory_avg_score": 0.6}})
+    )
+    scores = [1.0, 0.5, 0.0, 1.0]
+    samples = [
+        {"case": str(case), "run": run, "scores": {"tool_trajectory_avg_score": s}}
+        for run, s in enumerate(scores)
+    ]
+    shards = [
+        {"commit": "abc", "config": {}, "elapsed_secs": 1.0, "samples": half}
+        for half in (samples[:2], samples[2:])
+    ]
+
+    report = merge(shards)
+
+    stats = report["cases"][str(case)]["metrics"]["tool_trajectory_avg_score"]
+    assert stats["n"] == 4
+    assert stats["mean"] == 0.625
+    assert stats["variance"] == pytest.approx(0.229167)
+    assert stats["passed"]
+    assert report == {**report, **aggregate(samples)}
@@ -0,0 +1,105 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+from google.genai import types
+
+from customer_service.config import HistoryCompactionSettings
+from customer_service.shared_libraries.history_compactor import HistoryCompactor
+
+
+def products(count):
+    return {
+        "products": [
+            {
+                "id": f"gid://shopify/Product/{i}",
+                "title": f"Sculpt Bodysuit {i}",
+                "description": "Seamless, breathable shapewear. " * 10,
+            }
+            for i in range(count)
+        ]
+    }
+
+
+def turn(question, tool_result=None):
+    contents = [types.Content(role="user", parts=[types.Part(text=question)])]
+    if tool_result is not None:
+        call = types.FunctionCall(id="c1", name="findProducts", args={"query": "x"})
+        response = types.FunctionResponse(
+            id="c1", name="findProducts", response=tool_result
+        )
+        contents.append(
+            types.Content(role="model", parts=[types.Part(function_call=call)])
+        )
+        contents.append(
+            types.Content(role="user", parts=[types.Part(function_response=response)])
+        )
+    contents.append(
+        types.Content(role="model", parts=[types.Part(text="Here you go.")])
+    )
+    return contents
+
+
+def test_old_tool_results_are_summarized():
+    compactor = HistoryCompactor(HistoryCompactionSettings(keep_turns=1))
+    history = turn("show bodysuits", products(3)) + turn("any in black?", products(2))
+
+    result = compactor.compact(history)
+
+    old_response = result.contents[2].parts[0].function_response
+    assert old_response.id == "c1"
+    summary = old_response.response["result"]
+    assert "findProducts" in summary and "Sculpt Bodysuit 0" in summary
+    assert result.contents[1].parts[0].function_call.name == "findProducts"
+    assert result.contents[6].parts[0].function_response.response == products(2)
+    assert history[2].parts[0].function_response.response == products(3)
+    assert result.tokens_saved > 0
+    assert compactor.stats()["compacted"] == 1
+
+
+def test_other_agents_results_quoted_as_text_are_summarized():
+    compactor = HistoryCompactor(HistoryCompactionSettings(keep_turns=1))
+    quoted = (
+        "[product_agent] `findProducts` tool returned result: "
+        + json.dumps(products(3))
+    )
+    history = [
+        types.Content(role="user", parts=[types.Part(text="show bodysuits")]),
+        types.Content(
+            role="user",
+            parts=[types.Part(text="For context:"), types.Part(text=quoted)],
+        ),
+        *turn("what's the return policy?"),
+    ]
+
+    result = compactor.compact(history)
+
+    text = result.contents[1].parts[1].text
+    assert text.startswith("[product_agent] `findProducts` tool returned result: [")
+    assert "Sculpt Bodysuit 2" in text
+
+
+def test_budget_drops_oldest_turns_but_keeps_current():
+    compactor = HistoryCompactor(
+        HistoryCompactionSettings(keep_turns=3, max_tokens=600, max_result_chars=0)
+    )
+    history = [c for i in range(6) for c in turn(f"question {i}", products(5))]
+
+    result = compactor.compact(history)
+
+    assert result.tokens_after <= 600
+    assert result.turns_dropped > 0
+    assert result.contents[0].parts[0].text.startswith("question ")
+    assert result.contents[-2].parts[0].function_response.response == products(5)
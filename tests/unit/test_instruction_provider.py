@@ -0,0 +1,67 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from types import SimpleNamespace
+
+import pytest
+
+from customer_service.entities.customer import Customer
+from customer_service.shared_libraries.customer_repository import (
+    customer_repository,
+)
+from customer_service.shared_libraries.instruction_provider import (
+    GlobalInstructionProvider,
+)
+
+PREFIX = "\nThe profile of the current customer is:  "
+
+
+@pytest.fixture
+def provider():
+    customer_repository.put(Customer.get_customer("7730071404758"))
+    customer_repository.put(Customer.get_customer("42"))
+    yield GlobalInstructionProvider(PREFIX)
+    customer_repository.invalidate("7730071404758")
+    customer_repository.invalidate("42")
+
+
+def context(**state):
+    return SimpleNamespace(state=state)
+
+
+def test_renders_each_sessions_customer(provider):
+    gauri = provider(context(customer_id="7730071404758"))
+    alex = provider(context(customer_id="42"))
+
+    assert gauri.startswith(PREFIX) and alex.startswith(PREFIX)
+    assert '"name":"Gauri Khanna"' in gauri
+    assert '"name":"Alex Johnson"' in alex
+
+
+def test_cached_per_customer_version(provider):
+    first = provider(context(customer_id="42"))
+    assert provider(context(customer_id="42")) is first
+
+    updated = Customer.get_customer("42")
+    updated.loyalty_points = 999
+    customer_repository.put(updated)
+    assert '"loyalty_points":999' in provider(context(customer_id="42"))
+    assert provider.stats() == {"size": 2, "hits": 1, "misses": 2}
+
+
+def test_uses_session_profile_while_loading(provider):
+    instruction = provider(
+        context(customer_id="404", customer_profile='{"name":"Old"}')
+    )
+    assert instruction == PREFIX + '{"name":"Old"}\n'
@@ -0,0 +1,113 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from types import SimpleNamespace
+
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+from customer_service.config import IntentRouterSettings
+from customer_service.shared_libraries import callbacks
+from customer_service.shared_libraries.intent_router import (
+    GENERAL,
+    ORDER,
+    PRODUCT,
+    IntentRouter,
+    Route,
+)
+
+AGENTS = {ORDER, PRODUCT}
+
+
+def context(message, invocation_id):
+    agent = SimpleNamespace(
+        name="shopify_agent",
+        sub_agents=[SimpleNamespace(name=ORDER), SimpleNamespace(name=PRODUCT)],
+    )
+    invocation = SimpleNamespace(
+        invocation_id=invocation_id,
+        user_content=types.Content(role="user", parts=[types.Part(text=message)]),
+        session=SimpleNamespace(id="session-1", events=[]),
+        agent=agent,
+    )
+    return SimpleNamespace(
+        agent_name=agent.name,
+        invocation_id=invocation_id,
+        state={},
+        _invocation_context=invocation,
+    )
+
+
+def request(message):
+    llm_request = LlmRequest(
+        contents=[types.Content(role="user", parts=[types.Part(text=message)])]
+    )
+    llm_request.tools_dict["transfer_to_agent"] = None
+    return llm_request
+
+
+def test_rules_and_classifier_route_confident_messages():
+    router = IntentRouter(IntentRouterSettings(audit_rate=0))
+
+    assert router.classify("Where is my order #1042?") == Route(ORDER, 1.0, "rule")
+    assert router.classify("Can you recommend a bodysuit?").intent == PRODUCT
+    # Rules of both intents match, so the classifier decides
+    assert router.classify("do you have order tracking").source == "classifier"
+    assert router.classify("What is your return policy?").intent == GENERAL
+
+    assert router.dispatch(router.classify("track my parcel"), AGENTS)
+    assert not router.dispatch(router.classify("track my parcel"), {PRODUCT})
+    assert not router.dispatch(Route(PRODUCT, 0.5, "classifier"), AGENTS)
+    assert not router.dispatch(router.classify("Hello there"), AGENTS)
+    assert router.stats()["dispatched"] == 1
+    assert router.stats()["deferred"] == 3
+
+
+def test_audited_predictions_are_compared_with_the_model():
+    router = IntentRouter(IntentRouterSettings(audit_rate=0.5), sample=lambda: 0.1)
+    route = router.classify("Where is my order?")
+
+    assert not router.dispatch(route, AGENTS)
+    assert router.record(route, ORDER)
+    assert not router.record(Route(PRODUCT, 0.6, "classifier"), GENERAL)
+    assert router.stats() == {
+        "dispatched": 0,
+        "deferred": 1,
+        "audited": 1,
+        "compared": 2,
+        "agreed": 1,
+        "accuracy": 0.5,
+    }
+
+
+def test_route_intent_transfers_or_defers_to_the_model(monkeypatch):
+    router = IntentRouter(IntentRouterSettings(audit_rate=0))
+    monkeypatch.setattr(callbacks, "intent_router", router)
+
+    message = "Has order #1579 shipped?"
+    response = callbacks.route_intent(context(message, "inv-1"), request(message))
+
+    call = response.content.parts[0].function_call
+    assert call.name == "transfer_to_agent"
+    assert call.args == {"agent_name": ORDER}
+
+    message = "What is your return policy?"
+    deferred = context(message, "inv-2")
+    assert callbacks.route_intent(deferred, request(message)) is None
+    answer = LlmResponse(
+        content=types.Content(role="model", parts=[types.Part(text="30 days.")])
+    )
+    callbacks.record_delegation(deferred, answer)
+    assert router.stats()["compared"] == 1
+    assert router.accuracy() == 1.0
@@ -0,0 +1,99 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+from google.adk.models import LlmRequest
+from google.genai import types
+
+from customer_service.shared_libraries.mcp_results import decode_tool_result
+from loadtest.fixtures import FakeStore
+from loadtest.harness import percentile
+from loadtest.scripted_llm import ScriptedLlm
+from loadtest.stub_mcp import LatencyModel, StubMCPTool
+
+
+def request(*contents, customer_id="1000001"):
+    return LlmRequest(
+        contents=list(contents),
+        config=types.GenerateContentConfig(
+            system_instruction=f'profile {{"customer_id":"{customer_id}"}}'
+        ),
+    )
+
+
+def user(text):
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+def tool_response(name, payload):
+    part = types.Part(
+        function_response=types.FunctionResponse(name=name, response=payload)
+    )
+    return types.Content(role="user", parts=[part])
+
+
+def test_percentile_uses_nearest_rank():
+    samples = [float(i) for i in range(1, 101)]
+    assert percentile(samples, 50) == 50.0
+    assert percentile(samples, 99) == 99.0
+    assert percentile([], 95) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_stub_tool_answers_from_store():
+    store = FakeStore(product_count=10, customer_count=3, orders_per_customer=2)
+    tool = StubMCPTool("findOrders", store, LatencyModel(0))
+    customer_id = store.customer_ids()[0]
+
+    result = await tool.run_async(
+        args={"first": 10, "query": f"customer_id:{customer_id}"},
+        tool_context=None,
+    )
+
+    orders = decode_tool_result(result)["orders"]["edges"]
+    assert len(orders) == 2
+    assert tool.calls == 1
+
+
+def test_scripted_order_flow():
+    store = FakeStore(product_count=10, customer_count=3, orders_per_customer=2)
+    customer_id = store.customer_ids()[0]
+    root = ScriptedLlm(agent_name="shopify_agent")
+    orders = ScriptedLlm(agent_name="order_agent")
+    question = user("Where is my order?")
+
+    transfer = root.respond(request(question)).parts[0].function_call
+    assert transfer.name == "transfer_to_agent"
+    assert transfer.args == {"agent_name": "order_agent"}
+
+    find = orders.respond(request(question, customer_id=customer_id))
+    call = find.parts[0].function_call
+    assert call.name == "findOrders"
+    found = store.call(call.name, call.args)
+
+    lookup = orders.respond(
+        request(question, tool_response("findOrders", found), customer_id=customer_id)
+    ).parts[0].function_call
+    assert lookup.name == "getOrderById"
+    order = store.call(lookup.name, lookup.args)
+
+    answer = orders.respond(
+        request(
+            question,
+            tool_response("findOrders", found),
+            tool_response("getOrderById", order),
+            customer_id=customer_id,
+        )
+    )
+    assert order["order"]["name"] in answer.parts[0].text
@@ -0,0 +1,132 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+
+import anyio
+import pytest
+from mcp import StdioServerParameters
+
+from customer_service.config import MCPPoolSettings
+from customer_service.shared_libraries.mcp_pool import (
+    MCPConnectionPool,
+    _PoolMember,
+)
+
+
+class FakeSession:
+    def __init__(self, delay=0.0, broken=False, ping_error=None):
+        self.delay = delay
+        self.broken = broken
+        self.ping_error = ping_error
+        self.calls = []
+
+    async def call_tool(self, name, arguments=None):
+        if self.broken:
+            raise anyio.ClosedResourceError()
+        self.calls.append((name, arguments))
+        await asyncio.sleep(self.delay)
+        return {"tool": name}
+
+    async def send_ping(self):
+        if self.ping_error is not None:
+            raise self.ping_error
+        if self.broken:
+            raise anyio.ClosedResourceError()
+
+
+def make_member(session):
+    member = _PoolMember()
+    member.session = session
+    member.alive = True
+    return member
+
+
+@pytest.fixture
+def pool():
+    return MCPConnectionPool(
+        connection_params=StdioServerParameters(command="true"),
+        settings=MCPPoolSettings(pool_size=2, warm_spares=1),
+    )
+
+
+@pytest.mark.asyncio
+async def test_dispatches_to_least_outstanding_member(pool):
+    slow, fast = FakeSession(delay=0.05), FakeSession()
+    pool._active = [make_member(slow), make_member(fast)]
+
+    first = asyncio.create_task(pool.call_tool("findOrders", {}))
+    await asyncio.sleep(0)
+    await pool.call_tool("findProducts", {})
+    await first
+
+    assert slow.calls == [("findOrders", {})]
+    assert fast.calls == [("findProducts", {})]
+
+
+@pytest.mark.asyncio
+async def test_dead_member_is_replaced_by_spare(pool):
+    spare = FakeSession()
+    pool._active = [make_member(FakeSession(broken=True))]
+    pool._spares = [make_member(spare)]
+    pool.settings.pool_size = 1
+    pool.settings.warm_spares = 0
+
+    result = await pool.call_tool("getOrderById", {"orderId": "1"})
+
+    assert result == {"tool": "getOrderById"}
+    assert spare.calls == [("getOrderById", {"orderId": "1"})]
+    assert pool.stats()["replacements"] == 1
+
+
+@pytest.mark.asyncio
+async def test_call_timeout_comes_from_settings(pool):
+    pool.settings.call_timeout_secs = 0.01
+    pool._active = [make_member(FakeSession(delay=1))]
+
+    with pytest.raises(asyncio.TimeoutError):
+        await pool.call_tool("findOrders", {})
+
+
+@pytest.mark.asyncio
+async def test_unexpected_ping_errors_evict_the_member(pool, monkeypatch):
+    async def start_member():
+        return make_member(FakeSession())
+
+    monkeypatch.setattr(pool, "_start_member", start_member)
+    healthy = make_member(FakeSession())
+    failing = make_member(FakeSession(ping_error=RuntimeError("protocol error")))
+    pool._active = [healthy, failing]
+    pool.settings.pool_size = 2
+    pool.settings.warm_spares = 0
+
+    await pool._check_health()
+
+    assert pool._active == [healthy]
+    assert pool.stats()["replacements"] == 1
+    await asyncio.gather(*pool._tasks, return_exceptions=True)
+    assert not pool._tasks
+    assert len(pool._active) == 2
+
+
+@pytest.mark.asyncio
+async def test_members_that_never_initialize_are_stopped():
+    pool = MCPConnectionPool(
+        connection_params=StdioServerParameters(command="sleep", args=["30"]),
+        settings=MCPPoolSettings(pool_size=1, warm_spares=0, start_timeout_secs=0.2),
+    )
+
+    started = await asyncio.wait_for(pool._start_member(), timeout=5)
+
+    assert started is None
@@ -0,0 +1,87 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import sys
+
+import pytest
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from customer_service.agent import shopify_server_parameters
+from customer_service.config import MCPServerSettings
+from loadtest.fixtures import FakeStore
+from loadtest.mcp_server import (
+    TOOLS,
+    FaultInjector,
+    ThrottleBucket,
+    ThrottledError,
+    build_server,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_throttle_bucket_leaks_back():
+    clock = FakeClock()
+    bucket = ThrottleBucket(capacity=100, restore_rate=10, clock=clock)
+    bucket.acquire(60)
+    with pytest.raises(ThrottledError) as excinfo:
+        bucket.acquire(60)
+    assert json.loads(str(excinfo.value))["errors"][0]["extensions"] == {
+        "code": "THROTTLED"
+    }
+
+    clock.now = 2.0
+    bucket.acquire(60)
+    assert bucket.throttled == 1
+
+
+@pytest.mark.asyncio
+async def test_server_serves_store_and_injects_errors():
+    store = FakeStore(product_count=100, customer_count=10, orders_per_customer=3)
+    customer_id = store.customer_ids()[2]
+
+    server = build_server(store)
+    async with create_connected_server_and_client_session(server) as session:
+        listed = await session.list_tools()
+        assert {tool.name for tool in listed.tools} == set(TOOLS)
+        result = await session.call_tool(
+            "findOrders", {"first": 5, "query": f"customer_id:{customer_id}"}
+        )
+    assert not result.isError
+    assert len(json.loads(result.content[0].text)["orders"]["edges"]) == 3
+
+    failing = build_server(store, FaultInjector(error_rate=1.0))
+    async with create_connected_server_and_client_session(failing) as session:
+        result = await session.call_tool("getShopDetails", {})
+    assert result.isError
+    assert "INTERNAL_SERVER_ERROR" in result.content[0].text
+
+
+def test_stub_backend_needs_no_token(monkeypatch):
+    monkeypatch.delenv("SHOPIFY_ACCESS_TOKEN", raising=False)
+    settings = MCPServerSettings(backend="stub", stub_args=["--products", "10"])
+
+    params = shopify_server_parameters(settings)
+
+    assert params.command == sys.executable
+    assert params.args == ["-m", "loadtest.mcp_server", "--products", "10"]
+    with pytest.raises(ValueError):
+        shopify_server_parameters(MCPServerSettings(backend="shopify"))
@@ -0,0 +1,120 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import urllib.request
+from types import SimpleNamespace
+
+import pytest
+from google.adk.tools import BaseTool
+from mcp.types import CallToolResult, TextContent
+
+from customer_service.config import MetricsSettings
+from customer_service.shared_libraries.metrics import (
+    CALLBACK_SECONDS,
+    TOOL_ERRORS,
+    TOOL_SECONDS,
+    MeteredTool,
+    MetricsRegistry,
+    timed_callback,
+)
+
+
+class FlakyTool(BaseTool):
+    def __init__(self):
+        super().__init__(name="getOrderById", description="Get an order")
+
+    async def run_async(self, *, args, tool_context):
+        if args.get("fail"):
+            return CallToolResult(
+                content=[TextContent(type="text", text="THROTTLED")], isError=True
+            )
+        return {"order": args["orderId"]}
+
+
+def test_render_prometheus_text():
+    registry = MetricsRegistry(MetricsSettings())
+    latency = registry.histogram(
+        "agent_model_call_seconds", "Model call latency", ["agent"], buckets=[0.1, 1]
+    )
+    errors = registry.counter("agent_model_errors_total", "Failed calls", ["agent"])
+    latency.observe(0.05, agent="order_agent")
+    latency.observe(0.5, agent="order_agent")
+    errors.inc(agent='say "hi"')
+    registry.register_cache("response", lambda: (3, 1))
+
+    text = registry.render()
+
+    assert "# TYPE agent_model_call_seconds histogram" in text
+    assert 'agent_model_call_seconds_bucket{agent="order_agent",le="0.1"} 1' in text
+    assert 'agent_model_call_seconds_bucket{agent="order_agent",le="+Inf"} 2' in text
+    assert 'agent_model_call_seconds_count{agent="order_agent"} 2' in text
+    assert 'agent_model_errors_total{agent="say \\"hi\\""} 1' in text
+    assert 'agent_cache_hit_ratio{cache="response"} 0.7500' in text
+    with pytest.raises(ValueError):
+        latency.observe(1.0, tool="findOrders")
+
+
+@pytest.mark.asyncio
+async def test_metered_tool_labels_agent_and_counts_errors():
+    tool = MeteredTool(FlakyTool())
+    context = SimpleNamespace(agent_name="order_agent")
+    labels = {"agent": "order_agent", "tool": "getOrderById"}
+    calls_before = TOOL_SECONDS.count(**labels)
+    errors_before = TOOL_ERRORS.value(**labels)
+
+    assert await tool.run_async(args={"orderId": "1"}, tool_context=context) == {
+        "order": "1"
+    }
+    result = await tool.run_async(args={"fail": True}, tool_context=context)
+
+    assert result.isError
+    assert TOOL_SECONDS.count(**labels) == calls_before + 2
+    assert TOOL_ERRORS.value(**labels) == errors_before + 1
+
+
+def test_http_endpoint_and_file_dump(tmp_path):
+    dump_path = tmp_path / "metrics-{pid}.prom"
+    registry = MetricsRegistry(
+        MetricsSettings(port=0, dump_path=str(dump_path), dump_interval_secs=60)
+    )
+    registry.counter("agent_turns_total", "Turns", []).inc()
+    registry.start()
+    try:
+        port = registry.server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert "agent_turns_total 1" in response.read().decode()
+    finally:
+        registry.stop()
+
+    (dumped,) = tmp_path.glob("metrics-*.prom")
+    assert "agent_turns_total 1" in dumped.read_text()
+
+
+def test_chained_callbacks_are_timed_once():
+    @timed_callback
+    def inner_callback(callback_context):
+        return "inner"
+
+    @timed_callback
+    def outer_callback(callback_context):
+        return inner_callback(callback_context)
+
+    context = SimpleNamespace(agent_name="metrics_test_agent")
+    assert outer_callback(context) == "inner"
+    assert inner_callback(context) == "inner"
+
+    agent = "metrics_test_agent"
+    assert CALLBACK_SECONDS.count(agent=agent, callback="outer_callback") == 1
+    assert CALLBACK_SECONDS.count(agent=agent, callback="inner_callback") == 1
@@ -0,0 +1,98 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from customer_service.config import OrderIndexSettings
+from customer_service.shared_libraries.order_index import (
+    OrderIndex,
+    normalize_order_number,
+)
+
+PAGES = {
+    None: (
+        [{"id": "gid://shopify/Order/2", "name": "#1579"}],
+        "cursor-1",
+    ),
+    "cursor-1": (
+        [{"id": "gid://shopify/Order/1", "name": "#1576"}],
+        None,
+    ),
+}
+
+
+class FakeShopify:
+    def __init__(self):
+        self.find_calls = []
+
+    async def find_orders(self, args):
+        self.find_calls.append(args)
+        orders, cursor = PAGES[args.get("after")]
+        return {
+            "orders": {"edges": [{"node": order} for order in orders]},
+            "pageInfo": {"hasNextPage": cursor is not None, "endCursor": cursor},
+        }
+
+    async def get_order(self, args):
+        return {"order": {"id": args["orderId"]}}
+
+
+@pytest.fixture
+def shopify():
+    return FakeShopify()
+
+
+@pytest.fixture
+def index(shopify):
+    index = OrderIndex(OrderIndexSettings(page_size=1))
+    index.bind(shopify.find_orders, shopify.get_order)
+    return index
+
+
+def test_normalize_order_number():
+    assert normalize_order_number("#1579") == "1579"
+    assert normalize_order_number("Order 1579") == "1579"
+    assert normalize_order_number(1579) == "1579"
+
+
+@pytest.mark.asyncio
+async def test_resolve_pages_only_until_found(index, shopify):
+    summary = await index.resolve("42", "1579")
+
+    assert summary["id"] == "gid://shopify/Order/2"
+    assert len(shopify.find_calls) == 1
+    assert shopify.find_calls[0]["query"] == "customer_id:42"
+
+
+@pytest.mark.asyncio
+async def test_resolve_beyond_first_page_then_from_memory(index, shopify):
+    assert (await index.resolve("42", "#1576"))["id"] == "gid://shopify/Order/1"
+    assert (await index.resolve("42", "1579"))["id"] == "gid://shopify/Order/2"
+    assert len(shopify.find_calls) == 2
+    assert index.known_orders("42") == ["#1579", "#1576"]
+
+
+@pytest.mark.asyncio
+async def test_unknown_order_returns_none(index):
+    assert await index.resolve("42", "9999") is None
+
+
+@pytest.mark.asyncio
+async def test_recent_reads_first_page_once_then_resolves_older(index, shopify):
+    recent = await index.recent("42", 3)
+
+    assert [summary["name"] for summary in recent] == ["#1579"]
+    assert await index.recent("42", 3) == recent
+    assert (await index.resolve("42", "1576"))["id"] == "gid://shopify/Order/1"
+    assert [call.get("after") for call in shopify.find_calls] == [None, "cursor-1"]
@@ -0,0 +1,145 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from customer_service.config import OrderIndexSettings
+from customer_service.shared_libraries.order_index import OrderIndex
+from customer_service.shared_libraries.order_status import format_order_status
+from customer_service.tools import tools
+from loadtest.fixtures import FakeStore
+
+ORDER = {
+    "id": "gid://shopify/Order/5865972728022",
+    "name": "#1579",
+    "processedAt": "2025-03-12T10:00:00Z",
+    "displayFinancialStatus": "PAID",
+    "displayFulfillmentStatus": "FULFILLED",
+    "totalPriceSet": {"shopMoney": {"amount": "1998.0", "currencyCode": "INR"}},
+    "lineItems": {
+        "edges": [
+            {"node": {"name": "Sculpt Bodysuit (M / Black)", "quantity": 1}},
+            {"node": {"name": "Thigh Shaper (L)", "quantity": 2}},
+        ]
+    },
+    "fulfillments": [
+        {
+            "displayStatus": "IN_TRANSIT",
+            "estimatedDeliveryAt": "2025-03-15T18:00:00Z",
+            "trackingInfo": [
+                {"company": "Delhivery", "number": "DL1579", "url": "https://t/1"}
+            ],
+        }
+    ],
+}
+
+
+class FakeOrders:
+    """Serves FakeStore orders, counting getOrderById calls in flight."""
+
+    def __init__(self, store):
+        self.store = store
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def find_orders(self, args):
+        return self.store.call("findOrders", args)
+
+    async def get_order(self, args):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0)
+        self.in_flight -= 1
+        return self.store.call("getOrderById", args)
+
+
+def test_format_order_status():
+    assert format_order_status(ORDER, max_items=1) == (
+        "**Order #1579** placed 12 Mar 2025 (INR 1,998.00, paid)\n"
+        "Status: In transit\n"
+        "Items: Sculpt Bodysuit (M / Black) x1; +1 more\n"
+        "Tracking: Delhivery DL1579 https://t/1\n"
+        "Expected delivery: 15 Mar 2025"
+    )
+    cancelled = dict(ORDER, cancelledAt="2025-03-13T09:00:00Z")
+    assert "Status: Cancelled on 13 Mar 2025" in format_order_status(cancelled, 5)
+    assert "Expected delivery" not in format_order_status(cancelled, 5)
+
+
+@pytest.mark.asyncio
+async def test_get_order_status_covers_latest_and_open_orders(monkeypatch):
+    store = FakeStore(product_count=20, customer_count=3, orders_per_customer=4)
+    customer_id = store.customer_ids()[1]
+    orders = store.customer_orders(1)
+    # The two newest orders are still on their way
+    for order in orders[-2:]:
+        order.update(displayFulfillmentStatus="UNFULFILLED", fulfillments=[])
+    monkeypatch.setattr(store, "order", lambda n: orders[n - 4] if 4 <= n < 8 else None)
+    shopify = FakeOrders(store)
+    index = OrderIndex(OrderIndexSettings())
+    index.bind(shopify.find_orders, shopify.get_order)
+    monkeypatch.setattr(tools, "order_index", index)
+    context = SimpleNamespace(state={"customer_id": customer_id})
+
+    result = await tools.get_order_status("", context)
+
+    assert result["status"] == "success"
+    assert [o["order_name"] for o in result["orders"]] == [
+        orders[3]["name"],
+        orders[2]["name"],
+    ]
+    assert result["status_block"].count("Status: Being prepared") == 2
+    assert shopify.max_in_flight == 2
+
+    named = await tools.get_order_status(orders[0]["name"], context)
+    assert [o["order_name"] for o in named["orders"]] == [orders[0]["name"]]
+    assert "Tracking: Delhivery" in named["status_block"]
+    missing = await tools.get_order_status("#1", context)
+    assert missing["status"] == "not_found"
+
+
+@pytest.mark.asyncio
+async def test_lookup_order_reports_mcp_failures(monkeypatch):
+    async def timed_out(args):
+        raise asyncio.TimeoutError()
+
+    index = OrderIndex(OrderIndexSettings())
+    index.bind(timed_out, timed_out)
+    monkeypatch.setattr(tools, "order_index", index)
+    context = SimpleNamespace(state={"customer_id": "123"})
+
+    result = await tools.lookup_order("#1579", context)
+
+    assert result["status"] == "unavailable"
+
+
+@pytest.mark.asyncio
+async def test_get_order_status_reports_mcp_failures(monkeypatch):
+    async def timed_out(args):
+        raise asyncio.TimeoutError()
+
+    index = OrderIndex(OrderIndexSettings())
+    index.bind(timed_out, timed_out)
+    monkeypatch.setattr(tools, "order_index", index)
+    context = SimpleNamespace(state={"customer_id": "123"})
+
+    latest = await tools.get_order_status("", context)
+    named = await tools.get_order_status("#1579", context)
+
+    assert latest["status"] == "unavailable"
+    assert named["status"] == "unavailable"
+    assert "findOrders" in named["message"]
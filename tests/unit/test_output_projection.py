@@ -0,0 +1,139 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import pytest
+from google.adk.tools import BaseTool
+from mcp.types import CallToolResult, TextContent
+
+from customer_service.config import OutputProjectionSettings
+from customer_service.shared_libraries.output_projection import (
+    OutputProjector,
+    ProjectedTool,
+    wrap_with_projection,
+)
+from loadtest.fixtures import FakeStore
+
+
+def as_result(payload):
+    text = json.dumps(payload)
+    return CallToolResult(content=[TextContent(type="text", text=text)])
+
+
+class StoreTool(BaseTool):
+    def __init__(self, store, name):
+        super().__init__(name=name, description=name)
+        self.store = store
+
+    async def run_async(self, *, args, tool_context):
+        return as_result(self.store.call(self.name, args))
+
+
+def test_products_are_projected_and_lists_truncated():
+    projector = OutputProjector(
+        OutputProjectionSettings(max_list_items=2, max_text_chars=20)
+    )
+    variant = {"price": "999.00", "availableForSale": True, "metafields": {}}
+    payload = {
+        "data": {
+            "products": {
+                "edges": [
+                    {
+                        "cursor": "abc",
+                        "node": {
+                            "id": "gid://shopify/Product/1",
+                            "title": "Sculpt Bodysuit",
+                            "description": "Seamless, breathable all-day shapewear",
+                            "images": {"edges": [{"node": {"url": "https://x"}}]},
+                            "variants": {
+                                "edges": [
+                                    {"node": dict(variant, id=f"v{i}")}
+                                    for i in range(5)
+                                ]
+                            },
+                        },
+                    }
+                ],
+                "pageInfo": {"hasNextPage": False, "endCursor": "abc"},
+            }
+        }
+    }
+
+    projected = projector.project("findProducts", payload)
+
+    assert projected == {
+        "products": [
+            {
+                "id": "gid://shopify/Product/1",
+                "title": "Sculpt Bodysuit",
+                "description": "Seamless, breathable…",
+                "variantsTotal": 5,
+                "variants": [
+                    {"id": "v0", "price": "999.00", "availableForSale": True},
+                    {"id": "v1", "price": "999.00", "availableForSale": True},
+                ],
+            }
+        ]
+    }
+    assert projector.project("createDraftOrder", payload) is payload
+
+
+@pytest.mark.asyncio
+async def test_projected_tool_shrinks_order_results():
+    store = FakeStore(product_count=20, customer_count=2, orders_per_customer=3)
+    projector = OutputProjector(OutputProjectionSettings())
+    tool = wrap_with_projection(StoreTool(store, "findOrders"), projector)
+    assert isinstance(tool, ProjectedTool)
+    args = {"first": 5, "query": f"customer_id:{store.customer_ids()[0]}"}
+
+    result = await tool.run_async(args=args, tool_context=None)
+
+    orders = json.loads(result.content[0].text)["orders"]
+    assert len(orders) == 3
+    assert set(orders[0]) == {
+        "id",
+        "name",
+        "createdAt",
+        "displayFinancialStatus",
+        "displayFulfillmentStatus",
+        "totalPriceSet",
+        "lineItems",
+        "fulfillments",
+    }
+    assert orders[0]["fulfillments"][0]["trackingInfo"][0]["company"]
+    assert projector.chars_after < projector.chars_before
+    draft = StoreTool(store, "createDraftOrder")
+    assert wrap_with_projection(draft, projector) is draft
+
+
+@pytest.mark.asyncio
+async def test_projected_pages_keep_the_end_cursor():
+    store = FakeStore(product_count=20, customer_count=2, orders_per_customer=3)
+    projector = OutputProjector(OutputProjectionSettings())
+    tool = wrap_with_projection(StoreTool(store, "findOrders"), projector)
+    args = {"first": 2, "query": f"customer_id:{store.customer_ids()[0]}"}
+
+    result = await tool.run_async(args=args, tool_context=None)
+    first_page = json.loads(result.content[0].text)
+    assert len(first_page["orders"]) == 2
+    assert first_page["pageInfo"]["hasNextPage"] is True
+    cursor = first_page["pageInfo"]["endCursor"]
+    assert cursor
+
+    args["after"] = cursor
+    result = await tool.run_async(args=args, tool_context=None)
+    last_page = json.loads(result.content[0].text)
+    assert len(last_page["orders"]) == 1
+    assert last_page["pageInfo"]["hasNextPage"] is False
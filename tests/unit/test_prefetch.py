@@ -0,0 +1,120 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from google.adk.tools import BaseTool
+
+from customer_service.config import OrderIndexSettings, PrefetchSettings
+from customer_service.shared_libraries.order_index import OrderIndex
+from customer_service.shared_libraries.prefetch import (
+    PrefetchedTool,
+    SessionPrefetcher,
+)
+from customer_service.tools import tools
+from loadtest.fixtures import FakeStore
+
+
+class FindOrders(BaseTool):
+    def __init__(self):
+        super().__init__(name="findOrders", description="Find orders")
+        self.calls = []
+
+    async def run_async(self, *, args, tool_context):
+        self.calls.append(args)
+        return {"orders": [], "call": len(self.calls)}
+
+
+def tool_context(session_id):
+    session = SimpleNamespace(id=session_id)
+    return SimpleNamespace(_invocation_context=SimpleNamespace(session=session))
+
+
+@pytest.fixture
+def find_orders():
+    return FindOrders()
+
+
+@pytest.fixture
+def prefetched(find_orders):
+    prefetcher = SessionPrefetcher(PrefetchSettings(recent_orders=10))
+    prefetcher.bind(
+        {"findOrders": lambda args: find_orders.run_async(args=args, tool_context=None)}
+    )
+    return PrefetchedTool(find_orders, prefetcher)
+
+
+@pytest.mark.asyncio
+async def test_first_matching_call_is_served_from_prefetch(prefetched, find_orders):
+    prefetcher = prefetched.prefetcher
+    assert prefetcher.start("s1", "42") == 1
+    assert prefetcher.start("s1", "42") == 0  # Once per session
+
+    # Gemini sends NUMBER arguments as floats
+    args = {"query": "customer_id:42", "first": 10.0}
+    first = await prefetched.run_async(args=args, tool_context=tool_context("s1"))
+    assert first["call"] == 1
+    assert len(find_orders.calls) == 1
+
+    # Later calls see fresh data
+    second = await prefetched.run_async(args=args, tool_context=tool_context("s1"))
+    assert second["call"] == 2
+    assert prefetcher.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_other_sessions_and_arguments_are_not_served(prefetched, find_orders):
+    prefetched.prefetcher.start("s1", "42")
+
+    await prefetched.run_async(
+        args={"query": "customer_id:42", "first": 10}, tool_context=tool_context("s2")
+    )
+    await prefetched.run_async(
+        args={"query": "customer_id:42", "first": 3}, tool_context=tool_context("s1")
+    )
+    await asyncio.sleep(0)
+    assert len(find_orders.calls) == 3
+    assert prefetched.prefetcher.stats()["misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_warmed_order_index_serves_get_order_status(monkeypatch):
+    store = FakeStore(product_count=20, customer_count=3, orders_per_customer=4)
+    customer_id = store.customer_ids()[1]
+    find_orders_calls = []
+
+    async def find_orders(args):
+        find_orders_calls.append(args)
+        return store.call("findOrders", args)
+
+    async def get_order(args):
+        return store.call("getOrderById", args)
+
+    index = OrderIndex(OrderIndexSettings())
+    index.bind(find_orders, get_order)
+    monkeypatch.setattr(tools, "order_index", index)
+    prefetcher = SessionPrefetcher(PrefetchSettings())
+    prefetcher.bind({}, warmer=lambda customer_id: index.recent(customer_id, 3))
+
+    assert prefetcher.start("s1", customer_id) == 1
+    await asyncio.sleep(0)
+    assert len(find_orders_calls) == 1
+
+    context = SimpleNamespace(state={"customer_id": customer_id})
+    result = await tools.get_order_status("", context)
+
+    assert result["status"] == "success"
+    assert len(find_orders_calls) == 1
@@ -0,0 +1,63 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import pytest
+
+from customer_service.config import ProfilePromptSettings
+from customer_service.entities.customer import Customer
+from customer_service.shared_libraries.profile_serializer import ProfileSerializer
+
+
+@pytest.fixture
+def customer():
+    return Customer.get_customer("123")
+
+
+@pytest.fixture
+def serializer():
+    return ProfileSerializer(ProfilePromptSettings(recent_purchases=2))
+
+
+def test_profile_is_minified_and_summarized(serializer, customer):
+    profile = serializer.serialize(customer)
+    data = json.loads(profile.text)
+
+    assert "\n" not in profile.text and '": ' not in profile.text
+    assert len(profile.text) < len(customer.to_json()) / 2
+    assert profile.token_estimate == -(-len(profile.text) // 4)
+    assert "garden_profile" not in data
+    assert data["name"] == "Alex Johnson"
+    assert data["communication_preferences"] == ["email", "push_notifications"]
+    history = data["purchase_history"]
+    assert history["orders"] == 3
+    assert history["spent"] == 133.73
+    assert [p["date"] for p in history["recent"]] == ["2024-01-20", "2023-07-12"]
+    assert "Terracotta Pots (6-inch) x4" in history["recent"][1]["items"]
+
+
+def test_field_projection(serializer, customer):
+    profile = serializer.serialize(customer, fields=["name", "loyalty_points"])
+    assert json.loads(profile.text) == {"name": "Alex Johnson", "loyalty_points": 133}
+
+
+def test_cached_per_version(serializer, customer):
+    first = serializer.serialize(customer, version="v1")
+    assert serializer.serialize(customer, version="v1") is first
+    customer.loyalty_points = 500
+    assert json.loads(serializer.serialize(customer, version="v2").text)[
+        "loyalty_points"
+    ] == 500
+    assert serializer.stats() == {"size": 2, "hits": 1, "misses": 2}
@@ -0,0 +1,61 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+
+import pytest
+
+from customer_service.config import RateLimitSettings
+from customer_service.shared_libraries.rate_limiter import RateLimiter
+
+
+@pytest.mark.asyncio
+async def test_requests_within_burst_do_not_wait():
+    limiter = RateLimiter(RateLimitSettings(default_rpm=3, window_secs=60))
+    waits = [await limiter.acquire("gemini", "s1") for _ in range(3)]
+    assert waits == [0.0, 0.0, 0.0]
+    assert limiter.stats()["gemini"]["acquired"] == 3
+
+
+@pytest.mark.asyncio
+async def test_quotas_are_per_model():
+    limiter = RateLimiter(
+        RateLimitSettings(default_rpm=1, window_secs=60, model_rpm={"pro": 2})
+    )
+    await limiter.acquire("flash")
+    await limiter.acquire("pro")
+    assert await limiter.acquire("pro") == 0.0
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(limiter.acquire("flash"), timeout=0.05)
+
+
+@pytest.mark.asyncio
+async def test_waiting_sessions_are_served_round_robin():
+    limiter = RateLimiter(RateLimitSettings(default_rpm=100, window_secs=1, burst=1))
+    await limiter.acquire("gemini", "busy")
+    order = []
+
+    async def request(session_id):
+        await limiter.acquire("gemini", session_id)
+        order.append(session_id)
+
+    tasks = [asyncio.create_task(request("busy")) for _ in range(3)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(request("quiet")))
+    await asyncio.gather(*tasks)
+
+    assert order.index("quiet") == 1
+    stats = limiter.stats()["gemini"]
+    assert stats["delayed"] == 4
+    assert stats["max_wait_secs"] > 0
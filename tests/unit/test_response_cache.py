@@ -0,0 +1,163 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+from types import SimpleNamespace
+
+from google.adk.events import Event
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+from customer_service.config import ResponseCacheSettings
+from customer_service.shared_libraries import callbacks
+from customer_service.shared_libraries.response_cache import (
+    ResponseCache,
+    customer_segment,
+    personal_values,
+)
+
+RETURN_POLICY = "You can return unworn items within 30 days for a full refund."
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def answer(text: str) -> types.Content:
+    return types.Content(role="model", parts=[types.Part(text=text)])
+
+
+def test_exact_and_similar_lookups_expire():
+    clock = FakeClock()
+    cache = ResponseCache(ResponseCacheSettings(ttl_secs=60), clock=clock)
+    assert cache.store(
+        "shopify_agent", "new", "What's your return policy?", answer(RETURN_POLICY)
+    )
+
+    hit = cache.lookup("shopify_agent", "new", "whats your RETURN policy")
+    assert hit.parts[0].text == RETURN_POLICY
+    assert cache.lookup("shopify_agent", "new", "What is the returns policy")
+    assert not cache.lookup("shopify_agent", "new", "Return policy for sale items?")
+    assert not cache.lookup("shopify_agent", "returning", "Return policy?")
+    assert not cache.lookup("product_agent", "new", "What's your return policy?")
+    assert cache.stats() == {
+        "entries": 1,
+        "hits": 1,
+        "similar_hits": 1,
+        "misses": 3,
+        "refused": 0,
+    }
+
+    clock.now = 61
+    assert cache.lookup("shopify_agent", "new", "What's your return policy?") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_refuses_tool_calls_and_personal_data():
+    profile = json.dumps(
+        {
+            "name": "Alex Rivera",
+            "email": "alex@example.com",
+            "purchase_history": {"orders": 2},
+        }
+    )
+    personal = personal_values(profile)
+    cache = ResponseCache(ResponseCacheSettings())
+
+    assert customer_segment(profile) == "returning"
+    greeting = answer(f"Hi Alex! {RETURN_POLICY}")
+    assert not cache.store("shopify_agent", "returning", "returns", greeting, personal)
+    shipped = answer("Order #1042 shipped today.")
+    assert not cache.store("shopify_agent", "returning", "my order", shipped)
+    call = types.Content(
+        role="model",
+        parts=[types.Part(function_call=types.FunctionCall(name="findOrders"))],
+    )
+    assert not cache.store("shopify_agent", "returning", "my orders", call)
+    assert cache.stats()["refused"] == 3
+    assert cache.stats()["entries"] == 0
+
+
+def test_invalidate_by_agent_and_question():
+    cache = ResponseCache(ResponseCacheSettings())
+    sizing = answer("Our tees run true to size.")
+    policy = answer(RETURN_POLICY)
+    cache.store("shopify_agent", "new", "what's your return policy", policy)
+    cache.store("shopify_agent", "new", "how does sizing run", sizing)
+    cache.store("product_agent", "new", "how does sizing run", sizing)
+
+    assert cache.invalidate(query="What is the return policy?") == 1
+    assert cache.invalidate(agent_name="product_agent") == 1
+    assert cache.lookup("shopify_agent", "new", "How does sizing run?")
+
+
+def test_short_questions_only_match_exactly():
+    cache = ResponseCache(ResponseCacheSettings(min_similar_terms=2))
+    cache.store("shopify_agent", "new", "yes do it", answer("Done."))
+
+    assert cache.lookup("shopify_agent", "new", "yes do it")
+    assert cache.lookup("shopify_agent", "new", "yes please") is None
+    assert cache.lookup("shopify_agent", "new", "ok yes") is None
+
+
+def message(text: str) -> types.Content:
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+def turn(text: str, invocation_id: str, session_events):
+    """A callback context for the root agent answering a customer message."""
+    session_events.append(
+        Event(invocation_id=invocation_id, author="user", content=message(text))
+    )
+    invocation = SimpleNamespace(
+        invocation_id=invocation_id,
+        user_content=message(text),
+        session=SimpleNamespace(id="session-1", events=session_events),
+        agent=SimpleNamespace(name="shopify_agent"),
+    )
+    return SimpleNamespace(
+        agent_name="shopify_agent", state={}, _invocation_context=invocation
+    )
+
+
+def test_callbacks_only_cache_a_sessions_first_turn(monkeypatch):
+    cache = ResponseCache(ResponseCacheSettings())
+    monkeypatch.setattr(callbacks, "response_cache", cache)
+    request = LlmRequest(contents=[message("What's your return policy?")])
+    policy = LlmResponse(content=answer(RETURN_POLICY))
+
+    first = turn("What's your return policy?", "inv-1", [])
+    assert callbacks.serve_cached_response(first, request) is None
+    callbacks.cache_model_response(first, policy)
+    assert cache.stats()["entries"] == 1
+
+    # Another session opening with the same question is answered from cache
+    served = callbacks.serve_cached_response(
+        turn("What is your return policy", "inv-2", []), request
+    )
+    assert served.content.parts[0].text == RETURN_POLICY
+
+    # Follow-ups depend on the conversation, so they are neither served nor
+    # stored
+    events = [Event(invocation_id="inv-0", author="user", content=message("hi"))]
+    follow_up = turn("What's your return policy?", "inv-3", events)
+    assert callbacks.serve_cached_response(follow_up, request) is None
+    callbacks.cache_model_response(
+        turn("yes do it", "inv-4", events), LlmResponse(content=answer("Done."))
+    )
+    assert cache.stats()["entries"] == 1
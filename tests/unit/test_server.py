@@ -0,0 +1,139 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import httpx
+import pytest
+from google.adk.events import Event
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from customer_service.config import ServingSettings
+from customer_service.server import create_app
+from customer_service.shared_libraries.admission import AdmissionController
+
+
+class EchoRunner:
+    """Answers every message with its own text."""
+
+    app_name = "customer_service"
+
+    def __init__(self):
+        self.session_service = InMemorySessionService()
+
+    async def run_async(self, *, user_id, session_id, new_message, run_config):
+        yield Event(
+            author="shopify_agent",
+            content=types.Content(
+                role="model",
+                parts=[types.Part(text=f"echo: {new_message.parts[0].text}")],
+            ),
+        )
+
+
+IDENTITY = {"X-Customer-Id": "8027143659734"}
+
+
+def message(text):
+    return {"role": "user", "parts": [{"text": text}]}
+
+
+@pytest.mark.asyncio
+async def test_run_sse_streams_events():
+    app = create_app(runner=EchoRunner(), settings=ServingSettings())
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://test", headers=IDENTITY
+    ) as client:
+        session = (await client.post("/users/u1/sessions", json={})).json()
+        response = await client.post(
+            "/run_sse",
+            json={
+                "user_id": "u1",
+                "session_id": session["session_id"],
+                "new_message": message("hi"),
+            },
+        )
+        missing = await client.post(
+            "/run_sse",
+            json={"user_id": "u1", "session_id": "nope", "new_message": message("hi")},
+        )
+        health = (await client.get("/healthz")).json()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    data = [line[len("data: "):] for line in response.text.splitlines() if line]
+    assert json.loads(data[0])["content"]["parts"][0]["text"] == "echo: hi"
+    assert missing.status_code == 404
+    assert health["admission"]["admitted"] == 1
+    assert health["admission"]["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_saturated_worker_answers_busy_at_once():
+    settings = ServingSettings(retry_after_secs=3)
+    admission = AdmissionController(settings, probes=[lambda: "mcp_pool"])
+    app = create_app(runner=EchoRunner(), settings=settings, admission=admission)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://test", headers=IDENTITY
+    ) as client:
+        session = (await client.post("/users/u1/sessions", json={})).json()
+        response = await client.post(
+            "/run_sse",
+            json={
+                "user_id": "u1",
+                "session_id": session["session_id"],
+                "new_message": message("hi"),
+            },
+        )
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "3"
+    assert response.json()["reason"] == "mcp_pool"
+
+
+@pytest.mark.asyncio
+async def test_sessions_belong_to_the_authenticated_customer():
+    runner = EchoRunner()
+    settings = ServingSettings(client_state_keys=["language"])
+    app = create_app(runner=runner, settings=settings)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        anonymous = await client.post("/users/u1/sessions", json={})
+        spoofed = await client.post(
+            "/users/u1/sessions",
+            json={"state": {"customer_id": "1", "language": "en"}},
+            headers=IDENTITY,
+        )
+        created = await client.post(
+            "/users/u1/sessions", json={"state": {"language": "en"}}, headers=IDENTITY
+        )
+        session_id = created.json()["session_id"]
+        turn = {"user_id": "u1", "session_id": session_id, "new_message": message("hi")}
+        other_customer = await client.post(
+            "/run_sse", json=turn, headers={"X-Customer-Id": "1"}
+        )
+        owner = await client.post("/run_sse", json=turn, headers=IDENTITY)
+
+    assert anonymous.status_code == 401
+    assert spoofed.status_code == 400
+    assert "customer_id" in spoofed.json()["detail"]
+    session = runner.session_service.get_session(
+        app_name="customer_service", user_id="u1", session_id=session_id
+    )
+    assert session.state == {"language": "en", "customer_id": "8027143659734"}
+    assert other_customer.status_code == 404
+    assert owner.status_code == 200
@@ -0,0 +1,208 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sqlite3
+import threading
+
+import pytest
+
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from customer_service.config import SessionStoreSettings
+from customer_service.shared_libraries.session_store import SQLiteSessionService
+
+APP = "customer_service"
+
+
+def event(author, text="", delta=None, call=False):
+    part = (
+        types.Part(function_call=types.FunctionCall(name="lookup_order", args={}))
+        if call
+        else types.Part(text=text)
+    )
+    return Event(
+        author=author,
+        invocation_id="turn",
+        content=types.Content(role="model", parts=[part]),
+        actions=EventActions(state_delta=delta or {}),
+    )
+
+
+def run_turn(service, session, state):
+    service.append_event(session, event("user", "where is my order?"))
+    service.append_event(session, event("order_agent", call=True, delta=state))
+    service.append_event(session, event("order_agent", "It shipped yesterday."))
+
+
+def test_turn_is_written_once_and_survives_restart(tmp_path):
+    settings = SessionStoreSettings(path=str(tmp_path / "sessions.db"))
+    service = SQLiteSessionService(settings)
+    session = service.create_session(
+        app_name=APP, user_id="u1", state={"customer_id": "1", "app:greeting": "Hi"}
+    )
+
+    service.append_event(session, event("user", "where is my order?"))
+    service.append_event(
+        session,
+        event(
+            "order_agent",
+            call=True,
+            delta={"customer_profile": "VIP", "user:tier": "gold", "temp:x": 1},
+        ),
+    )
+    service.wait_for_writes()
+    assert service.writes == 0
+    service.append_event(session, event("order_agent", "It shipped yesterday."))
+    service.wait_for_writes()
+    assert service.writes == 1
+    service.close()
+
+    restarted = SQLiteSessionService(settings)
+    stored = restarted.get_session(app_name=APP, user_id="u1", session_id=session.id)
+    assert [e.author for e in stored.events] == ["user", "order_agent", "order_agent"]
+    assert stored.state == {
+        "customer_id": "1",
+        "customer_profile": "VIP",
+        "app:greeting": "Hi",
+        "user:tier": "gold",
+    }
+    other = restarted.create_session(app_name=APP, user_id="u1")
+    assert other.state == {"app:greeting": "Hi", "user:tier": "gold"}
+    assert [s.id for s in restarted.list_sessions(app_name=APP, user_id="u1").sessions]
+
+
+def test_cached_sessions_are_revalidated_across_workers(tmp_path):
+    settings = SessionStoreSettings(path=str(tmp_path / "sessions.db"))
+    first = SQLiteSessionService(settings)
+    second = SQLiteSessionService(settings)
+    first.create_session(app_name=APP, user_id="u1", session_id="s1")
+
+    def get(service):
+        return service.get_session(app_name=APP, user_id="u1", session_id="s1")
+
+    get(first)
+    assert first.stats()["hits"] == 1
+    run_turn(second, get(second), {"step": "second"})
+    second.wait_for_writes()
+
+    session = get(first)
+    assert first.stale == 1
+    assert len(session.events) == 3
+    assert session.state == {"step": "second"}
+
+    # A turn that started before another worker's turn was written is
+    # applied on top of it rather than overwriting it
+    run_turn(second, get(second), {"step": "again"})
+    second.wait_for_writes()
+    run_turn(first, session, {"other": "first"})
+    first.wait_for_writes()
+    stored = get(SQLiteSessionService(settings))
+    assert stored.state == {"step": "again", "other": "first"}
+    assert len(stored.events) == 9
+    assert len(get(first).events) == 9
+
+
+def test_evicted_sessions_are_written_and_deleted_sessions_gone(tmp_path):
+    service = SQLiteSessionService(
+        SessionStoreSettings(path=str(tmp_path / "sessions.db"), cache_size=1)
+    )
+    first = service.create_session(app_name=APP, user_id="u1", session_id="a")
+    service.append_event(first, event("user", "hello"))
+    service.create_session(app_name=APP, user_id="u1", session_id="b")
+
+    service.wait_for_writes()
+    assert service.writes == 1
+    stored = service.get_session(app_name=APP, user_id="u1", session_id="a")
+    assert [e.content.parts[0].text for e in stored.events] == ["hello"]
+
+    service.delete_session(app_name=APP, user_id="u1", session_id="a")
+    assert service.get_session(app_name=APP, user_id="u1", session_id="a") is None
+    assert service.list_events(app_name=APP, user_id="u1", session_id="a").events == []
+
+
+def test_turns_are_written_off_the_calling_thread(tmp_path, monkeypatch):
+    service = SQLiteSessionService(
+        SessionStoreSettings(path=str(tmp_path / "sessions.db"), cache_size=1)
+    )
+    session = service.create_session(app_name=APP, user_id="u1", session_id="s1")
+    release = threading.Event()
+    write_threads = []
+    apply = service._apply
+
+    def slow_apply(write, db):
+        write_threads.append(threading.current_thread())
+        release.wait(5)
+        apply(write, db)
+
+    monkeypatch.setattr(service, "_apply", slow_apply)
+    run_turn(service, session, {"step": "one", "user:tier": "gold"})
+
+    # The turn is served from memory while its write is queued, even once
+    # the session was evicted, without waiting for the writer
+    service.create_session(app_name=APP, user_id="u1", session_id="s2")
+    assert service.stats()["pending"] == 1
+    cached = service.get_session(app_name=APP, user_id="u1", session_id="s1")
+    assert len(cached.events) == 3
+    assert cached.state == {"step": "one", "user:tier": "gold"}
+    assert service.stats()["pending"] == 1
+
+    release.set()
+    service.wait_for_writes()
+    assert write_threads[0] is not threading.current_thread()
+    assert service.stats()["pending"] == 0
+    service.close()
+    stored = SQLiteSessionService(service.settings).get_session(
+        app_name=APP, user_id="u1", session_id="s1"
+    )
+    assert stored.state == {"step": "one", "user:tier": "gold"}
+
+
+def test_failed_writes_are_retried_in_order(tmp_path):
+    settings = SessionStoreSettings(
+        path=str(tmp_path / "sessions.db"), busy_timeout_secs=0.05
+    )
+    service = SQLiteSessionService(settings)
+    session = service.create_session(app_name=APP, user_id="u1", session_id="s1")
+
+    # Another connection holds the write lock, so the turn's write fails
+    blocker = sqlite3.connect(settings.path, isolation_level=None)
+    blocker.execute("BEGIN EXCLUSIVE")
+    run_turn(service, session, {"step": "one"})
+    service.wait_for_writes()
+    assert service.stats()["failed_writes"] == 1
+    assert service.writes == 0
+
+    session = service.get_session(app_name=APP, user_id="u1", session_id="s1")
+    assert len(session.events) == 3
+    blocker.execute("ROLLBACK")
+
+    # The next turn's write carries the failed turn's events first
+    run_turn(service, session, {"step": "two"})
+    service.wait_for_writes()
+    assert service.writes == 1
+    stored = SQLiteSessionService(settings).get_session(
+        app_name=APP, user_id="u1", session_id="s1"
+    )
+    assert len(stored.events) == 6
+    assert stored.events[2].content.parts[0].text == "It shipped yesterday."
+    assert stored.state == {"step": "two"}
+
+    # Events that still cannot be written are reported when closing
+    blocker.execute("BEGIN EXCLUSIVE")
+    run_turn(service, session, {"step": "three"})
+    with pytest.raises(RuntimeError, match="s1"):
+        service.close()
+    blocker.execute("ROLLBACK")
+    blocker.close()
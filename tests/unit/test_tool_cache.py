@@ -0,0 +1,81 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+from google.adk.tools import BaseTool
+
+from customer_service.shared_libraries.tool_cache import (
+    CachedTool,
+    ToolResultCache,
+    cache_key,
+)
+
+
+class CountingTool(BaseTool):
+    def __init__(self):
+        super().__init__(name="findProducts", description="Find products")
+        self.calls = 0
+
+    async def run_async(self, *, args, tool_context):
+        self.calls += 1
+        return {"products": [args.get("query")]}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_key_normalizes_arguments():
+    assert cache_key("findProducts", {"query": " body  suit ", "first": 10}) == (
+        cache_key("findProducts", {"first": 10, "query": "body suit", "after": None})
+    )
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = ToolResultCache(max_bytes=1024, clock=clock)
+    cache.set("k", "v", ttl_secs=10, size=1)
+    assert cache.get("k") == "v"
+    clock.now = 11
+    assert cache.get("k") is None
+
+
+def test_lru_evicts_by_size():
+    cache = ToolResultCache(max_bytes=10)
+    cache.set("a", "a", ttl_secs=60, size=4)
+    cache.set("b", "b", ttl_secs=60, size=4)
+    cache.get("a")
+    cache.set("c", "c", ttl_secs=60, size=4)
+    assert cache.get("b") is None
+    assert cache.get("a") == "a"
+    assert cache.stats()["bytes"] == 8
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cached_tool_reads_through():
+    tool = CountingTool()
+    cached = CachedTool(tool, ToolResultCache(max_bytes=1024), ttl_secs=60)
+
+    first = await cached.run_async(args={"query": "bodysuit"}, tool_context=None)
+    second = await cached.run_async(args={"query": "bodysuit "}, tool_context=None)
+
+    assert first == second
+    assert tool.calls == 1
+    assert cached.cache.stats()["tool_hits"] == {"findProducts": 1}
+    assert cached.cache.stats()["tool_misses"] == {"findProducts": 1}
@@ -0,0 +1,85 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+from google.adk.tools import BaseTool
+from google.genai import types
+from mcp.types import CallToolResult, TextContent
+
+from customer_service.shared_libraries.tool_cassette import ToolCassette
+
+
+class FindOrders(BaseTool):
+    def __init__(self):
+        super().__init__(name="findOrders", description="Find orders")
+        self.calls = 0
+
+    def _get_declaration(self):
+        return types.FunctionDeclaration(
+            name=self.name,
+            description=self.description,
+            parameters=types.Schema(
+                type=types.Type.OBJECT,
+                properties={"query": types.Schema(type=types.Type.STRING)},
+            ),
+        )
+
+    async def run_async(self, *, args, tool_context):
+        self.calls += 1
+        text = f'{{"call": {self.calls}}}'
+        return CallToolResult(content=[TextContent(type="text", text=text)])
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", ["cassette.json", "cassette.json.gz"])
+async def test_replays_recorded_calls_offline(tmp_path, name):
+    path = str(tmp_path / name)
+    recorder = ToolCassette(path)
+    live = FindOrders()
+    (recording,) = recorder.recording_tools([live])
+    for _ in range(2):
+        await recording.run_async(
+            args={"query": "customer_id:1", "first": 10}, tool_context=None
+        )
+    recorder.save()
+
+    cassette = ToolCassette.load(path)
+    (replay,) = cassette.replay_tools()
+    assert replay._get_declaration() == live._get_declaration()
+
+    # Argument order, whitespace and 10 versus 10.0 do not matter
+    args = {"first": 10.0, "query": " customer_id:1 "}
+    texts = [
+        (await replay.run_async(args=args, tool_context=None)).content[0].text
+        for _ in range(3)
+    ]
+    assert texts == ['{"call": 1}', '{"call": 2}', '{"call": 2}']
+    assert live.calls == 2
+    assert cassette.stats()["responses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_unrecorded_call_is_a_tool_error(tmp_path):
+    recorder = ToolCassette(str(tmp_path / "cassette.json"))
+    recorder.recording_tools([FindOrders()])
+    recorder.save()
+    cassette = ToolCassette.load(recorder.path)
+    (replay,) = cassette.replay_tools()
+
+    result = await replay.run_async(
+        args={"query": "customer_id:2"}, tool_context=None
+    )
+
+    assert result.isError
+    assert cassette.stats()["misses"] == 1
@@ -20,12 +20,18 @@ from customer_service.tools.tools import (
     modify_cart,
     get_product_recommendations,
     check_product_availability,
+    search_catalog,
     schedule_planting_service,
     get_available_planting_times,
     send_care_instructions,
     generate_qr_code,
 )
+from customer_service.config import CartSettings
+from customer_service.shared_libraries.cart import CartEngine
+from customer_service.shared_libraries.catalog_index import catalog_index
+from customer_service.tools import tools
 from datetime import datetime, timedelta
+from types import SimpleNamespace
 import logging
 
 # Configure logging for the test file
@@ -59,37 +65,49 @@ def test_update_salesforce_crm():
     }
 
 
-def test_access_cart_information():
-    customer_id = "123"
-    result = access_cart_information(customer_id)
+def use_memory_carts(monkeypatch):
+    engine = CartEngine(CartSettings(path=None))
+    monkeypatch.setattr(tools, "cart_engine", engine)
+    return engine
+
+
+def customer_context(customer_id):
+    return SimpleNamespace(state={"customer_id": customer_id}, invocation_id="turn")
+
+
+def test_access_cart_information(monkeypatch):
+    use_memory_carts(monkeypatch)
+    result = access_cart_information(customer_context("123"))
     assert result == {
-        "items": [
-            {
-                "product_id": "soil-123",
-                "name": "Standard Potting Soil",
-                "quantity": 1,
-            },
-            {
-                "product_id": "fert-456",
-                "name": "General Purpose Fertilizer",
-                "quantity": 1,
-            },
-        ],
-        "subtotal": 25.98,
+        "customer_id": "123",
+        "version": 0,
+        "items": [],
+        "item_count": 0,
+        "subtotal": 0,
+        "draft_order_id": None,
     }
 
 
-def test_modify_cart_add_and_remove():
-    customer_id = "123"
-    items_to_add = [{"product_id": "tree-789", "quantity": 1}]
+def test_modify_cart_add_and_remove(monkeypatch):
+    use_memory_carts(monkeypatch)
+    context = customer_context("123")
+    modify_cart(
+        [{"product_id": "soil-123", "name": "Potting Soil", "quantity": 1}],
+        [],
+        context,
+    )
+    items_to_add = [{"product_id": "tree-789", "quantity": 1, "price": 49.5}]
     items_to_remove = [{"product_id": "soil-123"}]
-    result = modify_cart(customer_id, items_to_add, items_to_remove)
-    assert result == {
-        "status": "success",
-        "message": "Cart updated successfully.",
-        "items_added": True,
-        "items_removed": True,
-    }
+    result = modify_cart(items_to_add, items_to_remove, context, expected_version=1)
+    assert result["status"] == "success"
+    assert result["items_added"] is True
+    assert result["items_removed"] is True
+    assert result["cart"]["items"] == [
+        {"product_id": "tree-789", "name": "tree-789", "quantity": 1, "price": 49.5}
+    ]
+    assert access_cart_information(context)["subtotal"] == 49.5
+    # Other customers' carts are out of reach
+    assert access_cart_information(customer_context("456"))["items"] == []
 
 
 def test_get_product_recommendations_petunias():
@@ -139,6 +157,23 @@ def test_check_product_availability():
     assert result == {"available": True, "quantity": 10, "store": store_id}
 
 
+def test_search_catalog_unavailable_before_sync():
+    catalog_index.replace_all([])
+    result = search_catalog("bodysuit")
+    assert result["status"] == "unavailable"
+    assert result["product_ids"] == []
+
+
+def test_search_catalog():
+    catalog_index.replace_all(
+        [{"id": "gid://shopify/Product/1", "title": "ShapeShifter Bodysuit"}]
+    )
+    result = search_catalog("bodysuit", limit=5)
+    catalog_index.replace_all([])
+    assert result["status"] == "success"
+    assert result["product_ids"] == ["gid://shopify/Product/1"]
+
+
 def test_schedule_planting_service():
     customer_id = "123"
     date = "2024-07-29"